@@ -52,6 +52,10 @@
   before-all:
     description: Execute a shell command on the build system before any wheels are built.
     type: string_array
+  before-all-snapshot:
+    default: false
+    description: Save the Linux container after before-all as a local image, and reuse it in later builds.
+    type: boolean
   before-build:
     description: Execute a shell command preparing each wheel's build.
     type: string_array
@@ -63,15 +67,33 @@
     description: Choose the Python versions to build.
     type: string_array
   build-frontend: {}  # filled in by build_frontend_schema below
+  build-jobs:
+    default: 1
+    description: Number of Linux build steps (containers) to run at the same time.
+    oneOf:
+      - type: integer
+        minimum: 1
+      - enum: [auto]
   build-verbosity:
     type: integer
     minimum: -3
     maximum: 3
     default: 0
     description: Increase/decrease the output of pip wheel.
+  cache-size-limit:
+    default: ""
+    description: The most disk space the cache can use, like "10G". The least recently used entries are removed at the start of a run to stay under it.
+    type: string
   config-settings:
     description: Specify config-settings for the build backend.
     type: string_table_array
+  container-build-jobs:
+    default: 1
+    description: Number of builds to run at the same time inside each Linux container.
+    oneOf:
+      - type: integer
+        minimum: 1
+      - enum: [auto]
   container-engine:
     oneOf:
       - enum: [docker, podman]
@@ -91,6 +113,18 @@
               type: string
           disable-host-mount:
             type: boolean
+  container-package-cache:
+    default: false
+    description: Keep the pip and uv caches of Linux containers in the cibuildwheel cache, and share them between builds.
+    type: boolean
+  container-project-files:
+    default: all
+    description: Which project files are copied into Linux containers - all of them, or those git tracks or doesn't ignore. A .cibwignore file excludes more.
+    enum: [all, vcs]
+  container-project-source:
+    default: copy
+    description: How the project gets into each Linux container - copied from the host, or from a volume or read-only bind mount.
+    enum: [copy, volume, bind]
   dependency-versions:
     default: pinned
     description: Specify how cibuildwheel controls the versions of the tools it uses
@@ -126,6 +160,10 @@
     description: Set environment variables on the host to pass-through to the container
       during the build.
     type: string_array
+  index-proxy:
+    default: false
+    description: Serve a local caching package index for the length of the run, and point pip and uv at it.
+    type: boolean
   manylinux-aarch64-image:
     type: string
     description: Specify alternative manylinux / musllinux container images
@@ -230,6 +268,14 @@
             type: array
             items:
               type: string
+  shared-cache:
+    default: ""
+    description: A directory or http(s) URL where wheels and downloaded tools are shared between machines.
+    type: string
+  wheel-cache:
+    default: false
+    description: Reuse wheels from earlier runs when nothing that goes into building them has changed.
+    type: boolean
 
 """
 
@@ -365,6 +411,16 @@ def build_frontend_schema(
 del non_global_options["skip"]
 del non_global_options["test-skip"]
 del non_global_options["enable"]
+del non_global_options["build-jobs"]
+del non_global_options["container-build-jobs"]
+del non_global_options["before-all-snapshot"]
+del non_global_options["container-project-source"]
+del non_global_options["container-project-files"]
+del non_global_options["container-package-cache"]
+del non_global_options["wheel-cache"]
+del non_global_options["shared-cache"]
+del non_global_options["index-proxy"]
+del non_global_options["cache-size-limit"]
 
 overrides["items"]["properties"]["select"]["oneOf"] = string_array
 overrides["items"]["properties"] |= non_global_options.copy()
@@ -5,21 +5,35 @@
     "cibuildwheel._compat",
     "cibuildwheel._compat.tarfile",
     "cibuildwheel.architecture",
+    "cibuildwheel.bundle",
     "cibuildwheel.ci",
     "cibuildwheel.logger",
+    "cibuildwheel.oci_container",
     "cibuildwheel.options",
     "cibuildwheel.platforms",
+    "cibuildwheel.report",
     "cibuildwheel.selector",
+    "cibuildwheel.sharding",
     "cibuildwheel.typing",
     "cibuildwheel.util",
+    "cibuildwheel.util.cache_index",
     "cibuildwheel.util.file",
     "cibuildwheel.util.helpers",
+    "cibuildwheel.util.index_proxy",
+    "cibuildwheel.util.prefetch",
+    "cibuildwheel.util.resource_usage",
     "cibuildwheel.util.resources",
+    "cibuildwheel.util.shared_cache",
+    "cibuildwheel.util.timing_history",
+    "cibuildwheel.util.trace",
     "contextlib",
     "functools",
+    "humanize",
     "io",
+    "json",
     "pathlib",
     "shutil",
+    "subprocess",
     "tempfile",
     "textwrap",
     "traceback",
@@ -30,8 +44,10 @@
 import dataclasses
 import functools
 import io
+import json
 import os
 import shutil
+import subprocess
 import sys
 import textwrap
 import traceback
@@ -39,25 +55,62 @@
 from pathlib import Path
 from tempfile import mkdtemp
 
+import humanize
+
 import cibuildwheel
 from cibuildwheel import errors
 from cibuildwheel._compat.tarfile import TarFile, safe_extractall
 from cibuildwheel.architecture import Architecture, allowed_architectures_check
+from cibuildwheel.bundle import export_bundle, import_bundle
 from cibuildwheel.ci import CIProvider, detect_ci_provider, fix_ansi_codes_for_github_actions
 from cibuildwheel.logger import log
+from cibuildwheel.oci_container import OCIContainerEngineConfig, prune_snapshots
 from cibuildwheel.options import CommandLineArguments, Options, compute_options
-from cibuildwheel.platforms import ALL_PLATFORM_MODULES, get_build_identifiers, native_platform
+from cibuildwheel.platforms import (
+    ALL_PLATFORM_MODULES,
+    get_build_identifiers,
+    linux,
+    native_platform,
+)
+from cibuildwheel.report import RunReport, compare_reports, use_report_file
 from cibuildwheel.selector import BuildSelector, EnableGroup, selector_matches
+from cibuildwheel.sharding import (
+    build_matrix,
+    container_groups,
+    estimate_costs,
+    plan_shards,
+    shard,
+)
 from cibuildwheel.typing import PLATFORMS, PlatformName
-from cibuildwheel.util.file import CIBW_CACHE_PATH, ensure_cache_sentinel
+from cibuildwheel.util.cache_index import (
+    cache_entries,
+    format_entries,
+    parse_size,
+    prune_cache,
+    use_cache_index,
+)
+from cibuildwheel.util.file import (
+    BUNDLE_WHEELHOUSE_NAME,
+    CIBW_CACHE_PATH,
+    ensure_cache_sentinel,
+    set_full_cache_verification,
+)
 from cibuildwheel.util.helpers import strtobool
+from cibuildwheel.util.index_proxy import upstream_index, use_index_proxy
+from cibuildwheel.util.prefetch import fetch_assets, prefetch_assets, unique_assets
+from cibuildwheel.util.resource_usage import use_usage_sampling
 from cibuildwheel.util.resources import read_all_configs
+from cibuildwheel.util.shared_cache import use_shared_cache
+from cibuildwheel.util.timing_history import earlier_durations, use_timing_history
+from cibuildwheel.util.trace import use_trace_file
 
 TYPE_CHECKING = False
 if TYPE_CHECKING:
-    from collections.abc import Generator, Iterable, Sequence
+    from collections.abc import Callable, Generator, Iterable, Sequence
     from typing import Literal
 
+    from cibuildwheel.util.prefetch import ToolchainAsset
+
 
 @dataclasses.dataclass
 class GlobalOptions:
@@ -87,6 +140,20 @@ def main() -> None:
         sys.exit(e.return_code)
 
 
+SUBCOMMANDS = frozenset({"bundle", "cache", "fetch", "report"})
+
+
+def get_subcommand(argv: Sequence[str]) -> str | None:
+    """
+    The subcommand that `argv` runs, or None for a build. A directory with a
+    subcommand's name is a package to build, as it was before the subcommand
+    existed.
+    """
+    if argv and argv[0] in SUBCOMMANDS and not Path(argv[0]).is_dir():
+        return argv[0]
+    return None
+
+
 def main_inner(global_options: GlobalOptions) -> None:
     """
     `main_inner` is the same as `main`, but it raises FatalError exceptions
@@ -98,12 +165,50 @@ def main_inner(global_options: GlobalOptions) -> None:
     else:
         arg_parser = argparse.ArgumentParser
 
+    subcommand = get_subcommand(sys.argv[1:])
+
+    if subcommand == "cache":
+        sys.exit(cache_command(arg_parser, sys.argv[2:]))
+
+    if subcommand == "report":
+        sys.exit(report_command(arg_parser, sys.argv[2:]))
+
+    # `cibuildwheel fetch` and `cibuildwheel bundle export` take the same
+    # options as a build, but only download what the builds would need
+    fetch = subcommand == "fetch"
+    bundle_export = subcommand == "bundle" and sys.argv[2:3] == ["export"]
+
+    if subcommand == "bundle" and not bundle_export:
+        sys.exit(bundle_command(arg_parser, sys.argv[2:]))
+
+    if fetch:
+        prog = "cibuildwheel fetch"
+        description = (
+            "Download the tools that the selected builds need into the cache, without building."
+        )
+    elif bundle_export:
+        prog = "cibuildwheel bundle export"
+        description = """
+            Write the tools, container images and pinned build dependencies
+            that the selected builds need to an archive, for `cibuildwheel
+            bundle import` on a machine without network access.
+        """
+    else:
+        prog = None
+        description = "Build wheels for all the platforms."
+
     parser = arg_parser(
-        description="Build wheels for all the platforms.",
+        prog=prog,
+        description=description,
         epilog="""
             Most options are supplied via environment variables or in
             --config-file (pyproject.toml usually). See
-            https://github.com/pypa/cibuildwheel#options for info.
+            https://github.com/pypa/cibuildwheel#options for info. Run
+            `cibuildwheel cache --help` to inspect or prune the cache, and
+            `cibuildwheel fetch` with the same options as a build to download
+            what the build needs without building. `cibuildwheel bundle
+            export` and `cibuildwheel bundle import` carry that to machines
+            without network access.
         """,
         allow_abbrev=False,
     )
@@ -175,6 +280,19 @@ def main_inner(global_options: GlobalOptions) -> None:
         """,
     )
 
+    if bundle_export:
+        parser.add_argument(
+            "bundle_export",
+            metavar="BUNDLE",
+            type=Path,
+            help="""
+                The archive to write. It's compressed if the name ends with
+                .tar.gz or .tgz.
+            """,
+        )
+    else:
+        parser.set_defaults(bundle_export=None)
+
     parser.add_argument(
         "package_dir",
         metavar="PACKAGE",
@@ -192,18 +310,112 @@ def main_inner(global_options: GlobalOptions) -> None:
         """,
     )
 
+    parser.add_argument(
+        "--jobs",
+        default=None,
+        metavar="N",
+        help="""
+            Number of Linux build steps (containers) to run at the same time,
+            or 'auto' for one per CPU. Overrides the build-jobs option.
+            Default: 1.
+        """,
+    )
+
+    parser.add_argument(
+        "--trace-file",
+        type=Path,
+        default=os.environ.get("CIBW_TRACE_FILE") or None,
+        help="""
+            Record a timeline of the run - every build, step and command,
+            with their arguments and exit codes - to this file, as a Chrome
+            trace. Open it in https://ui.perfetto.dev or chrome://tracing.
+        """,
+    )
+
+    parser.add_argument(
+        "--report-file",
+        type=Path,
+        default=os.environ.get("CIBW_REPORT_FILE") or None,
+        help="""
+            Write a JSON report of the run to this file - the time each build
+            and step took, the wheels' sizes and hashes, cache hits and
+            misses, and container start and copy times. Compare two reports
+            with `cibuildwheel report compare`.
+        """,
+    )
+
+    parser.add_argument(
+        "--container-usage-interval",
+        type=float,
+        metavar="SECONDS",
+        default=os.environ.get("CIBW_CONTAINER_USAGE_INTERVAL") or None,
+        help="""
+            Sample the CPU, memory, I/O and process count of each Linux build
+            container this often, and show the average and peak of each
+            build and step in the log, the summary and the report.
+        """,
+    )
+
     parser.add_argument(
         "--print-build-identifiers",
         action="store_true",
         help="Print the build identifiers matched by the current invocation and exit.",
     )
 
+    parser.add_argument(
+        "--print-build-matrix",
+        action="store_true",
+        help="""
+            Split the build identifiers matched by the current invocation into
+            --shards groups of about the same cost, print them as a JSON CI
+            matrix and exit.
+        """,
+    )
+
+    parser.add_argument(
+        "--shards",
+        type=int,
+        metavar="N",
+        help="The number of groups for --print-build-matrix.",
+    )
+
+    parser.add_argument(
+        "--shard",
+        type=shard,
+        metavar="INDEX/COUNT",
+        default=os.environ.get("CIBW_SHARD") or None,
+        help="""
+            Only build this machine's share of the matched builds, e.g. 2/4 for
+            the second of four. The builds are split by their estimated cost,
+            the same way on every machine.
+        """,
+    )
+
     parser.add_argument(
         "--clean-cache",
         action="store_true",
         help="Clear the cibuildwheel cache and exit.",
     )
 
+    parser.add_argument(
+        "--verify-cache",
+        action="store_true",
+        help="""
+            Hash the cached downloads every time they're used, rather than
+            only when their size, modification time or inode have changed
+            since they were last verified.
+        """,
+    )
+
+    parser.add_argument(
+        "--prune-snapshots",
+        action="store_true",
+        help="""
+            Remove the container images saved by the before-all-snapshot
+            option, from Docker and Podman, and exit.
+        """,
+    )
+
     parser.add_argument(
         "--allow-empty",
         action="store_true",
@@ -217,9 +429,17 @@ def main_inner(global_options: GlobalOptions) -> None:
         help="Print a full traceback for all errors",
     )
 
-    args = CommandLineArguments(**vars(parser.parse_args()))
+    parser.set_defaults(fetch=fetch)
+    if fetch:
+        argv = sys.argv[2:]
+    elif bundle_export:
+        argv = sys.argv[3:]
+    else:
+        argv = None
+    args = CommandLineArguments(**vars(parser.parse_args(argv)))
 
     global_options.print_traceback_on_error = args.debug_traceback
+    set_full_cache_verification(args.verify_cache)
 
     if args.clean_cache:
         if not CIBW_CACHE_PATH.exists():
@@ -263,6 +483,9 @@ def main_inner(global_options: GlobalOptions) -> None:
 
         sys.exit(0)
 
+    if args.prune_snapshots:
+        sys.exit(prune_container_snapshots())
+
     args.package_dir = args.package_dir.resolve()
 
     # This are always relative to the base directory, even in SDist builds
@@ -299,6 +522,247 @@ def main_inner(global_options: GlobalOptions) -> None:
             log.warning(f"Can't delete temporary folder '{temp_dir}'")
 
 
+def prune_container_snapshots() -> int:
+    """
+    Removes the before-all snapshot images from each container engine that
+    is installed. Returns the exit code.
+    """
+    engine_names: list[typing.Literal["docker", "podman"]] = [
+        name for name in ("docker", "podman") if shutil.which(name)
+    ]
+    if not engine_names:
+        print("Error: neither docker nor podman was found.", file=sys.stderr)
+        return 1
+
+    exit_code = 0
+    for engine_name in engine_names:
+        try:
+            tags = prune_snapshots(OCIContainerEngineConfig(engine_name))
+        except subprocess.CalledProcessError as e:
+            print(f"Error pruning {engine_name} snapshots: {e}", file=sys.stderr)
+            exit_code = 1
+            continue
+        print(f"Removed {len(tags)} snapshot image(s) from {engine_name}.")
+
+    return exit_code
+
+
+def cache_command(arg_parser: Callable[..., argparse.ArgumentParser], argv: Sequence[str]) -> int:
+    """
+    Runs `cibuildwheel cache stats|prune`. Returns the exit code.
+    """
+    parser = arg_parser(
+        prog="cibuildwheel cache",
+        description=f"Inspect or prune the cibuildwheel cache, at {CIBW_CACHE_PATH}.",
+        allow_abbrev=False,
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser(
+        "stats",
+        help="List the entries in the cache, least recently used first, with their sizes and hit counts.",
+    )
+    prune_parser = subparsers.add_parser(
+        "prune",
+        help="Remove the least recently used entries until the cache fits in a size.",
+    )
+    prune_parser.add_argument(
+        "--max-size",
+        default=os.environ.get("CIBW_CACHE_SIZE_LIMIT") or None,
+        help="""
+            The size to prune the cache to, like "10G". Default: the
+            CIBW_CACHE_SIZE_LIMIT environment variable.
+        """,
+    )
+    prune_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="List the entries that would be removed, without removing them.",
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "stats":
+        entries = cache_entries(CIBW_CACHE_PATH)
+        if not entries:
+            print(f"The cache at {CIBW_CACHE_PATH} is empty.")
+            return 0
+        print(format_entries(entries))
+        total = sum(e.size for e in entries)
+        print(f"\n{len(entries)} entries, {humanize.naturalsize(total)} in {CIBW_CACHE_PATH}")
+        return 0
+
+    if args.max_size is None:
+        parser.error("prune needs --max-size, or CIBW_CACHE_SIZE_LIMIT to be set")
+    try:
+        max_size = parse_size(args.max_size)
+    except ValueError as e:
+        parser.error(str(e))
+
+    removed = prune_cache(CIBW_CACHE_PATH, max_size=max_size, dry_run=args.dry_run)
+    if removed:
+        print(format_entries(removed))
+    freed = humanize.naturalsize(sum(e.size for e in removed))
+    verb = "Would remove" if args.dry_run else "Removed"
+    print(f"{verb} {len(removed)} entries, freeing {freed}.")
+    return 0
+
+
+def bundle_command(arg_parser: Callable[..., argparse.ArgumentParser], argv: Sequence[str]) -> int:
+    """
+    Runs `cibuildwheel bundle import`. Returns the exit code. `cibuildwheel
+    bundle export` takes the options of a build, so it's parsed with them.
+    """
+    parser = arg_parser(
+        prog="cibuildwheel bundle",
+        description="""
+            Carry what builds download to machines without network access.
+            Export a bundle with the same options as the build, then import it
+            on the build machine.
+        """,
+        allow_abbrev=False,
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser(
+        "export",
+        help="""
+            Write what the selected builds need to an archive. Takes the same
+            options as a build, see `cibuildwheel bundle export --help`.
+        """,
+    )
+    import_parser = subparsers.add_parser(
+        "import",
+        help="Unpack a bundle into the cache, and load its container images.",
+    )
+    import_parser.add_argument("bundle", metavar="BUNDLE", type=Path, help="The archive to import.")
+    import_parser.add_argument(
+        "--no-images",
+        action="store_true",
+        help="Don't load the container images into Docker or Podman.",
+    )
+    args = parser.parse_args(argv)
+
+    print(f"Importing {args.bundle} into {CIBW_CACHE_PATH}:")
+    manifest = import_bundle(
+        args.bundle, cache_path=CIBW_CACHE_PATH, load_images=not args.no_images
+    )
+    if manifest.platform == "linux":
+        # the builds run in containers, which have the wheelhouse mounted
+        wheelhouse = str(linux.CONTAINER_BUNDLE_WHEELHOUSE_PATH)
+        where = "in the build environment, e.g. with CIBW_ENVIRONMENT_LINUX"
+    else:
+        wheelhouse = str(CIBW_CACHE_PATH / BUNDLE_WHEELHOUSE_NAME)
+        where = "when running cibuildwheel"
+    print(
+        textwrap.dedent(
+            f"""
+            Imported the bundle for {len(manifest.identifiers)} {manifest.platform} builds.
+            To install the pinned build tools from it rather than from an index, set
+            PIP_FIND_LINKS={wheelhouse} and PIP_NO_INDEX=1 {where}.
+            """
+        )
+    )
+    return 0
+
+
+def report_command(arg_parser: Callable[..., argparse.ArgumentParser], argv: Sequence[str]) -> int:
+    """
+    Runs `cibuildwheel report compare`. Returns the exit code - 1 if anything
+    got slower or larger than the thresholds allow, so that CI can fail.
+    """
+    parser = arg_parser(
+        prog="cibuildwheel report",
+        description="Work with the reports written by --report-file.",
+        allow_abbrev=False,
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    compare_parser = subparsers.add_parser(
+        "compare",
+        help="List the builds, steps and wheels that got slower or larger between two reports.",
+    )
+    compare_parser.add_argument("old", metavar="OLD", type=Path, help="The baseline report.")
+    compare_parser.add_argument("new", metavar="NEW", type=Path, help="The report to check.")
+    compare_parser.add_argument(
+        "--time-threshold",
+        type=float,
+        default=10.0,
+        help="The percentage a build or step can get slower by. Default: 10.",
+    )
+    compare_parser.add_argument(
+        "--size-threshold",
+        type=float,
+        default=5.0,
+        help="The percentage a wheel can get larger by. Default: 5.",
+    )
+    compare_parser.add_argument(
+        "--min-duration",
+        type=float,
+        default=1.0,
+        help="""
+            Ignore changes in builds and steps that took less than this many
+            seconds in both reports - they're mostly noise. Default: 1.
+        """,
+    )
+    args = parser.parse_args(argv)
+
+    reports = []
+    for path in (args.old, args.new):
+        try:
+            reports.append(RunReport.from_json(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            msg = f"Can't read the report {path}: {e}"
+            raise errors.FatalError(msg) from e
+    old, new = reports
+
+    regressions = compare_reports(
+        old,
+        new,
+        time_threshold=args.time_threshold / 100,
+        size_threshold=args.size_threshold / 100,
+        min_duration=args.min_duration,
+    )
+    if not regressions:
+        print(f"No regressions between {args.old} and {args.new}.")
+        return 0
+    print(f"{len(regressions)} regression(s) between {args.old} and {args.new}:")
+    for regression in regressions:
+        print(" ", regression)
+    return 1
+
+
+def fetch_toolchain(assets: Sequence[ToolchainAsset]) -> int:
+    """
+    Downloads `assets` into the cache, for `cibuildwheel fetch`. Returns the
+    exit code.
+    """
+    assets = unique_assets(assets)
+    if not assets:
+        print("Nothing to fetch - the selected builds don't download any tools.")
+        return 0
+
+    print(f"Fetching {len(assets)} tools into {CIBW_CACHE_PATH}:")
+    for asset in assets:
+        print(f"  {asset.name}")
+    failures = fetch_assets(assets)
+    for name, error in failures.items():
+        print(f"Error fetching {name}: {error}", file=sys.stderr)
+    if failures:
+        return 1
+    print(f"Fetched {len(assets)} tools.")
+    return 0
+
+
+def prune_cache_to_limit(max_size: int) -> None:
+    """
+    Removes the least recently used cache entries until the cache fits in
+    `max_size` bytes, before a run adds to it.
+    """
+    removed = prune_cache(CIBW_CACHE_PATH, max_size=max_size)
+    if removed:
+        freed = humanize.naturalsize(sum(e.size for e in removed))
+        print(
+            f"info: Removed {len(removed)} least recently used entries from the cache, freeing {freed}"
+        )
+
+
 def _compute_platform_only(only: str) -> PlatformName:
     if "linux_" in only:
         return "linux"
@@ -361,11 +825,70 @@ def build_in_directory(args: CommandLineArguments) -> None:
         architectures=options.globals.architectures,
     )
 
+    if args.print_build_matrix:
+        if args.shards is None or args.shards < 1:
+            msg = (
+                "--print-build-matrix needs --shards, the number of groups to split the builds into"
+            )
+            raise errors.ConfigurationError(msg)
+        # timings from earlier runs make the groups more even, but they're
+        # only on this machine, so --shard can't use them
+        costs = estimate_costs(
+            identifiers,
+            platform=platform,
+            durations=earlier_durations(options, identifiers, cache_path=CIBW_CACHE_PATH),
+        )
+        shards = plan_shards(
+            container_groups(options, platform=platform, identifiers=identifiers),
+            costs,
+            count=args.shards,
+        )
+        print(json.dumps(build_matrix(shards, platform=platform), indent=2))
+        sys.exit(0)
+    if args.shards is not None:
+        msg = "--shards can only be used with --print-build-matrix"
+        raise errors.ConfigurationError(msg)
+
+    selected_count = len(identifiers)
+    if args.shard is not None:
+        index, count = args.shard
+        shards = plan_shards(
+            container_groups(options, platform=platform, identifiers=identifiers),
+            # every machine must compute the same plan, whatever its architecture
+            estimate_costs(identifiers, platform=platform, portable=True),
+            count=count,
+        )
+        identifiers = shards[index - 1].identifiers
+        options.select_shard(identifiers)
+
     if args.print_build_identifiers:
         for identifier in identifiers:
             print(identifier)
         sys.exit(0)
 
+    if args.fetch:
+        CIBW_CACHE_PATH.mkdir(parents=True, exist_ok=True)
+        ensure_cache_sentinel(CIBW_CACHE_PATH)
+        sys.exit(fetch_toolchain(platform_module.toolchain_assets(options, identifiers)))
+
+    if args.bundle_export is not None:
+        CIBW_CACHE_PATH.mkdir(parents=True, exist_ok=True)
+        ensure_cache_sentinel(CIBW_CACHE_PATH)
+        print(f"Exporting a bundle for {len(identifiers)} builds to {args.bundle_export}...")
+        manifest = export_bundle(
+            args.bundle_export,
+            platform=platform,
+            options=options,
+            identifiers=identifiers,
+            cache_path=CIBW_CACHE_PATH,
+        )
+        size = humanize.naturalsize(args.bundle_export.stat().st_size)
+        print(
+            f"Wrote {len(manifest.cache_entries)} cache entries, {len(manifest.images)} images "
+            f"and {len(manifest.files)} files ({size}) to {args.bundle_export}."
+        )
+        sys.exit(0)
+
     # Add CIBUILDWHEEL environment variable
     os.environ["CIBUILDWHEEL"] = "1"
 
@@ -387,20 +910,47 @@ def build_in_directory(args: CommandLineArguments) -> None:
     except ValueError as err:
         raise errors.DeprecationError(*err.args) from err
 
-    if not identifiers:
+    if not identifiers and selected_count and args.shard is not None:
+        index, count = args.shard
+        print(
+            f"cibuildwheel: Shard {index}/{count} has no builds, "
+            f"there are only {selected_count} to go round",
+            file=sys.stderr,
+        )
+    elif not identifiers:
         message = f"No build identifiers selected: {options.globals.build_selector}"
         if options.globals.allow_empty:
             print(f"cibuildwheel: {message}", file=sys.stderr)
         else:
             raise errors.NothingToDoError(message)
 
+    if options.globals.cache_size_limit is not None:
+        prune_cache_to_limit(options.globals.cache_size_limit)
+
     output_dir = options.globals.output_dir
 
     output_dir.mkdir(parents=True, exist_ok=True)
 
     tmp_path = Path(mkdtemp(prefix="cibw-run-")).resolve(strict=True)
     try:
-        with log.print_summary(options=options):
+        with (
+            use_trace_file(args.trace_file),
+            use_report_file(args.report_file, platform=platform),
+            use_usage_sampling(args.container_usage_interval),
+            use_timing_history(options, identifiers, cache_path=CIBW_CACHE_PATH),
+            use_cache_index(),
+            log.print_summary(options=options),
+            use_shared_cache(
+                options.globals.shared_cache, staging_dir=tmp_path / "shared-cache-uploads"
+            ),
+            use_index_proxy(
+                options.globals.index_proxy,
+                cache_dir=CIBW_CACHE_PATH / "index-proxy",
+                upstream=upstream_index(os.environ),
+                for_containers=platform == "linux",
+            ),
+            prefetch_assets(platform_module.toolchain_assets(options, identifiers)),
+        ):
             platform_module.build(options, tmp_path)
     finally:
         # avoid https://github.com/python/cpython/issues/86962 by performing
@@ -0,0 +1,465 @@
+from __future__ import annotations
+
+__lazy_modules__ = {
+    "cibuildwheel._compat",
+    "cibuildwheel._compat.tarfile",
+    "cibuildwheel.logger",
+    "cibuildwheel.oci_container",
+    "cibuildwheel.platforms",
+    "cibuildwheel.util",
+    "cibuildwheel.util.cache_index",
+    "cibuildwheel.util.file",
+    "cibuildwheel.util.prefetch",
+    "filelock",
+    "hashlib",
+    "json",
+    "re",
+    "shutil",
+    "subprocess",
+    "tempfile",
+    "time",
+}
+
+import dataclasses
+import hashlib
+import json
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from filelock import FileLock
+
+import cibuildwheel
+from cibuildwheel import errors
+from cibuildwheel._compat.tarfile import TarFile, safe_extractall
+from cibuildwheel.logger import log
+from cibuildwheel.oci_container import pull_image
+from cibuildwheel.platforms import ALL_PLATFORM_MODULES, linux, macos
+from cibuildwheel.util.cache_index import cache_entries, entry_name, record_cache_use
+from cibuildwheel.util.file import BUNDLE_WHEELHOUSE_NAME, CIBW_CACHE_PATH, ensure_cache_sentinel
+from cibuildwheel.util.prefetch import fetch_assets
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+    from typing import Self
+
+    from cibuildwheel.options import BuildOptions, Options
+    from cibuildwheel.typing import PlatformName
+
+# the version of the bundle layout, bumped when old bundles can't be imported
+BUNDLE_FORMAT = 1
+MANIFEST_NAME = "manifest.json"
+
+# where each part of the bundle goes in the archive
+CACHE_DIR = "cache"
+IMAGES_DIR = "images"
+WHEELHOUSE_DIR = "wheelhouse"
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class BundleImage:
+    """
+    A container image in a bundle, as written by `docker save` or `podman
+    save`.
+    """
+
+    engine: str
+    image: str
+    platform: str
+    file: str
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class BundleManifest:
+    """
+    What's in a bundle, and the sha256 of each file in it, so that a bundle
+    that was damaged on the way to the build machine isn't imported.
+    """
+
+    cibuildwheel_version: str
+    platform: str
+    identifiers: list[str]
+    cache_entries: list[str]
+    images: list[BundleImage]
+    files: dict[str, str]
+
+    def to_json(self) -> str:
+        return json.dumps({"format": BUNDLE_FORMAT, **dataclasses.asdict(self)}, indent=2)
+
+    @classmethod
+    def from_json(cls, text: str) -> Self:
+        data = json.loads(text)
+        if data.get("format") != BUNDLE_FORMAT:
+            msg = (
+                f"This bundle has format {data.get('format')!r}, but this version of "
+                f"cibuildwheel reads format {BUNDLE_FORMAT}. Export it again with "
+                f"cibuildwheel {cibuildwheel.__version__}."
+            )
+            raise errors.FatalError(msg)
+        return cls(
+            cibuildwheel_version=data["cibuildwheel_version"],
+            platform=data["platform"],
+            identifiers=data["identifiers"],
+            cache_entries=data["cache_entries"],
+            images=[BundleImage(**image) for image in data["images"]],
+            files=data["files"],
+        )
+
+
+class _BundleWriter:
+    """
+    Adds files to the bundle archive, and hashes them on the way.
+    """
+
+    def __init__(self, tar: TarFile) -> None:
+        self.tar = tar
+        self.files: dict[str, str] = {}
+
+    def add(self, path: Path, arcname: str) -> None:
+        if path.is_dir() and not path.is_symlink():
+            self.tar.add(path, arcname, recursive=False)
+            for child in sorted(path.iterdir()):
+                self.add(child, f"{arcname}/{child.name}")
+            return
+        if path.is_file() and not path.is_symlink():
+            with path.open("rb") as f:
+                self.files[arcname] = hashlib.file_digest(f, "sha256").hexdigest()
+        self.tar.add(path, arcname, recursive=False)
+
+
+def _bundle_images(options: Options, identifiers: Sequence[str]) -> list[BundleImage]:
+    python_configurations = [
+        c for c in linux.all_python_configurations() if c.identifier in identifiers
+    ]
+    images: dict[tuple[str, str, str], BundleImage] = {}
+    for step in linux.get_build_steps(options, python_configurations):
+        key = (step.container_engine.name, step.container_image, step.oci_platform.value)
+        if key not in images:
+            images[key] = BundleImage(
+                engine=step.container_engine.name,
+                image=step.container_image,
+                platform=step.oci_platform.value,
+                file=f"{IMAGES_DIR}/{len(images)}.tar",
+            )
+            pull_image(step.container_engine, step.container_image, step.oci_platform)
+    return list(images.values())
+
+
+@dataclasses.dataclass(frozen=True, order=True, kw_only=True)
+class WheelTarget:
+    """
+    The wheels that a build can install, as the tags to download them for.
+    Without `platforms`, they're the tags of this machine - for the builds
+    whose tools run on the host, which must match the build machines.
+    """
+
+    python_version: str
+    implementation: str
+    abis: tuple[str, ...] = ()
+    platforms: tuple[str, ...] = ()
+
+    def pip_args(self) -> list[str]:
+        args = [f"--python-version={self.python_version}"]
+        if self.platforms:
+            args.append(f"--implementation={self.implementation}")
+            args += [f"--abi={abi}" for abi in self.abis]
+            args += [f"--platform={platform}" for platform in self.platforms]
+        return args
+
+    def __str__(self) -> str:
+        if not self.platforms:
+            return f"Python {self.python_version}"
+        return f"Python {self.python_version} on {self.platforms[0]}"
+
+
+def _image_policy(image: str | None, pattern: str, default: int) -> int:
+    # e.g. the 28 of quay.io/pypa/manylinux_2_28_x86_64, with a default for
+    # images that aren't named for their policy
+    match = re.search(pattern, image or "")
+    return int(match.group(1)) if match else default
+
+
+def wheel_target(identifier: str, python_version: str, build_options: BuildOptions) -> WheelTarget:
+    """
+    The wheels that the build of `identifier` installs its build tools from.
+    """
+    python_tag, _, platform_tag = identifier.partition("-")
+    nodot = python_version.replace(".", "")
+    free_threaded = python_tag.endswith("t")
+    implementation = {"cp": "cp", "pp": "pp", "gp": "graalpy"}[python_tag[:2]]
+    abis = {
+        "cp": (f"cp{nodot}t", "none") if free_threaded else (f"cp{nodot}", "abi3", "none"),
+        "pp": (f"pypy{nodot}_pp73", "none"),
+        "graalpy": ("none",),
+    }[implementation]
+
+    os_name, _, arch = platform_tag.partition("_")
+    platforms: list[str] = []
+    if os_name == "manylinux":
+        glibc_minor = _image_policy(
+            (build_options.manylinux_images or {}).get(arch),
+            r"manylinux_2_(\d+)",
+            default=17,
+        )
+        platforms += [f"manylinux_2_{minor}_{arch}" for minor in range(glibc_minor, 4, -1)]
+        legacy = {17: "manylinux2014", 12: "manylinux2010", 5: "manylinux1"}
+        platforms += [f"{name}_{arch}" for minor, name in legacy.items() if glibc_minor >= minor]
+    elif os_name == "musllinux":
+        musl_minor = _image_policy(
+            (build_options.musllinux_images or {}).get(arch), r"musllinux_1_(\d+)", default=2
+        )
+        platforms += [f"musllinux_1_{minor}_{arch}" for minor in range(musl_minor, -1, -1)]
+    elif os_name == "macosx":
+        # pip also accepts older macOS versions, and universal2 wheels
+        archs = ["arm64", "x86_64"] if arch == "universal2" else [arch]
+        platforms += [f"macosx_11_0_{a}" for a in archs]
+    elif os_name in {"win", "win32"}:
+        platforms.append(platform_tag)
+
+    return WheelTarget(
+        python_version=python_version,
+        implementation=implementation,
+        abis=abis if platforms else (),
+        platforms=tuple(platforms),
+    )
+
+
+def _constraint_requirements(
+    platform: PlatformName, options: Options, identifiers: Sequence[str], tmp_dir: Path
+) -> set[tuple[WheelTarget, str]]:
+    """
+    The requirements pinned by the dependency constraints of the builds,
+    with the wheels each needs.
+    """
+    python_configurations = [
+        c
+        for c in ALL_PLATFORM_MODULES[platform].all_python_configurations()
+        if c.identifier in identifiers
+    ]
+    requirements = set()
+    for config in python_configurations:
+        major, minor, *_ = config.version.split(".")
+        build_options = options.build_options(config.identifier)
+        constraints = build_options.dependency_constraints.get_for_python_version(
+            version=config.version,
+            variant="pyodide" if platform == "pyodide" else "python",
+            tmp_dir=tmp_dir,
+        )
+        if constraints is None:
+            continue
+        target = wheel_target(config.identifier, f"{major}.{minor}", build_options)
+        for line in constraints.read_text(encoding="utf-8").splitlines():
+            requirement = line.partition("#")[0].strip()
+            if requirement and not requirement.startswith("-"):
+                requirements.add((target, requirement))
+    return requirements
+
+
+def _download_wheelhouse(requirements: Iterable[tuple[WheelTarget, str]], dest: Path) -> list[str]:
+    """
+    Downloads a wheel for each requirement into `dest`, once for each
+    target that needs it. Returns the ones that couldn't be downloaded.
+    """
+    failures = []
+    for target, requirement in sorted(requirements):
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "pip",
+                "download",
+                "--quiet",
+                "--no-deps",
+                "--only-binary=:all:",
+                "--disable-pip-version-check",
+                *target.pip_args(),
+                f"--dest={dest}",
+                requirement,
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=False,
+        )
+        if result.returncode != 0:
+            failures.append(f"{requirement} for {target}")
+    return failures
+
+
+def export_bundle(
+    bundle_path: Path,
+    *,
+    platform: PlatformName,
+    options: Options,
+    identifiers: Sequence[str],
+    cache_path: Path = CIBW_CACHE_PATH,
+) -> BundleManifest:
+    """
+    Writes everything that the builds of `identifiers` download - the
+    toolchains in the cache, the container images, and wheels of the pinned
+    build tools - to an archive at `bundle_path`, for `bundle import` on a
+    machine without network access.
+    """
+    platform_module = ALL_PLATFORM_MODULES[platform]
+
+    # every cache entry that's fetched, or already there, is marked as used
+    started = time.time()
+    assets = list(platform_module.toolchain_assets(options, identifiers))
+    if platform == "macos":
+        assets += macos.installer_assets(identifiers)
+    failures = fetch_assets(assets)
+    if failures:
+        names = ", ".join(sorted(failures))
+        msg = f"Could not fetch {names} for the bundle: {next(iter(failures.values()))}"
+        raise errors.FatalError(msg)
+    entries = [e for e in cache_entries(cache_path) if e.last_used >= started]
+
+    if platform == "pyodide":
+        # the cross-build environments are only known once pyodide-build is
+        # installed, so the ones that earlier builds put in the cache go in
+        xbuildenvs = [e for e in cache_entries(cache_path) if e.name.startswith("pyodide-build-")]
+        if not xbuildenvs:
+            log.warning(
+                "No Pyodide cross-build environments are in the cache, so they can't be "
+                "bundled. Run the build on this machine once, then export the bundle again."
+            )
+        bundled = {e.name for e in entries}
+        entries += [e for e in xbuildenvs if e.name not in bundled]
+
+    images = _bundle_images(options, identifiers) if platform == "linux" else []
+
+    bundle_path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="cibw-bundle-") as tmp:
+        tmp_dir = Path(tmp)
+        wheelhouse = tmp_dir / WHEELHOUSE_DIR
+        wheelhouse.mkdir()
+        requirements = _constraint_requirements(platform, options, identifiers, tmp_dir)
+        for failure in _download_wheelhouse(requirements, wheelhouse):
+            log.warning(f"No wheel of {failure} could be downloaded for the bundle")
+
+        tmp_bundle = tmp_dir / bundle_path.name
+        tar = (
+            TarFile.open(tmp_bundle, "w:gz")
+            if bundle_path.name.endswith((".tar.gz", ".tgz"))
+            else TarFile.open(tmp_bundle, "w")
+        )
+        with tar:
+            writer = _BundleWriter(tar)
+            for entry in entries:
+                writer.add(entry.path, f"{CACHE_DIR}/{entry.name}")
+            for image in images:
+                image_file = tmp_dir / "image.tar"
+                result = subprocess.run(
+                    [image.engine, "save", "-o", str(image_file), image.image],
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    check=False,
+                )
+                if result.returncode != 0:
+                    msg = f"Could not save the image {image.image}: {result.stderr.strip()}"
+                    raise errors.FatalError(msg)
+                writer.add(image_file, image.file)
+                image_file.unlink()
+            writer.add(wheelhouse, WHEELHOUSE_DIR)
+
+            manifest = BundleManifest(
+                cibuildwheel_version=cibuildwheel.__version__,
+                platform=platform,
+                identifiers=list(identifiers),
+                cache_entries=[e.name for e in entries],
+                images=images,
+                files=writer.files,
+            )
+            manifest_file = tmp_dir / MANIFEST_NAME
+            manifest_file.write_text(manifest.to_json(), encoding="utf-8")
+            tar.add(manifest_file, MANIFEST_NAME)
+
+        shutil.move(tmp_bundle, bundle_path)
+    return manifest
+
+
+def _verify(manifest: BundleManifest, root: Path) -> None:
+    for arcname, sha256 in manifest.files.items():
+        path = root / arcname
+        if not path.is_file():
+            msg = f"The bundle is incomplete, {arcname} is missing"
+            raise errors.FatalError(msg)
+        with path.open("rb") as f:
+            if hashlib.file_digest(f, "sha256").hexdigest() != sha256:
+                msg = f"The bundle is damaged, {arcname} doesn't match its sha256"
+                raise errors.FatalError(msg)
+
+
+def _load_images(images: Sequence[BundleImage], root: Path) -> list[BundleImage]:
+    loaded = []
+    for image in images:
+        if shutil.which(image.engine) is None:
+            log.warning(f"{image.engine} isn't installed, so {image.image} wasn't loaded")
+            continue
+        result = subprocess.run(
+            [image.engine, "load", "-i", str(root / image.file)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+            check=False,
+        )
+        if result.returncode != 0:
+            msg = f"Could not load the image {image.image}: {result.stderr.strip()}"
+            raise errors.FatalError(msg)
+        loaded.append(image)
+    return loaded
+
+
+def import_bundle(
+    bundle_path: Path, *, cache_path: Path = CIBW_CACHE_PATH, load_images: bool = True
+) -> BundleManifest:
+    """
+    Unpacks a bundle written by `export_bundle` into the cache, and loads its
+    container images into Docker or Podman. Entries that are already in the
+    cache are kept.
+    """
+    cache_path.mkdir(parents=True, exist_ok=True)
+    ensure_cache_sentinel(cache_path)
+
+    # unpacked in the cache, so that the entries can be moved into place
+    with tempfile.TemporaryDirectory(dir=cache_path, prefix=".bundle-import-") as tmp:
+        root = Path(tmp)
+        with TarFile.open(bundle_path) as tar:
+            safe_extractall(tar, root)
+        try:
+            manifest = BundleManifest.from_json((root / MANIFEST_NAME).read_text(encoding="utf-8"))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            msg = f"{bundle_path} isn't a cibuildwheel bundle: {e}"
+            raise errors.FatalError(msg) from e
+        _verify(manifest, root)
+
+        for name in manifest.cache_entries:
+            dest = cache_path / name
+            if entry_name(dest, cache_path) != name:
+                msg = f"The bundle has an invalid cache entry {name!r}"
+                raise errors.FatalError(msg)
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            with FileLock(f"{dest}.lock"):
+                exists = dest.exists()
+                if exists:
+                    print(f"  {name} (already in the cache)")
+                else:
+                    (root / CACHE_DIR / name).replace(dest)
+                    print(f"  {name}")
+            record_cache_use(dest, hit=exists, cache_path=cache_path)
+
+        wheelhouse = cache_path / BUNDLE_WHEELHOUSE_NAME
+        wheelhouse.mkdir(exist_ok=True)
+        for wheel in sorted((root / WHEELHOUSE_DIR).glob("*.whl")):
+            wheel.replace(wheelhouse / wheel.name)
+        record_cache_use(wheelhouse, cache_path=cache_path)
+
+        if load_images:
+            for image in _load_images(manifest.images, root):
+                print(f"  {image.image} ({image.platform}), loaded into {image.engine}")
+
+    return manifest
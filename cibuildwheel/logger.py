@@ -2,6 +2,10 @@
 
 __lazy_modules__ = {
     "cibuildwheel.ci",
+    "cibuildwheel.report",
+    "cibuildwheel.util",
+    "cibuildwheel.util.timing_history",
+    "cibuildwheel.util.trace",
     "contextlib",
     "functools",
     "hashlib",
@@ -9,6 +13,8 @@
     "io",
     "pathlib",
     "re",
+    "shutil",
+    "tempfile",
     "textwrap",
 }
 
@@ -20,21 +26,28 @@
 import io
 import os
 import re
+import shutil
 import sys
+import tempfile
 import textwrap
+import threading
 import time
 from pathlib import Path
 
 import humanize
 
 from cibuildwheel.ci import CIProvider, detect_ci_provider, filter_ansi_codes
+from cibuildwheel.report import StepReport, get_recorder
+from cibuildwheel.util.timing_history import get_timing_history
+from cibuildwheel.util.trace import get_trace
 
 TYPE_CHECKING = False
 if TYPE_CHECKING:
     from collections.abc import Generator
-    from typing import IO, AnyStr, Final, Literal
+    from typing import IO, AnyStr, Final, Literal, TextIO
 
     from cibuildwheel.options import Options
+    from cibuildwheel.util.resource_usage import UsageSampler, UsageSummary
 
     FoldPattern = tuple[str, str]
 
@@ -106,6 +119,7 @@ class BuildInfo:
     identifier: str
     filename: Path | None
     duration: float
+    usage: UsageSummary | None = None
 
     @functools.cached_property
     def size(self) -> str | None:
@@ -128,17 +142,65 @@ def __str__(self) -> str:
         return f"{self.identifier}: {duration} (test only)"
 
 
-class Logger:
-    fold_mode: Literal["azure", "github", "travis", "disabled"]
-    colors_enabled: bool
-    unicode_enabled: bool
+class _ThreadState(threading.local):
+    """
+    The parts of the Logger state that belong to a single thread of builds.
+    Each thread gets a fresh copy with the class-level defaults.
+    """
+
     active_build_identifier: str | None = None
     build_start_time: float | None = None
     step_start_time: float | None = None
+    step_name: str | None = None
+    # where the resource usage samples of the active build and step start
+    usage_sampler: UsageSampler | None = None
+    build_usage_start: int | None = None
+    step_usage_start: int | None = None
+    # the steps of the active build, kept while a report or the timing
+    # history is being recorded
+    steps: list[StepReport] | None = None
     active_fold_group_name: str | None = None
+    output: TextIO | None = None
+
+
+class _OutputRouter:
+    """
+    Stands in for sys.stdout while output is being buffered. Writes from a
+    thread that is buffering go to that thread's buffer, everything else goes
+    to the original stream.
+    """
+
+    def __init__(self, stream: TextIO, state: _ThreadState) -> None:
+        self.stream = stream
+        self.state = state
+
+    @property
+    def _target(self) -> TextIO:
+        return self.state.output or self.stream
+
+    def write(self, text: str) -> int:
+        return self._target.write(text)
+
+    def flush(self) -> None:
+        self._target.flush()
+
+    def __getattr__(self, name: str) -> object:
+        # delegates e.g. `buffer`, `encoding` and `isatty`
+        return getattr(self._target, name)
+
+
+class Logger:
+    fold_mode: Literal["azure", "github", "travis", "disabled"]
+    colors_enabled: bool
+    unicode_enabled: bool
     summary: list[BuildInfo]
 
     def __init__(self) -> None:
+        self._thread_state = _ThreadState()
+        self._output_lock = threading.Lock()
+        self._output_router: _OutputRouter | None = None
+        self._output_router_users = 0
+
         if sys.platform == "win32" and hasattr(sys.stdout, "reconfigure"):
             # the encoding on Windows can be a 1-byte charmap, but all CIs
             # support utf8, so we hardcode that
@@ -182,6 +244,10 @@ def build_start(self, identifier: str) -> None:
 
         self.build_start_time = time.time()
         self.active_build_identifier = identifier
+        keep_steps = get_recorder() is not None or get_timing_history() is not None
+        self._thread_state.steps = [] if keep_steps else None
+        if (sampler := self.usage_sampler) is not None:
+            self._thread_state.build_usage_start = sampler.sample()
 
     def build_end(self, filename: Path | None) -> None:
         assert self.build_start_time is not None
@@ -190,21 +256,59 @@ def build_end(self, filename: Path | None) -> None:
 
         c = self.colors
         s = self.symbols
-        duration = time.time() - self.build_start_time
+        end_time = time.time()
+        duration = end_time - self.build_start_time
         duration_str = humanize.naturaldelta(duration, minimum_unit="milliseconds")
 
+        usage = self._usage_since(self._thread_state.build_usage_start)
+        self._thread_state.build_usage_start = None
+
         print()
         print(f"{c.green}{s.done} {c.end}{self.active_build_identifier} finished in {duration_str}")
+        if usage:
+            print(f"{c.gray}{usage}{c.end}")
         self.summary.append(
-            BuildInfo(identifier=self.active_build_identifier, filename=filename, duration=duration)
+            BuildInfo(
+                identifier=self.active_build_identifier,
+                filename=filename,
+                duration=duration,
+                usage=usage,
+            )
         )
+        if (trace := get_trace()) is not None:
+            trace.add_span(
+                self.active_build_identifier,
+                category="build",
+                start=self.build_start_time,
+                end=end_time,
+                args={"wheel": filename.name if filename else None},
+            )
+        if (recorder := get_recorder()) is not None:
+            recorder.add_build(
+                self.active_build_identifier,
+                duration=duration,
+                wheel=filename,
+                steps=self._thread_state.steps or [],
+                usage=usage,
+            )
+        if (history := get_timing_history()) is not None:
+            history.record_build(
+                self.active_build_identifier,
+                duration=duration,
+                steps=[(step.name, step.duration) for step in self._thread_state.steps or []],
+            )
+            print(f"{c.gray}{history.progress()}{c.end}")
 
         self.build_start_time = None
         self.active_build_identifier = None
+        self._thread_state.steps = None
 
     def step(self, step_description: str) -> None:
         self.step_end()
         self.step_start_time = time.time()
+        self.step_name = step_description
+        if (sampler := self.usage_sampler) is not None:
+            self._thread_state.step_usage_start = sampler.sample()
         self._start_fold_group(step_description)
 
     def step_end(self, success: bool = True) -> None:
@@ -212,14 +316,44 @@ def step_end(self, success: bool = True) -> None:
             self._end_fold_group()
             c = self.colors
             s = self.symbols
-            duration = time.time() - self.step_start_time
+            end_time = time.time()
+            duration = end_time - self.step_start_time
+            usage = self._usage_since(self._thread_state.step_usage_start)
+            self._thread_state.step_usage_start = None
 
             if success:
                 print(f"{c.green}{s.done} {c.end}{duration:.2f}s".rjust(78))
             else:
                 print(f"{c.red}{s.error} {c.end}{duration:.2f}s".rjust(78))
+            if usage:
+                print(f"{c.gray}{usage}{c.end}".rjust(78))
+
+            if (trace := get_trace()) is not None:
+                trace.add_span(
+                    self.step_name or "step",
+                    category="step",
+                    start=self.step_start_time,
+                    end=end_time,
+                    args={"identifier": self.active_build_identifier, "success": success},
+                )
+            if self._thread_state.steps is not None:
+                self._thread_state.steps.append(
+                    StepReport(
+                        name=self.step_name or "step",
+                        duration=duration,
+                        success=success,
+                        usage=usage,
+                    )
+                )
 
             self.step_start_time = None
+            self.step_name = None
+
+    def _usage_since(self, start: int | None) -> UsageSummary | None:
+        sampler = self.usage_sampler
+        if sampler is None or start is None:
+            return None
+        return sampler.summary_since(start)
 
     def step_end_with_error(self, error: BaseException | str) -> None:
         self.step_end(success=False)
@@ -266,6 +400,8 @@ def print_summary(self, *, options: Options) -> Generator[None, None, None]:
         self._start_fold_group(f"{n_wheels} wheel{s} produced in {duration_str}")
         for build_info in self.summary:
             print(" ", build_info)
+            if build_info.usage:
+                print("   ", build_info.usage)
         self._end_fold_group()
 
         self.summary = []
@@ -274,6 +410,129 @@ def print_summary(self, *, options: Options) -> Generator[None, None, None]:
     def step_active(self) -> bool:
         return self.step_start_time is not None
 
+    @property
+    def active_build_identifier(self) -> str | None:
+        return self._thread_state.active_build_identifier
+
+    @active_build_identifier.setter
+    def active_build_identifier(self, value: str | None) -> None:
+        self._thread_state.active_build_identifier = value
+
+    @property
+    def build_start_time(self) -> float | None:
+        return self._thread_state.build_start_time
+
+    @build_start_time.setter
+    def build_start_time(self, value: float | None) -> None:
+        self._thread_state.build_start_time = value
+
+    @property
+    def step_start_time(self) -> float | None:
+        return self._thread_state.step_start_time
+
+    @step_start_time.setter
+    def step_start_time(self, value: float | None) -> None:
+        self._thread_state.step_start_time = value
+
+    @property
+    def step_name(self) -> str | None:
+        return self._thread_state.step_name
+
+    @step_name.setter
+    def step_name(self, value: str | None) -> None:
+        self._thread_state.step_name = value
+
+    @property
+    def usage_sampler(self) -> UsageSampler | None:
+        """
+        The sampler of the resource usage of the container the current
+        thread's builds run in, if usage is being sampled.
+        """
+        return self._thread_state.usage_sampler
+
+    @contextlib.contextmanager
+    def sampling_usage(self, sampler: UsageSampler | None) -> Generator[None, None, None]:
+        """
+        Reports the resource usage from `sampler` with each of the current
+        thread's steps and builds in the block.
+        """
+        previous = self._thread_state.usage_sampler
+        self._thread_state.usage_sampler = sampler
+        try:
+            yield
+        finally:
+            self._thread_state.usage_sampler = previous
+
+    @property
+    def active_fold_group_name(self) -> str | None:
+        return self._thread_state.active_fold_group_name
+
+    @active_fold_group_name.setter
+    def active_fold_group_name(self, value: str | None) -> None:
+        self._thread_state.active_fold_group_name = value
+
+    @property
+    def output_buffer(self) -> TextIO | None:
+        """
+        The buffer that the current thread's output is going to, if it's
+        inside `buffered_output`.
+        """
+        return self._thread_state.output
+
+    @contextlib.contextmanager
+    def buffered_output(self, *, into: TextIO | None = None) -> Generator[None, None, None]:
+        """
+        Buffers everything printed to stdout by the current thread, including
+        output relayed from containers, and writes it out in one block when
+        the context exits. This keeps the logs of concurrent jobs readable.
+
+        The block is written to stdout, or to `into` - the `output_buffer` of
+        another thread - when jobs are nested.
+
+        Output written straight to the stdout file descriptor (e.g. by a
+        subprocess that inherits it) is not buffered.
+        """
+        assert self._thread_state.output is None, "buffered_output is not reentrant"
+
+        with self._output_lock:
+            if self._output_router is None:
+                self._output_router = _OutputRouter(sys.stdout, self._thread_state)
+                sys.stdout = self._output_router
+            self._output_router_users += 1
+            stream = into or self._output_router.stream
+
+        with tempfile.TemporaryFile() as buffer_file:
+            output = io.TextIOWrapper(
+                buffer_file,
+                encoding="utf8",
+                errors="surrogateescape",
+                line_buffering=True,
+                write_through=True,
+            )
+            self._thread_state.output = output
+            try:
+                yield
+            finally:
+                self._thread_state.output = None
+                output.flush()
+                buffer_file.seek(0)
+
+                with self._output_lock:
+                    stream.flush()
+                    if hasattr(stream, "buffer"):
+                        shutil.copyfileobj(buffer_file, stream.buffer)
+                        stream.buffer.flush()
+                    else:
+                        stream.write(buffer_file.read().decode("utf8", errors="surrogateescape"))
+                        stream.flush()
+
+                    self._output_router_users -= 1
+                    if self._output_router_users == 0:
+                        sys.stdout = self._output_router.stream
+                        self._output_router = None
+
+                output.detach()
+
     def _start_fold_group(self, name: str) -> None:
         self._end_fold_group()
         self.active_fold_group_name = name
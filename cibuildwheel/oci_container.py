@@ -4,51 +4,76 @@
     "cibuildwheel.ci",
     "cibuildwheel.errors",
     "cibuildwheel.logger",
+    "cibuildwheel.report",
     "cibuildwheel.util",
     "cibuildwheel.util.cmd",
+    "cibuildwheel.util.file",
+    "cibuildwheel.util.file_selection",
     "cibuildwheel.util.helpers",
+    "cibuildwheel.util.metadata_cache",
+    "cibuildwheel.util.resource_usage",
+    "cibuildwheel.util.trace",
     "contextlib",
     "io",
+    "itertools",
     "json",
     "platform",
+    "queue",
     "shlex",
     "shutil",
     "subprocess",
     "textwrap",
+    "time",
     "uuid",
 }
 
 import contextlib
 import dataclasses
 import io
+import itertools
 import json
 import os
 import platform
+import queue
 import shlex
 import shutil
+import stat
+import struct
 import subprocess
 import sys
 import textwrap
+import threading
+import time
 import typing
 import uuid
-from enum import Enum
-from pathlib import PurePosixPath
+from enum import Enum, IntEnum
+from pathlib import Path, PurePosixPath
 from typing import Literal, assert_never
 
 from cibuildwheel.ci import CIProvider, detect_ci_provider
 from cibuildwheel.errors import OCIEngineTooOldError
 from cibuildwheel.logger import log
+from cibuildwheel.report import container_timer
+from cibuildwheel.util import resources
 from cibuildwheel.util.cmd import call
+from cibuildwheel.util.file import CIBW_CACHE_PATH
+from cibuildwheel.util.file_selection import tar_file_list
 from cibuildwheel.util.helpers import FlexibleVersion, parse_key_value_string, strtobool
+from cibuildwheel.util.metadata_cache import MetadataCache
+from cibuildwheel.util.resource_usage import CGROUP_FILES, CGROUP_ROOT, parse_cgroup_files
+from cibuildwheel.util.trace import ByteCounter, command_span, trace_span
 
 TYPE_CHECKING = False
 if TYPE_CHECKING:
-    from collections.abc import Mapping, Sequence
-    from pathlib import Path, PurePath
+    from collections.abc import Generator, Mapping, Sequence
+    from pathlib import PurePath
     from types import TracebackType
     from typing import IO, Self
 
     from cibuildwheel.typing import PathOrStr
+    from cibuildwheel.util.resource_usage import UsageSample
+
+    AgentReplies = queue.SimpleQueue[tuple["FrameKind", bytes] | None]
 
 ContainerEngineName = Literal["docker", "podman"]
 
@@ -140,6 +165,60 @@ def options_summary(self) -> str | dict[str, str]:
 DEFAULT_ENGINE = OCIContainerEngineConfig("docker")
 
 
+class FrameKind(IntEnum):
+    """
+    The kinds of frame exchanged with the agent in the container, see
+    resources/container_agent.py.
+    """
+
+    RUN = 1
+    STDOUT = 2
+    STDERR = 3
+    EXIT = 4
+    SHUTDOWN = 5
+    BATCH = 6
+    RESULT = 7
+    QUERY = 8
+
+
+# channel, kind, payload length
+FRAME_HEADER = struct.Struct(">IBI")
+
+# images saved by OCIContainer.commit_snapshot are tagged in this repository,
+# and carry this label so that they can be found and pruned
+SNAPSHOT_REPOSITORY = "cibuildwheel-snapshot"
+SNAPSHOT_LABEL = "io.github.pypa.cibuildwheel.snapshot"
+# the ID of the image a snapshot was saved from
+SNAPSHOT_BASE_IMAGE_LABEL = "io.github.pypa.cibuildwheel.snapshot.base-image"
+
+# what's been found out about container engines and images, so that it
+# doesn't have to be worked out again for every container
+METADATA_CACHE = MetadataCache(CIBW_CACHE_PATH / "oci-metadata.json")
+
+# environment variables that point an engine's client at a different server
+ENGINE_ENDPOINT_VARIABLES = (
+    "DOCKER_HOST",
+    "DOCKER_CONTEXT",
+    "CONTAINER_HOST",
+    "CONTAINER_CONNECTION",
+)
+
+
+@dataclasses.dataclass(frozen=True)
+class ContainerFileStat:
+    mode: int
+    size: int
+    mtime: float
+
+    @property
+    def is_dir(self) -> bool:
+        return stat.S_ISDIR(self.mode)
+
+    @property
+    def is_file(self) -> bool:
+        return stat.S_ISREG(self.mode)
+
+
 def _check_engine_version(engine: OCIContainerEngineConfig) -> None:
     try:
         version_string = call(engine.name, "version", "-f", "{{json .}}", capture_stdout=True)
@@ -192,6 +271,181 @@ def _check_engine_version(engine: OCIContainerEngineConfig) -> None:
         raise OCIEngineTooOldError(msg) from e
 
 
+def _check_engine_version_cached(engine: OCIContainerEngineConfig) -> None:
+    """
+    Like `_check_engine_version`, but remembers an engine that passed. The
+    engine is identified by its executable - an upgrade or downgrade
+    replaces it - and the server it's configured to talk to.
+    """
+    executable = shutil.which(engine.name)
+    if executable is None:
+        _check_engine_version(engine)
+        return
+
+    executable_path = Path(executable).resolve()
+    executable_stat = executable_path.stat()
+    cache_key = json.dumps(
+        [
+            "engine-version",
+            engine.name,
+            str(executable_path),
+            executable_stat.st_mtime_ns,
+            executable_stat.st_size,
+            [os.environ.get(name, "") for name in ENGINE_ENDPOINT_VARIABLES],
+        ]
+    )
+    if METADATA_CACHE.get(cache_key):
+        return
+
+    _check_engine_version(engine)
+    METADATA_CACHE.set(cache_key, True)
+
+
+def get_image_id(engine: OCIContainerEngineConfig, image: str) -> str | None:
+    """
+    Returns the ID of `image`, or None if it isn't present locally.
+    """
+    result = subprocess.run(
+        [engine.name, "image", "inspect", "--format", "{{.Id}}", image],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip()
+
+
+def _image_platform_format(oci_platform: OCIPlatform) -> str:
+    # the format for `image inspect` that gives a value comparable to oci_platform
+    return (
+        "{{.Os}}/{{.Architecture}}/{{.Variant}}"
+        if len(oci_platform.value.split("/")) == 3
+        else "{{.Os}}/{{.Architecture}}"
+    )
+
+
+def pull_image(engine: OCIContainerEngineConfig, image: str, oci_platform: OCIPlatform) -> None:
+    """
+    Pulls `image` for `oci_platform`, unless it's already present - the same
+    decision that `OCIContainer` makes when it creates a container, so that
+    the container can then start without pulling. This is quiet and doesn't
+    raise; if the pull fails, creating the container reports the problem.
+    """
+    with contextlib.suppress(OSError):
+        inspect = subprocess.run(
+            [
+                engine.name,
+                "image",
+                "inspect",
+                image,
+                "--format",
+                _image_platform_format(oci_platform),
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            check=False,
+        )
+        if inspect.returncode == 0 and inspect.stdout.strip() == oci_platform.value:
+            return
+
+        subprocess.run(
+            [engine.name, "pull", f"--platform={oci_platform.value}", image],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=False,
+        )
+
+
+def host_tar_command(files: Sequence[str] | None) -> tuple[str, bytes | None]:
+    """
+    Returns a shell command that writes a tar of the current directory to
+    stdout - of just `files` within it, if given - and the input to run it
+    with.
+    """
+    tar_format = "--format gnutar" if sys.platform.startswith("darwin") else ""
+    if files is None:
+        return f"tar -c {tar_format} -f - .", None
+    return f"tar -c {tar_format} -f - -T -", os.fsencode(tar_file_list(files))
+
+
+def create_volume_from_dir(
+    engine: OCIContainerEngineConfig,
+    from_path: Path,
+    *,
+    image: str,
+    oci_platform: OCIPlatform,
+    files: Sequence[str] | None = None,
+) -> str:
+    """
+    Creates a volume holding a copy of the directory `from_path` - or just
+    `files` within it, if given - and returns its name. The files are copied
+    in through a container of `image`, which is created but not started.
+    """
+    volume = f"cibuildwheel-{uuid.uuid4()}"
+    mount_path = "/cibuildwheel-volume"
+    call(engine.name, "volume", "create", volume)
+    try:
+        container_id = call(
+            engine.name,
+            "create",
+            f"--platform={oci_platform.value}",
+            f"--volume={volume}:{mount_path}",
+            image,
+            "/bin/true",
+            capture_stdout=True,
+        ).strip()
+        try:
+            tar_command, tar_input = host_tar_command(files)
+            subprocess.run(
+                f"{tar_command} | {engine.name} cp - {container_id}:{mount_path}",
+                shell=True,
+                check=True,
+                cwd=from_path,
+                input=tar_input,
+            )
+        finally:
+            subprocess.run(
+                [engine.name, "rm", "--force", container_id],
+                stdout=subprocess.DEVNULL,
+                check=False,
+            )
+    except BaseException:
+        remove_volume(engine, volume)
+        raise
+    return volume
+
+
+def remove_volume(engine: OCIContainerEngineConfig, volume: str) -> None:
+    subprocess.run(
+        [engine.name, "volume", "rm", "--force", volume],
+        stdout=subprocess.DEVNULL,
+        check=False,
+    )
+
+
+def prune_snapshots(engine: OCIContainerEngineConfig) -> list[str]:
+    """
+    Removes the images saved by `OCIContainer.commit_snapshot`, and returns
+    their tags.
+    """
+    output = call(
+        engine.name,
+        "images",
+        "--filter",
+        f"label={SNAPSHOT_LABEL}",
+        "--format",
+        "{{.Repository}}:{{.Tag}}",
+        capture_stdout=True,
+    )
+    tags = sorted(set(output.split()))
+    if tags:
+        call(engine.name, "rmi", *tags)
+    return tags
+
+
 class OCIContainer:
     """
     An object that represents a running OCI (e.g. Docker) container.
@@ -199,9 +453,14 @@ class OCIContainer:
     Intended for use as a context manager e.g.
     `with OCIContainer(image = 'ubuntu') as docker:`
 
-    A bash shell is running in the remote container. When `call()` is invoked,
-    the command is relayed to the remote shell, and the results are streamed
-    back to cibuildwheel.
+    A small agent (resources/container_agent.py) is running in the remote
+    container. When `call()` is invoked, the command is sent to the agent, and
+    its output and return code are streamed back to cibuildwheel. `call()` can
+    be used from several threads at once, the commands run concurrently. The
+    agent also answers queries about the container's files and environment
+    (`glob()`, `exists()`, `stat()`, `read_text()`, `file_hash()`,
+    `get_environment()`) and makes and removes directories (`make_dirs()`,
+    `remove()`) without starting a process in the container.
 
     Example:
         >>> # xdoctest: +REQUIRES(LINUX)
@@ -235,6 +494,7 @@ def __init__(
         oci_platform: OCIPlatform,
         cwd: PathOrStr | None = None,
         engine: OCIContainerEngineConfig = DEFAULT_ENGINE,
+        volumes: Sequence[str] = (),
     ):
         if not image:
             msg = "Must have a non-empty image to run."
@@ -245,10 +505,14 @@ def __init__(
         self.cwd = cwd
         self.name: str | None = None
         self.process: subprocess.Popen[bytes] | None = None
+        self._agent_lock = threading.Lock()
+        self._agent_write_lock = threading.Lock()
+        self._agent_channels: dict[int, AgentReplies] = {}
+        self._agent_channel_ids = itertools.count(1)
+        self._agent_reader: threading.Thread | None = None
+        self._agent_exited = True
         self.engine = engine
-        self.host_tar_format = ""
-        if sys.platform.startswith("darwin"):
-            self.host_tar_format = "--format gnutar"
+        self.volumes = volumes
 
     def _get_platform_args(self, *, oci_platform: OCIPlatform | None = None) -> tuple[str, str]:
         if oci_platform is None:
@@ -264,11 +528,7 @@ def _get_platform_args(self, *, oci_platform: OCIPlatform | None = None) -> tupl
                 "inspect",
                 self.image,
                 "--format",
-                (
-                    "{{.Os}}/{{.Architecture}}/{{.Variant}}"
-                    if len(oci_platform.value.split("/")) == 3
-                    else "{{.Os}}/{{.Architecture}}"
-                ),
+                _image_platform_format(oci_platform),
                 capture_stdout=True,
             ).strip()
             if image_platform == oci_platform.value:
@@ -280,11 +540,71 @@ def _get_platform_args(self, *, oci_platform: OCIPlatform | None = None) -> tupl
             pass
         return f"--platform={oci_platform.value}", f"--pull={pull}"
 
+    def _get_32_bit_args(self, platform_args: tuple[str, str]) -> tuple[tuple[str, str], bool]:
+        """
+        Works out how to run a 32-bit image: returns the platform args to use,
+        and whether the container's shell needs to be run under `linux32`.
+        This takes a container run or two, so the answer is cached for images
+        that are present locally, by image ID.
+        """
+        cache_key = None
+        image_id = get_image_id(self.engine, self.image)
+        if image_id is not None:
+            cache_key = json.dumps(
+                ["32-bit-args", self.engine.name, image_id, self.oci_platform.value]
+            )
+            cached = METADATA_CACHE.get(cache_key)
+            if cached is not None:
+                platform_arg, pull_arg = cached["platform_args"]
+                return (platform_arg, pull_arg), bool(cached["simulate_32_bit"])
+
+        # If the architecture running the image is already the right one
+        # or the image entrypoint takes care of enforcing this, then we don't need to
+        # simulate this
+        simulate_32_bit = False
+        run_cmd = [self.engine.name, "run", "--rm"]
+        ctr_cmd = ["uname", "-m"]
+        try:
+            container_machine = call(
+                *run_cmd, *platform_args, self.image, *ctr_cmd, capture_stdout=True
+            ).strip()
+        except subprocess.CalledProcessError:
+            if self.oci_platform == OCIPlatform.i386:
+                # The image might have been built with amd64 architecture
+                # Let's try that
+                platform_args = self._get_platform_args(oci_platform=OCIPlatform.AMD64)
+                container_machine = call(
+                    *run_cmd, *platform_args, self.image, *ctr_cmd, capture_stdout=True
+                ).strip()
+            else:
+                raise
+        if container_machine not in {"i686", "armv7l", "armv8l"}:
+            simulate_32_bit = True
+            # sanity check to ensure no deadlock waiting for container to start
+            call(
+                *run_cmd,
+                *platform_args,
+                self.image,
+                "linux32",
+                "/bin/true",
+                capture_stdout=True,
+            )
+
+        # only cache what was found out about the image that was already
+        # present - if it was pulled, it might not be the same image
+        if cache_key is not None and platform_args[1] == "--pull=never":
+            METADATA_CACHE.set(
+                cache_key,
+                {"platform_args": list(platform_args), "simulate_32_bit": simulate_32_bit},
+            )
+
+        return platform_args, simulate_32_bit
+
     def __enter__(self) -> Self:
         assert self.process is None
         self.name = f"cibuildwheel-{uuid.uuid4()}"
 
-        _check_engine_version(self.engine)
+        _check_engine_version_cached(self.engine)
 
         # work-around for Travis-CI PPC64le Docker runs since 2021:
         # this avoids network splits
@@ -298,39 +618,17 @@ def __enter__(self) -> Self:
 
         simulate_32_bit = False
         if self.oci_platform in {OCIPlatform.i386, OCIPlatform.ARMV7}:
-            # If the architecture running the image is already the right one
-            # or the image entrypoint takes care of enforcing this, then we don't need to
-            # simulate this
-            run_cmd = [self.engine.name, "run", "--rm"]
-            ctr_cmd = ["uname", "-m"]
-            try:
-                container_machine = call(
-                    *run_cmd, *platform_args, self.image, *ctr_cmd, capture_stdout=True
-                ).strip()
-            except subprocess.CalledProcessError:
-                if self.oci_platform == OCIPlatform.i386:
-                    # The image might have been built with amd64 architecture
-                    # Let's try that
-                    platform_args = self._get_platform_args(oci_platform=OCIPlatform.AMD64)
-                    container_machine = call(
-                        *run_cmd, *platform_args, self.image, *ctr_cmd, capture_stdout=True
-                    ).strip()
-                else:
-                    raise
-            if container_machine not in {"i686", "armv7l", "armv8l"}:
-                simulate_32_bit = True
-                # sanity check to ensure no deadlock waiting for container to start
-                call(
-                    *run_cmd,
-                    *platform_args,
-                    self.image,
-                    "linux32",
-                    "/bin/true",
-                    capture_stdout=True,
-                )
+            platform_args, simulate_32_bit = self._get_32_bit_args(platform_args)
 
         shell_args = ["linux32", "/bin/bash"] if simulate_32_bit else ["/bin/bash"]
 
+        with container_timer(self.name, image=self.image, kind="start"):
+            self._create_and_start(network_args, platform_args, shell_args)
+        return self
+
+    def _create_and_start(
+        self, network_args: Sequence[str], platform_args: Sequence[str], shell_args: Sequence[str]
+    ) -> None:
         subprocess.run(
             [
                 self.engine.name,
@@ -340,6 +638,7 @@ def __enter__(self) -> Self:
                 f"--name={self.name}",
                 "--interactive",
                 *(["--volume=/:/host"] if not self.engine.disable_host_mount else []),
+                *(f"--volume={volume}" for volume in self.volumes),
                 *network_args,
                 *platform_args,
                 *self.engine.create_args,
@@ -350,41 +649,26 @@ def __enter__(self) -> Self:
         )
 
         try:
-            self.process = subprocess.Popen(
-                [
-                    self.engine.name,
-                    "start",
-                    "--attach",
-                    "--interactive",
-                    self.name,
-                ],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-            )
-
-            assert self.process.stdin
-            assert self.process.stdout
-            self.bash_stdin = self.process.stdin
-            self.bash_stdout = self.process.stdout
-
-            # run a noop command to block until the container is responding
-            self.call(["/bin/true"], cwd="/")
+            self._start_agent()
 
             if self.cwd:
                 # Although `docker create -w` does create the working dir if it
                 # does not exist, podman does not. There does not seem to be a way
                 # to setup a workdir for a container running in podman.
-                self.call(["mkdir", "-p", os.fspath(self.cwd)], cwd="/")
+                self.make_dirs(PurePosixPath(self.cwd))
         except BaseException:
             # clean-up
             if self.process is not None:
                 if self.process.poll() is None:
                     self.process.kill()
+                if self._agent_reader is not None:
+                    # the reader thread finishes once the process has gone
+                    self._agent_reader.join()
+                    self._agent_reader = None
                 self.process.communicate()
             self.process = None
             self._remove_container()
             raise
-        return self
 
     def __exit__(
         self,
@@ -392,15 +676,84 @@ def __exit__(
         exc_val: BaseException | None,
         exc_tb: TracebackType | None,
     ) -> None:
+        try:
+            self._stop_agent()
+        finally:
+            keep_container = strtobool(os.environ.get("CIBW_DEBUG_KEEP_CONTAINER", ""))
+            if not keep_container:
+                self._remove_container()
+
+    def _start_agent(self) -> None:
+        """
+        Attaches to the container's shell, and replaces it with the agent
+        (resources/container_agent.py) that runs our commands. The agent needs
+        Python - in images that don't have it, the shell is kept and commands
+        are relayed to it one at a time.
+        """
+        assert self.name is not None
+        self.process = subprocess.Popen(
+            [self.engine.name, "start", "--attach", "--interactive", self.name],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+
+        assert self.process.stdin
+        assert self.process.stdout
+        self.bash_stdin = self.process.stdin
+        self.bash_stdout = self.process.stdout
+
+        # bash reads its input as it goes, so the agent takes over the rest
+        # of stdin once it's exec'd. That has to happen on the last line of
+        # the script - bash can read ahead past the line it's running, and
+        # the agent would then miss (or misread) the start of its input.
+        agent_source = resources.CONTAINER_AGENT.read_text(encoding="utf8")
+        start_script = textwrap.dedent(
+            """\
+            agent_python=""
+            for candidate in {utility_python} python3; do
+                if command -v "$candidate" > /dev/null; then
+                    agent_python=$candidate
+                    break
+                fi
+            done
+            if [ -n "$agent_python" ]; then echo agent; exec "$agent_python" -u -c {agent_source}; else echo shell; fi
+            """
+        ).format(utility_python=self.UTILITY_PYTHON, agent_source=shlex.quote(agent_source))
+        self.bash_stdin.write(start_script.encode("utf8"))
+        self.bash_stdin.flush()
+
+        match self.bash_stdout.readline():
+            case b"agent\n":
+                self._agent_exited = False
+                self._agent_reader = threading.Thread(
+                    target=self._read_frames, name=f"{self.name}-agent", daemon=True
+                )
+                self._agent_reader.start()
+            case b"shell\n":
+                log.notice(
+                    f"No Python found in image {self.image}, commands in the container will run one at a time."
+                )
+            case _:
+                msg = "Failed to start the container agent, the container shell has exited"
+                raise RuntimeError(msg)
+
+        # run a noop command to block until the container is responding
+        self.call(["/bin/true"], cwd="/")
+
+    def _stop_agent(self) -> None:
         assert self.process is not None
         try:
-            # Ask bash to exit cleanly and wait for the `start` process to finish.
-            # If the container/bash has already died, the write raises
-            # BrokenPipeError; if bash refuses to exit, `wait` raises
-            # TimeoutExpired. Both are handled below so we always reach the
-            # cleanup in `finally` rather than leaking the process or container.
-            self.bash_stdin.write(b"exit 0\n")
-            self.bash_stdin.flush()
+            # Ask the agent (or shell) to exit cleanly and wait for the `start`
+            # process to finish. If the container has already died, the write
+            # raises BrokenPipeError; if the agent refuses to exit, `wait`
+            # raises TimeoutExpired. Both are handled below so we always reach
+            # the cleanup in `finally` rather than leaking the process or
+            # container.
+            if self._agent_reader is not None:
+                self._send_frame(0, FrameKind.SHUTDOWN)
+            else:
+                self.bash_stdin.write(b"exit 0\n")
+                self.bash_stdin.flush()
             self.process.wait(timeout=30)
 
             if self.engine.name == "podman":
@@ -410,21 +763,61 @@ def __exit__(
                 # line. For now, this seems to work "well enough".
                 self.process.wait()
         except (OSError, subprocess.TimeoutExpired):
-            # bash didn't shut down cleanly; force the process down so it isn't
-            # leaked, then continue to cleanup.
+            # the agent didn't shut down cleanly; force the process down so it
+            # isn't leaked, then continue to cleanup.
             if self.process.poll() is None:
                 self.process.kill()
                 self.process.wait()
         finally:
             with contextlib.suppress(OSError):
                 self.bash_stdin.close()
+            if self._agent_reader is not None:
+                self._agent_reader.join()
+                self._agent_reader = None
             with contextlib.suppress(OSError):
                 self.bash_stdout.close()
             self.process = None
 
-            keep_container = strtobool(os.environ.get("CIBW_DEBUG_KEEP_CONTAINER", ""))
-            if not keep_container:
-                self._remove_container()
+    def _send_frame(self, channel: int, kind: FrameKind, payload: bytes = b"") -> None:
+        with self._agent_write_lock:
+            self.bash_stdin.write(FRAME_HEADER.pack(channel, kind, len(payload)))
+            self.bash_stdin.write(payload)
+            self.bash_stdin.flush()
+
+    def _read_frames(self) -> None:
+        # runs on a background thread, handing each frame from the agent to
+        # the call that's waiting for it
+        try:
+            while len(header := self.bash_stdout.read(FRAME_HEADER.size)) == FRAME_HEADER.size:
+                channel, kind, length = FRAME_HEADER.unpack(header)
+                payload = self.bash_stdout.read(length)
+                with self._agent_lock:
+                    replies = self._agent_channels.get(channel)
+                if replies is not None:
+                    replies.put((FrameKind(kind), payload))
+        except (OSError, ValueError):
+            # the pipe was closed
+            pass
+        finally:
+            with self._agent_lock:
+                self._agent_exited = True
+                for replies in self._agent_channels.values():
+                    replies.put(None)
+
+    @contextlib.contextmanager
+    def _open_channel(self) -> Generator[tuple[int, AgentReplies], None, None]:
+        replies: AgentReplies = queue.SimpleQueue()
+        with self._agent_lock:
+            if self._agent_exited:
+                msg = "Failed to run the command, the container agent has exited"
+                raise RuntimeError(msg)
+            channel = next(self._agent_channel_ids)
+            self._agent_channels[channel] = replies
+        try:
+            yield channel, replies
+        finally:
+            with self._agent_lock:
+                del self._agent_channels[channel]
 
     def _remove_container(self) -> None:
         assert self.name is not None
@@ -439,18 +832,32 @@ def _remove_container(self) -> None:
             log.warning(msg)
         self.name = None
 
-    def copy_into(self, from_path: Path, to_path: PurePath) -> None:
+    def copy_into(
+        self, from_path: Path, to_path: PurePath, *, files: Sequence[str] | None = None
+    ) -> None:
+        """
+        Copies a file or directory into the container. For a directory,
+        `files` limits the copy to those paths within it.
+        """
+        with container_timer(self.name, image=self.image, kind="copy_in"):
+            self._copy_into(from_path, to_path, files=files)
+
+    def _copy_into(
+        self, from_path: Path, to_path: PurePath, *, files: Sequence[str] | None
+    ) -> None:
         if from_path.is_dir():
-            self.call(["mkdir", "-p", to_path])
+            self.make_dirs(to_path)
+            tar_command, tar_input = host_tar_command(files)
             subprocess.run(
-                f"tar -c {self.host_tar_format} -f - . | {self.engine.name} exec -i {self.name} tar --no-same-owner -xC {shell_quote(to_path)} -f -",
+                f"{tar_command} | {self.engine.name} exec -i {self.name} tar --no-same-owner -xC {shell_quote(to_path)} -f -",
                 shell=True,
                 check=True,
                 cwd=from_path,
+                input=tar_input,
             )
         else:
             exec_process: subprocess.Popen[bytes]
-            self.call(["mkdir", "-p", to_path.parent])
+            self.make_dirs(to_path.parent)
             with subprocess.Popen(
                 [
                     self.engine.name,
@@ -478,24 +885,147 @@ def copy_into(self, from_path: Path, to_path: PurePath) -> None:
     def copy_out(self, from_path: PurePath, to_path: Path) -> None:
         # note: we assume from_path is a dir
         to_path.mkdir(parents=True, exist_ok=True)
-        call(self.engine.name, "cp", f"{self.name}:{from_path}/.", to_path)
+        with container_timer(self.name, image=self.image, kind="copy_out"):
+            call(self.engine.name, "cp", f"{self.name}:{from_path}/.", to_path)
+
+    def image_id(self) -> str:
+        """
+        Returns the ID of the image the container was started from.
+        """
+        assert self.name is not None
+        return call(
+            self.engine.name,
+            "container",
+            "inspect",
+            "--format",
+            "{{.Image}}",
+            self.name,
+            capture_stdout=True,
+        ).strip()
+
+    def base_image_id(self) -> str:
+        """
+        Returns the ID of the image the container was started from, or if
+        that's a snapshot, of the image the snapshot was saved from.
+        """
+        image_id = self.image_id()
+        base_image_id = call(
+            self.engine.name,
+            "image",
+            "inspect",
+            "--format",
+            f'{{{{index .Config.Labels "{SNAPSHOT_BASE_IMAGE_LABEL}"}}}}',
+            image_id,
+            capture_stdout=True,
+        ).strip()
+        # images without the label give "" or "<no value>", depending on the engine
+        return base_image_id if base_image_id not in {"", "<no value>"} else image_id
+
+    def commit_snapshot(self, tag: str, *, base_image_id: str) -> None:
+        """
+        Saves the container's filesystem as the local image `tag`. The image
+        is labelled so that `prune_snapshots` can find it, and with
+        `base_image_id`, the image the container was started from.
+        """
+        assert self.name is not None
+        call(
+            self.engine.name,
+            "commit",
+            "--change",
+            f"LABEL {SNAPSHOT_LABEL}=1",
+            "--change",
+            f"LABEL {SNAPSHOT_BASE_IMAGE_LABEL}={base_image_id}",
+            self.name,
+            tag,
+        )
 
     def glob(self, path: PurePosixPath, pattern: str) -> list[PurePosixPath]:
         glob_pattern = path.joinpath(pattern)
 
-        path_strings = json.loads(
-            self.call(
-                [
-                    self.UTILITY_PYTHON,
-                    "-c",
-                    f"import sys, json, glob; json.dump(glob.glob({str(glob_pattern)!r}), sys.stdout)",
-                ],
-                capture_output=True,
-            )
-        )
+        if self._agent_reader is not None:
+            path_strings = self._query("glob", pattern=self._container_path(glob_pattern))
+        else:
+            # without IFS, the pattern is expanded but not split at spaces
+            script = 'IFS=; for f in $1; do [ -e "$f" ] && echo "$f"; done; true'
+            output = self.call(["sh", "-c", script, "sh", glob_pattern], capture_output=True)
+            path_strings = output.splitlines()
 
         return [PurePosixPath(p) for p in path_strings]
 
+    def exists(self, path: PurePath) -> bool:
+        if self._agent_reader is not None:
+            return typing.cast("bool", self._query("exists", path=self._container_path(path)))
+
+        try:
+            self.call(["test", "-e", path])
+        except subprocess.CalledProcessError:
+            return False
+        return True
+
+    def stat(self, path: PurePath) -> ContainerFileStat:
+        if self._agent_reader is not None:
+            return ContainerFileStat(**self._query("stat", path=self._container_path(path)))
+
+        mode, size, mtime = self.call(
+            ["stat", "-L", "-c", "%f %s %Y", path], capture_output=True
+        ).split()
+        return ContainerFileStat(mode=int(mode, 16), size=int(size), mtime=float(mtime))
+
+    def read_text(self, path: PurePath) -> str:
+        """
+        Returns the contents of a small (up to 1MB) text file in the container.
+        """
+        if self._agent_reader is not None:
+            return typing.cast("str", self._query("read", path=self._container_path(path)))
+
+        return self.call(["cat", path], capture_output=True)
+
+    def resource_usage(self) -> UsageSample | None:
+        """
+        Reads the container's CPU, memory, I/O and process usage from its
+        cgroup. Returns None if it can't be read - that needs the agent, so
+        that it can be read while commands are running.
+        """
+        if self._agent_reader is None:
+            return None
+        paths = [f"{CGROUP_ROOT}/{name}" for name in CGROUP_FILES]
+        contents = self._query("read_files", paths=paths)
+        return parse_cgroup_files(
+            {name: contents.get(path) for name, path in zip(CGROUP_FILES, paths, strict=True)},
+            time=time.time(),
+        )
+
+    def file_hash(self, path: PurePath) -> str:
+        """
+        Returns the hex sha256 digest of a file in the container.
+        """
+        if self._agent_reader is not None:
+            return typing.cast("str", self._query("hash", path=self._container_path(path)))
+
+        return self.call(["sha256sum", path], capture_output=True).split()[0]
+
+    def make_dirs(self, *paths: PurePath) -> None:
+        """
+        Like `mkdir -p`, creates directories and their parents.
+        """
+        if self._agent_reader is None:
+            self.call(["mkdir", "-p", *paths], cwd="/")
+            return
+
+        print(f"    + mkdir -p {' '.join(shell_quote(p) for p in paths)}")
+        self._query("mkdir", paths=[self._container_path(p) for p in paths])
+
+    def remove(self, *paths: PurePath) -> None:
+        """
+        Like `rm -rf`, removes files and directories, if they exist.
+        """
+        if self._agent_reader is None:
+            self.call(["rm", "-rf", *paths])
+            return
+
+        print(f"    + rm -rf {' '.join(shell_quote(p) for p in paths)}")
+        self._query("remove", paths=[self._container_path(p) for p in paths])
+
     def call(
         self,
         args: Sequence[PathOrStr],
@@ -508,69 +1038,23 @@ def call(
             # so we always need to specify it when making calls.
             cwd = self.cwd
 
-        chdir = f"cd {cwd}" if cwd else ""
-        env_assignments = (
-            " ".join(f"{shlex.quote(k)}={shlex.quote(v)}" for k, v in env.items())
-            if env is not None
-            else ""
-        )
-        command = " ".join(shlex.quote(str(a)) for a in args)
-        end_of_message = str(uuid.uuid4())
-
         # log the command we're executing
-        print(f"    + {command}")
-
-        # Write a command to the remote shell. First we change the
-        # cwd, if that's required. Then, we use the `env` utility to run
-        # `command` inside the specified environment. We use `env` because it
-        # can cope with spaces and strange characters in the name or value.
-        # Finally, the remote shell is told to write a footer - this will show
-        # up in the output so we know when to stop reading, and will include
-        # the return code of `command`.
-        self.bash_stdin.write(
-            bytes(
-                f"""(
-            {chdir}
-            env {env_assignments} {command}
-            printf "%04d%s\n" $? {end_of_message}
-        )
-        """,
-                encoding="utf8",
-                errors="surrogateescape",
-            )
-        )
-        self.bash_stdin.flush()
+        print(f"    + {' '.join(shlex.quote(str(a)) for a in args)}")
 
         if capture_output:
             output_io: IO[bytes] = io.BytesIO()
         else:
             output_io = sys.stdout.buffer
 
-        return_code = None
-        while return_code is None:
-            line = self.bash_stdout.readline()
-
-            if not line:
-                msg = "Failed to read the return code, the container shell has exited"
-                raise RuntimeError(msg)
-
-            if line.endswith(bytes(end_of_message, encoding="utf8") + b"\n"):
-                # fmt: off
-                footer_offset = (
-                    len(line)
-                    - 1  # newline character
-                    - len(end_of_message)  # delimiter
-                    - 4  # 4 return code decimals
-                )
-                # fmt: on
-                return_code_str = line[footer_offset : footer_offset + 4]
-                return_code = int(return_code_str)
-                # add the last line to output, without the footer
-                output_io.write(line[0:footer_offset])
-                output_io.flush()
+        with command_span(args, category="container") as span:
+            counter = ByteCounter(output_io)
+            counting_io = typing.cast("IO[bytes]", counter)
+            if self._agent_reader is not None:
+                return_code = self._call_agent(args, env=env, cwd=cwd, output_io=counting_io)
             else:
-                output_io.write(line)
-                output_io.flush()
+                return_code = self._call_shell(args, env=env, cwd=cwd, output_io=counting_io)
+            span["exit_code"] = return_code
+            span["output_bytes"] = counter.count
 
         if isinstance(output_io, io.BytesIO):
             output = str(output_io.getvalue(), encoding="utf8", errors="surrogateescape")
@@ -582,18 +1066,218 @@ def call(
 
         return output
 
-    def get_environment(self) -> dict[str, str]:
-        env = json.loads(
-            self.call(
-                [
-                    self.UTILITY_PYTHON,
-                    "-c",
-                    "import sys, json, os; json.dump(os.environ.copy(), sys.stdout)",
-                ],
-                capture_output=True,
+    def _call_agent(
+        self,
+        args: Sequence[PathOrStr],
+        *,
+        env: Mapping[str, str] | None,
+        cwd: PathOrStr | None,
+        output_io: IO[bytes],
+    ) -> int:
+        request = _command_request(args, env=env, cwd=cwd)
+
+        # error output goes to stderr, unless this thread's output is being
+        # buffered - then it's kept together with the rest of the log
+        error_io = sys.stdout.buffer if log.output_buffer is not None else sys.stderr.buffer
+
+        with self._open_channel() as (channel, replies):
+            try:
+                self._send_frame(channel, FrameKind.RUN, json.dumps(request).encode("utf8"))
+            except OSError as e:
+                msg = "Failed to run the command, the container agent has exited"
+                raise RuntimeError(msg) from e
+
+            while True:
+                reply = replies.get()
+
+                if reply is None:
+                    msg = "Failed to read the return code, the container agent has exited"
+                    raise RuntimeError(msg)
+
+                kind, payload = reply
+                match kind:
+                    case FrameKind.STDOUT:
+                        output_io.write(payload)
+                        output_io.flush()
+                    case FrameKind.STDERR:
+                        error_io.write(payload)
+                        error_io.flush()
+                    case FrameKind.EXIT:
+                        return int(payload)
+                    case _:
+                        msg = f"Unexpected frame from the container agent: {kind!r}"
+                        raise RuntimeError(msg)
+
+    def call_batch(
+        self,
+        commands: Sequence[Sequence[PathOrStr]],
+        env: Mapping[str, str] | None = None,
+        cwd: PathOrStr | None = None,
+        *,
+        check: bool = True,
+    ) -> list[subprocess.CompletedProcess[str]]:
+        """
+        Runs `commands` one after another, in a single round trip to the
+        container, and returns their results. Output is captured, not
+        streamed. With `check`, stops at the first command that fails and
+        raises CalledProcessError for it.
+        """
+        if cwd is None:
+            cwd = self.cwd
+
+        for args in commands:
+            print(f"    + {' '.join(shlex.quote(str(a)) for a in args)}")
+
+        with trace_span(
+            "batch", category="container", commands=[[str(a) for a in c] for c in commands]
+        ) as span:
+            if self._agent_reader is not None:
+                results = self._call_batch_agent(commands, env=env, cwd=cwd, check=check)
+            else:
+                results = []
+                for args in commands:
+                    output_io = io.BytesIO()
+                    return_code = self._call_shell(args, env=env, cwd=cwd, output_io=output_io)
+                    output = str(output_io.getvalue(), encoding="utf8", errors="surrogateescape")
+                    results.append(subprocess.CompletedProcess(args, return_code, output, ""))
+                    if return_code != 0 and check:
+                        break
+            span["exit_codes"] = [result.returncode for result in results]
+
+        if check:
+            for result in results:
+                result.check_returncode()
+
+        return results
+
+    def _call_batch_agent(
+        self,
+        commands: Sequence[Sequence[PathOrStr]],
+        *,
+        env: Mapping[str, str] | None,
+        cwd: PathOrStr | None,
+        check: bool,
+    ) -> list[subprocess.CompletedProcess[str]]:
+        request = {
+            "commands": [_command_request(args, env=env, cwd=cwd) for args in commands],
+            "check": check,
+        }
+        results = self._agent_request(FrameKind.BATCH, request)
+
+        return [
+            subprocess.CompletedProcess(
+                args, result["returncode"], result["stdout"], result["stderr"]
             )
+            for args, result in zip(commands, results, strict=False)
+        ]
+
+    def _query(self, op: str, **args: typing.Any) -> typing.Any:  # noqa: ANN401
+        # asks the agent about the container, see QUERIES in
+        # resources/container_agent.py
+        reply = self._agent_request(FrameKind.QUERY, {"op": op, **args})
+        if "error" in reply:
+            errno, strerror, filename = reply["error"]
+            raise OSError(errno, strerror, filename)
+        return reply["value"]
+
+    def _agent_request(self, kind: FrameKind, request: dict[str, typing.Any]) -> typing.Any:  # noqa: ANN401
+        # sends a request to the agent, and waits for its JSON result
+        with self._open_channel() as (channel, replies):
+            try:
+                self._send_frame(channel, kind, json.dumps(request).encode("utf8"))
+            except OSError as e:
+                msg = "Failed to send the request, the container agent has exited"
+                raise RuntimeError(msg) from e
+
+            reply = replies.get()
+
+        if reply is None:
+            msg = "Failed to read the result, the container agent has exited"
+            raise RuntimeError(msg)
+
+        reply_kind, payload = reply
+        if reply_kind != FrameKind.RESULT:
+            msg = f"Unexpected frame from the container agent: {reply_kind!r}"
+            raise RuntimeError(msg)
+
+        return json.loads(payload)
+
+    def _container_path(self, path: PurePath) -> str:
+        # the agent doesn't share the working dir of the commands it runs, so
+        # relative paths are resolved here
+        return str(PurePosixPath("/", self.cwd or "/", path))
+
+    def _call_shell(
+        self,
+        args: Sequence[PathOrStr],
+        *,
+        env: Mapping[str, str] | None,
+        cwd: PathOrStr | None,
+        output_io: IO[bytes],
+    ) -> int:
+        chdir = f"cd {cwd}" if cwd else ""
+        env_assignments = (
+            " ".join(f"{shlex.quote(k)}={shlex.quote(v)}" for k, v in env.items())
+            if env is not None
+            else ""
         )
-        return typing.cast("dict[str, str]", env)
+        command = " ".join(shlex.quote(str(a)) for a in args)
+        end_of_message = str(uuid.uuid4())
+
+        # the shell can only run one command at a time
+        with self._agent_write_lock:
+            # Write a command to the remote shell. First we change the
+            # cwd, if that's required. Then, we use the `env` utility to run
+            # `command` inside the specified environment. We use `env` because it
+            # can cope with spaces and strange characters in the name or value.
+            # Finally, the remote shell is told to write a footer - this will show
+            # up in the output so we know when to stop reading, and will include
+            # the return code of `command`.
+            self.bash_stdin.write(
+                bytes(
+                    f"""(
+                {chdir}
+                env {env_assignments} {command}
+                printf "%04d%s\n" $? {end_of_message}
+            )
+            """,
+                    encoding="utf8",
+                    errors="surrogateescape",
+                )
+            )
+            self.bash_stdin.flush()
+
+            while True:
+                line = self.bash_stdout.readline()
+
+                if not line:
+                    msg = "Failed to read the return code, the container shell has exited"
+                    raise RuntimeError(msg)
+
+                if line.endswith(bytes(end_of_message, encoding="utf8") + b"\n"):
+                    # fmt: off
+                    footer_offset = (
+                        len(line)
+                        - 1  # newline character
+                        - len(end_of_message)  # delimiter
+                        - 4  # 4 return code decimals
+                    )
+                    # fmt: on
+                    return_code_str = line[footer_offset : footer_offset + 4]
+                    # add the last line to output, without the footer
+                    output_io.write(line[0:footer_offset])
+                    output_io.flush()
+                    return int(return_code_str)
+
+                output_io.write(line)
+                output_io.flush()
+
+    def get_environment(self) -> dict[str, str]:
+        if self._agent_reader is not None:
+            return typing.cast("dict[str, str]", self._query("environ"))
+
+        environ = self.call(["cat", "/proc/self/environ"], capture_output=True)
+        return dict(item.split("=", 1) for item in environ.split("\0") if "=" in item)
 
     def environment_executor(self, command: Sequence[str], environment: dict[str, str]) -> str:
         # used as an EnvironmentExecutor to evaluate commands and capture output
@@ -615,5 +1299,16 @@ def debug_info(self) -> str:
         return output
 
 
+def _command_request(
+    args: Sequence[PathOrStr], *, env: Mapping[str, str] | None, cwd: PathOrStr | None
+) -> dict[str, typing.Any]:
+    # a command to run, as sent to the agent
+    return {
+        "args": [str(a) for a in args],
+        "env": dict(env) if env is not None else None,
+        "cwd": os.fspath(cwd) if cwd else None,
+    }
+
+
 def shell_quote(path: PurePath) -> str:
     return shlex.quote(os.fspath(path))
@@ -10,6 +10,7 @@
     "cibuildwheel.selector",
     "cibuildwheel.typing",
     "cibuildwheel.util",
+    "cibuildwheel.util.cache_index",
     "cibuildwheel.util.helpers",
     "cibuildwheel.util.packaging",
     "collections",
@@ -31,12 +32,13 @@
 import difflib
 import enum
 import functools
+import os
 import shlex
 import textwrap
 import tomllib
 from collections.abc import Mapping, Sequence
 from pathlib import Path
-from typing import assert_never
+from typing import Literal, assert_never, cast, get_args
 
 from packaging.specifiers import SpecifierSet
 
@@ -50,13 +52,14 @@
 from cibuildwheel.selector import BuildSelector, EnableGroup, TestSelector, selector_matches
 from cibuildwheel.typing import PLATFORMS, PlatformName
 from cibuildwheel.util import resources
+from cibuildwheel.util.cache_index import parse_size
 from cibuildwheel.util.helpers import format_safe, parse_key_value_string, strtobool, unwrap
 from cibuildwheel.util.packaging import DependencyConstraints
 
 TYPE_CHECKING = False
 if TYPE_CHECKING:
     from collections.abc import Callable, Generator, Iterable, Set
-    from typing import Any, Final, Literal, Self
+    from typing import Any, Final, Self
 
 MANYLINUX_ARCHS: Final[tuple[str, ...]] = (
     "x86_64",
@@ -91,10 +94,21 @@ class CommandLineArguments:
     config_file: str
     package_dir: Path
     print_build_identifiers: bool
+    print_build_matrix: bool
+    shards: int | None
+    shard: tuple[int, int] | None
     allow_empty: bool
     debug_traceback: bool
     enable: list[str]
     clean_cache: bool
+    verify_cache: bool
+    prune_snapshots: bool
+    jobs: str | None
+    fetch: bool
+    bundle_export: Path | None
+    trace_file: Path | None
+    report_file: Path | None
+    container_usage_interval: float | None
 
     @classmethod
     def defaults(cls) -> Self:
@@ -107,12 +121,27 @@ def defaults(cls) -> Self:
             output_dir=Path("wheelhouse"),
             package_dir=Path(),
             print_build_identifiers=False,
+            print_build_matrix=False,
+            shards=None,
+            shard=None,
             debug_traceback=False,
             enable=[],
             clean_cache=False,
+            verify_cache=False,
+            prune_snapshots=False,
+            jobs=None,
+            fetch=False,
+            bundle_export=None,
+            trace_file=None,
+            report_file=None,
+            container_usage_interval=None,
         )
 
 
+ContainerProjectSource = Literal["copy", "volume", "bind"]
+ContainerProjectFiles = Literal["all", "vcs"]
+
+
 @dataclasses.dataclass(frozen=True, kw_only=True)
 class GlobalOptions:
     package_dir: Path
@@ -121,6 +150,16 @@ class GlobalOptions:
     test_selector: TestSelector
     architectures: set[Architecture]
     allow_empty: bool
+    build_jobs: int
+    container_build_jobs: int
+    before_all_snapshot: bool
+    container_project_source: ContainerProjectSource
+    container_project_files: ContainerProjectFiles
+    container_package_cache: bool
+    wheel_cache: bool
+    shared_cache: str
+    index_proxy: bool
+    cache_size_limit: int | None
 
 
 @dataclasses.dataclass(frozen=True)
@@ -141,6 +180,7 @@ def options_summary(self) -> str | dict[str, str]:
 class BuildOptions:
     globals: GlobalOptions
     environment: ParsedEnvironment
+    environment_pass: list[str]
     before_all: str
     before_build: str | None
     xbuild_tools: list[str] | None
@@ -721,6 +761,41 @@ def globals(self) -> GlobalOptions:
             architectures = Architecture.all_archs(self.platform)
             enable |= EnableGroup.all_groups()
 
+        build_jobs_str = args.jobs or self.reader.get("build-jobs", env_plat=False)
+        build_jobs = _parse_jobs("build-jobs", build_jobs_str)
+        container_build_jobs = _parse_jobs(
+            "container-build-jobs", self.reader.get("container-build-jobs", env_plat=False)
+        )
+        before_all_snapshot = strtobool(self.reader.get("before-all-snapshot", env_plat=False))
+        container_project_source = cast(
+            "ContainerProjectSource",
+            _parse_choice(
+                "container-project-source",
+                self.reader.get("container-project-source", env_plat=False),
+                get_args(ContainerProjectSource),
+            ),
+        )
+        wheel_cache = strtobool(self.reader.get("wheel-cache", env_plat=False))
+        shared_cache = self.reader.get("shared-cache", env_plat=False).strip()
+        index_proxy = strtobool(self.reader.get("index-proxy", env_plat=False))
+        cache_size_limit_str = self.reader.get("cache-size-limit", env_plat=False).strip()
+        try:
+            cache_size_limit = parse_size(cache_size_limit_str) if cache_size_limit_str else None
+        except ValueError as e:
+            msg = f"Failed to parse cache-size-limit. {e}"
+            raise errors.ConfigurationError(msg) from e
+        container_project_files = cast(
+            "ContainerProjectFiles",
+            _parse_choice(
+                "container-project-files",
+                self.reader.get("container-project-files", env_plat=False),
+                get_args(ContainerProjectFiles),
+            ),
+        )
+        container_package_cache = strtobool(
+            self.reader.get("container-package-cache", env_plat=False)
+        )
+
         build_selector = BuildSelector(
             build_config=build_config,
             skip_config=skip_config,
@@ -736,6 +811,16 @@ def globals(self) -> GlobalOptions:
             test_selector=test_selector,
             architectures=architectures,
             allow_empty=allow_empty,
+            build_jobs=build_jobs,
+            container_build_jobs=container_build_jobs,
+            before_all_snapshot=before_all_snapshot,
+            container_project_source=container_project_source,
+            container_project_files=container_project_files,
+            container_package_cache=container_package_cache,
+            wheel_cache=wheel_cache,
+            shared_cache=shared_cache,
+            index_proxy=index_proxy,
+            cache_size_limit=cache_size_limit,
         )
 
     def _check_pinned_image(self, value: str, pinned_images: Mapping[str, str]) -> None:
@@ -971,6 +1056,7 @@ def _compute_build_options(self, identifier: str | None) -> BuildOptions:
                 xbuild_files=xbuild_files,
                 repair_command=repair_command,
                 environment=environment,
+                environment_pass=environment_pass,
                 dependency_constraints=dependency_constraints,
                 manylinux_images=manylinux_images or None,
                 musllinux_images=musllinux_images or None,
@@ -982,6 +1068,18 @@ def _compute_build_options(self, identifier: str | None) -> BuildOptions:
                 audit_requires=audit_requires,
             )
 
+    def select_shard(self, identifiers: Iterable[str]) -> None:
+        """
+        Narrows the selected builds to `identifiers`, this machine's share of
+        a run that's split with --shard.
+        """
+        build_selector = dataclasses.replace(
+            self.globals.build_selector, shard=frozenset(identifiers)
+        )
+        self.globals = dataclasses.replace(self.globals, build_selector=build_selector)
+        # the build options hold the globals, so they're computed again
+        self.build_options.cache_clear()
+
     def check_for_invalid_configuration(self, identifiers: Iterable[str]) -> None:
         if self.platform in {"macos", "windows"}:
             before_all_values = {self.build_options(i).before_all for i in identifiers}
@@ -1121,6 +1219,41 @@ def option_summary_value(option_value: Any) -> str:  # noqa: ANN401
         return str(option_value)
 
 
+def _parse_jobs(option_name: str, value: str) -> int:
+    """
+    Parses the value of a build-jobs style option. "auto" means one job per
+    CPU.
+
+    >>> _parse_jobs("build-jobs", "4")
+    4
+    >>> _parse_jobs("build-jobs", "auto") >= 1
+    True
+    """
+    value = value.strip()
+    if value == "auto":
+        return os.cpu_count() or 1
+
+    try:
+        build_jobs = int(value)
+    except ValueError:
+        build_jobs = 0
+
+    if build_jobs < 1:
+        msg = f"{option_name} must be a positive integer or 'auto', got {value!r}"
+        raise errors.ConfigurationError(msg)
+
+    return build_jobs
+
+
+def _parse_choice(option_name: str, value: str, choices: tuple[str, ...]) -> str:
+    value = value.strip()
+    if value not in choices:
+        names = ", ".join(repr(n) for n in choices)
+        msg = f"{option_name} must be one of {names}, got {value!r}"
+        raise errors.ConfigurationError(msg)
+    return value
+
+
 def compute_options(
     platform: PlatformName,
     command_line_arguments: CommandLineArguments,
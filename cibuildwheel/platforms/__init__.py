@@ -16,6 +16,7 @@
     from cibuildwheel.options import Options
     from cibuildwheel.selector import BuildSelector
     from cibuildwheel.typing import GenericPythonConfiguration, PlatformName
+    from cibuildwheel.util.prefetch import ToolchainAsset
 
 
 class PlatformModule(Protocol):
@@ -27,6 +28,10 @@ def get_python_configurations(
         self, build_selector: BuildSelector, architectures: set[Architecture]
     ) -> Sequence[GenericPythonConfiguration]: ...
 
+    def toolchain_assets(
+        self, options: Options, identifiers: Sequence[str]
+    ) -> Sequence[ToolchainAsset]: ...
+
     def build(self, options: Options, tmp_path: Path) -> None: ...
 
 
@@ -7,13 +7,16 @@
     "cibuildwheel.audit",
     "cibuildwheel.frontend",
     "cibuildwheel.logger",
+    "cibuildwheel.util.cache_index",
     "cibuildwheel.util.cmd",
     "cibuildwheel.util.file",
     "cibuildwheel.util.helpers",
     "cibuildwheel.util.packaging",
+    "cibuildwheel.util.prefetch",
     "cibuildwheel.util.python_build_standalone",
     "cibuildwheel.venv",
     "filelock",
+    "functools",
     "packaging",
     "packaging.utils",
     "pathlib",
@@ -28,6 +31,7 @@
     "typing",
 }
 
+import functools
 import os
 import platform
 import re
@@ -57,6 +61,7 @@
 )
 from cibuildwheel.logger import log
 from cibuildwheel.util import resources
+from cibuildwheel.util.cache_index import record_cache_use
 from cibuildwheel.util.cmd import call, shell
 from cibuildwheel.util.file import (
     CIBW_CACHE_PATH,
@@ -64,14 +69,21 @@
     download,
     move_file,
     remove_on_error,
+    verify_file,
 )
 from cibuildwheel.util.helpers import prepare_command
 from cibuildwheel.util.packaging import find_compatible_wheel
-from cibuildwheel.util.python_build_standalone import create_python_build_standalone_environment
-from cibuildwheel.venv import constraint_flags, find_uv, virtualenv
+from cibuildwheel.util.prefetch import ToolchainAsset
+from cibuildwheel.util.python_build_standalone import (
+    create_python_build_standalone_environment,
+    python_build_standalone_asset,
+)
+from cibuildwheel.venv import constraint_flags, find_uv, virtualenv, virtualenv_asset
 
 TYPE_CHECKING = False
 if TYPE_CHECKING:
+    from collections.abc import Sequence
+
     from cibuildwheel.options import BuildOptions, Options
     from cibuildwheel.selector import BuildSelector
     from cibuildwheel.typing import PathOrStr
@@ -122,6 +134,24 @@ def get_python_configurations(
     ]
 
 
+def toolchain_assets(options: Options, identifiers: Sequence[str]) -> list[ToolchainAsset]:
+    assets = []
+    for config in all_python_configurations():
+        if config.identifier not in identifiers:
+            continue
+        assets.append(
+            ToolchainAsset(
+                name=config.url.rpartition("/")[-1],
+                fetch=functools.partial(download_target_python, config),
+            )
+        )
+        assets.append(python_build_standalone_asset(config.version, CIBW_CACHE_PATH))
+        build_options = options.build_options(config.identifier)
+        if build_options.build_frontend.name not in {"build[uv]", "uv"}:
+            assets.append(virtualenv_asset(config.version))
+    return assets
+
+
 def shell_prepared(command: str, *, build_options: BuildOptions, env: dict[str, str]) -> None:
     shell(
         prepare_command(command, project=".", package=build_options.package_dir),
@@ -211,13 +241,22 @@ def build(options: Options, tmp_path: Path) -> None:
         raise errors.FatalError(msg) from error
 
 
-def setup_target_python(config: PythonConfiguration, build_path: Path) -> Path:
-    log.step("Installing target Python...")
+def download_target_python(config: PythonConfiguration) -> Path:
     python_tgz = CIBW_CACHE_PATH / config.url.rpartition("/")[-1]
     with FileLock(f"{python_tgz}.lock"):
+        record_cache_use(python_tgz)
+        if python_tgz.exists() and not verify_file(python_tgz, config.sha256):
+            print(f"Cached {python_tgz.name} doesn't match its SHA256; redownloading.")
+            python_tgz.unlink()
         if not python_tgz.exists():
             with remove_on_error(python_tgz):
                 download(config.url, python_tgz, sha256=config.sha256)
+    return python_tgz
+
+
+def setup_target_python(config: PythonConfiguration, build_path: Path) -> Path:
+    log.step("Installing target Python...")
+    python_tgz = download_target_python(config)
 
     python_dir = build_path / "python"
     python_dir.mkdir()
@@ -6,12 +6,15 @@
     "cibuildwheel.logger",
     "cibuildwheel.platforms.macos",
     "cibuildwheel.util",
+    "cibuildwheel.util.cache_index",
     "cibuildwheel.util.cmd",
     "cibuildwheel.util.file",
     "cibuildwheel.util.helpers",
     "cibuildwheel.util.packaging",
+    "cibuildwheel.util.prefetch",
     "cibuildwheel.venv",
     "filelock",
+    "functools",
     "packaging",
     "packaging.version",
     "pathlib",
@@ -24,6 +27,7 @@
 }
 
 import dataclasses
+import functools
 import os
 import platform
 import shlex
@@ -47,6 +51,7 @@
 from cibuildwheel.logger import log
 from cibuildwheel.platforms.macos import install_cpython as install_build_cpython
 from cibuildwheel.util import resources
+from cibuildwheel.util.cache_index import record_cache_use
 from cibuildwheel.util.cmd import call, shell, split_command
 from cibuildwheel.util.file import (
     CIBW_CACHE_PATH,
@@ -57,7 +62,8 @@
 )
 from cibuildwheel.util.helpers import prepare_command, unwrap_preserving_paragraphs
 from cibuildwheel.util.packaging import find_compatible_wheel
-from cibuildwheel.venv import constraint_flags, virtualenv
+from cibuildwheel.util.prefetch import ToolchainAsset, with_temporary_directory
+from cibuildwheel.venv import constraint_flags, virtualenv, virtualenv_asset
 
 TYPE_CHECKING = False
 if TYPE_CHECKING:
@@ -163,6 +169,26 @@ def get_python_configurations(
     return python_configurations
 
 
+def toolchain_assets(
+    options: Options,  # noqa: ARG001
+    identifiers: Sequence[str],
+) -> list[ToolchainAsset]:
+    # the build Python is installed system-wide from the python.org
+    # installer, so it's not fetched ahead of time
+    assets = []
+    for config in all_python_configurations():
+        if config.identifier not in identifiers or "t-ios" in config.identifier:
+            continue
+        install = functools.partial(install_target_cpython, config=config, free_threading=False)
+        assets.append(
+            ToolchainAsset(
+                name=config.url.rsplit("/", 1)[-1], fetch=with_temporary_directory(install)
+            )
+        )
+        assets.append(virtualenv_asset(config.version))
+    return assets
+
+
 def install_target_cpython(tmp: Path, config: PythonConfiguration, free_threading: bool) -> Path:
     if free_threading:
         msg = "Free threading builds aren't available for iOS (yet)"
@@ -174,6 +200,7 @@ def install_target_cpython(tmp: Path, config: PythonConfiguration, free_threadin
     assert ios_python_tar_gz.endswith(extension)
     installation_path = CIBW_CACHE_PATH / ios_python_tar_gz[: -len(extension)]
     with FileLock(str(installation_path) + ".lock"):
+        record_cache_use(installation_path)
         if not installation_path.exists():
             downloaded_tar_gz = tmp / ios_python_tar_gz
             download(config.url, downloaded_tar_gz, sha256=config.sha256)
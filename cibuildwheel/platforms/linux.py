@@ -5,46 +5,92 @@
     "cibuildwheel.frontend",
     "cibuildwheel.logger",
     "cibuildwheel.util",
+    "cibuildwheel.util.cache_index",
     "cibuildwheel.util.file",
+    "cibuildwheel.util.file_selection",
     "cibuildwheel.util.helpers",
+    "cibuildwheel.util.index_proxy",
     "cibuildwheel.util.packaging",
+    "cibuildwheel.util.resource_usage",
+    "cibuildwheel.util.wheel_cache",
     "collections",
+    "concurrent",
+    "concurrent.futures",
     "contextlib",
+    "hashlib",
+    "json",
     "pathlib",
+    "re",
     "shutil",
     "subprocess",
+    "tempfile",
     "textwrap",
     "typing",
 }
 
+import concurrent.futures
 import contextlib
 import dataclasses
+import hashlib
+import json
+import re
 import shutil
 import subprocess
 import sys
+import tempfile
 import textwrap
+import threading
 from collections import OrderedDict
 from pathlib import Path, PurePath, PurePosixPath
-from typing import assert_never
+from typing import TypeVar, assert_never
 
 from cibuildwheel import errors
 from cibuildwheel.architecture import Architecture
 from cibuildwheel.audit import needs_audit, run_audit
 from cibuildwheel.frontend import get_build_frontend_extra_flags, prepare_config_settings
 from cibuildwheel.logger import log
-from cibuildwheel.oci_container import OCIContainer, OCIContainerEngineConfig, OCIPlatform
+from cibuildwheel.oci_container import (
+    SNAPSHOT_REPOSITORY,
+    OCIContainer,
+    OCIContainerEngineConfig,
+    OCIPlatform,
+    create_volume_from_dir,
+    get_image_id,
+    pull_image,
+    remove_volume,
+)
 from cibuildwheel.util import resources
-from cibuildwheel.util.file import copy_test_sources
+from cibuildwheel.util.cache_index import record_cache_use
+from cibuildwheel.util.file import BUNDLE_WHEELHOUSE_NAME, CIBW_CACHE_PATH, copy_test_sources
+from cibuildwheel.util.file_selection import select_project_files, tar_file_list
 from cibuildwheel.util.helpers import prepare_command, unwrap
+from cibuildwheel.util.index_proxy import get_index_proxy
 from cibuildwheel.util.packaging import find_compatible_wheel
+from cibuildwheel.util.resource_usage import sample_usage
+from cibuildwheel.util.wheel_cache import WheelCache, get_wheel_cache
 
 TYPE_CHECKING = False
 if TYPE_CHECKING:
-    from collections.abc import Iterable, Iterator, Sequence, Set
+    from collections.abc import Callable, Iterable, Iterator, Sequence, Set
 
-    from cibuildwheel.options import BuildOptions, Options
+    from cibuildwheel.options import BuildOptions, ContainerProjectSource, Options
     from cibuildwheel.selector import BuildSelector
     from cibuildwheel.typing import PathOrStr
+    from cibuildwheel.util.prefetch import ToolchainAsset
+
+T = TypeVar("T")
+
+_audit_lock = threading.Lock()
+
+# where the project is mounted read-only, when it's not copied from the host
+CONTAINER_PROJECT_SOURCE_PATH = PurePosixPath("/cibuildwheel/project-source")
+CONTAINER_PROJECT_FILE_LIST_PATH = PurePosixPath("/cibuildwheel/project-files")
+
+# where the pip and uv caches are mounted, with container-package-cache
+CONTAINER_PACKAGE_CACHE_PATH = PurePosixPath("/cibuildwheel/package-cache")
+
+# where the wheelhouse of an imported bundle is mounted read-only
+CONTAINER_BUNDLE_WHEELHOUSE_PATH = PurePosixPath("/cibuildwheel/bundle-wheelhouse")
 
 ARCHITECTURE_OCI_PLATFORM_MAP = {
     Architecture.x86_64: OCIPlatform.AMD64,
@@ -75,6 +121,235 @@ class BuildStep:
     container_engine: OCIContainerEngineConfig
     container_image: str
 
+    @property
+    def oci_platform(self) -> OCIPlatform:
+        architecture = Architecture(self.platform_tag.split("_", 1)[1])
+        return ARCHITECTURE_OCI_PLATFORM_MAP[architecture]
+
+
+class BuiltWheels:
+    """
+    The wheels built in one container. Builds that run at the same time in
+    the container share this, so access is locked.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._output_wheels: list[PurePosixPath] = []
+        self._claimed_names: set[str] = set()
+
+    def find_compatible_wheel(self, identifier: str) -> PurePosixPath | None:
+        with self._lock:
+            return find_compatible_wheel(self._output_wheels, identifier)
+
+    def claim(self, wheel: PurePosixPath, identifier: str) -> bool:
+        """
+        Reserves the name of a newly repaired wheel. Returns False if a build
+        running at the same time already claimed a wheel with that name that
+        is compatible with `identifier`.
+        """
+        with self._lock:
+            if wheel.name not in self._claimed_names:
+                self._claimed_names.add(wheel.name)
+                return True
+            if find_compatible_wheel([wheel], identifier) is None:
+                raise errors.AlreadyBuiltWheelError(wheel.name)
+            return False
+
+    def add(self, output_wheel: PurePosixPath) -> None:
+        with self._lock:
+            self._output_wheels.append(output_wheel)
+
+
+class ImagePrefetch:
+    """
+    Pulls the images of all the build steps in the background, so that later
+    steps' pulls overlap with the earlier steps' builds. With a single step
+    there's nothing to overlap, so the image is pulled as the container
+    starts, as usual.
+    """
+
+    def __init__(
+        self, build_steps: Sequence[BuildStep], executor: concurrent.futures.Executor
+    ) -> None:
+        self._pulls: dict[tuple[str, str, OCIPlatform], concurrent.futures.Future[None]] = {}
+        if len(build_steps) <= 1:
+            return
+
+        for build_step in build_steps:
+            key = self._key(build_step)
+            if key not in self._pulls:
+                self._pulls[key] = executor.submit(
+                    pull_image,
+                    build_step.container_engine,
+                    build_step.container_image,
+                    build_step.oci_platform,
+                )
+
+        print(f"info: Pulling {len(self._pulls)} container image(s) in the background...")
+
+    @staticmethod
+    def _key(build_step: BuildStep) -> tuple[str, str, OCIPlatform]:
+        return (
+            build_step.container_engine.name,
+            build_step.container_image,
+            build_step.oci_platform,
+        )
+
+    def wait(self, build_step: BuildStep) -> None:
+        pull = self._pulls.get(self._key(build_step))
+        if pull is None:
+            return
+        if not pull.done():
+            print("info: Waiting for the image to be pulled...")
+        # a failed pull isn't an error here - creating the container will
+        # pull again, and report the problem
+        concurrent.futures.wait([pull])
+
+
+class ProjectSource:
+    """
+    Gets the project into each container, following container-project-source
+    and container-project-files. With `copy`, it's streamed from the host
+    for every build step. With `volume` or `bind`, it's mounted read-only
+    into each container, and copied into place inside the container. A
+    volume is created and filled the first time a container engine needs
+    one, and removed by `close()`.
+
+    `files` are the paths within `project_dir` to copy, or None for all of
+    them.
+    """
+
+    def __init__(
+        self,
+        kind: ContainerProjectSource,
+        project_dir: Path,
+        files: Sequence[str] | None = None,
+    ) -> None:
+        self.kind = kind
+        self.project_dir = project_dir
+        self.files = files
+        self._lock = threading.Lock()
+        self._volumes: dict[str, tuple[OCIContainerEngineConfig, str]] = {}
+
+    def volumes(self, build_step: BuildStep) -> list[str]:
+        """
+        The volumes to give a container for `build_step`, in `--volume` syntax.
+        """
+        if self.kind == "copy":
+            return []
+        if self.kind == "bind":
+            return [f"{self.project_dir}:{CONTAINER_PROJECT_SOURCE_PATH}:ro"]
+
+        engine = build_step.container_engine
+        with self._lock:
+            if engine.name not in self._volumes:
+                print(
+                    "info: Copying the project into a volume, to share with the other build steps..."
+                )
+                volume = create_volume_from_dir(
+                    engine,
+                    self.project_dir,
+                    image=build_step.container_image,
+                    oci_platform=build_step.oci_platform,
+                    files=self.files,
+                )
+                self._volumes[engine.name] = (engine, volume)
+            _, volume = self._volumes[engine.name]
+        return [f"{volume}:{CONTAINER_PROJECT_SOURCE_PATH}:ro"]
+
+    def copy_into(self, container: OCIContainer, container_project_path: PurePath) -> None:
+        if self.kind == "copy":
+            container.copy_into(self.project_dir, container_project_path, files=self.files)
+            return
+
+        file_list_args: list[PathOrStr] = []
+        if self.kind == "bind" and self.files is not None:
+            # a volume only holds the selected files, but a bind mount shows
+            # everything, so tar is given the list
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                local_file_list = Path(tmp_dir) / "project-files"
+                local_file_list.write_text(tar_file_list(self.files), encoding="utf-8")
+                container.copy_into(local_file_list, CONTAINER_PROJECT_FILE_LIST_PATH)
+            file_list_args = ["-T", CONTAINER_PROJECT_FILE_LIST_PATH]
+
+        container.make_dirs(container_project_path)
+        container.call(
+            [
+                "sh",
+                "-c",
+                'src="$1" dest="$2"; shift 2; tar -C "$src" -cf - "$@" | tar -C "$dest" --no-same-owner -xf -',
+                "sh",
+                CONTAINER_PROJECT_SOURCE_PATH,
+                container_project_path,
+                *(file_list_args or ["."]),
+            ]
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            for engine, volume in self._volumes.values():
+                remove_volume(engine, volume)
+            self._volumes.clear()
+
+
+def package_cache_dir(oci_platform: OCIPlatform, image: str) -> Path:
+    """
+    The host directory holding the pip and uv caches of containers for
+    `oci_platform` running `image`. The wheels that pip and uv build from
+    sdists only suit one architecture and libc, and pip doesn't tell them
+    apart, so each architecture and image has its own. The image's tag or
+    digest is left out, so that updating the image keeps the cache.
+    """
+    repository = image.partition("@")[0]
+    if ":" in repository.rpartition("/")[2]:
+        repository = repository.rpartition(":")[0]
+    name = f"{oci_platform.value}-{repository}"
+    return CIBW_CACHE_PATH / "container-package-cache" / re.sub(r"[^\w.-]+", "-", name)
+
+
+def give_package_cache_to_owner(container: OCIContainer) -> None:
+    """
+    Files written by root in the container would belong to root on the host
+    too, so they're given to the owner of the package cache directory. This
+    also runs after a failed build, so it can't raise an error of its own.
+    """
+    with contextlib.suppress(subprocess.CalledProcessError, RuntimeError, OSError):
+        container.call(
+            [
+                "sh",
+                "-c",
+                'owner="$(stat -c %u:%g "$1")"; find "$1" ! -user "${owner%:*}" -exec chown -h "$owner" {} + 2>/dev/null || true',
+                "sh",
+                CONTAINER_PACKAGE_CACHE_PATH,
+            ]
+        )
+
+
+def bundle_wheelhouse_volumes() -> list[str]:
+    """
+    The wheelhouse that `cibuildwheel bundle import` unpacked, if any, so
+    that PIP_FIND_LINKS can point at it in the container.
+    """
+    wheelhouse = CIBW_CACHE_PATH / BUNDLE_WHEELHOUSE_NAME
+    if not wheelhouse.is_dir():
+        return []
+    return [f"{wheelhouse}:{CONTAINER_BUNDLE_WHEELHOUSE_PATH}:ro"]
+
+
+def package_cache_environment() -> dict[str, str]:
+    """
+    Points pip and uv at the mounted caches. Both of them write to their
+    caches atomically, and uv locks its cache, so containers from several
+    runs can share them.
+    """
+    return {
+        "PIP_CACHE_DIR": str(CONTAINER_PACKAGE_CACHE_PATH / "pip"),
+        "UV_CACHE_DIR": str(CONTAINER_PACKAGE_CACHE_PATH / "uv"),
+        # the cache is on another file system, so uv can't hardlink from it
+        "UV_LINK_MODE": "copy",
+    }
+
 
 def all_python_configurations() -> list[PythonConfiguration]:
     config_dicts = resources.read_python_configs("linux")
@@ -97,6 +372,15 @@ def get_python_configurations(
     ]
 
 
+def toolchain_assets(
+    options: Options,  # noqa: ARG001
+    identifiers: Sequence[str],  # noqa: ARG001
+) -> list[ToolchainAsset]:
+    # everything the builds need comes with the container images, which
+    # `build` pulls in the background
+    return []
+
+
 def container_image_for_python_configuration(
     config: PythonConfiguration, build_options: BuildOptions
 ) -> str:
@@ -194,24 +478,38 @@ def build_in_container(
     container_project_path: PurePath,
     container_package_dir: PurePath,
     local_tmp_dir: Path,
+    from_snapshot: bool = False,
+    project_source: ProjectSource | None = None,
+    wheel_cache: WheelCache | None = None,
 ) -> None:
     container_output_dir = PurePosixPath("/output")
 
     check_all_python_exist(platform_configs=platform_configs, container=container)
 
+    if project_source is None:
+        project_source = ProjectSource("copy", Path.cwd())
+
     log.step("Copying project into container...")
-    container.copy_into(Path.cwd(), container_project_path)
+    project_source.copy_into(container, container_project_path)
 
     before_all_options_identifier = platform_configs[0].identifier
     before_all_options = options.build_options(before_all_options_identifier)
 
-    if before_all_options.before_all:
+    if from_snapshot:
+        print(
+            f"info: Skipping before_all, the container was started from a snapshot ({container.image})"
+        )
+    elif before_all_options.before_all:
         log.step("Running before_all...")
 
         env = container.get_environment()
         env["PATH"] = f"/opt/python/cp39-cp39/bin:{env['PATH']}"
         env["PIP_DISABLE_PIP_VERSION_CHECK"] = "1"
         env["PIP_ROOT_USER_ACTION"] = "ignore"
+        if options.globals.container_package_cache:
+            env |= package_cache_environment()
+        if (index_proxy := get_index_proxy()) is not None:
+            env |= index_proxy.container_environment(container.engine.name)
         env = before_all_options.environment.as_dictionary(
             env, executor=container.environment_executor
         )
@@ -223,288 +521,449 @@ def build_in_container(
         )
         container.call(["sh", "-c", before_all_prepared], env=env)
 
-    built_wheels: list[PurePosixPath] = []
-
-    for config in platform_configs:
-        log.build_start(config.identifier)
-        local_identifier_tmp_dir = local_tmp_dir / config.identifier
-        build_options = options.build_options(config.identifier)
-        build_frontend = build_options.build_frontend
-        use_uv = build_frontend.name in {"build[uv]", "uv"}
-        pip = ["uv", "pip"] if use_uv else ["pip"]
-
-        log.step("Setting up build environment...")
-
-        dependency_constraint_flags: list[PathOrStr] = []
-        local_constraints_file = build_options.dependency_constraints.get_for_python_version(
-            version=config.version,
-            tmp_dir=local_identifier_tmp_dir,
+        if options.globals.before_all_snapshot:
+            log.step("Saving a snapshot of the container...")
+            base_image_id = container.image_id()
+            snapshot_image = before_all_snapshot_image(
+                base_image_id=base_image_id,
+                oci_platform=container.oci_platform,
+                before_all_options=before_all_options,
+            )
+            # the project isn't kept in the snapshot, so that builds see the
+            # same project files whether they start from a snapshot or not
+            container.remove(container_project_path)
+            container.commit_snapshot(snapshot_image, base_image_id=base_image_id)
+            project_source.copy_into(container, container_project_path)
+
+    # the same whether the container was started from a snapshot or not, so
+    # that the wheels built before the snapshot was saved are found
+    toolchain = "" if wheel_cache is None else container.base_image_id()
+
+    built_wheels = BuiltWheels()
+    container_build_jobs = min(options.globals.container_build_jobs, len(platform_configs))
+
+    if container_build_jobs <= 1:
+        for config in platform_configs:
+            build_identifier_in_container(
+                options=options,
+                config=config,
+                container=container,
+                container_project_path=container_project_path,
+                container_package_dir=container_package_dir,
+                container_output_dir=container_output_dir,
+                local_tmp_dir=local_tmp_dir,
+                built_wheels=built_wheels,
+                wheel_cache=wheel_cache,
+                toolchain=toolchain,
+            )
+    else:
+        log.step_end()
+        print(f"info: Building {len(platform_configs)} wheels, {container_build_jobs} at a time...")
+        step_output = log.output_buffer
+        usage_sampler = log.usage_sampler
+
+        def run_build(config: PythonConfiguration) -> None:
+            with log.buffered_output(into=step_output), log.sampling_usage(usage_sampler):
+                try:
+                    build_identifier_in_container(
+                        options=options,
+                        config=config,
+                        container=container,
+                        container_project_path=container_project_path,
+                        container_package_dir=container_package_dir,
+                        container_output_dir=container_output_dir,
+                        local_tmp_dir=local_tmp_dir,
+                        built_wheels=built_wheels,
+                        wheel_cache=wheel_cache,
+                        toolchain=toolchain,
+                    )
+                except BaseException:
+                    if log.step_active:
+                        log.step_end(success=False)
+                    raise
+
+        run_concurrently(
+            run_build,
+            platform_configs,
+            max_workers=container_build_jobs,
+            thread_name_prefix="cibw-build",
         )
-        if local_constraints_file:
-            container_constraints_file = PurePosixPath("/constraints.txt")
-            container.copy_into(local_constraints_file, container_constraints_file)
-            dependency_constraint_flags = ["-c", container_constraints_file]
 
-        env = container.get_environment()
-        env["PIP_DISABLE_PIP_VERSION_CHECK"] = "1"
-        env["PIP_ROOT_USER_ACTION"] = "ignore"
+    log.step("Copying wheels back to host...")
+    # copy the output back into the host
+    container.copy_out(container_output_dir, options.globals.output_dir)
+    log.step_end()
 
-        # put this config's python top of the list
-        python_bin = config.path / "bin"
-        env["PATH"] = f"{python_bin}:{env['PATH']}"
 
-        env = build_options.environment.as_dictionary(env, executor=container.environment_executor)
-        env["CIBUILDWHEEL_BUILD_IDENTIFIER"] = config.identifier
+def before_all_snapshot_image(
+    *, base_image_id: str, oci_platform: OCIPlatform, before_all_options: BuildOptions
+) -> str:
+    """
+    The tag of the image that a container is saved as after before_all. It
+    depends on everything that goes into running before_all - the image the
+    container started from, before_all itself, and the environment options.
+    """
+    key = json.dumps(
+        [
+            base_image_id,
+            oci_platform.value,
+            before_all_options.before_all,
+            repr(before_all_options.environment),
+        ]
+    )
+    return f"{SNAPSHOT_REPOSITORY}:{hashlib.sha256(key.encode()).hexdigest()[:32]}"
 
-        # check config python is still on PATH
-        which_python = container.call(["which", "python"], env=env, capture_output=True).strip()
-        if PurePosixPath(which_python) != python_bin / "python":
-            msg = "python available on PATH doesn't match our installed instance. If you have modified PATH, ensure that you don't overwrite cibuildwheel's entry or insert python above it."
-            raise errors.FatalError(msg)
-        container.call(["python", "-V", "-V"], env=env)
 
-        if use_uv:
-            which_uv = container.call(["which", "uv"], env=env, capture_output=True).strip()
-            if not which_uv:
-                msg = "uv not found on PATH. You must use a supported manylinux or musllinux environment with uv."
-                raise errors.FatalError(msg)
-        else:
-            which_pip = container.call(["which", "pip"], env=env, capture_output=True).strip()
-            if PurePosixPath(which_pip) != python_bin / "pip":
-                msg = "pip available on PATH doesn't match our installed instance. If you have modified PATH, ensure that you don't overwrite cibuildwheel's entry or insert pip above it."
-                raise errors.FatalError(msg)
+def find_before_all_snapshot(
+    *, options: Options, build_step: BuildStep, oci_platform: OCIPlatform
+) -> str | None:
+    """
+    Returns the snapshot image to start the build step's container from, if
+    one was saved by an earlier build.
+    """
+    before_all_options = options.build_options(build_step.platform_configs[0].identifier)
+    if not options.globals.before_all_snapshot or not before_all_options.before_all:
+        return None
+
+    base_image_id = get_image_id(build_step.container_engine, build_step.container_image)
+    if base_image_id is None:
+        # the image hasn't been pulled yet, so there can't be a snapshot of it
+        return None
+
+    snapshot_image = before_all_snapshot_image(
+        base_image_id=base_image_id,
+        oci_platform=oci_platform,
+        before_all_options=before_all_options,
+    )
+    if get_image_id(build_step.container_engine, snapshot_image) is None:
+        return None
+    return snapshot_image
 
-        compatible_wheel = find_compatible_wheel(built_wheels, config.identifier)
-        if compatible_wheel:
-            log.step_end()
-            print(
-                f"\nFound previously built wheel {compatible_wheel.name}, that's compatible with {config.identifier}. Skipping build step..."
-            )
-            repaired_wheel = compatible_wheel
-        else:
-            if build_options.before_build:
-                log.step("Running before_build...")
-                before_build_prepared = prepare_command(
-                    build_options.before_build,
-                    project=container_project_path,
-                    package=container_package_dir,
-                )
-                before_build_env = env.copy()
-                if use_uv:
-                    # On Linux, no virtualenv is created for the build environment
-                    # (unlike macOS/Windows, where one is set up before before_build
-                    # runs). uv requires either an active venv or an explicit Python
-                    # target to install packages. Pin UV_PYTHON to the exact interpreter
-                    # for this build so that `uv pip install` works in before_build
-                    # without requiring users to pass --system.
-                    before_build_env["UV_PYTHON"] = str(python_bin / "python")
-                container.call(["sh", "-c", before_build_prepared], env=before_build_env)
-
-            log.step("Building wheel...")
-
-            temp_dir = PurePosixPath("/tmp/cibuildwheel")
-            built_wheel_dir = temp_dir / "built_wheel"
-            container.call(["rm", "-rf", built_wheel_dir])
-            container.call(["mkdir", "-p", built_wheel_dir])
-
-            extra_flags = get_build_frontend_extra_flags(
-                build_frontend,
-                build_options.build_verbosity,
-                prepare_config_settings(
-                    build_options.config_settings,
-                    project=container_project_path,
-                    package=container_package_dir,
-                ),
-            )
 
-            match build_frontend.name:
-                case "pip":
-                    container.call(
-                        [
-                            "python",
-                            "-m",
-                            "pip",
-                            "wheel",
-                            container_package_dir,
-                            f"--wheel-dir={built_wheel_dir}",
-                            "--no-deps",
-                            *extra_flags,
-                        ],
-                        env=env,
-                    )
-                case "build" | "build[uv]":
-                    if use_uv and "--no-isolation" not in extra_flags and "-n" not in extra_flags:
-                        extra_flags += ["--installer=uv"]
-                    container.call(
-                        [
-                            "python",
-                            "-m",
-                            "build",
-                            container_package_dir,
-                            "--wheel",
-                            f"--outdir={built_wheel_dir}",
-                            *extra_flags,
-                        ],
-                        env=env,
-                    )
-                case "uv":
-                    container.call(
-                        [
-                            "uv",
-                            "build",
-                            f"--python={python_bin / 'python'}",
-                            container_package_dir,
-                            "--wheel",
-                            f"--out-dir={built_wheel_dir}",
-                            *extra_flags,
-                        ],
-                        env=env,
-                    )
-                case "pyodide-build":
-                    msg = "The 'pyodide-build' build frontend is not supported on this platform"
-                    raise errors.FatalError(msg)
-                case _:
-                    assert_never(build_frontend)
+def build_identifier_in_container(
+    *,
+    options: Options,
+    config: PythonConfiguration,
+    container: OCIContainer,
+    container_project_path: PurePath,
+    container_package_dir: PurePath,
+    container_output_dir: PurePosixPath,
+    local_tmp_dir: Path,
+    built_wheels: BuiltWheels,
+    wheel_cache: WheelCache | None = None,
+    toolchain: str = "",
+) -> None:
+    log.build_start(config.identifier)
+    local_identifier_tmp_dir = local_tmp_dir / config.identifier
+    build_options = options.build_options(config.identifier)
+    build_frontend = build_options.build_frontend
+    use_uv = build_frontend.name in {"build[uv]", "uv"}
+    pip = ["uv", "pip"] if use_uv else ["pip"]
+
+    log.step("Setting up build environment...")
+
+    # each build gets its own scratch dir, so that builds can run at the same
+    # time in one container
+    temp_dir = PurePosixPath("/tmp/cibuildwheel") / config.identifier
+
+    dependency_constraint_flags: list[PathOrStr] = []
+    local_constraints_file = build_options.dependency_constraints.get_for_python_version(
+        version=config.version,
+        tmp_dir=local_identifier_tmp_dir,
+    )
+    if local_constraints_file:
+        container_constraints_file = temp_dir / "constraints.txt"
+        container.copy_into(local_constraints_file, container_constraints_file)
+        dependency_constraint_flags = ["-c", container_constraints_file]
+
+    wheel_cache_key = None
+    wheel_cache_lookup = None
+    if wheel_cache is not None and not built_wheels.find_compatible_wheel(config.identifier):
+        # the lookup can go on while the build environment is set up
+        wheel_cache_key = wheel_cache.key(
+            identifier=config.identifier,
+            build_options=build_options,
+            toolchain=toolchain,
+            constraints_path=local_constraints_file,
+        )
+        wheel_cache_lookup = wheel_cache.lookup(wheel_cache_key)
+
+    env = container.get_environment()
+    env["PIP_DISABLE_PIP_VERSION_CHECK"] = "1"
+    env["PIP_ROOT_USER_ACTION"] = "ignore"
+    if options.globals.container_package_cache:
+        env |= package_cache_environment()
+    if (index_proxy := get_index_proxy()) is not None:
+        env |= index_proxy.container_environment(container.engine.name)
+
+    # put this config's python top of the list
+    python_bin = config.path / "bin"
+    env["PATH"] = f"{python_bin}:{env['PATH']}"
+
+    env = build_options.environment.as_dictionary(env, executor=container.environment_executor)
+    env["CIBUILDWHEEL_BUILD_IDENTIFIER"] = config.identifier
+
+    # check config python is still on PATH, in a single round trip
+    which_python, python_version, which_installer = (
+        result.stdout.strip()
+        for result in container.call_batch(
+            [["which", "python"], ["python", "-V", "-V"], ["which", "uv" if use_uv else "pip"]],
+            env=env,
+        )
+    )
+    if PurePosixPath(which_python) != python_bin / "python":
+        msg = "python available on PATH doesn't match our installed instance. If you have modified PATH, ensure that you don't overwrite cibuildwheel's entry or insert python above it."
+        raise errors.FatalError(msg)
+    print(python_version)
+
+    if use_uv and not which_installer:
+        msg = "uv not found on PATH. You must use a supported manylinux or musllinux environment with uv."
+        raise errors.FatalError(msg)
+    if not use_uv and PurePosixPath(which_installer) != python_bin / "pip":
+        msg = "pip available on PATH doesn't match our installed instance. If you have modified PATH, ensure that you don't overwrite cibuildwheel's entry or insert pip above it."
+        raise errors.FatalError(msg)
+
+    compatible_wheel = built_wheels.find_compatible_wheel(config.identifier)
+    cached_wheel = wheel_cache_lookup.result() if wheel_cache_lookup is not None else None
+
+    if compatible_wheel:
+        log.step_end()
+        print(
+            f"\nFound previously built wheel {compatible_wheel.name}, that's compatible with {config.identifier}. Skipping build step..."
+        )
+        repaired_wheel = compatible_wheel
+    elif cached_wheel:
+        log.step_end()
+        print(f"\nFound {cached_wheel.name} in the wheel cache. Skipping build step...")
+        repaired_wheel = temp_dir / "repaired_wheel" / cached_wheel.name
+        container.remove(repaired_wheel.parent)
+        container.copy_into(cached_wheel, repaired_wheel)
+
+        if not built_wheels.claim(repaired_wheel, config.identifier):
+            compatible_wheel = repaired_wheel
+    else:
+        if build_options.before_build:
+            log.step("Running before_build...")
+            before_build_prepared = prepare_command(
+                build_options.before_build,
+                project=container_project_path,
+                package=container_package_dir,
+            )
+            before_build_env = env.copy()
+            if use_uv:
+                # On Linux, no virtualenv is created for the build environment
+                # (unlike macOS/Windows, where one is set up before before_build
+                # runs). uv requires either an active venv or an explicit Python
+                # target to install packages. Pin UV_PYTHON to the exact interpreter
+                # for this build so that `uv pip install` works in before_build
+                # without requiring users to pass --system.
+                before_build_env["UV_PYTHON"] = str(python_bin / "python")
+            container.call(["sh", "-c", before_build_prepared], env=before_build_env)
+
+        log.step("Building wheel...")
+
+        built_wheel_dir = temp_dir / "built_wheel"
+        repaired_wheel_dir = temp_dir / "repaired_wheel"
+        container.remove(built_wheel_dir, repaired_wheel_dir)
+        container.make_dirs(built_wheel_dir, repaired_wheel_dir)
+
+        extra_flags = get_build_frontend_extra_flags(
+            build_frontend,
+            build_options.build_verbosity,
+            prepare_config_settings(
+                build_options.config_settings,
+                project=container_project_path,
+                package=container_package_dir,
+            ),
+        )
 
-            try:
-                built_wheel = container.glob(built_wheel_dir, "*.whl")[0]
-            except IndexError:
-                raise errors.BuildProducedNoWheelError() from None
-
-            repaired_wheel_dir = temp_dir / "repaired_wheel"
-            container.call(["rm", "-rf", repaired_wheel_dir])
-            container.call(["mkdir", "-p", repaired_wheel_dir])
-
-            if built_wheel.name.endswith("none-any.whl"):
-                raise errors.NonPlatformWheelError()
-
-            if build_options.repair_command:
-                log.step("Repairing wheel...")
-                repair_command_prepared = prepare_command(
-                    build_options.repair_command,
-                    wheel=built_wheel,
-                    dest_dir=repaired_wheel_dir,
-                    package=container_package_dir,
-                    project=container_project_path,
+        match build_frontend.name:
+            case "pip":
+                container.call(
+                    [
+                        "python",
+                        "-m",
+                        "pip",
+                        "wheel",
+                        container_package_dir,
+                        f"--wheel-dir={built_wheel_dir}",
+                        "--no-deps",
+                        *extra_flags,
+                    ],
+                    env=env,
                 )
-                container.call(["sh", "-c", repair_command_prepared], env=env)
-            else:
-                container.call(["mv", built_wheel, repaired_wheel_dir])
-
-            match container.glob(repaired_wheel_dir, "*.whl"):
-                case []:
-                    raise errors.RepairStepProducedNoWheelError()
-                case [repaired_wheel]:
-                    pass
-                case too_many:
-                    raise errors.RepairStepProducedMultipleWheelsError([p.name for p in too_many])
-
-            if repaired_wheel.name in {wheel.name for wheel in built_wheels}:
-                raise errors.AlreadyBuiltWheelError(repaired_wheel.name)
-
-            log.step_end()
-
-            if needs_audit(build_options.audit_command, repaired_wheel.name):
-                local_abi3audit_dir = local_identifier_tmp_dir / "audit"
-                local_abi3audit_dir.mkdir(parents=True, exist_ok=True)
-                try:
-                    container.copy_out(repaired_wheel_dir, local_abi3audit_dir)
-                    local_wheel = local_abi3audit_dir / repaired_wheel.name
-                    run_audit(tmp_dir=local_tmp_dir, build_options=build_options, wheel=local_wheel)
-                finally:
-                    shutil.rmtree(local_abi3audit_dir, ignore_errors=True)
-
-        if build_options.test_command and build_options.test_selector(config.identifier):
-            log.step("Testing wheel...")
-
-            # set up a virtual environment to install and test from, to make sure
-            # there are no dependencies that were pulled in at build time.
-            if not use_uv:
+            case "build" | "build[uv]":
+                if use_uv and "--no-isolation" not in extra_flags and "-n" not in extra_flags:
+                    extra_flags += ["--installer=uv"]
                 container.call(
-                    ["pip", "install", "virtualenv", *dependency_constraint_flags], env=env
+                    [
+                        "python",
+                        "-m",
+                        "build",
+                        container_package_dir,
+                        "--wheel",
+                        f"--outdir={built_wheel_dir}",
+                        *extra_flags,
+                    ],
+                    env=env,
                 )
+            case "uv":
+                container.call(
+                    [
+                        "uv",
+                        "build",
+                        f"--python={python_bin / 'python'}",
+                        container_package_dir,
+                        "--wheel",
+                        f"--out-dir={built_wheel_dir}",
+                        *extra_flags,
+                    ],
+                    env=env,
+                )
+            case "pyodide-build":
+                msg = "The 'pyodide-build' build frontend is not supported on this platform"
+                raise errors.FatalError(msg)
+            case _:
+                assert_never(build_frontend)
 
-            testing_temp_dir = PurePosixPath(
-                container.call(["mktemp", "-d"], capture_output=True).strip()
+        try:
+            built_wheel = container.glob(built_wheel_dir, "*.whl")[0]
+        except IndexError:
+            raise errors.BuildProducedNoWheelError() from None
+
+        if built_wheel.name.endswith("none-any.whl"):
+            raise errors.NonPlatformWheelError()
+
+        if build_options.repair_command:
+            log.step("Repairing wheel...")
+            repair_command_prepared = prepare_command(
+                build_options.repair_command,
+                wheel=built_wheel,
+                dest_dir=repaired_wheel_dir,
+                package=container_package_dir,
+                project=container_project_path,
             )
-            venv_dir = testing_temp_dir / "venv"
+            container.call(["sh", "-c", repair_command_prepared], env=env)
+        else:
+            container.call(["mv", built_wheel, repaired_wheel_dir])
 
-            if use_uv:
-                container.call(["uv", "venv", venv_dir, "--python", python_bin / "python"], env=env)
-            else:
-                # Use embedded dependencies from virtualenv to ensure determinism
-                venv_args = ["--no-periodic-update", "--pip=embed", "--no-setuptools"]
-                if "38" in config.identifier:
-                    venv_args.append("--no-wheel")
-                container.call(["python", "-m", "virtualenv", *venv_args, venv_dir], env=env)
-
-            virtualenv_env = env.copy()
-            virtualenv_env["PATH"] = f"{venv_dir / 'bin'}:{virtualenv_env['PATH']}"
-            virtualenv_env["VIRTUAL_ENV"] = str(venv_dir)
-            virtualenv_env = build_options.test_environment.as_dictionary(
-                prev_environment=virtualenv_env
+        match container.glob(repaired_wheel_dir, "*.whl"):
+            case []:
+                raise errors.RepairStepProducedNoWheelError()
+            case [repaired_wheel]:
+                pass
+            case too_many:
+                raise errors.RepairStepProducedMultipleWheelsError([p.name for p in too_many])
+
+        if not built_wheels.claim(repaired_wheel, config.identifier):
+            print(
+                f"\nWheel {repaired_wheel.name} was also built by another build running at the same time, only one will be kept."
             )
+            compatible_wheel = repaired_wheel
 
-            if build_options.before_test:
-                before_test_prepared = prepare_command(
-                    build_options.before_test,
-                    project=container_project_path,
-                    package=container_package_dir,
-                )
-                container.call(["sh", "-c", before_test_prepared], env=virtualenv_env)
+        log.step_end()
 
-            # Install the wheel we just built
-            container.call(
-                [*pip, "install", str(repaired_wheel) + build_options.test_extras],
-                env=virtualenv_env,
-            )
+        audit = needs_audit(build_options.audit_command, repaired_wheel.name)
+        if audit or wheel_cache_key is not None:
+            local_repaired_wheel_dir = local_identifier_tmp_dir / "repaired_wheel"
+            local_repaired_wheel_dir.mkdir(parents=True, exist_ok=True)
+            try:
+                container.copy_out(repaired_wheel_dir, local_repaired_wheel_dir)
+                local_wheel = local_repaired_wheel_dir / repaired_wheel.name
+                if audit:
+                    # the audit venv in local_tmp_dir is shared between builds
+                    with _audit_lock:
+                        run_audit(
+                            tmp_dir=local_tmp_dir, build_options=build_options, wheel=local_wheel
+                        )
+                if wheel_cache is not None and wheel_cache_key is not None:
+                    wheel_cache.put(wheel_cache_key, local_wheel)
+            finally:
+                shutil.rmtree(local_repaired_wheel_dir, ignore_errors=True)
+
+    if build_options.test_command and build_options.test_selector(config.identifier):
+        log.step("Testing wheel...")
+
+        # set up a virtual environment to install and test from, to make sure
+        # there are no dependencies that were pulled in at build time.
+        if not use_uv:
+            container.call(["pip", "install", "virtualenv", *dependency_constraint_flags], env=env)
+
+        testing_temp_dir = temp_dir / "test"
+        venv_dir = testing_temp_dir / "venv"
+        test_cwd = testing_temp_dir / "test_cwd"
+        container.remove(testing_temp_dir)
+        container.make_dirs(test_cwd)
 
-            # Install any requirements to run the tests
-            if build_options.test_requires:
-                container.call([*pip, "install", *build_options.test_requires], env=virtualenv_env)
+        if use_uv:
+            container.call(["uv", "venv", venv_dir, "--python", python_bin / "python"], env=env)
+        else:
+            # Use embedded dependencies from virtualenv to ensure determinism
+            venv_args = ["--no-periodic-update", "--pip=embed", "--no-setuptools"]
+            if "38" in config.identifier:
+                venv_args.append("--no-wheel")
+            container.call(["python", "-m", "virtualenv", *venv_args, venv_dir], env=env)
+
+        virtualenv_env = env.copy()
+        virtualenv_env["PATH"] = f"{venv_dir / 'bin'}:{virtualenv_env['PATH']}"
+        virtualenv_env["VIRTUAL_ENV"] = str(venv_dir)
+        virtualenv_env = build_options.test_environment.as_dictionary(
+            prev_environment=virtualenv_env
+        )
 
-            # Run the tests from a different directory
-            test_command_prepared = prepare_command(
-                build_options.test_command,
+        if build_options.before_test:
+            before_test_prepared = prepare_command(
+                build_options.before_test,
                 project=container_project_path,
                 package=container_package_dir,
-                wheel=repaired_wheel,
             )
+            container.call(["sh", "-c", before_test_prepared], env=virtualenv_env)
 
-            test_cwd = testing_temp_dir / "test_cwd"
-            container.call(["mkdir", "-p", test_cwd])
+        # Install the wheel we just built
+        container.call(
+            [*pip, "install", str(repaired_wheel) + build_options.test_extras],
+            env=virtualenv_env,
+        )
 
-            if build_options.test_sources:
-                copy_test_sources(
-                    build_options.test_sources,
-                    Path.cwd(),
-                    test_cwd,
-                    copy_into=container.copy_into,
-                )
-            else:
-                # Use the test_fail.py file to raise a nice error if the user
-                # tries to run tests in the cwd
-                container.copy_into(resources.TEST_FAIL_CWD_FILE, test_cwd / "test_fail.py")
+        # Install any requirements to run the tests
+        if build_options.test_requires:
+            container.call([*pip, "install", *build_options.test_requires], env=virtualenv_env)
 
-            container.call(["sh", "-c", test_command_prepared], cwd=test_cwd, env=virtualenv_env)
+        # Run the tests from a different directory
+        test_command_prepared = prepare_command(
+            build_options.test_command,
+            project=container_project_path,
+            package=container_package_dir,
+            wheel=repaired_wheel,
+        )
 
-            # clean up test environment
-            container.call(["rm", "-rf", testing_temp_dir])
+        if build_options.test_sources:
+            copy_test_sources(
+                build_options.test_sources,
+                Path.cwd(),
+                test_cwd,
+                copy_into=container.copy_into,
+            )
+        else:
+            # Use the test_fail.py file to raise a nice error if the user
+            # tries to run tests in the cwd
+            container.copy_into(resources.TEST_FAIL_CWD_FILE, test_cwd / "test_fail.py")
 
-        # move repaired wheel to output
-        output_wheel: Path | None = None
-        if compatible_wheel is None:
-            container.call(["mkdir", "-p", container_output_dir])
-            container.call(["mv", repaired_wheel, container_output_dir])
-            built_wheels.append(container_output_dir / repaired_wheel.name)
-            output_wheel = options.globals.output_dir / repaired_wheel.name
+        container.call(["sh", "-c", test_command_prepared], cwd=test_cwd, env=virtualenv_env)
 
-        log.build_end(output_wheel)
+        # clean up test environment
+        container.remove(testing_temp_dir)
 
-    log.step("Copying wheels back to host...")
-    # copy the output back into the host
-    container.copy_out(container_output_dir, options.globals.output_dir)
-    log.step_end()
+    # move repaired wheel to output
+    output_wheel: Path | None = None
+    if compatible_wheel is None:
+        container.call_batch(
+            [["mkdir", "-p", container_output_dir], ["mv", repaired_wheel, container_output_dir]]
+        )
+        built_wheels.add(container_output_dir / repaired_wheel.name)
+        output_wheel = options.globals.output_dir / repaired_wheel.name
+
+    log.build_end(output_wheel)
 
 
 def build(options: Options, tmp_path: Path) -> None:
@@ -521,52 +980,180 @@ def build(options: Options, tmp_path: Path) -> None:
     container_project_path = PurePosixPath("/project")
     container_package_dir = container_project_path / abs_package_dir.relative_to(cwd)
 
-    for build_step in get_build_steps(options, python_configurations):
-        try:
-            # check the container engine is installed
-            subprocess.run(
-                [build_step.container_engine.name, "--version"],
-                check=True,
-                stdout=subprocess.DEVNULL,
-            )
-        except subprocess.CalledProcessError as error:
-            msg = unwrap(
-                f"""
-                {build_step.container_engine.name} not found. An OCI exe like
-                Docker or Podman is required to run Linux builds. If you're
-                building on Travis CI, add `services: [docker]` to your
-                .travis.yml. If you're building on Circle CI in Linux, add a
-                `setup_remote_docker` step to your .circleci/config.yml.
-                """
-            )
-            raise errors.ConfigurationError(msg) from error
+    build_steps = list(get_build_steps(options, python_configurations))
+    build_jobs = min(options.globals.build_jobs, len(build_steps))
 
-        try:
-            ids_to_build = [x.identifier for x in build_step.platform_configs]
-            log.step(f"Starting container image {build_step.container_image}...")
+    project_source = ProjectSource(
+        options.globals.container_project_source,
+        cwd,
+        files=select_project_files(cwd, vcs=options.globals.container_project_files == "vcs"),
+    )
+
+    wheel_cache = get_wheel_cache(options)
 
-            print(f"info: This container will host the build for {', '.join(ids_to_build)}...")
-            architecture = Architecture(build_step.platform_tag.split("_", 1)[1])
+    pull_executor = concurrent.futures.ThreadPoolExecutor(thread_name_prefix="cibw-pull")
+    try:
+        image_prefetch = ImagePrefetch(build_steps, pull_executor)
 
-            with OCIContainer(
-                image=build_step.container_image,
-                oci_platform=ARCHITECTURE_OCI_PLATFORM_MAP[architecture],
+        if build_jobs <= 1:
+            for build_step in build_steps:
+                build_step_in_container(
+                    options=options,
+                    build_step=build_step,
+                    container_project_path=container_project_path,
+                    container_package_dir=container_package_dir,
+                    local_tmp_dir=tmp_path,
+                    image_prefetch=image_prefetch,
+                    project_source=project_source,
+                    wheel_cache=wheel_cache,
+                )
+            return
+
+        print(f"info: Running {len(build_steps)} build steps, {build_jobs} at a time...")
+
+        def run_build_step(build_step: BuildStep) -> None:
+            with log.buffered_output():
+                try:
+                    build_step_in_container(
+                        options=options,
+                        build_step=build_step,
+                        container_project_path=container_project_path,
+                        container_package_dir=container_package_dir,
+                        local_tmp_dir=tmp_path,
+                        image_prefetch=image_prefetch,
+                        project_source=project_source,
+                        wheel_cache=wheel_cache,
+                    )
+                except BaseException:
+                    if log.step_active:
+                        log.step_end(success=False)
+                    raise
+
+        run_concurrently(
+            run_build_step,
+            build_steps,
+            max_workers=build_jobs,
+            thread_name_prefix="cibw-build-step",
+        )
+    finally:
+        pull_executor.shutdown(wait=False, cancel_futures=True)
+        project_source.close()
+
+
+def run_concurrently(
+    fn: Callable[[T], None],
+    items: Sequence[T],
+    *,
+    max_workers: int,
+    thread_name_prefix: str,
+) -> None:
+    """
+    Calls `fn` on each of `items` in a pool of threads. If a call fails, no
+    more calls are started, but the ones already running are allowed to
+    finish. Then the first error is raised.
+    """
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix=thread_name_prefix
+    ) as executor:
+        futures = [executor.submit(fn, item) for item in items]
+        done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_EXCEPTION)
+        failed = [f for f in futures if f in done and f.exception() is not None]
+        if failed:
+            executor.shutdown(wait=True, cancel_futures=True)
+            failed[0].result()
+
+
+def build_step_in_container(
+    *,
+    options: Options,
+    build_step: BuildStep,
+    container_project_path: PurePath,
+    container_package_dir: PurePath,
+    local_tmp_dir: Path,
+    image_prefetch: ImagePrefetch | None = None,
+    project_source: ProjectSource | None = None,
+    wheel_cache: WheelCache | None = None,
+) -> None:
+    try:
+        # check the container engine is installed
+        subprocess.run(
+            [build_step.container_engine.name, "--version"],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+    except subprocess.CalledProcessError as error:
+        msg = unwrap(
+            f"""
+            {build_step.container_engine.name} not found. An OCI exe like
+            Docker or Podman is required to run Linux builds. If you're
+            building on Travis CI, add `services: [docker]` to your
+            .travis.yml. If you're building on Circle CI in Linux, add a
+            `setup_remote_docker` step to your .circleci/config.yml.
+            """
+        )
+        raise errors.ConfigurationError(msg) from error
+
+    try:
+        ids_to_build = [x.identifier for x in build_step.platform_configs]
+        log.step(f"Starting container image {build_step.container_image}...")
+
+        print(f"info: This container will host the build for {', '.join(ids_to_build)}...")
+        oci_platform = build_step.oci_platform
+
+        if image_prefetch is not None:
+            image_prefetch.wait(build_step)
+
+        snapshot_image = find_before_all_snapshot(
+            options=options, build_step=build_step, oci_platform=oci_platform
+        )
+
+        volumes = project_source.volumes(build_step) if project_source is not None else []
+        volumes += bundle_wheelhouse_volumes()
+        if options.globals.container_package_cache:
+            cache_dir = package_cache_dir(oci_platform, build_step.container_image)
+            record_cache_use(cache_dir)
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            volumes = [*volumes, f"{cache_dir}:{CONTAINER_PACKAGE_CACHE_PATH}"]
+
+        engine = build_step.container_engine
+        if (index_proxy := get_index_proxy()) is not None:
+            engine = dataclasses.replace(
+                engine,
+                create_args=(*engine.create_args, *index_proxy.container_create_args(engine.name)),
+            )
+
+        with (
+            OCIContainer(
+                image=snapshot_image or build_step.container_image,
+                oci_platform=oci_platform,
                 cwd=container_project_path,
-                engine=build_step.container_engine,
-            ) as container:
+                engine=engine,
+                volumes=volumes,
+            ) as container,
+            # looked up only when sampling is on
+            sample_usage(lambda: container.resource_usage()) as usage_sampler,  # noqa: PLW0108
+            log.sampling_usage(usage_sampler),
+        ):
+            try:
                 build_in_container(
                     options=options,
                     platform_configs=build_step.platform_configs,
                     container=container,
                     container_project_path=container_project_path,
                     container_package_dir=container_package_dir,
-                    local_tmp_dir=tmp_path,
+                    local_tmp_dir=local_tmp_dir,
+                    from_snapshot=snapshot_image is not None,
+                    project_source=project_source,
+                    wheel_cache=wheel_cache,
                 )
+            finally:
+                if options.globals.container_package_cache:
+                    give_package_cache_to_owner(container)
 
-        except subprocess.CalledProcessError as error:
-            troubleshoot(options, error)
-            msg = f"Command {error.cmd} failed with code {error.returncode}. {error.stdout or ''}"
-            raise errors.FatalError(msg) from error
+    except subprocess.CalledProcessError as error:
+        troubleshoot(options, error)
+        msg = f"Command {error.cmd} failed with code {error.returncode}. {error.stdout or ''}"
+        raise errors.FatalError(msg) from error
 
 
 def _matches_prepared_command(error_cmd: Sequence[str], command_template: str) -> bool:
@@ -588,6 +1175,14 @@ def troubleshoot(options: Options, error: Exception) -> None:
         # the wheel build step or the repair step failed
         so_files = list(options.globals.package_dir.glob("**/*.so"))
 
+        project_files = select_project_files(
+            Path.cwd(), vcs=options.globals.container_project_files == "vcs"
+        )
+        if project_files is not None:
+            # only the files copied into the container can cause trouble
+            copied_files = {Path.cwd() / f for f in project_files}
+            so_files = [f for f in so_files if f.absolute() in copied_files]
+
         if so_files:
             print(
                 textwrap.dedent(
@@ -606,6 +1201,10 @@ def troubleshoot(options: Options, error: Exception) -> None:
 
                     Files that belong to a virtual environment are probably not an issue
                     unless you used a custom command telling cibuildwheel to activate it.
+
+                    To copy only the files that git tracks or doesn't ignore into the
+                    container, set container-project-files to "vcs". Files can also be
+                    left out with a .cibwignore file.
                     """
                 ),
                 file=sys.stderr,
@@ -6,10 +6,13 @@
     "cibuildwheel.frontend",
     "cibuildwheel.logger",
     "cibuildwheel.util",
+    "cibuildwheel.util.cache_index",
     "cibuildwheel.util.cmd",
     "cibuildwheel.util.file",
     "cibuildwheel.util.helpers",
     "cibuildwheel.util.packaging",
+    "cibuildwheel.util.prefetch",
+    "cibuildwheel.util.wheel_cache",
     "cibuildwheel.venv",
     "filelock",
     "inspect",
@@ -48,6 +51,7 @@
 )
 from cibuildwheel.logger import log
 from cibuildwheel.util import resources
+from cibuildwheel.util.cache_index import record_cache_use
 from cibuildwheel.util.cmd import call, shell
 from cibuildwheel.util.file import (
     CIBW_CACHE_PATH,
@@ -58,11 +62,19 @@
 )
 from cibuildwheel.util.helpers import prepare_command, unwrap
 from cibuildwheel.util.packaging import find_compatible_wheel, get_pip_version
-from cibuildwheel.venv import constraint_flags, find_uv, target_marker_env, virtualenv
+from cibuildwheel.util.prefetch import ToolchainAsset, with_temporary_directory
+from cibuildwheel.util.wheel_cache import get_wheel_cache, host_toolchain
+from cibuildwheel.venv import (
+    constraint_flags,
+    find_uv,
+    target_marker_env,
+    virtualenv,
+    virtualenv_asset,
+)
 
 TYPE_CHECKING = False
 if TYPE_CHECKING:
-    from collections.abc import Set
+    from collections.abc import Sequence, Set
     from typing import Literal
 
     from cibuildwheel.architecture import Architecture
@@ -164,6 +176,58 @@ def get_python_configurations(
     return python_configurations
 
 
+def toolchain_assets(options: Options, identifiers: Sequence[str]) -> list[ToolchainAsset]:
+    # CPython is installed system-wide from the python.org installer, so it's
+    # not fetched ahead of time
+    assets = []
+    for config in all_python_configurations():
+        if config.identifier not in identifiers:
+            continue
+        if config.identifier.startswith("pp"):
+            install = functools.partial(install_pypy, url=config.url, sha256=config.sha256)
+            assets.append(
+                ToolchainAsset(
+                    name=config.url.rsplit("/", 1)[-1], fetch=with_temporary_directory(install)
+                )
+            )
+        elif config.identifier.startswith("gp"):
+            install = functools.partial(install_graalpy, url=config.url, sha256=config.sha256)
+            assets.append(
+                ToolchainAsset(
+                    name=config.url.rsplit("/", 1)[-1], fetch=with_temporary_directory(install)
+                )
+            )
+        build_options = options.build_options(config.identifier)
+        if build_options.build_frontend.name not in {"build[uv]", "uv"}:
+            assets.append(virtualenv_asset(config.version))
+    return assets
+
+
+def installer_assets(identifiers: Sequence[str]) -> list[ToolchainAsset]:
+    """
+    The python.org installers of the CPython builds. Builds download them
+    only when CPython isn't installed already, so they're not fetched ahead
+    of time - but a bundle needs them, for build machines without it.
+    """
+    return [
+        ToolchainAsset(
+            name=config.url.rsplit("/", 1)[-1],
+            fetch=functools.partial(download_cpython_installer, config.url, config.sha256),
+        )
+        for config in all_python_configurations()
+        if config.identifier in identifiers and config.identifier.startswith("cp")
+    ]
+
+
+def download_cpython_installer(url: str, sha256: str) -> Path:
+    pkg_path = CIBW_CACHE_PATH / "cpython-installer" / url.rsplit("/", 1)[-1]
+    with FileLock(str(pkg_path) + ".lock"):
+        record_cache_use(pkg_path)
+        if not pkg_path.exists():
+            download(url, pkg_path, sha256=sha256)
+    return pkg_path
+
+
 def install_cpython(_tmp: Path, version: str, url: str, free_threading: bool, sha256: str) -> Path:
     ft = "T" if free_threading else ""
     installation_path = Path(f"/Library/Frameworks/Python{ft}.framework/Versions/{version}")
@@ -187,10 +251,8 @@ def install_cpython(_tmp: Path, version: str, url: str, free_threading: bool, sh
                     """
                 )
                 raise errors.FatalError(msg)
-            python_filename = url.rsplit("/", maxsplit=1)[-1]
-            pkg_path = CIBW_CACHE_PATH / "cpython-installer" / python_filename
-            if not pkg_path.exists():
-                download(url, pkg_path, sha256=sha256)
+            # an imported bundle has put the installer in the cache already
+            pkg_path = download_cpython_installer(url, sha256)
             args = []
             if version.startswith("3.14"):
                 args += ["-applyChoiceChangesXML", str(resources.FREE_THREAD_ENABLE_314.resolve())]
@@ -221,6 +283,7 @@ def install_pypy(tmp: Path, url: str, sha256: str) -> Path:
     assert pypy_archive.endswith(extension)
     installation_path = CIBW_CACHE_PATH / pypy_archive[: -len(extension)]
     with FileLock(str(installation_path) + ".lock"):
+        record_cache_use(installation_path)
         if not installation_path.exists():
             downloaded_archive = tmp / pypy_archive
             download(url, downloaded_archive, sha256=sha256)
@@ -237,6 +300,7 @@ def install_graalpy(tmp: Path, url: str, sha256: str) -> Path:
     assert graalpy_archive.endswith(extension)
     installation_path = CIBW_CACHE_PATH / graalpy_archive[: -len(extension)]
     with FileLock(str(installation_path) + ".lock"):
+        record_cache_use(installation_path)
         if not installation_path.exists():
             downloaded_archive = tmp / graalpy_archive
             download(url, downloaded_archive, sha256=sha256)
@@ -481,6 +545,7 @@ def build(options: Options, tmp_path: Path) -> None:
             shell(before_all_prepared, env=env)
 
         built_wheels: list[Path] = []
+        wheel_cache = get_wheel_cache(options)
 
         for config in python_configurations:
             build_options = options.build_options(config.identifier)
@@ -505,6 +570,20 @@ def build(options: Options, tmp_path: Path) -> None:
                 version=config.version, tmp_dir=identifier_tmp_dir
             )
 
+            wheel_cache_key = None
+            wheel_cache_lookup = None
+            if wheel_cache is not None and not find_compatible_wheel(
+                built_wheels, config.identifier
+            ):
+                # the lookup can go on while the build environment is set up
+                wheel_cache_key = wheel_cache.key(
+                    identifier=config.identifier,
+                    build_options=build_options,
+                    toolchain=host_toolchain(config),
+                    constraints_path=constraints_path,
+                )
+                wheel_cache_lookup = wheel_cache.lookup(wheel_cache_key)
+
             base_python, env = setup_python(
                 identifier_tmp_dir / "build",
                 config,
@@ -516,12 +595,23 @@ def build(options: Options, tmp_path: Path) -> None:
             pip_version = None if use_uv else get_pip_version(env)
 
             compatible_wheel = find_compatible_wheel(built_wheels, config.identifier)
+            cached_wheel = wheel_cache_lookup.result() if wheel_cache_lookup is not None else None
+
             if compatible_wheel:
                 log.step_end()
                 print(
                     f"\nFound previously built wheel {compatible_wheel.name}, that's compatible with {config.identifier}. Skipping build step..."
                 )
                 repaired_wheel = compatible_wheel
+            elif cached_wheel:
+                log.step_end()
+                print(f"\nFound {cached_wheel.name} in the wheel cache. Skipping build step...")
+                repaired_wheel_dir.mkdir()
+                repaired_wheel = repaired_wheel_dir / cached_wheel.name
+                shutil.copy2(cached_wheel, repaired_wheel)
+
+                if repaired_wheel.name in {wheel.name for wheel in built_wheels}:
+                    raise errors.AlreadyBuiltWheelError(repaired_wheel.name)
             else:
                 if build_options.before_build:
                     log.step("Running before_build...")
@@ -639,6 +729,9 @@ def build(options: Options, tmp_path: Path) -> None:
 
                 run_audit(tmp_dir=tmp_path, build_options=build_options, wheel=repaired_wheel)
 
+                if wheel_cache is not None and wheel_cache_key is not None:
+                    wheel_cache.put(wheel_cache_key, repaired_wheel)
+
             if build_options.test_command and build_options.test_selector(config.identifier):
                 machine_arch = platform.machine()
                 testing_archs: list[Literal["x86_64", "arm64"]]
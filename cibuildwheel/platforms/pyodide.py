@@ -6,11 +6,14 @@
     "cibuildwheel.frontend",
     "cibuildwheel.logger",
     "cibuildwheel.util",
+    "cibuildwheel.util.cache_index",
     "cibuildwheel.util.cmd",
     "cibuildwheel.util.file",
     "cibuildwheel.util.helpers",
     "cibuildwheel.util.packaging",
+    "cibuildwheel.util.prefetch",
     "cibuildwheel.util.python_build_standalone",
+    "cibuildwheel.util.wheel_cache",
     "cibuildwheel.venv",
     "filelock",
     "json",
@@ -42,6 +45,7 @@
 from cibuildwheel.frontend import get_build_frontend_extra_flags, prepare_config_settings
 from cibuildwheel.logger import log
 from cibuildwheel.util import resources
+from cibuildwheel.util.cache_index import record_cache_use
 from cibuildwheel.util.cmd import call, shell
 from cibuildwheel.util.file import (
     CIBW_CACHE_PATH,
@@ -54,15 +58,18 @@
 )
 from cibuildwheel.util.helpers import prepare_command, unwrap, unwrap_preserving_paragraphs
 from cibuildwheel.util.packaging import find_compatible_wheel, get_pip_version
+from cibuildwheel.util.prefetch import ToolchainAsset
 from cibuildwheel.util.python_build_standalone import (
     PythonBuildStandaloneError,
     create_python_build_standalone_environment,
+    python_build_standalone_asset,
 )
-from cibuildwheel.venv import constraint_flags, virtualenv
+from cibuildwheel.util.wheel_cache import get_wheel_cache, host_toolchain
+from cibuildwheel.venv import constraint_flags, virtualenv, virtualenv_asset
 
 TYPE_CHECKING = False
 if TYPE_CHECKING:
-    from collections.abc import Set
+    from collections.abc import Sequence, Set
 
     from cibuildwheel.environment import ParsedEnvironment
     from cibuildwheel.options import Options
@@ -109,6 +116,7 @@ def ensure_node(major_version: str) -> Path:
     name = f"node-{version}-{platform}-{arch}"
     path = CIBW_CACHE_PATH / name
     with FileLock(str(path) + ".lock"):
+        record_cache_use(path)
         if not path.exists():
             url = f"{base_url}{version}/{name}.{ext}"
             with TemporaryDirectory() as tmp_path:
@@ -253,6 +261,7 @@ def install_xbuildenv(env: dict[str, str], xbuildenv_cache_path: Path, pyodide_v
     pyodide_root = xbuildenv_cache_path / pyodide_version / "xbuildenv" / "pyodide-root"
 
     with FileLock(CIBW_CACHE_PATH / "xbuildenv.lock"):
+        record_cache_use(xbuildenv_cache_path, hit=pyodide_root.exists())
         if pyodide_root.exists():
             return str(pyodide_root)
 
@@ -400,6 +409,26 @@ def get_python_configurations(
     return [c for c in all_python_configurations() if build_selector(c.identifier)]
 
 
+def toolchain_assets(options: Options, identifiers: Sequence[str]) -> list[ToolchainAsset]:
+    # the xbuildenvs are installed by pyodide-build, from within the build
+    # environment, so they can't be fetched ahead of time
+    assets = []
+    for config in all_python_configurations():
+        if config.identifier not in identifiers:
+            continue
+        assets.append(python_build_standalone_asset(config.version, CIBW_CACHE_PATH))
+        assets.append(virtualenv_asset(config.version))
+        build_options = options.build_options(config.identifier)
+        if build_options.test_command and build_options.test_selector(config.identifier):
+            assets.append(
+                ToolchainAsset(
+                    name=f"Node.js {config.node_version}",
+                    fetch=functools.partial(ensure_node, config.node_version),
+                )
+            )
+    return assets
+
+
 def build(options: Options, tmp_path: Path) -> None:
     python_configurations = get_python_configurations(
         options.globals.build_selector, options.globals.architectures
@@ -421,6 +450,7 @@ def build(options: Options, tmp_path: Path) -> None:
             shell(before_all_prepared, env=env)
 
         built_wheels: list[Path] = []
+        wheel_cache = get_wheel_cache(options)
 
         for config in python_configurations:
             build_options = options.build_options(config.identifier)
@@ -440,6 +470,20 @@ def build(options: Options, tmp_path: Path) -> None:
                 version=config.version, variant="pyodide", tmp_dir=identifier_tmp_dir
             )
 
+            wheel_cache_key = None
+            wheel_cache_lookup = None
+            if wheel_cache is not None and not find_compatible_wheel(
+                built_wheels, config.identifier
+            ):
+                # the lookup can go on while the build environment is set up
+                wheel_cache_key = wheel_cache.key(
+                    identifier=config.identifier,
+                    build_options=build_options,
+                    toolchain=host_toolchain(config),
+                    constraints_path=constraints_path,
+                )
+                wheel_cache_lookup = wheel_cache.lookup(wheel_cache_key)
+
             env = setup_python(
                 tmp=identifier_tmp_dir / "build",
                 python_configuration=config,
@@ -468,12 +512,22 @@ def build(options: Options, tmp_path: Path) -> None:
             env["_PYODIDE_EXTRA_MOUNTS"] = oldmounts + ":".join(extra_mounts)
 
             compatible_wheel = find_compatible_wheel(built_wheels, config.identifier)
+            cached_wheel = wheel_cache_lookup.result() if wheel_cache_lookup is not None else None
+
             if compatible_wheel:
                 log.step_end()
                 print(
                     f"\nFound previously built wheel {compatible_wheel.name}, that's compatible with {config.identifier}. Skipping build step..."
                 )
                 repaired_wheel = compatible_wheel
+            elif cached_wheel:
+                log.step_end()
+                print(f"\nFound {cached_wheel.name} in the wheel cache. Skipping build step...")
+                repaired_wheel = repaired_wheel_dir / cached_wheel.name
+                shutil.copy2(cached_wheel, repaired_wheel)
+
+                if repaired_wheel.name in {wheel.name for wheel in built_wheels}:
+                    raise errors.AlreadyBuiltWheelError(repaired_wheel.name)
             else:
                 if build_options.before_build:
                     log.step("Running before_build...")
@@ -535,6 +589,9 @@ def build(options: Options, tmp_path: Path) -> None:
 
                 run_audit(tmp_dir=tmp_path, build_options=build_options, wheel=repaired_wheel)
 
+                if wheel_cache is not None and wheel_cache_key is not None:
+                    wheel_cache.put(wheel_cache_key, repaired_wheel)
+
             if build_options.test_command and build_options.test_selector(config.identifier):
                 log.step("Testing wheel...")
 
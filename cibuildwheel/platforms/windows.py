@@ -6,10 +6,13 @@
     "cibuildwheel.frontend",
     "cibuildwheel.logger",
     "cibuildwheel.util",
+    "cibuildwheel.util.cache_index",
     "cibuildwheel.util.cmd",
     "cibuildwheel.util.file",
     "cibuildwheel.util.helpers",
     "cibuildwheel.util.packaging",
+    "cibuildwheel.util.prefetch",
+    "cibuildwheel.util.wheel_cache",
     "cibuildwheel.venv",
     "filelock",
     "pathlib",
@@ -26,7 +29,7 @@
 import shutil
 import subprocess
 import textwrap
-from functools import cache
+from functools import cache, partial
 from pathlib import Path
 from typing import assert_never
 
@@ -42,6 +45,7 @@
 )
 from cibuildwheel.logger import log
 from cibuildwheel.util import resources
+from cibuildwheel.util.cache_index import record_cache_use
 from cibuildwheel.util.cmd import call, shell
 from cibuildwheel.util.file import (
     CIBW_CACHE_PATH,
@@ -53,7 +57,15 @@
 )
 from cibuildwheel.util.helpers import prepare_command, unwrap
 from cibuildwheel.util.packaging import find_compatible_wheel, get_pip_version
-from cibuildwheel.venv import constraint_flags, find_uv, target_marker_env, virtualenv
+from cibuildwheel.util.prefetch import ToolchainAsset, with_temporary_directory
+from cibuildwheel.util.wheel_cache import get_wheel_cache, host_toolchain
+from cibuildwheel.venv import (
+    constraint_flags,
+    find_uv,
+    target_marker_env,
+    virtualenv,
+    virtualenv_asset,
+)
 
 TYPE_CHECKING = False
 if TYPE_CHECKING:
@@ -127,10 +139,44 @@ def get_python_configurations(
     return python_configurations
 
 
+def toolchain_assets(options: Options, identifiers: Sequence[str]) -> list[ToolchainAsset]:
+    assets = []
+    for config in all_python_configurations():
+        if config.identifier not in identifiers:
+            continue
+        if config.identifier.startswith("cp"):
+            assets.append(
+                ToolchainAsset(
+                    name=f"CPython {config.identifier}", fetch=partial(install_cpython, config)
+                )
+            )
+        elif config.identifier.startswith("pp"):
+            assert config.url is not None
+            install = partial(install_pypy, arch=config.arch, url=config.url, sha256=config.sha256)
+            assets.append(
+                ToolchainAsset(
+                    name=config.url.rsplit("/", 1)[-1], fetch=with_temporary_directory(install)
+                )
+            )
+        elif config.identifier.startswith("gp"):
+            assert config.url is not None
+            install = partial(install_graalpy, url=config.url, sha256=config.sha256)
+            assets.append(
+                ToolchainAsset(
+                    name=config.url.rsplit("/", 1)[-1], fetch=with_temporary_directory(install)
+                )
+            )
+        build_options = options.build_options(config.identifier)
+        if build_options.build_frontend.name not in {"build[uv]", "uv"}:
+            assets.append(virtualenv_asset(config.version))
+    return assets
+
+
 @cache
 def _ensure_nuget() -> Path:
     nuget = CIBW_CACHE_PATH / "nuget.exe"
     with FileLock(str(nuget) + ".lock"):
+        record_cache_use(nuget)
         if not nuget.exists():
             with remove_on_error(nuget):
                 download("https://dist.nuget.org/win-x86-commandline/latest/nuget.exe", nuget)
@@ -147,6 +193,7 @@ def install_cpython(configuration: PythonConfiguration, arch: str | None = None)
     installation_path = base_output_dir / (nuget_args[0] + "." + version) / "tools"
     free_threaded_str = "-freethreaded" if free_threaded else ""
     with FileLock(str(base_output_dir) + f"-{version}{free_threaded_str}-{arch}.lock"):
+        record_cache_use(installation_path)
         if not installation_path.exists():
             nuget = _ensure_nuget()
             with remove_on_error(installation_path.parent):
@@ -163,6 +210,7 @@ def install_pypy(tmp: Path, arch: str, url: str, sha256: str) -> Path:
     assert zip_filename.endswith(extension)
     installation_path = CIBW_CACHE_PATH / zip_filename[: -len(extension)]
     with FileLock(str(installation_path) + ".lock"):
+        record_cache_use(installation_path)
         if not installation_path.exists():
             pypy_zip = tmp / zip_filename
             download(url, pypy_zip, sha256=sha256)
@@ -178,6 +226,7 @@ def install_graalpy(tmp: Path, url: str, sha256: str) -> Path:
     assert zip_filename.endswith(extension)
     installation_path = CIBW_CACHE_PATH / zip_filename[: -len(extension)]
     with FileLock(str(installation_path) + ".lock"):
+        record_cache_use(installation_path)
         if not installation_path.exists():
             graalpy_zip = tmp / zip_filename
             download(url, graalpy_zip, sha256=sha256)
@@ -438,6 +487,7 @@ def build(options: Options, tmp_path: Path) -> None:
             shell(before_all_prepared, env=env)
 
         built_wheels: list[Path] = []
+        wheel_cache = get_wheel_cache(options)
 
         for config in python_configurations:
             build_options = options.build_options(config.identifier)
@@ -455,6 +505,20 @@ def build(options: Options, tmp_path: Path) -> None:
                 tmp_dir=identifier_tmp_dir,
             )
 
+            wheel_cache_key = None
+            wheel_cache_lookup = None
+            if wheel_cache is not None and not find_compatible_wheel(
+                built_wheels, config.identifier
+            ):
+                # the lookup can go on while the build environment is set up
+                wheel_cache_key = wheel_cache.key(
+                    identifier=config.identifier,
+                    build_options=build_options,
+                    toolchain=host_toolchain(config),
+                    constraints_path=constraints_path,
+                )
+                wheel_cache_lookup = wheel_cache.lookup(wheel_cache_key)
+
             # install Python
             base_python, env = setup_python(
                 identifier_tmp_dir / "build",
@@ -467,12 +531,23 @@ def build(options: Options, tmp_path: Path) -> None:
             pip_version = None if use_uv else get_pip_version(env)
 
             compatible_wheel = find_compatible_wheel(built_wheels, config.identifier)
+            cached_wheel = wheel_cache_lookup.result() if wheel_cache_lookup is not None else None
+
             if compatible_wheel:
                 log.step_end()
                 print(
                     f"\nFound previously built wheel {compatible_wheel.name}, that's compatible with {config.identifier}. Skipping build step..."
                 )
                 repaired_wheel = compatible_wheel
+            elif cached_wheel:
+                log.step_end()
+                print(f"\nFound {cached_wheel.name} in the wheel cache. Skipping build step...")
+                repaired_wheel_dir.mkdir()
+                repaired_wheel = repaired_wheel_dir / cached_wheel.name
+                shutil.copy2(cached_wheel, repaired_wheel)
+
+                if repaired_wheel.name in {wheel.name for wheel in built_wheels}:
+                    raise errors.AlreadyBuiltWheelError(repaired_wheel.name)
             else:
                 # run the before_build command
                 if build_options.before_build:
@@ -582,6 +657,9 @@ def build(options: Options, tmp_path: Path) -> None:
 
                 run_audit(tmp_dir=tmp_path, build_options=build_options, wheel=repaired_wheel)
 
+                if wheel_cache is not None and wheel_cache_key is not None:
+                    wheel_cache.put(wheel_cache_key, repaired_wheel)
+
             test_selected = options.globals.test_selector(config.identifier)
             if test_selected and config.arch == "ARM64" != platform_module.machine():
                 log.warning(
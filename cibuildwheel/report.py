@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+__lazy_modules__ = {
+    "cibuildwheel.util",
+    "cibuildwheel.util.resource_usage",
+    "hashlib",
+    "humanize",
+    "json",
+}
+
+import contextlib
+import dataclasses
+import hashlib
+import json
+import threading
+import time
+
+import humanize
+
+import cibuildwheel
+from cibuildwheel import errors
+from cibuildwheel.util.resource_usage import UsageSummary
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from collections.abc import Generator, Sequence
+    from pathlib import Path
+    from typing import Any, Literal, Self
+
+    ContainerTimeKind = Literal["start", "copy_in", "copy_out"]
+
+# the version of the report layout, bumped when old reports can't be compared
+REPORT_FORMAT = 1
+
+
+@dataclasses.dataclass(kw_only=True)
+class StepReport:
+    name: str
+    duration: float
+    success: bool
+    usage: UsageSummary | None = None
+
+
+@dataclasses.dataclass(kw_only=True)
+class WheelReport:
+    name: str
+    size: int
+    sha256: str
+
+
+@dataclasses.dataclass(kw_only=True)
+class BuildReport:
+    identifier: str
+    duration: float
+    wheel: WheelReport | None
+    steps: list[StepReport]
+    usage: UsageSummary | None = None
+
+
+@dataclasses.dataclass(kw_only=True)
+class CacheUse:
+    hits: int = 0
+    misses: int = 0
+
+
+@dataclasses.dataclass(kw_only=True)
+class ContainerReport:
+    """
+    The time spent starting a container, and copying files in and out of it.
+    """
+
+    image: str
+    start: float = 0.0
+    copy_in: float = 0.0
+    copy_out: float = 0.0
+
+
+@dataclasses.dataclass(kw_only=True)
+class RunReport:
+    """
+    A machine-readable record of a run - what each build and step took, the
+    wheels it made, how the cache did and what the containers cost. Written
+    by `--report-file`, and compared by `cibuildwheel report compare`.
+    """
+
+    cibuildwheel_version: str
+    platform: str
+    duration: float = 0.0
+    builds: list[BuildReport] = dataclasses.field(default_factory=list)
+    cache: dict[str, CacheUse] = dataclasses.field(default_factory=dict)
+    containers: dict[str, ContainerReport] = dataclasses.field(default_factory=dict)
+
+    def to_json(self) -> str:
+        return json.dumps({"format": REPORT_FORMAT, **dataclasses.asdict(self)}, indent=2)
+
+    @classmethod
+    def from_json(cls, text: str) -> Self:
+        data = json.loads(text)
+        if data.get("format") != REPORT_FORMAT:
+            msg = (
+                f"This report has format {data.get('format')!r}, but this version of "
+                f"cibuildwheel reads format {REPORT_FORMAT}."
+            )
+            raise errors.FatalError(msg)
+        return cls(
+            cibuildwheel_version=data["cibuildwheel_version"],
+            platform=data["platform"],
+            duration=data["duration"],
+            builds=[
+                BuildReport(
+                    identifier=build["identifier"],
+                    duration=build["duration"],
+                    wheel=WheelReport(**build["wheel"]) if build["wheel"] else None,
+                    steps=[
+                        StepReport(**{**step, "usage": _usage_from_json(step.get("usage"))})
+                        for step in build["steps"]
+                    ],
+                    usage=_usage_from_json(build.get("usage")),
+                )
+                for build in data["builds"]
+            ],
+            cache={name: CacheUse(**use) for name, use in data["cache"].items()},
+            containers={
+                name: ContainerReport(**container) for name, container in data["containers"].items()
+            },
+        )
+
+
+def _usage_from_json(data: dict[str, Any] | None) -> UsageSummary | None:
+    # resource usage is only there if it was sampled
+    return UsageSummary(**data) if data else None
+
+
+class Recorder:
+    """
+    Collects the report of a run, from the threads that do the builds.
+    """
+
+    def __init__(self, platform: str) -> None:
+        self.report = RunReport(cibuildwheel_version=cibuildwheel.__version__, platform=platform)
+        self._lock = threading.Lock()
+
+    def add_build(
+        self,
+        identifier: str,
+        *,
+        duration: float,
+        wheel: Path | None,
+        steps: Sequence[StepReport],
+        usage: UsageSummary | None = None,
+    ) -> None:
+        wheel_report = None
+        if wheel is not None:
+            with wheel.open("rb") as f:
+                sha256 = hashlib.file_digest(f, "sha256").hexdigest()
+            wheel_report = WheelReport(name=wheel.name, size=wheel.stat().st_size, sha256=sha256)
+        build = BuildReport(
+            identifier=identifier,
+            duration=duration,
+            wheel=wheel_report,
+            steps=list(steps),
+            usage=usage,
+        )
+        with self._lock:
+            self.report.builds.append(build)
+
+    def add_cache_use(self, name: str, *, hit: bool) -> None:
+        with self._lock:
+            use = self.report.cache.setdefault(name, CacheUse())
+            if hit:
+                use.hits += 1
+            else:
+                use.misses += 1
+
+    def add_container_time(
+        self, container: str, *, image: str, kind: ContainerTimeKind, duration: float
+    ) -> None:
+        with self._lock:
+            times = self.report.containers.setdefault(container, ContainerReport(image=image))
+            setattr(times, kind, getattr(times, kind) + duration)
+
+
+_recorder: Recorder | None = None
+
+
+def get_recorder() -> Recorder | None:
+    """
+    The recorder of this run's report, if one was asked for.
+    """
+    return _recorder
+
+
+@contextlib.contextmanager
+def use_report_file(path: Path | None, *, platform: str) -> Generator[None, None, None]:
+    """
+    Records a report of the block to `path`, if it's given. The report is
+    written when the block exits, even if it fails, so it covers the builds
+    that finished.
+    """
+    global _recorder  # noqa: PLW0603
+
+    if path is None:
+        yield
+        return
+
+    recorder = Recorder(platform)
+    _recorder = recorder
+    start = time.time()
+    try:
+        yield
+    finally:
+        _recorder = None
+        recorder.report.duration = time.time() - start
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(recorder.report.to_json(), encoding="utf-8")
+        print(f"info: Wrote a report of the run to {path}")
+
+
+@contextlib.contextmanager
+def container_timer(
+    container: str | None, *, image: str, kind: ContainerTimeKind
+) -> Generator[None, None, None]:
+    """
+    Adds the time the block takes to the `kind` time of `container`, if a
+    report is being recorded.
+    """
+    recorder = _recorder
+    if recorder is None or container is None:
+        yield
+        return
+
+    start = time.time()
+    try:
+        yield
+    finally:
+        recorder.add_container_time(container, image=image, kind=kind, duration=time.time() - start)
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class Regression:
+    """
+    Something that got slower or larger between two reports.
+    """
+
+    subject: str
+    measure: Literal["time", "size"]
+    old: float
+    new: float
+
+    @property
+    def change(self) -> float:
+        return (self.new - self.old) / self.old
+
+    def __str__(self) -> str:
+        if self.measure == "size":
+            old, new = humanize.naturalsize(self.old), humanize.naturalsize(self.new)
+        else:
+            old, new = f"{self.old:.2f}s", f"{self.new:.2f}s"
+        return f"{self.subject}: {old} -> {new} (+{self.change:.0%})"
+
+
+def _step_durations(build: BuildReport) -> dict[str, float]:
+    # a step can run more than once in a build, e.g. to test on several
+    # architectures
+    durations: dict[str, float] = {}
+    for step in build.steps:
+        durations[step.name] = durations.get(step.name, 0.0) + step.duration
+    return durations
+
+
+def compare_reports(
+    old: RunReport,
+    new: RunReport,
+    *,
+    time_threshold: float,
+    size_threshold: float,
+    min_duration: float,
+) -> list[Regression]:
+    """
+    The builds, steps and wheels that got slower or larger by more than the
+    thresholds, which are fractions - 0.1 is 10%. Time changes are ignored
+    when both durations are under `min_duration` seconds, they're noise.
+    Builds that are in only one of the reports aren't compared.
+    """
+    regressions = []
+
+    def compare_time(subject: str, old_duration: float, new_duration: float) -> None:
+        if max(old_duration, new_duration) < min_duration or old_duration <= 0:
+            return
+        if new_duration > old_duration * (1 + time_threshold):
+            regressions.append(
+                Regression(subject=subject, measure="time", old=old_duration, new=new_duration)
+            )
+
+    old_builds = {build.identifier: build for build in old.builds}
+    for build in new.builds:
+        old_build = old_builds.get(build.identifier)
+        if old_build is None:
+            continue
+        compare_time(build.identifier, old_build.duration, build.duration)
+
+        old_steps = _step_durations(old_build)
+        for step_name, duration in _step_durations(build).items():
+            if step_name in old_steps:
+                compare_time(f"{build.identifier} {step_name}", old_steps[step_name], duration)
+
+        old_wheel, wheel = old_build.wheel, build.wheel
+        if wheel and old_wheel and wheel.size > old_wheel.size * (1 + size_threshold):
+            regressions.append(
+                Regression(subject=wheel.name, measure="size", old=old_wheel.size, new=wheel.size)
+            )
+
+    return regressions
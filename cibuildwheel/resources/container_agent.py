@@ -0,0 +1,272 @@
+# This script is run inside build containers by cibuildwheel's OCIContainer.
+# It runs commands on behalf of the host, several at a time, and relays their
+# output back.
+#
+# The host and the agent talk over the agent's stdin/stdout in frames. Each
+# frame is a header - channel, kind, payload length - followed by the
+# payload. A channel is one command; the host picks the channel numbers.
+#
+# Besides running commands, it answers queries about the container - globs,
+# file stats and contents, the environment - without starting a new
+# interpreter for each one.
+#
+# It has to run on whatever Python the container provides, which can be as
+# old as 3.6, so it only uses the standard library and older syntax.
+
+import errno
+import glob
+import hashlib
+import json
+import os
+import shutil
+import stat
+import struct
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from typing import Any, BinaryIO
+
+HEADER = struct.Struct(">IBI")
+
+# frame kinds, keep in sync with FrameKind in cibuildwheel/oci_container.py
+RUN = 1  # host -> agent: run a command, JSON payload {"args", "env", "cwd"}
+STDOUT = 2  # agent -> host: output of a command
+STDERR = 3  # agent -> host: error output of a command
+EXIT = 4  # agent -> host: a command has finished, payload is the return code
+SHUTDOWN = 5  # host -> agent: exit the agent
+BATCH = 6  # host -> agent: run commands one after another, JSON payload {"commands", "check"}
+RESULT = 7  # agent -> host: JSON results of a batch or query
+QUERY = 8  # host -> agent: a filesystem or environment query, JSON payload {"op", ...}
+
+CHUNK_SIZE = 65536
+
+# the return code a shell uses for a command that can't be run
+NOT_RUNNABLE = 127
+
+# queries only read files small enough to hold in memory
+MAX_READ_SIZE = 1024 * 1024
+
+
+class Agent:
+    def __init__(self, stdin: BinaryIO, stdout: BinaryIO) -> None:
+        self.stdin = stdin
+        self.stdout = stdout
+        self.write_lock = threading.Lock()
+
+    def send(self, channel: int, kind: int, payload: bytes = b"") -> None:
+        with self.write_lock:
+            self.stdout.write(HEADER.pack(channel, kind, len(payload)))
+            self.stdout.write(payload)
+            self.stdout.flush()
+
+    def serve(self) -> None:
+        while True:
+            header = self.stdin.read(HEADER.size)
+            if len(header) < HEADER.size:
+                # the host has gone away
+                return
+            channel, kind, length = HEADER.unpack(header)
+            payload = self.stdin.read(length)
+
+            if kind == SHUTDOWN:
+                return
+
+            if kind in (RUN, BATCH, QUERY):
+                thread = threading.Thread(target=self.handle, args=(channel, kind, payload))
+                thread.daemon = True
+                thread.start()
+
+    def handle(self, channel: int, kind: int, payload: bytes) -> None:
+        # the host waits for a reply to every request, so one is sent even if
+        # the request can't be handled
+        handlers = {RUN: self.run, BATCH: self.run_batch, QUERY: self.query}
+        try:
+            request = json.loads(payload.decode("utf8", "surrogateescape"))
+            handlers[kind](channel, request)
+        except Exception as e:  # noqa: BLE001
+            message = error_message(e)
+            if kind == QUERY:
+                self.send(channel, RESULT, json.dumps({"error": [None, message, None]}).encode())
+            elif kind == BATCH:
+                result = {"returncode": NOT_RUNNABLE, "stdout": "", "stderr": message + "\n"}
+                self.send(channel, RESULT, json.dumps([result]).encode())
+            else:
+                self.send(channel, STDERR, (message + "\n").encode("utf8", "surrogateescape"))
+                self.send(channel, EXIT, str(NOT_RUNNABLE).encode())
+
+    def start(self, request: Any) -> "subprocess.Popen[bytes]":  # noqa: ANN401, UP037
+        env = os.environ.copy()
+        env.update(request["env"] or {})
+        return subprocess.Popen(
+            request["args"],
+            env=env,
+            cwd=request["cwd"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+
+    def run(self, channel: int, request: Any) -> None:  # noqa: ANN401
+        try:
+            process = self.start(request)
+        except Exception as e:  # noqa: BLE001
+            self.send(channel, STDERR, start_error_message(request, e))
+            self.send(channel, EXIT, str(NOT_RUNNABLE).encode())
+            return
+
+        forwarders = [
+            threading.Thread(target=self.forward, args=(channel, STDOUT, process.stdout)),
+            threading.Thread(target=self.forward, args=(channel, STDERR, process.stderr)),
+        ]
+        for forwarder in forwarders:
+            forwarder.start()
+        for forwarder in forwarders:
+            forwarder.join()
+
+        return_code = shell_return_code(process.wait())
+        self.send(channel, EXIT, str(return_code).encode())
+
+    def run_batch(self, channel: int, request: Any) -> None:  # noqa: ANN401
+        results = []
+        for command in request["commands"]:
+            try:
+                process = self.start(command)
+            except Exception as e:  # noqa: BLE001
+                return_code, stdout, stderr = NOT_RUNNABLE, b"", start_error_message(command, e)
+            else:
+                stdout, stderr = process.communicate()
+                return_code = shell_return_code(process.returncode)
+
+            results.append(
+                {
+                    "returncode": return_code,
+                    "stdout": stdout.decode("utf8", "surrogateescape"),
+                    "stderr": stderr.decode("utf8", "surrogateescape"),
+                }
+            )
+            if return_code != 0 and request["check"]:
+                break
+
+        self.send(channel, RESULT, json.dumps(results).encode("utf8"))
+
+    def query(self, channel: int, request: Any) -> None:  # noqa: ANN401
+        try:
+            reply = {"value": QUERIES[request["op"]](request)}
+        except OSError as e:
+            reply = {"error": [e.errno, e.strerror, e.filename]}
+        except Exception as e:  # noqa: BLE001
+            reply = {"error": [None, error_message(e), None]}
+        self.send(channel, RESULT, json.dumps(reply).encode("utf8"))
+
+    def forward(self, channel: int, kind: int, stream: BinaryIO) -> None:
+        fd = stream.fileno()
+        while True:
+            chunk = os.read(fd, CHUNK_SIZE)
+            if not chunk:
+                break
+            self.send(channel, kind, chunk)
+        stream.close()
+
+
+def query_glob(request: Any) -> Any:  # noqa: ANN401
+    return sorted(glob.glob(request["pattern"]))  # noqa: PTH207
+
+
+def query_exists(request: Any) -> Any:  # noqa: ANN401
+    return Path(request["path"]).exists()
+
+
+def query_stat(request: Any) -> Any:  # noqa: ANN401
+    result = Path(request["path"]).stat()
+    return {"mode": result.st_mode, "size": result.st_size, "mtime": result.st_mtime}
+
+
+def query_read(request: Any) -> Any:  # noqa: ANN401
+    with Path(request["path"]).open("rb") as f:
+        data = f.read(MAX_READ_SIZE + 1)
+    if len(data) > MAX_READ_SIZE:
+        raise OSError(errno.EFBIG, "File too large", request["path"])
+    return data.decode("utf8", "surrogateescape")
+
+
+def query_read_files(request: Any) -> Any:  # noqa: ANN401
+    # for small files that may not exist, like cgroup files - each is None if
+    # it can't be read
+    contents = {}
+    for path in request["paths"]:
+        try:
+            with Path(path).open("rb") as f:
+                contents[path] = f.read(MAX_READ_SIZE).decode("utf8", "surrogateescape")
+        except OSError:
+            contents[path] = None
+    return contents
+
+
+def query_hash(request: Any) -> Any:  # noqa: ANN401
+    digest = hashlib.sha256()
+    with Path(request["path"]).open("rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def query_environ(request: Any) -> Any:  # noqa: ANN401, ARG001
+    return dict(os.environ)
+
+
+def query_mkdir(request: Any) -> Any:  # noqa: ANN401
+    for path in request["paths"]:
+        Path(path).mkdir(parents=True, exist_ok=True)
+
+
+def query_remove(request: Any) -> Any:  # noqa: ANN401
+    for path in map(Path, request["paths"]):
+        try:
+            if stat.S_ISDIR(path.lstat().st_mode):
+                shutil.rmtree(path)
+            else:
+                path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+QUERIES = {
+    "glob": query_glob,
+    "exists": query_exists,
+    "stat": query_stat,
+    "read": query_read,
+    "read_files": query_read_files,
+    "hash": query_hash,
+    "environ": query_environ,
+    "mkdir": query_mkdir,
+    "remove": query_remove,
+}
+
+
+def error_message(error: Exception) -> str:
+    return f"container agent: {type(error).__name__}: {error}"
+
+
+def start_error_message(request: Any, error: Exception) -> bytes:  # noqa: ANN401
+    if not isinstance(error, OSError):
+        message = error_message(error)
+    elif request.get("cwd") and not Path(request["cwd"]).is_dir():
+        # Popen blames the command for a missing working directory
+        message = f"cd: {request['cwd']}: {error.strerror}"
+    else:
+        message = f"{request['args'][0]}: {error.strerror}"
+    return f"{message}\n".encode("utf8", "surrogateescape")
+
+
+def shell_return_code(return_code: int) -> int:
+    # a process killed by a signal is reported the way a shell would
+    return 128 - return_code if return_code < 0 else return_code
+
+
+def main() -> None:
+    Agent(sys.stdin.buffer, sys.stdout.buffer).serve()
+
+
+if __name__ == "__main__":
+    main()
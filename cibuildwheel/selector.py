@@ -79,8 +79,14 @@ class BuildSelector:
     skip_config: str
     requires_python: SpecifierSet | None = None
     enable: frozenset[EnableGroup] = frozenset()
+    # the identifiers of this machine's shard, when the builds are split
+    # across machines with --shard
+    shard: frozenset[str] | None = None
 
     def __call__(self, build_id: str) -> bool:
+        if self.shard is not None and build_id not in self.shard:
+            return False
+
         # Filter build selectors by python_requires if set
         if self.requires_python is not None:
             py_ver_str = build_id.split("-", maxsplit=1)[0].split("_", maxsplit=1)[0]
@@ -116,6 +122,7 @@ def options_summary(self) -> dict[str, str | list[str]]:
             "skip_config": self.skip_config,
             "requires_python": str(self.requires_python),
             "enable": sorted(group.value for group in self.enable),
+            **({"shard": sorted(self.shard)} if self.shard is not None else {}),
         }
 
 
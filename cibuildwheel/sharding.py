@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+__lazy_modules__ = {"cibuildwheel.architecture", "cibuildwheel.platforms", "math", "statistics"}
+
+import dataclasses
+import math
+import statistics
+
+from cibuildwheel.architecture import Architecture
+from cibuildwheel.platforms import linux
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from collections.abc import Mapping, Sequence, Set
+    from typing import Any
+
+    from cibuildwheel.options import Options
+    from cibuildwheel.typing import PlatformName
+
+# how much longer than a plain CPython build these take, when there are no
+# timings of earlier runs to go by
+EMULATION_COST = 10.0
+PYPY_COST = 1.5
+FREE_THREADED_COST = 1.2
+
+
+def shard(value: str) -> tuple[int, int]:
+    """
+    Parses a shard like "2/5", the second of five. Named for argparse, which
+    shows the name of the type in its errors.
+    """
+    index_str, sep, count_str = value.partition("/")
+    if not sep:
+        msg = f"expected INDEX/COUNT, like 1/4, got {value!r}"
+        raise ValueError(msg)
+    index, count = int(index_str), int(count_str)
+    if not 1 <= index <= count:
+        msg = f"the shard index must be between 1 and {count}, got {index}"
+        raise ValueError(msg)
+    return index, count
+
+
+def _native_linux_archs(*, portable: bool) -> frozenset[Architecture]:
+    if portable:
+        # the most common CI machine, so that every machine agrees
+        return frozenset({Architecture.x86_64, Architecture.i686})
+    native_arch = Architecture.native_arch("linux")
+    if native_arch is None:
+        return frozenset()
+    return frozenset({native_arch, *Architecture.bitness_archs("linux", "32")})
+
+
+def static_cost(identifier: str, *, native_archs: Set[Architecture] | None = None) -> float:
+    """
+    The cost of a build relative to a plain CPython one. Linux builds for an
+    architecture that isn't in `native_archs` are emulated.
+    """
+    python, _, platform_tag = identifier.partition("-")
+    cost = 1.0
+    if python.startswith(("pp", "gp")):
+        cost *= PYPY_COST
+    if python.endswith("t"):
+        cost *= FREE_THREADED_COST
+    if native_archs is not None:
+        arch = Architecture(platform_tag.split("_", 1)[1])
+        if arch not in native_archs:
+            cost *= EMULATION_COST
+    return cost
+
+
+def estimate_costs(
+    identifiers: Sequence[str],
+    *,
+    platform: PlatformName,
+    durations: Mapping[str, float] | None = None,
+    portable: bool = False,
+) -> dict[str, float]:
+    """
+    The estimated cost of each build on this machine. With the `durations` of
+    earlier runs, the costs are in seconds, and builds without one are scaled
+    from the static costs to match the ones with. Otherwise they're relative.
+    With `portable`, they're the same on any machine, as if it were x86_64.
+    """
+    native_archs = _native_linux_archs(portable=portable) if platform == "linux" else None
+    costs = {i: static_cost(i, native_archs=native_archs) for i in identifiers}
+    known = [i for i in identifiers if durations and i in durations]
+    if not durations or not known:
+        return costs
+
+    scale = statistics.mean(durations[i] / costs[i] for i in known)
+    return {i: durations[i] if i in known else costs[i] * scale for i in identifiers}
+
+
+def container_groups(
+    options: Options, *, platform: PlatformName, identifiers: Sequence[str]
+) -> list[list[str]]:
+    """
+    Groups the builds that run in the same container, sharing its startup and
+    before-all. Only Linux builds share containers, the rest are alone.
+    """
+    if platform != "linux":
+        return [[identifier] for identifier in identifiers]
+
+    selected = set(identifiers)
+    python_configurations = [
+        config for config in linux.all_python_configurations() if config.identifier in selected
+    ]
+    return [
+        [config.identifier for config in step.platform_configs]
+        for step in linux.get_build_steps(options, python_configurations)
+    ]
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class Shard:
+    identifiers: list[str]
+    cost: float
+
+
+def _split_group(group: list[str], pieces: int, costs: Mapping[str, float]) -> list[list[str]]:
+    # consecutive runs of the group, of about the same cost
+    target = sum(costs[i] for i in group) / pieces
+    result: list[list[str]] = [[]]
+    cost = 0.0
+    for identifier in group:
+        if result[-1] and cost >= target and len(result) < pieces:
+            result.append([])
+            cost = 0.0
+        result[-1].append(identifier)
+        cost += costs[identifier]
+    return result
+
+
+def plan_shards(
+    groups: Sequence[list[str]], costs: Mapping[str, float], *, count: int
+) -> list[Shard]:
+    """
+    Splits the builds into `count` shards of about the same cost. The builds
+    in a group stay together, unless the group is too big for one shard. The
+    plan only depends on its inputs, so every machine of a run computes the
+    same one. Some shards are empty if there are too few builds to go round.
+    """
+    target = sum(costs.values()) / count
+    units = []
+    for group in groups:
+        group_cost = sum(costs[i] for i in group)
+        pieces = min(len(group), math.ceil(round(group_cost / target, 6)))
+        units.extend(_split_group(group, pieces, costs))
+
+    # the biggest first, each to the shard with the least so far
+    units.sort(key=lambda unit: -sum(costs[i] for i in unit))
+    shard_builds: list[list[str]] = [[] for _ in range(count)]
+    loads = [0.0] * count
+    for unit in units:
+        index = min(range(count), key=lambda s: (loads[s], s))
+        shard_builds[index].extend(unit)
+        loads[index] += sum(costs[i] for i in unit)
+
+    order = {identifier: n for n, identifier in enumerate(i for g in groups for i in g)}
+    return [
+        Shard(identifiers=sorted(builds, key=order.__getitem__), cost=load)
+        for builds, load in zip(shard_builds, loads, strict=True)
+    ]
+
+
+def build_matrix(shards: Sequence[Shard], *, platform: PlatformName) -> dict[str, Any]:
+    """
+    The shards as a CI matrix, e.g. for GitHub Actions' `fromJSON`. Each entry
+    has a `build` selector, for CIBW_BUILD. Empty shards are left out.
+    """
+    return {
+        "include": [
+            {
+                "platform": platform,
+                "identifiers": s.identifiers,
+                "build": " ".join(s.identifiers),
+                "estimated_cost": round(s.cost, 1),
+            }
+            for s in shards
+            if s.identifiers
+        ]
+    }
@@ -19,3 +19,6 @@
 class GenericPythonConfiguration(Protocol):
     @property
     def identifier(self) -> str: ...
+
+    @property
+    def version(self) -> str: ...
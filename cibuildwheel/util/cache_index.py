@@ -0,0 +1,374 @@
+from __future__ import annotations
+
+__lazy_modules__ = {
+    "cibuildwheel.report",
+    "cibuildwheel.util.metadata_cache",
+    "filelock",
+    "humanize",
+    "re",
+    "shutil",
+    "threading",
+    "time",
+}
+
+import contextlib
+import dataclasses
+import os
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+
+import humanize
+from filelock import FileLock, Timeout
+
+from cibuildwheel.report import get_recorder
+from cibuildwheel.util.file import CIBW_CACHE_PATH, VERIFIED_SUFFIX
+from cibuildwheel.util.metadata_cache import MetadataCache
+from cibuildwheel.util.timing_history import TIMINGS_DB_NAME
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from collections.abc import Generator, Mapping, Sequence
+
+# when, and how often, each cache entry was used
+CACHE_INDEX_FILE_NAME = "cache-index.json"
+
+# directories where each child is a separate entry
+ENTRY_COLLECTIONS = frozenset(
+    {
+        "container-package-cache",
+        "cpython-installer",
+        "nuget-cpython",
+        "python-build-standalone",
+        "wheels",
+    }
+)
+
+# files that belong to the cache itself, rather than to an entry
+RESERVED_NAMES = frozenset(
+    {
+        "CACHEDIR.TAG",
+        CACHE_INDEX_FILE_NAME,
+        "oci-metadata.json",
+        "prune.lock",
+        TIMINGS_DB_NAME,
+    }
+)
+
+# entries used more recently than this are never pruned, another run may be
+# using them
+PRUNE_MIN_AGE = 60 * 60
+
+# during a run, uses are written to the index in batches, this often
+WRITE_DELAY = 5.0
+# and the entries the run has used are recorded as used again this often, so
+# that they're kept while it may still be using them
+KEEP_ALIVE_INTERVAL = PRUNE_MIN_AGE / 4
+
+_SIZE_UNITS = {
+    "": 1,
+    "k": 1000,
+    "m": 1000**2,
+    "g": 1000**3,
+    "t": 1000**4,
+    "ki": 1024,
+    "mi": 1024**2,
+    "gi": 1024**3,
+    "ti": 1024**4,
+}
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class CacheEntry:
+    """
+    Something in the cache that's used and removed as a whole - e.g. an
+    installed Python, a downloaded archive, or a cached wheel.
+    """
+
+    name: str
+    path: Path
+    size: int
+    last_used: float
+    hits: int
+
+
+def _index(cache_path: Path) -> MetadataCache:
+    return MetadataCache(cache_path / CACHE_INDEX_FILE_NAME)
+
+
+def entry_name(path: Path, cache_path: Path = CIBW_CACHE_PATH) -> str | None:
+    """
+    The name of the cache entry that `path` belongs to, or None if it's not
+    in the cache.
+    """
+    try:
+        parts = path.resolve().relative_to(cache_path.resolve()).parts
+    except ValueError:
+        return None
+    if not parts or parts[0] in RESERVED_NAMES:
+        return None
+    if parts[0] in ENTRY_COLLECTIONS:
+        return "/".join(parts[:2]) if len(parts) > 1 else None
+    return parts[0]
+
+
+def record_cache_use(
+    path: Path, *, hit: bool | None = None, cache_path: Path = CIBW_CACHE_PATH
+) -> None:
+    """
+    Notes that the cache entry holding `path` is being used, so that it's
+    pruned last. `hit` says whether it was already in the cache - by default,
+    whether `path` exists.
+    """
+    name = entry_name(path, cache_path)
+    if name is None:
+        return
+    if hit is None:
+        hit = path.exists()
+
+    if _use_batch is not None:
+        _use_batch.add(cache_path, name, hit=hit)
+    else:
+        _write_uses(cache_path, {name: int(hit)}, now=time.time())
+    if (recorder := get_recorder()) is not None:
+        recorder.add_cache_use(name, hit=hit)
+
+
+def _write_uses(cache_path: Path, hits: Mapping[str, int], *, now: float) -> None:
+    def update(entries: dict[str, object]) -> None:
+        for name, new_hits in hits.items():
+            record = entries.get(name)
+            old_hits = record.get("hits", 0) if isinstance(record, dict) else 0
+            entries[name] = {"last_used": now, "hits": old_hits + new_hits}
+
+    _index(cache_path).update_all(update)
+
+
+class _UseBatch:
+    """
+    The cache uses of a run, written to the index together, rather than a
+    rewrite of the index for each one. The entries that have been used are
+    recorded as used again every `KEEP_ALIVE_INTERVAL` until the run ends,
+    so that other runs don't prune them - e.g. a directory that a container
+    has mounted.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pending: dict[tuple[Path, str], int] = {}
+        self._used: set[tuple[Path, str]] = set()
+        self._refreshed = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="cibw-cache-index", daemon=True)
+        self._thread.start()
+
+    def add(self, cache_path: Path, name: str, *, hit: bool) -> None:
+        with self._lock:
+            key = (cache_path, name)
+            self._pending[key] = self._pending.get(key, 0) + int(hit)
+            self._used.add(key)
+
+    def flush(self) -> None:
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+            if time.monotonic() - self._refreshed >= KEEP_ALIVE_INTERVAL:
+                self._refreshed = time.monotonic()
+                pending = dict.fromkeys(self._used, 0) | pending
+
+        by_cache: dict[Path, dict[str, int]] = {}
+        for (cache_path, name), hits in pending.items():
+            by_cache.setdefault(cache_path, {})[name] = hits
+        now = time.time()
+        for cache_path, hits_by_name in by_cache.items():
+            _write_uses(cache_path, hits_by_name, now=now)
+
+    def _run(self) -> None:
+        while not self._stop.wait(WRITE_DELAY):
+            self.flush()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+
+
+_use_batch: _UseBatch | None = None
+
+
+@contextlib.contextmanager
+def use_cache_index() -> Generator[None, None, None]:
+    """
+    Writes the cache uses in the block to the index in batches, and keeps
+    the entries that were used from being pruned until the block ends.
+    """
+    global _use_batch  # noqa: PLW0603
+
+    previous = _use_batch
+    _use_batch = _UseBatch()
+    try:
+        yield
+    finally:
+        batch, _use_batch = _use_batch, previous
+        batch.close()
+
+
+def _entry_paths(cache_path: Path) -> list[tuple[str, Path]]:
+    entries = []
+    for path in sorted(cache_path.iterdir()):
+        # hidden names are scratch space, like a bundle being imported.
+        # Verification records belong to the file they're next to
+        if (
+            path.name in RESERVED_NAMES
+            or path.name.endswith((".lock", VERIFIED_SUFFIX))
+            or path.name.startswith(".")
+        ):
+            continue
+        if path.name in ENTRY_COLLECTIONS and path.is_dir():
+            entries += [
+                (f"{path.name}/{child.name}", child)
+                for child in sorted(path.iterdir())
+                if not child.name.endswith(".lock") and not child.name.startswith(".")
+            ]
+        else:
+            entries.append((path.name, path))
+    return entries
+
+
+def _size(path: Path) -> int:
+    if not path.is_dir() or path.is_symlink():
+        return path.lstat().st_size
+    size = 0
+    for dirpath, dirnames, filenames in os.walk(path):
+        for name in [*dirnames, *filenames]:
+            # an entry may be changing while it's measured
+            with contextlib.suppress(FileNotFoundError):
+                size += Path(dirpath, name).lstat().st_size
+    return size
+
+
+def cache_entries(cache_path: Path = CIBW_CACHE_PATH) -> list[CacheEntry]:
+    """
+    The entries in the cache, least recently used first. Entries that were
+    never recorded as used are dated by when they were last modified.
+    """
+    if not cache_path.is_dir():
+        return []
+    records = _index(cache_path).items()
+    entries = []
+    for name, path in _entry_paths(cache_path):
+        record = records.get(name)
+        if not isinstance(record, dict):
+            record = {}
+        try:
+            last_used = record.get("last_used") or path.lstat().st_mtime
+            size = _size(path)
+        except FileNotFoundError:
+            continue
+        entries.append(
+            CacheEntry(
+                name=name,
+                path=path,
+                size=size,
+                last_used=float(last_used),
+                hits=int(record.get("hits", 0)),
+            )
+        )
+    return sorted(entries, key=lambda e: e.last_used)
+
+
+def prune_cache(
+    cache_path: Path = CIBW_CACHE_PATH,
+    *,
+    max_size: int,
+    min_age: float = PRUNE_MIN_AGE,
+    dry_run: bool = False,
+) -> list[CacheEntry]:
+    """
+    Removes the least recently used entries until the cache is no bigger
+    than `max_size` bytes. Entries used in the last `min_age` seconds, or
+    being installed by another run, are kept. Returns the entries that were
+    (or, with `dry_run`, would be) removed.
+    """
+    if not cache_path.is_dir():
+        return []
+    try:
+        # only one run prunes at a time, the others carry on
+        prune_lock = FileLock(cache_path / "prune.lock", timeout=0)
+        prune_lock.acquire()
+    except Timeout:
+        return []
+
+    try:
+        entries = cache_entries(cache_path)
+        total = sum(e.size for e in entries)
+        removed: list[CacheEntry] = []
+        now = time.time()
+        for entry in entries:
+            if total <= max_size:
+                break
+            if now - entry.last_used < min_age:
+                continue
+            if not dry_run and not _remove_entry(entry, cache_path):
+                continue
+            removed.append(entry)
+            total -= entry.size
+        return removed
+    finally:
+        prune_lock.release()
+
+
+def _remove_entry(entry: CacheEntry, cache_path: Path) -> bool:
+    lock_path = Path(f"{entry.path}.lock")
+    try:
+        # entries are created while holding their lock, so a held lock means
+        # another run is installing it
+        with FileLock(lock_path, timeout=0) if lock_path.exists() else contextlib.nullcontext():
+            if entry.path.is_dir() and not entry.path.is_symlink():
+                shutil.rmtree(entry.path)
+            else:
+                entry.path.unlink()
+                Path(f"{entry.path}{VERIFIED_SUFFIX}").unlink(missing_ok=True)
+    except (Timeout, OSError):
+        return False
+    _index(cache_path).update(entry.name, lambda _: None)
+    return True
+
+
+def parse_size(size: str) -> int:
+    """
+    Reads a size in bytes, like "500M", "10GB" or "2GiB". K, M, G and T are
+    powers of 1000, Ki, Mi, Gi and Ti are powers of 1024.
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([kmgt]i?)?b?\s*", size, re.IGNORECASE)
+    if match is None:
+        msg = f"Invalid size {size!r}, expected a number of bytes with an optional unit, like '10G'"
+        raise ValueError(msg)
+    number, unit = match.groups()
+    return int(float(number) * _SIZE_UNITS[(unit or "").lower()])
+
+
+def format_entries(entries: Sequence[CacheEntry]) -> str:
+    """
+    A table of `entries`, for `cibuildwheel cache stats`.
+    """
+    rows = [("Entry", "Size", "Last used", "Hits")]
+    rows += [
+        (
+            e.name,
+            humanize.naturalsize(e.size),
+            humanize.naturaltime(time.time() - e.last_used),
+            str(e.hits),
+        )
+        for e in entries
+    ]
+    widths = [max(len(row[i]) for row in rows) for i in range(4)]
+    return "\n".join(
+        "  ".join(
+            cell.rjust(width) if i in {1, 3} else cell.ljust(width)
+            for i, (cell, width) in enumerate(zip(row, widths, strict=True))
+        ).rstrip()
+        for row in rows
+    )
@@ -1,6 +1,12 @@
 from __future__ import annotations
 
-__lazy_modules__ = {"cibuildwheel.errors", "shlex", "shutil", "subprocess"}
+__lazy_modules__ = {
+    "cibuildwheel.errors",
+    "cibuildwheel.util.trace",
+    "shlex",
+    "shutil",
+    "subprocess",
+}
 
 import os
 import shlex
@@ -10,6 +16,7 @@
 import typing
 
 from cibuildwheel.errors import FatalError
+from cibuildwheel.util.trace import command_span, trace_span
 
 TYPE_CHECKING = False
 if TYPE_CHECKING:
@@ -63,20 +70,25 @@ def call(
         msg = f"Couldn't find {args_[0]!r} in PATH {path!r}"
         raise FatalError(msg)
     args_[0] = executable
-    try:
-        result = subprocess.run(
-            args_,
-            check=True,
-            shell=_IS_WIN,
-            env=env,
-            cwd=cwd,
-            capture_output=capture_stdout,
-            text=capture_stdout,
-        )
-    except subprocess.CalledProcessError as e:
+    with command_span(args_, category="command") as span:
+        try:
+            result = subprocess.run(
+                args_,
+                check=True,
+                shell=_IS_WIN,
+                env=env,
+                cwd=cwd,
+                capture_output=capture_stdout,
+                text=capture_stdout,
+            )
+        except subprocess.CalledProcessError as e:
+            span["exit_code"] = e.returncode
+            if capture_stdout:
+                sys.stderr.write(e.stderr)
+            raise
+        span["exit_code"] = result.returncode
         if capture_stdout:
-            sys.stderr.write(e.stderr)
-        raise
+            span["output_bytes"] = len(result.stdout.encode())
     if not capture_stdout:
         return None
     sys.stderr.write(result.stderr)
@@ -88,7 +100,13 @@ def shell(
 ) -> None:
     command = " ".join(commands)
     print(f"+ {command}")
-    subprocess.run(command, env=env, cwd=cwd, shell=True, check=True)
+    with trace_span("shell", category="command", command=command) as span:
+        try:
+            subprocess.run(command, env=env, cwd=cwd, shell=True, check=True)
+        except subprocess.CalledProcessError as e:
+            span["exit_code"] = e.returncode
+            raise
+        span["exit_code"] = 0
 
 
 def split_command(lst: list[str]) -> Iterator[list[str]]:
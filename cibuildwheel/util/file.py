@@ -3,7 +3,11 @@
 __lazy_modules__ = {
     "certifi",
     "cibuildwheel.errors",
+    "cibuildwheel.util.shared_cache",
+    "concurrent",
+    "concurrent.futures",
     "hashlib",
+    "json",
     "shutil",
     "ssl",
     "tarfile",
@@ -11,11 +15,14 @@
     "urllib",
     "urllib.error",
     "urllib.request",
+    "uuid",
     "zipfile",
 }
 
 
+import dataclasses
 import hashlib
+import json
 import os
 import shutil
 import ssl
@@ -23,6 +30,8 @@
 import time
 import urllib.error
 import urllib.request
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from contextlib import contextmanager
 from pathlib import Path, PurePath
 from typing import Final
@@ -32,6 +41,7 @@
 from platformdirs import user_cache_path
 
 from cibuildwheel.errors import FatalError
+from cibuildwheel.util.shared_cache import get_shared_cache
 
 TYPE_CHECKING = False
 if TYPE_CHECKING:
@@ -42,6 +52,9 @@
     os.environ.get("CIBW_CACHE_PATH", DEFAULT_CIBW_CACHE_PATH)
 ).resolve()
 
+# where `cibuildwheel bundle import` puts the wheels of the build tools, in the cache
+BUNDLE_WHEELHOUSE_NAME = "bundle-wheelhouse"
+
 
 @contextmanager
 def remove_on_error(path: Path) -> Generator[None, None, None]:
@@ -79,7 +92,42 @@ def ensure_cache_sentinel(cache_path: Path) -> None:
             )
 
 
+# downloads are streamed to disk in chunks of this size
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# files at least this big are downloaded in several segments at once, when
+# the server supports range requests
+SEGMENTED_DOWNLOAD_MIN_SIZE = 32 * 1024 * 1024
+DOWNLOAD_SEGMENTS = 4
+
+# exponential backoff, so that a network outage of about a minute is survivable
+DOWNLOAD_ATTEMPTS = 6
+
+# next to a cached file, records the hash it was verified to have, and the
+# size, mtime and inode it had then
+VERIFIED_SUFFIX = ".verified"
+
+# with --verify-cache, cached files are hashed every time they're used, not
+# only when they look changed
+_full_cache_verification = False
+
+
+def set_full_cache_verification(enabled: bool) -> None:
+    global _full_cache_verification  # noqa: PLW0603
+    _full_cache_verification = enabled
+
+
 def download(url: str, dest: Path, *, sha256: str | None = None) -> None:
+    # files with a known hash can be shared between machines
+    shared_cache = get_shared_cache() if sha256 else None
+    shared_key = f"downloads/sha256/{sha256}/{dest.name}"
+    if shared_cache is not None and shared_cache.get(shared_key, dest):
+        if _file_sha256(dest) == sha256:
+            print(f"+ Download {url} to {dest} (from the shared cache)")
+            _record_verified(dest, sha256)
+            return
+        dest.unlink()
+
     print(f"+ Download {url} to {dest}")
     dest_dir = dest.parent
     dest_dir.mkdir(parents=True, exist_ok=True)
@@ -88,32 +136,206 @@ def download(url: str, dest: Path, *, sha256: str | None = None) -> None:
     # so we use certifi (this sounds odd but requests also does this by default)
     cafile = os.environ.get("SSL_CERT_FILE", certifi.where())
     context = ssl.create_default_context(cafile=cafile)
-    # exponential backoff, so that a network outage of about a minute is survivable
-    repeat_num = 6
-    for i in range(repeat_num):
-        try:
-            with urllib.request.urlopen(url, context=context) as response:
-                dest.write_bytes(response.read())
-                break
-
-        except urllib.error.HTTPError as error:
-            # a client error, such as a bad URL, will not fix itself
-            if i == repeat_num - 1 or 400 <= error.code < 500:
-                raise
-            time.sleep(3 * 2**i)
 
-        except OSError:
-            if i == repeat_num - 1:
-                raise
-            time.sleep(3 * 2**i)
-
-    if sha256:
-        with dest.open("rb") as f:
-            computed = hashlib.file_digest(f, "sha256").hexdigest()
-        if computed != sha256:
-            dest.unlink(missing_ok=True)
+    # the file is only moved into place once it's complete and verified, so
+    # an interrupted download never leaves a partial file at `dest`. Unlike
+    # mkstemp's 0600, it gets the permissions the umask gives any new file
+    tmp_path = dest_dir / f"{dest.name}.{uuid.uuid4().hex}.part"
+    os.close(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666))
+    try:
+        computed = _Download(url, tmp_path, context).run()
+        if sha256 and computed != sha256:
             msg = f"SHA256 mismatch for {url}: expected {sha256!r}, got {computed!r}"
             raise FatalError(msg)
+        tmp_path.replace(dest)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    if sha256:
+        _record_verified(dest, sha256)
+
+    if shared_cache is not None:
+        shared_cache.put_async((shared_key, dest))
+
+
+@dataclasses.dataclass
+class _Segment:
+    start: int
+    # exclusive, or None until the size of the file is known
+    end: int | None
+    # how much has been written so far
+    offset: int
+
+
+class _Download:
+    """
+    Streams `url` into `path`, hashing it as it's written. When the
+    connection drops, the download carries on from where it stopped with a
+    range request. Large files are fetched in several segments at once, if
+    the server supports it - only the first is hashed as it arrives, the
+    others are hashed from disk at the end.
+    """
+
+    def __init__(self, url: str, path: Path, context: ssl.SSLContext) -> None:
+        self.url = url
+        self.path = path
+        self.context = context
+        self.hasher = hashlib.sha256()
+        self.hashed = 0
+        self.executor: ThreadPoolExecutor | None = None
+        self.segment_futures: list[Future[None]] = []
+
+    def run(self) -> str:
+        """
+        Downloads the file, and returns its SHA256.
+        """
+        try:
+            self._fetch(_Segment(start=0, end=None, offset=0), hashing=True)
+            for future in self.segment_futures:
+                future.result()
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown(cancel_futures=True)
+
+        with self.path.open("rb") as f:
+            f.seek(self.hashed)
+            while chunk := f.read(DOWNLOAD_CHUNK_SIZE):
+                self.hasher.update(chunk)
+        return self.hasher.hexdigest()
+
+    def _fetch(self, segment: _Segment, *, hashing: bool) -> None:
+        failures = 0
+        while True:
+            offset = segment.offset
+            try:
+                self._fetch_once(segment, hashing=hashing)
+                return
+            except OSError as error:
+                if segment.offset > offset:
+                    # the connection dropped part way through, which isn't
+                    # counted against the attempts as long as it's progressing
+                    failures = 0
+                # a client error, such as a bad URL, will not fix itself
+                client_error = isinstance(error, urllib.error.HTTPError) and 400 <= error.code < 500
+                if client_error or failures == DOWNLOAD_ATTEMPTS - 1:
+                    raise
+                time.sleep(3 * 2**failures)
+                failures += 1
+
+    def _fetch_once(self, segment: _Segment, *, hashing: bool) -> None:
+        headers = {}
+        if segment.offset > 0 or segment.end is not None:
+            last = "" if segment.end is None else segment.end - 1
+            headers["Range"] = f"bytes={segment.offset}-{last}"
+        request = urllib.request.Request(self.url, headers=headers)
+
+        with urllib.request.urlopen(request, context=self.context) as response:
+            if response.status == 206:
+                if segment.end is None:
+                    segment.end = _content_range_total(response.headers.get("Content-Range"))
+            elif segment.start > 0:
+                msg = f"{self.url} didn't honor a range request"
+                raise FatalError(msg)
+            else:
+                if segment.offset > 0:
+                    # the server sent the whole file again, so start over
+                    segment.offset = 0
+                    self.hasher = hashlib.sha256()
+                    self.hashed = 0
+                length = response.headers.get("Content-Length")
+                if segment.end is None and length is not None:
+                    segment.end = int(length)
+                    if response.headers.get("Accept-Ranges") == "bytes":
+                        self._start_segments(segment)
+
+            with self.path.open("r+b") as f:
+                f.seek(segment.offset)
+                while segment.end is None or segment.offset < segment.end:
+                    size = DOWNLOAD_CHUNK_SIZE
+                    if segment.end is not None:
+                        size = min(size, segment.end - segment.offset)
+                    chunk = response.read(size)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    segment.offset += len(chunk)
+                    if hashing:
+                        self.hasher.update(chunk)
+                        self.hashed += len(chunk)
+
+        if segment.end is not None and segment.offset < segment.end:
+            msg = f"Connection closed after {segment.offset} of {segment.end} bytes"
+            raise ConnectionError(msg)
+
+    def _start_segments(self, first: _Segment) -> None:
+        assert first.end is not None
+        size = first.end
+        if size < SEGMENTED_DOWNLOAD_MIN_SIZE or DOWNLOAD_SEGMENTS < 2:
+            return
+        segment_size = -(-size // DOWNLOAD_SEGMENTS)
+        first.end = segment_size
+        segments = [
+            _Segment(start=start, end=min(start + segment_size, size), offset=start)
+            for start in range(segment_size, size, segment_size)
+        ]
+        self.executor = ThreadPoolExecutor(max_workers=len(segments))
+        self.segment_futures = [
+            self.executor.submit(self._fetch, segment, hashing=False) for segment in segments
+        ]
+
+
+def _content_range_total(content_range: str | None) -> int | None:
+    # e.g. "bytes 100-199/1000", the total is "*" when it's not known
+    if content_range is None:
+        return None
+    _, _, total = content_range.rpartition("/")
+    return int(total) if total.isdigit() else None
+
+
+def _file_sha256(path: Path) -> str:
+    with path.open("rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def _verified_record(path: Path, sha256: str) -> dict[str, int | str]:
+    stat = path.stat()
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "inode": stat.st_ino,
+        "sha256": sha256,
+    }
+
+
+def _record_verified(path: Path, sha256: str) -> None:
+    # files outside the cache are only used once
+    if not path.resolve().is_relative_to(CIBW_CACHE_PATH):
+        return
+    sidecar = Path(f"{path}{VERIFIED_SUFFIX}")
+    tmp_sidecar = sidecar.with_name(f"{sidecar.name}.{os.getpid()}.tmp")
+    tmp_sidecar.write_text(json.dumps(_verified_record(path, sha256)), encoding="utf-8")
+    tmp_sidecar.replace(sidecar)
+
+
+def verify_file(path: Path, sha256: str) -> bool:
+    """
+    Whether the cached file at `path` has the hash `sha256`. Once it's been
+    hashed, it's only hashed again if its size, mtime or inode change, or
+    with --verify-cache.
+    """
+    sidecar = Path(f"{path}{VERIFIED_SUFFIX}")
+    if not _full_cache_verification:
+        try:
+            record = json.loads(sidecar.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            record = None
+        if record == _verified_record(path, sha256):
+            return True
+
+    if _file_sha256(path) != sha256:
+        sidecar.unlink(missing_ok=True)
+        return False
+    _record_verified(path, sha256)
+    return True
 
 
 def extract_zip(zip_src: Path, dest: Path) -> None:
@@ -174,6 +396,23 @@ def move_file(src_file: Path, dst_file: Path) -> Path:
     return Path(resulting_file).resolve(strict=True)
 
 
+def _link_or_copy(src: str, dst: str) -> None:
+    try:
+        os.link(src, dst)
+    except OSError:
+        # e.g. on another file system
+        shutil.copy2(src, dst)
+
+
+def clone_tree(src: Path, dst: Path) -> None:
+    """
+    Copies the directory `src` to `dst`, hardlinking the files where it can,
+    which is much quicker than copying them. The files are shared, so they
+    mustn't be modified in place - replacing them is fine.
+    """
+    shutil.copytree(src, dst, symlinks=True, copy_function=_link_or_copy)
+
+
 def copy_into_local(src: Path, dst: PurePath) -> None:
     """Copy a path from src to dst, regardless of whether it's a file or a directory."""
     # Ensure the target folder location exists
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+__lazy_modules__ = {
+    "cibuildwheel.logger",
+    "re",
+    "subprocess",
+}
+
+import dataclasses
+import os
+import re
+import subprocess
+from pathlib import Path, PurePosixPath
+
+from cibuildwheel.logger import log
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator, Sequence
+
+IGNORE_FILE_NAME = ".cibwignore"
+
+
+@dataclasses.dataclass(frozen=True)
+class IgnorePattern:
+    regex: re.Pattern[str]
+    negated: bool
+    dir_only: bool
+
+
+def parse_ignore_patterns(text: str) -> list[IgnorePattern]:
+    """
+    Parses patterns in the syntax of a .gitignore file.
+    """
+    patterns = []
+    for line in text.splitlines():
+        pattern = line.rstrip()
+        if not pattern or pattern.startswith("#"):
+            continue
+
+        negated = pattern.startswith("!")
+        if negated or pattern.startswith(("\\!", "\\#")):
+            # drop the "!", or the backslash escaping a leading "!" or "#"
+            pattern = pattern[1:]
+
+        dir_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        if not pattern:
+            continue
+
+        # a pattern with a slash before its end is relative to the project
+        # root, otherwise it can match at any depth
+        anchored = "/" in pattern
+        regex = _translate(pattern.lstrip("/"))
+        if not anchored:
+            regex = f"(?:.*/)?{regex}"
+
+        patterns.append(
+            IgnorePattern(regex=re.compile(regex, re.DOTALL), negated=negated, dir_only=dir_only)
+        )
+    return patterns
+
+
+def _translate(pattern: str) -> str:
+    result = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i) and (i == 0 or pattern[i - 1] == "/"):
+            result.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i) and i + 2 == len(pattern) and pattern[i - 1 : i] == "/":
+            result.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            result.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            result.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and (end := pattern.find("]", i + 2)) != -1:
+            body = pattern[i + 1 : end].replace("\\", "\\\\")
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            result.append(f"[{body}]")
+            i = end + 1
+        elif pattern[i] == "\\" and i + 1 < len(pattern):
+            result.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            result.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(result)
+
+
+class IgnoreMatcher:
+    """
+    Decides which paths, relative to the project root, a list of patterns
+    excludes. Like git, a file inside an excluded directory is excluded even
+    if a later pattern matches the file itself.
+    """
+
+    def __init__(self, patterns: Sequence[IgnorePattern]) -> None:
+        self.patterns = patterns
+        self._excluded_dirs: dict[str, bool] = {}
+
+    def _matches(self, path: str, *, is_dir: bool) -> bool:
+        excluded = False
+        for pattern in self.patterns:
+            if pattern.dir_only and not is_dir:
+                continue
+            if pattern.regex.fullmatch(path):
+                excluded = not pattern.negated
+        return excluded
+
+    def dir_excluded(self, path: str) -> bool:
+        if path not in self._excluded_dirs:
+            parent = PurePosixPath(path).parent.as_posix()
+            self._excluded_dirs[path] = (parent != "." and self.dir_excluded(parent)) or (
+                self._matches(path, is_dir=True)
+            )
+        return self._excluded_dirs[path]
+
+    def excluded(self, path: str) -> bool:
+        parent = PurePosixPath(path).parent.as_posix()
+        if parent != "." and self.dir_excluded(parent):
+            return True
+        return self._matches(path, is_dir=False)
+
+
+def select_project_files(project_dir: Path, *, vcs: bool) -> list[str] | None:
+    """
+    Returns the files under `project_dir` that should be copied into a build
+    container, as POSIX paths relative to it. None means everything.
+
+    With `vcs`, that's the files git tracks plus the untracked files it
+    doesn't ignore. Any patterns in a .cibwignore file at the root of the
+    project are excluded too.
+    """
+    ignore_file = project_dir / IGNORE_FILE_NAME
+    patterns = (
+        parse_ignore_patterns(ignore_file.read_text(encoding="utf-8"))
+        if ignore_file.is_file()
+        else []
+    )
+
+    candidates = git_files(project_dir) if vcs else None
+    if vcs and candidates is None:
+        log.warning(
+            "container-project-files is 'vcs', but git can't list the files in "
+            f"{project_dir}. Copying all the project files instead."
+        )
+    if candidates is None:
+        if not patterns:
+            return None
+        matcher = IgnoreMatcher(patterns)
+        candidates = walk_files(project_dir, skip_dir=matcher.dir_excluded)
+    else:
+        matcher = IgnoreMatcher(patterns)
+
+    selected = set()
+    for path in candidates:
+        if "\n" in path:
+            # the file lists given to tar are newline-separated
+            log.warning(f"Not copying {path!r} into the container, its name contains a newline")
+            continue
+        if not matcher.excluded(path):
+            selected.add(path)
+    return sorted(selected)
+
+
+def git_files(project_dir: Path) -> list[str] | None:
+    """
+    Returns the files under `project_dir` that git tracks, plus the untracked
+    files it doesn't ignore, or None if it's not in a git repository.
+    """
+    try:
+        output = subprocess.run(
+            ["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+            cwd=project_dir,
+            check=True,
+            capture_output=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    files = []
+    for entry in os.fsdecode(output).split("\0"):
+        if not entry:
+            continue
+        path = project_dir / entry
+        if path.is_symlink() or path.is_file():
+            files.append(entry)
+        elif path.is_dir():
+            # a submodule - git lists it as a single entry
+            files.extend(f"{entry}/{f}" for f in walk_files(path, skip_dir=lambda d: d == ".git"))
+        # otherwise, the file is tracked but has been deleted
+    return files
+
+
+def walk_files(root: Path, *, skip_dir: Callable[[str], bool]) -> Iterator[str]:
+    """
+    Yields the files under `root`, as POSIX paths relative to it, leaving out
+    the directories for which `skip_dir` is true.
+    """
+    for dir_path, dir_names, file_names in os.walk(root):
+        rel_dir = Path(dir_path).relative_to(root).as_posix()
+        prefix = "" if rel_dir == "." else f"{rel_dir}/"
+
+        kept_dirs = []
+        for name in dir_names:
+            if (Path(dir_path) / name).is_symlink():
+                # os.walk doesn't follow links, tar copies them as links
+                file_names.append(name)
+            elif not skip_dir(prefix + name):
+                kept_dirs.append(name)
+        dir_names[:] = kept_dirs
+
+        yield from (prefix + name for name in file_names)
+
+
+def tar_file_list(files: Iterable[str]) -> str:
+    """
+    The contents of a file list for `tar -T`. Each path is given relative to
+    the current directory, so that none can be mistaken for an option.
+    """
+    return "".join(f"./{f}\n" for f in files)
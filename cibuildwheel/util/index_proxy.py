@@ -0,0 +1,529 @@
+from __future__ import annotations
+
+__lazy_modules__ = {
+    "base64",
+    "certifi",
+    "cibuildwheel.logger",
+    "cibuildwheel.util.cache_index",
+    "filelock",
+    "hashlib",
+    "html",
+    "html.parser",
+    "http",
+    "http.client",
+    "http.server",
+    "json",
+    "secrets",
+    "shutil",
+    "ssl",
+    "time",
+    "urllib",
+    "urllib.error",
+    "urllib.parse",
+    "urllib.request",
+    "uuid",
+}
+
+import base64
+import contextlib
+import hashlib
+import html
+import html.parser
+import http.client
+import http.server
+import json
+import os
+import re
+import secrets
+import shutil
+import ssl
+import threading
+import time
+import typing
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from pathlib import Path
+
+import certifi
+from filelock import FileLock
+
+from cibuildwheel.logger import log
+from cibuildwheel.util.cache_index import record_cache_use
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from collections.abc import Generator, Mapping
+
+    from cibuildwheel.oci_container import ContainerEngineName
+
+DEFAULT_UPSTREAM = "https://pypi.org/simple/"
+
+# how long a project page is reused before it's fetched again
+PAGE_MAX_AGE = 10 * 60
+
+JSON_CONTENT_TYPE = "application/vnd.pypi.simple.v1+json"
+HTML_CONTENT_TYPE = "application/vnd.pypi.simple.v1+html"
+
+# the names containers use to reach the host
+CONTAINER_HOST_NAMES: dict[ContainerEngineName, str] = {
+    "docker": "host.docker.internal",
+    "podman": "host.containers.internal",
+}
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def redact_url(url: str) -> str:
+    """
+    `url` without any credentials in it, to show in logs and errors.
+    """
+    parsed = urllib.parse.urlsplit(url)
+    if "@" not in parsed.netloc:
+        return url
+    host = parsed.netloc.rpartition("@")[2]
+    return urllib.parse.urlunsplit(parsed._replace(netloc=f"****@{host}"))
+
+
+class UpstreamError(Exception):
+    def __init__(self, url: str, status: int) -> None:
+        super().__init__(f"{redact_url(url)} returned {status}")
+        self.url = url
+        self.status = status
+
+
+class _LinkParser(html.parser.HTMLParser):
+    """
+    Collects the files on a PEP 503 project page, in PEP 691 form.
+    """
+
+    def __init__(self, page_url: str) -> None:
+        super().__init__()
+        self.page_url = page_url
+        self.files: list[dict[str, typing.Any]] = []
+        self._attrs: dict[str, str | None] | None = None
+        self._text: list[str] = []
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag == "a":
+            self._attrs = dict(attrs)
+            self._text = []
+
+    def handle_data(self, data: str) -> None:
+        if self._attrs is not None:
+            self._text.append(data)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag != "a" or self._attrs is None:
+            return
+        attrs, self._attrs = self._attrs, None
+        href = attrs.get("href")
+        if not href:
+            return
+
+        url, _, fragment = urllib.parse.urljoin(self.page_url, href).partition("#")
+        file: dict[str, typing.Any] = {
+            "filename": "".join(self._text).strip(),
+            "url": url,
+            "hashes": dict([fragment.split("=", 1)]) if "=" in fragment else {},
+        }
+        if attrs.get("data-requires-python"):
+            file["requires-python"] = attrs["data-requires-python"]
+        if "data-yanked" in attrs:
+            file["yanked"] = attrs["data-yanked"] or True
+        if "data-gpg-sig" in attrs:
+            file["gpg-sig"] = attrs["data-gpg-sig"] == "true"
+        metadata = attrs.get("data-core-metadata", attrs.get("data-dist-info-metadata"))
+        if metadata is not None:
+            file["core-metadata"] = (
+                dict([metadata.split("=", 1)]) if "=" in metadata else metadata != "false"
+            )
+        self.files.append(file)
+
+
+def parse_project_page(body: bytes, content_type: str, page_url: str) -> dict[str, typing.Any]:
+    """
+    Reads a project page from an index, in either the PEP 691 JSON format or
+    the PEP 503 HTML format, into the JSON format, with absolute file URLs.
+    """
+    if content_type.startswith(JSON_CONTENT_TYPE):
+        page = json.loads(body)
+        for file in page["files"]:
+            file["url"] = urllib.parse.urljoin(page_url, file["url"])
+        return typing.cast("dict[str, typing.Any]", page)
+
+    parser = _LinkParser(page_url)
+    parser.feed(body.decode("utf-8", errors="replace"))
+    parser.close()
+    return {"meta": {"api-version": "1.0"}, "files": parser.files}
+
+
+def render_html_page(name: str, files: list[dict[str, typing.Any]]) -> bytes:
+    """
+    Writes a project page in the PEP 503 HTML format.
+    """
+    links = []
+    for file in files:
+        href = file["url"]
+        if "sha256" in file["hashes"]:
+            href += f"#sha256={file['hashes']['sha256']}"
+        attrs = [f'href="{html.escape(href)}"']
+        if file.get("requires-python"):
+            attrs.append(f'data-requires-python="{html.escape(file["requires-python"])}"')
+        if file.get("yanked"):
+            reason = file["yanked"] if isinstance(file["yanked"], str) else ""
+            attrs.append(f'data-yanked="{html.escape(reason)}"')
+        metadata = file.get("core-metadata", file.get("dist-info-metadata"))
+        if metadata:
+            value = (
+                "=".join(next(iter(metadata.items())))
+                if isinstance(metadata, dict) and metadata
+                else "true"
+            )
+            attrs.append(f'data-core-metadata="{html.escape(value)}"')
+            attrs.append(f'data-dist-info-metadata="{html.escape(value)}"')
+        links.append(f"<a {' '.join(attrs)}>{html.escape(file['filename'])}</a><br/>")
+    return (
+        "<!DOCTYPE html>\n"
+        f"<html><head><title>Links for {html.escape(name)}</title></head><body>\n"
+        f"<h1>Links for {html.escape(name)}</h1>\n" + "\n".join(links) + "\n</body></html>\n"
+    ).encode()
+
+
+def normalize_project_name(name: str) -> str:
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+class IndexProxy:
+    """
+    A package index on localhost that forwards to an upstream index, and
+    keeps what it fetches in `cache_dir`. Every build in a run uses it, so
+    each project page and file is only fetched once, however many builds
+    need it. Project pages are fetched again after PAGE_MAX_AGE, and files
+    are kept for good.
+
+    Requests for the same page or file wait for each other, across threads
+    and processes, so that they're only fetched once. The index's URLs
+    include a random token, since it may be reachable from the network.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        *,
+        upstream: str = DEFAULT_UPSTREAM,
+        listen_address: str = "127.0.0.1",
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.upstream = upstream if upstream.endswith("/") else f"{upstream}/"
+        self.token = secrets.token_urlsafe(16)
+        self._file_urls: dict[str, str] = {}
+        self._file_urls_lock = threading.Lock()
+
+        cafile = os.environ.get("SSL_CERT_FILE", certifi.where())
+        self._ssl_context = ssl.create_default_context(cafile=cafile)
+        parsed_upstream = urllib.parse.urlsplit(self.upstream)
+        self._upstream_netloc = parsed_upstream.hostname, parsed_upstream.port
+        self._upstream_auth = None
+        if parsed_upstream.username is not None:
+            credentials = f"{urllib.parse.unquote(parsed_upstream.username)}:{urllib.parse.unquote(parsed_upstream.password or '')}"
+            self._upstream_auth = f"Basic {base64.b64encode(credentials.encode()).decode()}"
+
+        self._server = http.server.ThreadingHTTPServer((listen_address, 0), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def url(self, host: str = "127.0.0.1") -> str:
+        """
+        The URL of the index, for a client that reaches this machine as `host`.
+        """
+        return f"http://{host}:{self.port}/{self.token}/simple/"
+
+    def environment(self) -> dict[str, str]:
+        """
+        The environment variables that point pip and uv at the index.
+        """
+        return {"PIP_INDEX_URL": self.url(), "UV_INDEX_URL": self.url()}
+
+    def container_environment(self, engine_name: ContainerEngineName) -> dict[str, str]:
+        """
+        Like `environment`, for a container run by `engine_name`.
+        """
+        host = CONTAINER_HOST_NAMES[engine_name]
+        return {
+            "PIP_INDEX_URL": self.url(host),
+            "UV_INDEX_URL": self.url(host),
+            # pip only trusts plain HTTP from localhost
+            "PIP_TRUSTED_HOST": f"{host}:{self.port}",
+        }
+
+    def container_create_args(self, engine_name: ContainerEngineName) -> list[str]:
+        """
+        The arguments a container needs to reach the index. Podman containers
+        can reach the host by name already, Docker ones need to be told.
+        """
+        if engine_name == "docker":
+            return [f"--add-host={CONTAINER_HOST_NAMES['docker']}:host-gateway"]
+        return []
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="cibw-index-proxy", daemon=True
+        )
+        self._thread.start()
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def project_page(self, name: str) -> dict[str, typing.Any]:
+        """
+        The page for project `name`, in the PEP 691 JSON format, with the
+        upstream file URLs.
+        """
+        name = normalize_project_name(name)
+        path = self.cache_dir / "pages" / f"{_url_key(self.upstream)}-{name}.json"
+        page_url = urllib.parse.urljoin(self.upstream, f"{name}/")
+
+        def is_fresh() -> bool:
+            with contextlib.suppress(OSError):
+                return time.time() - path.stat().st_mtime < PAGE_MAX_AGE
+            return False
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if not is_fresh():
+            with FileLock(f"{path}.lock"):
+                # another request may have fetched it while this one waited
+                if not is_fresh():
+                    try:
+                        with self._open(page_url, accept=_UPSTREAM_ACCEPT) as response:
+                            page = parse_project_page(
+                                response.read(), response.headers.get_content_type(), page_url
+                            )
+                        _write_atomically(path, json.dumps(page).encode())
+                    except (UpstreamError, OSError, ValueError, KeyError) as error:
+                        if not path.exists() or (
+                            isinstance(error, UpstreamError) and error.status == 404
+                        ):
+                            raise
+                        log.warning(
+                            f"Using an old copy of {redact_url(page_url)}, fetching it failed: {error}"
+                        )
+
+        page = json.loads(path.read_text(encoding="utf-8"))
+        page["name"] = page.get("name", name)
+        return typing.cast("dict[str, typing.Any]", page)
+
+    def proxied_page(self, name: str, prefix: str) -> dict[str, typing.Any]:
+        """
+        The page for project `name`, with file URLs that point at this index,
+        under `prefix`.
+        """
+        page = self.project_page(name)
+        files = []
+        with self._file_urls_lock:
+            for file in page["files"]:
+                key = _url_key(file["url"])
+                self._file_urls[key] = file["url"]
+                filename = urllib.parse.quote(file["filename"])
+                files.append(file | {"url": f"{prefix}/files/{key}/{filename}"})
+        return page | {"files": files}
+
+    def file(self, key: str, filename: str) -> Path:
+        """
+        The cached copy of a file from a project page, fetching it first if
+        needed. `filename` can have ".metadata" added, for the file's core
+        metadata (PEP 658).
+        """
+        if Path(filename).name != filename or filename.startswith("."):
+            raise UpstreamError(filename, 404)
+        path = self.cache_dir / "files" / key / filename
+        if path.exists():
+            return path
+
+        with self._file_urls_lock:
+            url = self._file_urls.get(key)
+        if url is None:
+            # only files listed on a page that this index served can be fetched
+            raise UpstreamError(filename, 404)
+        if filename.endswith(".metadata") and not url.endswith(".metadata"):
+            url += ".metadata"
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with FileLock(path.parent / f".{filename}.lock"):
+            if not path.exists():
+                with self._open(url) as response:
+                    _write_atomically(path, response)
+        return path
+
+    def _open(self, url: str, accept: str | None = None) -> http.client.HTTPResponse:
+        request = urllib.request.Request(url)
+        if accept is not None:
+            request.add_header("Accept", accept)
+        parsed = urllib.parse.urlsplit(url)
+        if self._upstream_auth is not None and (parsed.hostname, parsed.port) == (
+            self._upstream_netloc
+        ):
+            request.add_header("Authorization", self._upstream_auth)
+        if parsed.username is not None:
+            # the credentials are sent in the header instead
+            netloc = parsed.netloc.rpartition("@")[2]
+            request.full_url = urllib.parse.urlunsplit(parsed._replace(netloc=netloc))
+        try:
+            response = urllib.request.urlopen(request, context=self._ssl_context, timeout=60)
+        except urllib.error.HTTPError as error:
+            error.close()
+            raise UpstreamError(url, error.code) from None
+        return typing.cast("http.client.HTTPResponse", response)
+
+
+_UPSTREAM_ACCEPT = f"{JSON_CONTENT_TYPE}, {HTML_CONTENT_TYPE};q=0.2, text/html;q=0.01"
+
+
+def _url_key(url: str) -> str:
+    return hashlib.sha256(url.encode()).hexdigest()[:32]
+
+
+def _write_atomically(dest: Path, src: bytes | typing.BinaryIO) -> None:
+    tmp_path = dest.with_name(f".{dest.name}.{uuid.uuid4()}.tmp")
+    try:
+        with tmp_path.open("wb") as tmp_file:
+            if isinstance(src, bytes):
+                tmp_file.write(src)
+            else:
+                shutil.copyfileobj(src, tmp_file, CHUNK_SIZE)
+        tmp_path.replace(dest)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def _make_handler(proxy: IndexProxy) -> type[http.server.BaseHTTPRequestHandler]:
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:
+            parts = urllib.parse.urlsplit(self.path).path.split("/")
+            # the first part is empty, since the path starts with a slash
+            if len(parts) < 4 or not secrets.compare_digest(parts[1], proxy.token):
+                self.send_error(404)
+                return
+            prefix = f"http://{self.headers.get('Host', '')}/{proxy.token}"
+
+            try:
+                match parts[2:]:
+                    case ["simple", name, ""]:
+                        self._send_page(proxy.proxied_page(urllib.parse.unquote(name), prefix))
+                    case ["simple", name]:
+                        self.send_response(301)
+                        self.send_header("Location", f"{prefix}/simple/{name}/")
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                    case ["files", key, filename]:
+                        self._send_file(proxy.file(key, urllib.parse.unquote(filename)))
+                    case _:
+                        self.send_error(404)
+            except UpstreamError as error:
+                self.send_error(404 if error.status == 404 else 502, str(error))
+            except (OSError, ValueError, KeyError) as error:
+                self.send_error(502, str(error))
+
+        def _send_page(self, page: dict[str, typing.Any]) -> None:
+            if JSON_CONTENT_TYPE in self.headers.get("Accept", ""):
+                body = json.dumps(page).encode()
+                content_type = JSON_CONTENT_TYPE
+            else:
+                body = render_html_page(page["name"], page["files"])
+                content_type = HTML_CONTENT_TYPE
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            # the index only lives as long as the run, so clients shouldn't keep pages
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_file(self, path: Path) -> None:
+            with path.open("rb") as f:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Content-Length", str(os.fstat(f.fileno()).st_size))
+                self.end_headers()
+                shutil.copyfileobj(f, self.wfile, CHUNK_SIZE)
+
+        def log_message(self, format: str, *args: typing.Any) -> None:
+            pass
+
+    return Handler
+
+
+_index_proxy: IndexProxy | None = None
+
+
+def get_index_proxy() -> IndexProxy | None:
+    """
+    The index proxy for this run, if one is running.
+    """
+    return _index_proxy
+
+
+def upstream_index(env: Mapping[str, str]) -> str:
+    """
+    The index the proxy forwards to - the one pip or uv would have used.
+    """
+    return env.get("PIP_INDEX_URL") or env.get("UV_INDEX_URL") or DEFAULT_UPSTREAM
+
+
+@contextlib.contextmanager
+def use_index_proxy(
+    enabled: bool,
+    *,
+    cache_dir: Path,
+    upstream: str = DEFAULT_UPSTREAM,
+    for_containers: bool = False,
+) -> Generator[None, None, None]:
+    """
+    Runs the index proxy for the duration of the block, if `enabled`. Builds
+    that run on the host use it through the environment. For builds in
+    containers, it listens on every interface, and the containers are given
+    its address themselves.
+    """
+    global _index_proxy  # noqa: PLW0603
+
+    if not enabled:
+        yield
+        return
+
+    record_cache_use(cache_dir)
+    proxy = IndexProxy(
+        cache_dir,
+        upstream=upstream,
+        listen_address="0.0.0.0" if for_containers else "127.0.0.1",
+    )
+    proxy.start()
+    print(f"info: Serving a caching package index for {redact_url(upstream)} on port {proxy.port}")
+
+    old_environ = {}
+    if not for_containers:
+        for name, value in proxy.environment().items():
+            old_environ[name] = os.environ.get(name)
+            os.environ[name] = value
+
+    _index_proxy = proxy
+    try:
+        yield
+    finally:
+        _index_proxy = None
+        for name, old_value in old_environ.items():
+            if old_value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = old_value
+        proxy.close()
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+__lazy_modules__ = {
+    "filelock",
+    "json",
+}
+
+import json
+import os
+import threading
+import typing
+
+from filelock import FileLock
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+
+class MetadataCache:
+    """
+    A small JSON file of key/value pairs, for facts that are slow to find out
+    but rarely change - e.g. whether a container engine is recent enough.
+    Keys should include whatever would make the value out of date, so that a
+    change gives a new key rather than needing the old one removed.
+
+    The file can be shared by several threads and processes. A file that
+    can't be read is treated as empty, it's only a cache.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> typing.Any:  # noqa: ANN401
+        """
+        Returns the value stored for `key`, or None.
+        """
+        with self._lock:
+            return self._read().get(key)
+
+    def items(self) -> dict[str, typing.Any]:
+        """
+        All the stored keys and values.
+        """
+        with self._lock:
+            return self._read()
+
+    def set(self, key: str, value: typing.Any) -> None:  # noqa: ANN401
+        self.update(key, lambda _: value)
+
+    def update(self, key: str, fn: Callable[[typing.Any], typing.Any]) -> None:
+        """
+        Replaces the value stored for `key` (or None) with `fn(value)`. Other
+        processes can't change it in between. If `fn` returns None, the key
+        is removed.
+        """
+
+        def update_entry(entries: dict[str, typing.Any]) -> None:
+            value = fn(entries.get(key))
+            if value is None:
+                entries.pop(key, None)
+            else:
+                entries[key] = value
+
+        self.update_all(update_entry)
+
+    def update_all(self, fn: Callable[[dict[str, typing.Any]], None]) -> None:
+        """
+        Calls `fn` with all the stored keys and values, to change them in
+        place, and writes them back once. Other processes can't change them
+        in between.
+        """
+        with self._lock:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with FileLock(f"{self.path}.lock"):
+                    entries = self._read()
+                    fn(entries)
+                    tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+                    tmp_path.write_text(json.dumps(entries, indent=1), encoding="utf-8")
+                    tmp_path.replace(self.path)
+            except OSError:
+                # not being able to write the cache only makes later runs slower
+                pass
+
+    def _read(self) -> dict[str, typing.Any]:
+        try:
+            entries = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return entries if isinstance(entries, dict) else {}
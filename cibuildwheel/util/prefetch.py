@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+__lazy_modules__ = {
+    "concurrent",
+    "concurrent.futures",
+    "tempfile",
+}
+
+import contextlib
+import dataclasses
+import functools
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from collections.abc import Callable, Generator, Iterable
+
+# how many assets are fetched at once
+PREFETCH_WORKERS = 4
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class ToolchainAsset:
+    """
+    Something that builds download into the cache - e.g. an interpreter,
+    virtualenv, or Node.js - and the function that puts it there. That's the
+    same function the build calls, so a build that needs an asset while it's
+    being fetched waits for it, rather than fetching it again.
+    """
+
+    name: str
+    fetch: Callable[[], object]
+
+
+def unique_assets(assets: Iterable[ToolchainAsset]) -> list[ToolchainAsset]:
+    """
+    Drops the assets that have the same name as an earlier one - most builds
+    need the same tools as the others.
+    """
+    unique: dict[str, ToolchainAsset] = {}
+    for asset in assets:
+        unique.setdefault(asset.name, asset)
+    return list(unique.values())
+
+
+def with_temporary_directory(fn: Callable[[Path], object]) -> Callable[[], object]:
+    """
+    Adapts an install function that needs a scratch directory, to fetch an
+    asset on its own.
+    """
+
+    @functools.wraps(fn)
+    def fetch() -> object:
+        with tempfile.TemporaryDirectory(prefix="cibw-prefetch-") as tmp:
+            return fn(Path(tmp))
+
+    return fetch
+
+
+def fetch_assets(
+    assets: Iterable[ToolchainAsset], *, max_workers: int = PREFETCH_WORKERS
+) -> dict[str, BaseException]:
+    """
+    Fetches `assets` concurrently, and waits for them. Returns the errors,
+    keyed by the name of the asset that failed.
+    """
+    assets = unique_assets(assets)
+    errors: dict[str, BaseException] = {}
+    if not assets:
+        return errors
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(asset.fetch): asset for asset in assets}
+        for future in as_completed(futures):
+            error = future.exception()
+            if error is not None:
+                errors[futures[future].name] = error
+    return errors
+
+
+@contextlib.contextmanager
+def prefetch_assets(
+    assets: Iterable[ToolchainAsset], *, max_workers: int = PREFETCH_WORKERS
+) -> Generator[None, None, None]:
+    """
+    Fetches `assets` in the background for the duration of the block, so
+    downloads overlap with the builds. Failures are ignored - the build that
+    needs the asset fetches it again, and reports the error.
+    """
+    assets = unique_assets(assets)
+    if not assets:
+        yield
+        return
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cibw-prefetch")
+    for asset in assets:
+        executor.submit(asset.fetch)
+    try:
+        yield
+    finally:
+        # the assets that were started are left to finish, so the cache isn't
+        # left with partial downloads
+        executor.shutdown(cancel_futures=True)
@@ -1,33 +1,47 @@
 from __future__ import annotations
 
 __lazy_modules__ = {
+    "cibuildwheel.util.cache_index",
     "cibuildwheel.util.file",
+    "cibuildwheel.util.prefetch",
     "cibuildwheel.util.resources",
     "filelock",
     "fnmatch",
-    "hashlib",
     "json",
     "platform",
+    "shutil",
     "subprocess",
 }
 
 import fnmatch
 import functools
-import hashlib
 import json
 import platform
+import shutil
 import subprocess
 import typing
 
 from filelock import FileLock
 
-from cibuildwheel.util.file import download, extract_tar, remove_on_error
+from cibuildwheel.util.cache_index import record_cache_use
+from cibuildwheel.util.file import (
+    clone_tree,
+    download,
+    extract_tar,
+    remove_on_error,
+    verify_file,
+)
+from cibuildwheel.util.prefetch import ToolchainAsset
 from cibuildwheel.util.resources import PYTHON_BUILD_STANDALONE_RELEASES
 
 TYPE_CHECKING = False
 if TYPE_CHECKING:
     from pathlib import Path
 
+# the extracted archives are kept in this directory of the cache, so that
+# each environment can be cloned from them, rather than extracted again
+EXTRACTED_DIR_NAME = "python-build-standalone"
+
 
 class PythonBuildStandaloneAsset(typing.TypedDict):
     name: str
@@ -152,21 +166,15 @@ def _download_or_get_from_cache(
 ) -> Path:
     with FileLock(cache_dir / (asset_filename + ".lock")):
         asset_cache_path = cache_dir / asset_filename
+        record_cache_use(asset_cache_path)
         if asset_cache_path.is_file():
-            if sha256:
-                with asset_cache_path.open("rb") as f:
-                    computed = hashlib.file_digest(f, "sha256").hexdigest()
-                if computed != sha256:
-                    print(
-                        f"Cached python_build_standalone SHA256 mismatch for {asset_cache_path}; redownloading."
-                    )
-                    asset_cache_path.unlink(missing_ok=True)
-                else:
-                    print(f"Using cached python_build_standalone: {asset_cache_path}")
-                    return asset_cache_path
-            else:
+            if not sha256 or verify_file(asset_cache_path, sha256):
                 print(f"Using cached python_build_standalone: {asset_cache_path}")
                 return asset_cache_path
+            print(
+                f"Cached python_build_standalone SHA256 mismatch for {asset_cache_path}; redownloading."
+            )
+            asset_cache_path.unlink(missing_ok=True)
 
         print(f"Downloading python_build_standalone: {asset_url} to {asset_cache_path}")
         with remove_on_error(asset_cache_path):
@@ -192,12 +200,76 @@ def _find_python_executable(extracted_dir: Path) -> Path:
     return executable_path.resolve()  # Return absolute path
 
 
+def download_python_build_standalone(python_version: str, cache_dir: Path) -> Path:
+    """
+    Returns the python-build-standalone archive for `python_version` on this
+    machine, downloading it to `cache_dir` if it's not already there.
+    """
+    arch_id, platform_id, libc_id = _get_platform_identifiers()
+
+    pbs_tag, asset_url, asset_filename, asset_sha256 = _get_pbs_asset(
+        python_version=python_version,
+        arch_identifier=arch_id,
+        platform_identifier=platform_id,
+        libc_identifier=libc_id,
+    )
+
+    print(f"Using python-build-standalone release: {pbs_tag}")
+
+    return _download_or_get_from_cache(
+        asset_url=asset_url, asset_filename=asset_filename, cache_dir=cache_dir, sha256=asset_sha256
+    )
+
+
+def extract_python_build_standalone(archive_path: Path, cache_dir: Path) -> Path:
+    """
+    Returns the directory in `cache_dir` that the python-build-standalone
+    archive at `archive_path` is extracted to, extracting it if it's not
+    already there.
+    """
+    extracted = cache_dir / EXTRACTED_DIR_NAME / archive_path.name.removesuffix(".tar.gz")
+    extracted.parent.mkdir(parents=True, exist_ok=True)
+    with FileLock(f"{extracted}.lock"):
+        record_cache_use(extracted)
+        if not extracted.exists():
+            # extracted beside it and moved into place whole, so that a
+            # partial extraction is never used
+            tmp_extracted = extracted.with_name(f".{extracted.name}.tmp")
+            shutil.rmtree(tmp_extracted, ignore_errors=True)
+            with remove_on_error(tmp_extracted):
+                extract_tar(archive_path, tmp_extracted)
+            tmp_extracted.rename(extracted)
+    return extracted
+
+
+def fetch_python_build_standalone(python_version: str, cache_dir: Path) -> Path:
+    """
+    Downloads and extracts the python-build-standalone archive for
+    `python_version` into `cache_dir`, if that's not already been done.
+    Returns the extracted directory.
+    """
+    archive_path = download_python_build_standalone(python_version, cache_dir)
+    return extract_python_build_standalone(archive_path, cache_dir)
+
+
+def python_build_standalone_asset(python_version: str, cache_dir: Path) -> ToolchainAsset:
+    """
+    The python-build-standalone that `create_python_build_standalone_environment`
+    copies.
+    """
+    return ToolchainAsset(
+        name=f"python-build-standalone {python_version}",
+        fetch=functools.partial(fetch_python_build_standalone, python_version, cache_dir),
+    )
+
+
 def create_python_build_standalone_environment(
     python_version: str, temp_dir: Path, cache_dir: Path
 ) -> Path:
     """
-    Returns a Python environment from python-build-standalone, downloading it
-    if necessary using a cache, and expanding it into a fresh base path.
+    Returns a Python environment from python-build-standalone, downloading
+    and extracting it into the cache if necessary, and cloning it into a
+    fresh base path.
 
     Args:
         python_version: The Python version string (e.g., "3.12").
@@ -214,23 +286,12 @@ def create_python_build_standalone_environment(
 
     print(f"Creating python-build-standalone environment: version={python_version}")
 
-    arch_id, platform_id, libc_id = _get_platform_identifiers()
-
-    pbs_tag, asset_url, asset_filename, asset_sha256 = _get_pbs_asset(
-        python_version=python_version,
-        arch_identifier=arch_id,
-        platform_identifier=platform_id,
-        libc_identifier=libc_id,
-    )
-
-    print(f"Using python-build-standalone release: {pbs_tag}")
-
-    archive_path = _download_or_get_from_cache(
-        asset_url=asset_url, asset_filename=asset_filename, cache_dir=cache_dir, sha256=asset_sha256
-    )
+    extracted = fetch_python_build_standalone(python_version, cache_dir)
 
     python_base_dir = temp_dir / "pbs"
     assert not python_base_dir.exists()
-    extract_tar(archive_path, python_base_dir)
+    # the environment's files are hardlinks to the cached ones, so it's made
+    # in a moment, and isn't affected if the cache is pruned while it's used
+    clone_tree(extracted, python_base_dir)
 
     return _find_python_executable(python_base_dir)
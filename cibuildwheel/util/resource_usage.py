@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+__lazy_modules__ = {"humanize"}
+
+import contextlib
+import dataclasses
+import itertools
+import threading
+
+import humanize
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from collections.abc import Callable, Generator, Mapping, Sequence
+
+# the files a container's resource usage is read from - its own cgroup is
+# mounted at /sys/fs/cgroup. The first four are cgroup v2, the rest v1
+CGROUP_ROOT = "/sys/fs/cgroup"
+CGROUP_FILES = (
+    "cpu.stat",
+    "memory.current",
+    "io.stat",
+    "pids.current",
+    "cpuacct/cpuacct.usage",
+    "memory/memory.usage_in_bytes",
+    "blkio/blkio.throttle.io_service_bytes",
+    "pids/pids.current",
+)
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class UsageSample:
+    """
+    A container's resource usage at one moment. CPU time and I/O are totals
+    since the container started. Each is None if it can't be read.
+    """
+
+    time: float
+    cpu_seconds: float | None
+    memory: int | None
+    io_bytes: int | None
+    pids: int | None
+
+
+def _int(text: str | None) -> int | None:
+    try:
+        return int(text.strip()) if text is not None else None
+    except ValueError:
+        return None
+
+
+def parse_cgroup_files(files: Mapping[str, str | None], *, time: float) -> UsageSample | None:
+    """
+    Reads a sample from the contents of `CGROUP_FILES` - None for the files
+    that couldn't be read. Returns None if none of them could.
+    """
+    cpu_seconds = None
+    io_bytes = None
+
+    if (cpu_stat := files.get("cpu.stat")) is not None:
+        for line in cpu_stat.splitlines():
+            key, _, value = line.partition(" ")
+            if key == "usage_usec" and (usec := _int(value)) is not None:
+                cpu_seconds = usec / 1e6
+    elif (usage_ns := _int(files.get("cpuacct/cpuacct.usage"))) is not None:
+        cpu_seconds = usage_ns / 1e9
+
+    if (io_stat := files.get("io.stat")) is not None:
+        # "<major>:<minor> rbytes=1 wbytes=2 rios=3 ..." for each device
+        io_bytes = 0
+        for line in io_stat.splitlines():
+            for field in line.split()[1:]:
+                key, _, value = field.partition("=")
+                if key in {"rbytes", "wbytes"}:
+                    io_bytes += _int(value) or 0
+    elif (blkio := files.get("blkio/blkio.throttle.io_service_bytes")) is not None:
+        # "<major>:<minor> Read 1" lines, and a "Total" line per device
+        io_bytes = 0
+        for line in blkio.splitlines():
+            fields = line.split()
+            if len(fields) == 3 and fields[1] in {"Read", "Write"}:
+                io_bytes += _int(fields[2]) or 0
+
+    memory = _int(files.get("memory.current"))
+    if memory is None:
+        memory = _int(files.get("memory/memory.usage_in_bytes"))
+    pids = _int(files.get("pids.current"))
+    if pids is None:
+        pids = _int(files.get("pids/pids.current"))
+
+    if cpu_seconds is None and memory is None and io_bytes is None and pids is None:
+        return None
+    return UsageSample(
+        time=time, cpu_seconds=cpu_seconds, memory=memory, io_bytes=io_bytes, pids=pids
+    )
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class UsageSummary:
+    """
+    The resource usage of a container over a span of time. CPU is in cores,
+    so 2.0 is two cores kept busy. I/O is the bytes read and written.
+    """
+
+    cpu_average: float | None = None
+    cpu_peak: float | None = None
+    memory_average: float | None = None
+    memory_peak: int | None = None
+    io_bytes: int | None = None
+    pids_peak: int | None = None
+
+    def __str__(self) -> str:
+        parts = []
+        if self.cpu_average is not None and self.cpu_peak is not None:
+            parts.append(f"CPU {self.cpu_average:.1f} cores avg, {self.cpu_peak:.1f} peak")
+        if self.memory_average is not None and self.memory_peak is not None:
+            average = humanize.naturalsize(self.memory_average)
+            parts.append(f"memory {average} avg, {humanize.naturalsize(self.memory_peak)} peak")
+        if self.io_bytes is not None:
+            parts.append(f"I/O {humanize.naturalsize(self.io_bytes)}")
+        if self.pids_peak is not None:
+            parts.append(f"{self.pids_peak} processes peak")
+        return ", ".join(parts)
+
+
+def summarize(samples: Sequence[UsageSample]) -> UsageSummary | None:
+    """
+    Sums up a run of samples. The rates need two samples at least, so a
+    single sample only gives memory and process counts.
+    """
+    if not samples:
+        return None
+
+    cpu = [(s.time, s.cpu_seconds) for s in samples if s.cpu_seconds is not None]
+    cpu_average = cpu_peak = None
+    if len(cpu) >= 2 and cpu[-1][0] > cpu[0][0]:
+        cpu_average = (cpu[-1][1] - cpu[0][1]) / (cpu[-1][0] - cpu[0][0])
+        cpu_peak = max(
+            (b_cpu - a_cpu) / (b_time - a_time)
+            for (a_time, a_cpu), (b_time, b_cpu) in itertools.pairwise(cpu)
+            if b_time > a_time
+        )
+
+    memory = [s.memory for s in samples if s.memory is not None]
+    io = [s.io_bytes for s in samples if s.io_bytes is not None]
+    pids = [s.pids for s in samples if s.pids is not None]
+    return UsageSummary(
+        cpu_average=cpu_average,
+        cpu_peak=cpu_peak,
+        memory_average=sum(memory) / len(memory) if memory else None,
+        memory_peak=max(memory) if memory else None,
+        io_bytes=io[-1] - io[0] if len(io) >= 2 else None,
+        pids_peak=max(pids) if pids else None,
+    )
+
+
+class UsageSampler:
+    """
+    Samples a container's resource usage every `interval` seconds, from a
+    background thread, and on demand - at the start and end of each step, so
+    that short steps are covered too.
+    """
+
+    def __init__(self, read: Callable[[], UsageSample | None], *, interval: float) -> None:
+        self.read = read
+        self.interval = interval
+        self.samples: list[UsageSample] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def sample(self) -> int:
+        """
+        Takes a sample now. Returns where the samples from now on start, to
+        pass to `summary_since`.
+        """
+        try:
+            sample = self.read()
+        except (OSError, RuntimeError):
+            # the container may be going away
+            sample = None
+        with self._lock:
+            index = len(self.samples)
+            if sample is not None:
+                self.samples.append(sample)
+            return index
+
+    def summary_since(self, index: int) -> UsageSummary | None:
+        """
+        Takes a sample, and sums up the ones from `index` on.
+        """
+        self.sample()
+        with self._lock:
+            return summarize(self.samples[index:])
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    @contextlib.contextmanager
+    def running(self) -> Generator[None, None, None]:
+        thread = threading.Thread(target=self._run, name="cibw-usage-sampler", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            self._stop.set()
+            thread.join()
+
+
+_sample_interval: float | None = None
+
+
+def get_sample_interval() -> float | None:
+    """
+    How often containers' resource usage is sampled, in seconds, or None if
+    it isn't.
+    """
+    return _sample_interval
+
+
+@contextlib.contextmanager
+def use_usage_sampling(interval: float | None) -> Generator[None, None, None]:
+    """
+    Samples the resource usage of the containers started in the block every
+    `interval` seconds, if it's given.
+    """
+    global _sample_interval  # noqa: PLW0603
+
+    previous = _sample_interval
+    _sample_interval = interval
+    try:
+        yield
+    finally:
+        _sample_interval = previous
+
+
+@contextlib.contextmanager
+def sample_usage(
+    read: Callable[[], UsageSample | None],
+) -> Generator[UsageSampler | None, None, None]:
+    """
+    Samples resource usage with `read` while the block runs, if sampling is
+    on. Yields the sampler, or None if it's off or usage can't be read.
+    """
+    if _sample_interval is None:
+        yield None
+        return
+
+    sampler = UsageSampler(read, interval=_sample_interval)
+    sampler.sample()
+    if not sampler.samples:
+        yield None
+        return
+
+    with sampler.running():
+        yield sampler
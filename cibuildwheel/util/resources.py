@@ -28,6 +28,7 @@
 CIBUILDWHEEL_SCHEMA: Final[Path] = PATH / "cibuildwheel.schema.json"
 PYTHON_BUILD_STANDALONE_RELEASES: Final[Path] = PATH / "python-build-standalone-releases.json"
 TEST_FAIL_CWD_FILE: Final[Path] = PATH / "testing_temp_dir_file.py"
+CONTAINER_AGENT: Final[Path] = PATH / "container_agent.py"
 IOS_SUPPORT_FILES: Final[Path] = PATH / "ios-support"
 
 
@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+__lazy_modules__ = {
+    "certifi",
+    "cibuildwheel.logger",
+    "concurrent",
+    "concurrent.futures",
+    "http",
+    "http.client",
+    "shutil",
+    "ssl",
+    "urllib",
+    "urllib.error",
+    "urllib.parse",
+    "urllib.request",
+    "uuid",
+}
+
+import concurrent.futures
+import contextlib
+import http.client
+import os
+import shutil
+import ssl
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from pathlib import Path
+from typing import Protocol
+
+import certifi
+
+from cibuildwheel.logger import log
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from collections.abc import Callable, Generator
+    from concurrent.futures import Future
+    from typing import BinaryIO, ParamSpec, TypeVar
+
+    P = ParamSpec("P")
+    T = TypeVar("T")
+
+# the environment variable holding a bearer token for an HTTP shared cache
+TOKEN_ENV_VAR = "CIBW_SHARED_CACHE_TOKEN"
+
+CHUNK_SIZE = 1024 * 1024
+
+# how long to wait on an HTTP shared cache before giving up on it, in seconds
+TIMEOUT = 60
+
+
+class SharedCacheBackend(Protocol):
+    """
+    Somewhere to keep files that several machines can reach. Keys are
+    relative POSIX paths, like "wheels/<hash>.whl".
+    """
+
+    def get(self, key: str, dest: Path) -> bool:
+        """
+        Saves the file stored under `key` to `dest`. Returns False if there's
+        no such file.
+        """
+        ...
+
+    def put(self, key: str, src: Path) -> None: ...
+
+
+class DirectoryBackend:
+    """
+    Keeps files in a directory, e.g. on a network file system.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def get(self, key: str, dest: Path) -> bool:
+        try:
+            with (self.root / key).open("rb") as src_file:
+                _write_atomically(dest, src_file)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def put(self, key: str, src: Path) -> None:
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with src.open("rb") as src_file:
+            _write_atomically(path, src_file)
+
+
+class HTTPBackend:
+    """
+    Keeps files on a web server, using GET to fetch them and PUT to store
+    them. A bearer token is sent if CIBW_SHARED_CACHE_TOKEN is set.
+    """
+
+    def __init__(self, base_url: str, *, token: str | None = None) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+        cafile = os.environ.get("SSL_CERT_FILE", certifi.where())
+        self.context = ssl.create_default_context(cafile=cafile)
+
+    def _request(
+        self,
+        method: str,
+        key: str,
+        *,
+        data: BinaryIO | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> urllib.request.Request:
+        request = urllib.request.Request(
+            f"{self.base_url}/{urllib.parse.quote(key)}",
+            data=data,
+            headers=headers or {},
+            method=method,
+        )
+        if self.token:
+            request.add_header("Authorization", f"Bearer {self.token}")
+        return request
+
+    def get(self, key: str, dest: Path) -> bool:
+        try:
+            request = self._request("GET", key)
+            with urllib.request.urlopen(request, context=self.context, timeout=TIMEOUT) as r:
+                _write_atomically(dest, r)
+        except urllib.error.HTTPError as error:
+            if error.code == 404:
+                return False
+            raise
+        return True
+
+    def put(self, key: str, src: Path) -> None:
+        with src.open("rb") as src_file:
+            request = self._request(
+                "PUT",
+                key,
+                data=src_file,
+                headers={
+                    "Content-Length": str(src.stat().st_size),
+                    "Content-Type": "application/octet-stream",
+                },
+            )
+            with urllib.request.urlopen(request, context=self.context, timeout=TIMEOUT):
+                pass
+
+
+def _write_atomically(dest: Path, src_file: BinaryIO) -> None:
+    tmp_path = dest.with_name(f".{dest.name}.{uuid.uuid4()}.tmp")
+    try:
+        with tmp_path.open("wb") as tmp_file:
+            shutil.copyfileobj(src_file, tmp_file, CHUNK_SIZE)
+        tmp_path.replace(dest)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def backend_from_location(location: str) -> SharedCacheBackend:
+    """
+    Returns the backend for a shared-cache setting - an http(s) URL, or a
+    directory.
+    """
+    parsed = urllib.parse.urlparse(location)
+    if parsed.scheme in {"http", "https"}:
+        return HTTPBackend(location, token=os.environ.get(TOKEN_ENV_VAR))
+    if parsed.scheme == "file":
+        return DirectoryBackend(Path(urllib.request.url2pathname(parsed.path)))
+    return DirectoryBackend(Path(location))
+
+
+class SharedCache:
+    """
+    Runs lookups and uploads on a backend in the background, so they
+    overlap with the builds. The shared cache only saves time, so a failed
+    lookup is treated as a miss, and a failed upload is a warning.
+    """
+
+    def __init__(self, backend: SharedCacheBackend, staging_dir: Path) -> None:
+        self.backend = backend
+        self.staging_dir = staging_dir
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=4, thread_name_prefix="cibw-shared-cache"
+        )
+        self._uploads: list[Future[None]] = []
+        self._lock = threading.Lock()
+
+    def get(self, key: str, dest: Path) -> bool:
+        """
+        Saves the file stored under `key` to `dest`, if there is one.
+        """
+        try:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            return self.backend.get(key, dest)
+        except (OSError, http.client.HTTPException) as error:
+            log.warning(f"Can't read {key} from the shared cache: {error}")
+            return False
+
+    def submit(self, fn: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> Future[T]:
+        """
+        Runs `fn` in the background, e.g. a lookup that needs several calls
+        to `get`.
+        """
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def put_async(self, *files: tuple[str, Path]) -> None:
+        """
+        Uploads copies of `files`, given as (key, path) pairs, one after
+        another. The copies are taken now, so the caller can move or delete
+        the files straight away.
+        """
+        self.staging_dir.mkdir(parents=True, exist_ok=True)
+        staged_files = []
+        for key, src in files:
+            staged = self.staging_dir / f"{uuid.uuid4()}-{src.name}"
+            shutil.copyfile(src, staged)
+            staged_files.append((key, staged))
+
+        def upload() -> None:
+            try:
+                for key, staged in staged_files:
+                    self.backend.put(key, staged)
+            except (OSError, http.client.HTTPException) as error:
+                log.warning(f"Can't save {key} to the shared cache: {error}")
+            finally:
+                for _, staged in staged_files:
+                    staged.unlink(missing_ok=True)
+
+        with self._lock:
+            self._uploads.append(self._executor.submit(upload))
+
+    def close(self) -> None:
+        """
+        Waits for the uploads to finish.
+        """
+        with self._lock:
+            uploads = list(self._uploads)
+        if any(not upload.done() for upload in uploads):
+            print("info: Waiting for uploads to the shared cache to finish...")
+        self._executor.shutdown(wait=True)
+
+
+_shared_cache: SharedCache | None = None
+
+
+def get_shared_cache() -> SharedCache | None:
+    """
+    The shared cache for this run, if one is set up.
+    """
+    return _shared_cache
+
+
+@contextlib.contextmanager
+def use_shared_cache(location: str, *, staging_dir: Path) -> Generator[None, None, None]:
+    """
+    Sets up the shared cache at `location` for the duration of the block.
+    An empty location disables it.
+    """
+    global _shared_cache  # noqa: PLW0603
+
+    if not location:
+        yield
+        return
+
+    _shared_cache = SharedCache(backend_from_location(location), staging_dir)
+    try:
+        yield
+    finally:
+        shared_cache, _shared_cache = _shared_cache, None
+        shared_cache.close()
@@ -0,0 +1,330 @@
+from __future__ import annotations
+
+__lazy_modules__ = {"hashlib", "humanize", "sqlite3", "statistics"}
+
+import contextlib
+import dataclasses
+import hashlib
+import sqlite3
+import statistics
+import threading
+import time
+
+import humanize
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from collections.abc import Callable, Generator, Iterable, Mapping, Sequence
+    from pathlib import Path
+    from typing import TypeVar
+
+    from cibuildwheel.options import Options
+
+    T = TypeVar("T")
+
+# the timing database, in the cache directory
+TIMINGS_DB_NAME = "timings.sqlite"
+
+# how many of the most recent runs of a build are kept, and go into its
+# expected duration
+HISTORY_LENGTH = 10
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    id INTEGER PRIMARY KEY,
+    project TEXT NOT NULL,
+    config TEXT NOT NULL,
+    identifier TEXT NOT NULL,
+    duration REAL NOT NULL,
+    finished REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS builds_by_identifier ON builds (project, identifier, config);
+CREATE TABLE IF NOT EXISTS steps (
+    build_id INTEGER NOT NULL REFERENCES builds (id) ON DELETE CASCADE,
+    step TEXT NOT NULL,
+    duration REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS steps_by_build ON steps (build_id);
+"""
+
+
+def project_key(options: Options) -> str:
+    """
+    The name builds' timings are kept under - the project's name from
+    pyproject.toml, or the package directory's name if it has none.
+    """
+    project = (options.pyproject_toml or {}).get("project", {})
+    name = project.get("name") if isinstance(project, dict) else None
+    if isinstance(name, str) and name:
+        return name
+    return options.globals.package_dir.resolve().name
+
+
+def config_key(options: Options, identifier: str) -> str:
+    """
+    A hash of the options that apply to a build. A change to them may change
+    how long it takes, so older timings are only used as a fallback.
+    """
+    build_options = options.build_options(identifier)
+    values = {
+        field.name: getattr(build_options, field.name)
+        for field in dataclasses.fields(build_options)
+        if field.name != "globals"
+    }
+    return hashlib.sha256(repr(sorted(values.items())).encode()).hexdigest()[:16]
+
+
+class TimingDatabase:
+    """
+    The durations of earlier builds, and of their steps, in an SQLite
+    database. Several runs can share it, so each operation opens its own
+    connection.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    @contextlib.contextmanager
+    def _connect(self) -> Generator[sqlite3.Connection, None, None]:
+        with contextlib.closing(sqlite3.connect(self.path, timeout=10)) as connection:
+            connection.execute("PRAGMA foreign_keys = ON")
+            with connection:
+                connection.executescript(_SCHEMA)
+            with connection:
+                yield connection
+
+    def record_build(
+        self,
+        *,
+        project: str,
+        config: str,
+        identifier: str,
+        duration: float,
+        steps: Sequence[tuple[str, float]] = (),
+        finished: float | None = None,
+    ) -> None:
+        """
+        Adds a build, forgetting the oldest ones past `HISTORY_LENGTH`. A step
+        that ran more than once in the build is recorded once, with the total.
+        """
+        step_durations: dict[str, float] = {}
+        for step, step_duration in steps:
+            step_durations[step] = step_durations.get(step, 0.0) + step_duration
+
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "INSERT INTO builds (project, config, identifier, duration, finished) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    project,
+                    config,
+                    identifier,
+                    duration,
+                    time.time() if finished is None else finished,
+                ),
+            )
+            connection.executemany(
+                "INSERT INTO steps (build_id, step, duration) VALUES (?, ?, ?)",
+                [(cursor.lastrowid, step, d) for step, d in step_durations.items()],
+            )
+            connection.execute(
+                "DELETE FROM builds WHERE project = ? AND config = ? AND identifier = ? "
+                "AND id NOT IN (SELECT id FROM builds WHERE project = ? AND config = ? "
+                "AND identifier = ? ORDER BY finished DESC LIMIT ?)",
+                (project, config, identifier) * 2 + (HISTORY_LENGTH,),
+            )
+
+    def _recent_builds(
+        self, connection: sqlite3.Connection, *, project: str, config: str, identifier: str
+    ) -> list[tuple[int, float]]:
+        # the builds with this config, or failing that, with any config
+        for query, params in (
+            ("AND config = ?", (project, identifier, config)),
+            ("", (project, identifier)),
+        ):
+            rows = connection.execute(
+                f"SELECT id, duration FROM builds WHERE project = ? AND identifier = ? {query} "
+                "ORDER BY finished DESC LIMIT ?",
+                (*params, HISTORY_LENGTH),
+            ).fetchall()
+            if rows:
+                return rows
+        return []
+
+    def expected_duration(self, *, project: str, config: str, identifier: str) -> float | None:
+        """
+        The median duration of the recent builds of `identifier`, or None if
+        it has never been built.
+        """
+        with self._connect() as connection:
+            rows = self._recent_builds(
+                connection, project=project, config=config, identifier=identifier
+            )
+        return statistics.median(duration for _, duration in rows) if rows else None
+
+    def expected_step_durations(
+        self, *, project: str, config: str, identifier: str
+    ) -> dict[str, float]:
+        """
+        The median duration of each step in the recent builds of `identifier`.
+        """
+        with self._connect() as connection:
+            rows = self._recent_builds(
+                connection, project=project, config=config, identifier=identifier
+            )
+            build_ids = [build_id for build_id, _ in rows]
+            step_rows = connection.execute(
+                f"SELECT step, duration FROM steps WHERE build_id IN ({','.join('?' * len(build_ids))})",
+                build_ids,
+            ).fetchall()
+
+        durations: dict[str, list[float]] = {}
+        for step, duration in step_rows:
+            durations.setdefault(step, []).append(duration)
+        return {step: statistics.median(d) for step, d in durations.items()}
+
+
+class TimingHistory:
+    """
+    The timings of this run's builds against the earlier ones - what each
+    build is expected to take, and how far through the run is.
+    """
+
+    def __init__(
+        self, database: TimingDatabase, *, project: str, configs: Mapping[str, str]
+    ) -> None:
+        self.database = database
+        self.project = project
+        self.configs = dict(configs)
+        self.start_time = time.time()
+        self.done: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._failed = False
+
+        def read_expected_durations() -> dict[str, float]:
+            expected = {
+                identifier: database.expected_duration(
+                    project=project, config=config, identifier=identifier
+                )
+                for identifier, config in self.configs.items()
+            }
+            return {i: d for i, d in expected.items() if d is not None}
+
+        self.known_durations = self._guard(read_expected_durations) or {}
+
+    def _guard(self, operation: Callable[[], T]) -> T | None:
+        # the history is only a nice-to-have, it can't fail a build
+        if self._failed:
+            return None
+        try:
+            return operation()
+        except sqlite3.Error as e:
+            self._failed = True
+            print(f"cibuildwheel: warning: Can't use the build timing history: {e}")
+            return None
+
+    def expected_durations(self) -> dict[str, float]:
+        """
+        What each build of the run is expected to take. The builds that have
+        never run get the average of the others, or nothing if none have.
+        """
+        if not self.known_durations:
+            return {}
+        fallback = statistics.mean(self.known_durations.values())
+        return {i: self.known_durations.get(i, fallback) for i in self.configs}
+
+    def record_build(
+        self, identifier: str, *, duration: float, steps: Iterable[tuple[str, float]]
+    ) -> None:
+        with self._lock:
+            self.done[identifier] = duration
+        config = self.configs.get(identifier)
+        if config is None:
+            return
+        steps = list(steps)
+        self._guard(
+            lambda: self.database.record_build(
+                project=self.project,
+                config=config,
+                identifier=identifier,
+                duration=duration,
+                steps=steps,
+            )
+        )
+
+    def progress(self) -> str:
+        """
+        How far through the run is, e.g. "3/10 builds done, 40% of the
+        expected time, about 5 minutes left". The time left is scaled by how
+        this run is going compared to earlier ones, which also takes account
+        of builds running in parallel.
+        """
+        with self._lock:
+            done = set(self.done)
+        message = f"{len(done)}/{len(self.configs)} builds done"
+
+        expected = self.expected_durations()
+        total = sum(expected.values())
+        if not total:
+            return message
+        expected_done = sum(d for i, d in expected.items() if i in done)
+        expected_left = total - expected_done
+        elapsed = time.time() - self.start_time
+        speed = elapsed / expected_done if expected_done else 1.0
+        left = humanize.naturaldelta(expected_left * speed)
+        return f"{message}, {expected_done / total:.0%} of the expected time, about {left} left"
+
+
+def _timing_history(
+    options: Options, identifiers: Sequence[str], *, cache_path: Path
+) -> TimingHistory:
+    return TimingHistory(
+        TimingDatabase(cache_path / TIMINGS_DB_NAME),
+        project=project_key(options),
+        configs={identifier: config_key(options, identifier) for identifier in identifiers},
+    )
+
+
+def earlier_durations(
+    options: Options, identifiers: Sequence[str], *, cache_path: Path
+) -> dict[str, float]:
+    """
+    What the builds that have run before are expected to take, from the
+    timing history in the cache.
+    """
+    if not (cache_path / TIMINGS_DB_NAME).exists():
+        return {}
+    return _timing_history(options, identifiers, cache_path=cache_path).known_durations
+
+
+_history: TimingHistory | None = None
+
+
+def get_timing_history() -> TimingHistory | None:
+    """
+    The timing history of this run, if it's kept.
+    """
+    return _history
+
+
+@contextlib.contextmanager
+def use_timing_history(
+    options: Options, identifiers: Sequence[str], *, cache_path: Path
+) -> Generator[TimingHistory, None, None]:
+    """
+    Keeps the timings of the builds in the block in the cache, and makes the
+    earlier ones available.
+    """
+    global _history  # noqa: PLW0603
+
+    history = _timing_history(options, identifiers, cache_path=cache_path)
+    if expected := history.expected_durations():
+        total = humanize.naturaldelta(sum(expected.values()))
+        print(f"info: Earlier runs took {total} for these builds, one at a time")
+
+    previous = _history
+    _history = history
+    try:
+        yield history
+    finally:
+        _history = previous
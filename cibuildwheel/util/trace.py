@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+__lazy_modules__ = {"json"}
+
+import contextlib
+import json
+import os
+import threading
+import time
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from collections.abc import Generator, Sequence
+    from pathlib import Path
+    from typing import IO
+
+    from cibuildwheel.typing import PathOrStr
+
+
+class Trace:
+    """
+    A timeline of a run, written as a Chrome trace - the JSON format that
+    chrome://tracing and https://ui.perfetto.dev open. Each build, step and
+    command is a span, on the track of the thread that ran it.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.start = time.time()
+        self._events: list[dict[str, object]] = []
+        self._thread_names: dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def add_span(
+        self, name: str, *, category: str, start: float, end: float, args: dict[str, object]
+    ) -> None:
+        """
+        Records a span from `start` to `end`, given as `time.time()` values,
+        on the current thread's track.
+        """
+        thread = threading.current_thread()
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": round((start - self.start) * 1e6),
+            "dur": round((end - start) * 1e6),
+            "pid": os.getpid(),
+            "tid": thread.ident,
+            "args": args,
+        }
+        with self._lock:
+            self._events.append(event)
+            if thread.ident is not None:
+                self._thread_names.setdefault(thread.ident, thread.name)
+
+    def write(self) -> None:
+        with self._lock:
+            metadata: list[dict[str, object]] = [
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": os.getpid(),
+                    "tid": tid,
+                    "args": {"name": name},
+                }
+                for tid, name in self._thread_names.items()
+            ]
+            trace = {"traceEvents": metadata + self._events, "displayTimeUnit": "ms"}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(trace), encoding="utf-8")
+
+
+_trace: Trace | None = None
+
+
+def get_trace() -> Trace | None:
+    """
+    The trace being recorded for this run, if there is one.
+    """
+    return _trace
+
+
+@contextlib.contextmanager
+def use_trace_file(path: Path | None) -> Generator[None, None, None]:
+    """
+    Records a trace of the block to `path`, if it's given. The trace is
+    written when the block exits, even if it fails.
+    """
+    global _trace  # noqa: PLW0603
+
+    if path is None:
+        yield
+        return
+
+    trace = Trace(path)
+    _trace = trace
+    try:
+        with trace_span("cibuildwheel", category="run"):
+            yield
+    finally:
+        _trace = None
+        trace.write()
+        print(f"info: Wrote a trace of the run to {path}")
+
+
+@contextlib.contextmanager
+def trace_span(
+    name: str, *, category: str, **args: object
+) -> Generator[dict[str, object], None, None]:
+    """
+    Records the block as a span, if a trace is being recorded. Yields the
+    span's arguments, so that the block can add to them - e.g. the exit code
+    of a command.
+    """
+    trace = _trace
+    span_args = dict(args)
+    if trace is None:
+        yield span_args
+        return
+
+    start = time.time()
+    try:
+        yield span_args
+    except BaseException as e:
+        span_args.setdefault("error", type(e).__name__)
+        raise
+    finally:
+        trace.add_span(name, category=category, start=start, end=time.time(), args=span_args)
+
+
+def command_span(
+    args: Sequence[PathOrStr], *, category: str
+) -> contextlib.AbstractContextManager[dict[str, object]]:
+    """
+    A span for running the command `args`, named after the program.
+    """
+    command = [str(arg) for arg in args]
+    name = os.path.basename(command[0]) if command else "command"  # noqa: PTH119
+    return trace_span(name, category=category, command=command)
+
+
+class ByteCounter:
+    """
+    Passes writes through to a binary stream, counting the bytes.
+    """
+
+    def __init__(self, stream: IO[bytes]) -> None:
+        self.stream = stream
+        self.count = 0
+
+    def write(self, data: bytes) -> int:
+        self.count += len(data)
+        return self.stream.write(data)
+
+    def flush(self) -> None:
+        self.stream.flush()
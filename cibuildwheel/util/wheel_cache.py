@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+__lazy_modules__ = {
+    "cibuildwheel.logger",
+    "cibuildwheel.util.cache_index",
+    "cibuildwheel.util.file",
+    "cibuildwheel.util.file_selection",
+    "cibuildwheel.util.shared_cache",
+    "contextlib",
+    "hashlib",
+    "json",
+    "os",
+    "platform",
+    "shutil",
+    "uuid",
+}
+
+import contextlib
+import hashlib
+import json
+import os
+import platform
+import shutil
+import threading
+import uuid
+from concurrent.futures import Future
+from pathlib import Path
+
+from cibuildwheel import __version__
+from cibuildwheel.logger import log
+from cibuildwheel.util.cache_index import record_cache_use
+from cibuildwheel.util.file import CIBW_CACHE_PATH
+from cibuildwheel.util.file_selection import git_files, walk_files
+from cibuildwheel.util.shared_cache import get_shared_cache
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from cibuildwheel.options import BuildOptions, Options
+    from cibuildwheel.util.shared_cache import SharedCache
+
+# the name and hash of the wheel in a cache entry
+ENTRY_FILE_NAME = "entry.json"
+
+
+class WheelCache:
+    """
+    Repaired wheels from earlier runs, stored under a key that hashes
+    everything that went into building them - the project's files, the
+    build options, the toolchain, and the dependency constraints. A build
+    whose key is found can reuse the wheel instead of building it again.
+
+    Only what's in the key is checked. The project's files are the ones git
+    tracks or doesn't ignore, when the project is in a git repository.
+
+    Wheels are also saved to, and looked up in, the shared cache, when one
+    is set up.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        project_dir: Path,
+        *,
+        exclude: Sequence[Path] = (),
+        shared: SharedCache | None = None,
+    ) -> None:
+        self.path = path
+        self.project_dir = project_dir
+        self.exclude = exclude
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._project_hash: str | None = None
+
+    def project_hash(self) -> str:
+        """
+        A hash of the project's files, computed once and reused for every key.
+        """
+        with self._lock:
+            if self._project_hash is None:
+                self._project_hash = hash_project_files(self.project_dir, exclude=self.exclude)
+            return self._project_hash
+
+    def key(
+        self,
+        *,
+        identifier: str,
+        build_options: BuildOptions,
+        toolchain: str,
+        constraints_path: Path | None,
+    ) -> str:
+        """
+        The key of the wheel for `identifier`. `toolchain` should identify
+        what the build runs on - e.g. a container image ID.
+        """
+        constraints = (
+            hashlib.sha256(constraints_path.read_bytes()).hexdigest()
+            if constraints_path is not None
+            else None
+        )
+        inputs = {
+            "cibuildwheel": __version__,
+            "identifier": identifier,
+            "project": self.project_hash(),
+            "package_dir": self._project_relative(build_options.package_dir),
+            "toolchain": toolchain,
+            "constraints": constraints,
+            "environment": repr(build_options.environment),
+            # the builds see the values these have on the host now
+            "environment_pass": {
+                name: os.environ.get(name) for name in build_options.environment_pass
+            },
+            "before_all": build_options.before_all,
+            "before_build": build_options.before_build,
+            "xbuild_tools": build_options.xbuild_tools,
+            "xbuild_files": build_options.xbuild_files,
+            "repair_command": build_options.repair_command,
+            "build_frontend": repr(build_options.build_frontend),
+            "config_settings": build_options.config_settings,
+            "pyodide_version": build_options.pyodide_version,
+        }
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+    def get(self, key: str) -> Path | None:
+        """
+        Returns the cached wheel for `key`, or None.
+        """
+        wheels = list((self.path / key).glob("*.whl"))
+        return wheels[0] if len(wheels) == 1 else None
+
+    def lookup(self, key: str) -> Future[Path | None]:
+        """
+        Finds the cached wheel for `key`, like `get`, but also looks in the
+        shared cache, if there is one. That happens in the background, so
+        the result is a future.
+        """
+        wheel = self.get(key)
+        if wheel is not None:
+            record_cache_use(self.path / key, hit=True, cache_path=self.path.parent)
+        if wheel is not None or self.shared is None:
+            future: Future[Path | None] = Future()
+            future.set_result(wheel)
+            return future
+        return self.shared.submit(self._fetch_shared, key)
+
+    def put(self, key: str, wheel: Path) -> None:
+        """
+        Saves a copy of `wheel` under `key`, and uploads it to the shared
+        cache, if there is one.
+        """
+        tmp_dir = self._make_tmp_dir()
+        try:
+            shutil.copy2(wheel, tmp_dir / wheel.name)
+            (tmp_dir / ENTRY_FILE_NAME).write_text(
+                json.dumps({"name": wheel.name, "sha256": file_sha256(wheel)}),
+                encoding="utf-8",
+            )
+            if self.shared is not None:
+                # the wheel goes first, so that an entry is only found once
+                # its wheel can be downloaded
+                self.shared.put_async(
+                    (f"wheels/{key}.whl", tmp_dir / wheel.name),
+                    (f"wheels/{key}.json", tmp_dir / ENTRY_FILE_NAME),
+                )
+            self._commit(tmp_dir, key)
+            record_cache_use(self.path / key, hit=False, cache_path=self.path.parent)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def _fetch_shared(self, key: str) -> Path | None:
+        assert self.shared is not None
+        tmp_dir = self._make_tmp_dir()
+        try:
+            if not self.shared.get(f"wheels/{key}.json", tmp_dir / ENTRY_FILE_NAME):
+                return None
+            try:
+                entry = json.loads((tmp_dir / ENTRY_FILE_NAME).read_text(encoding="utf-8"))
+                name, sha256 = entry["name"], entry["sha256"]
+            except (ValueError, KeyError, TypeError):
+                log.warning(f"Ignoring an invalid entry for {key} in the shared cache")
+                return None
+            if not isinstance(name, str) or Path(name).name != name or not name.endswith(".whl"):
+                log.warning(f"Ignoring an invalid entry for {key} in the shared cache")
+                return None
+
+            wheel = tmp_dir / name
+            if not self.shared.get(f"wheels/{key}.whl", wheel):
+                return None
+            if file_sha256(wheel) != sha256:
+                log.warning(f"Ignoring {name} from the shared cache, its hash doesn't match")
+                return None
+
+            print(f"info: Downloaded {name} from the shared cache")
+            self._commit(tmp_dir, key)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return self.get(key)
+
+    def _make_tmp_dir(self) -> Path:
+        tmp_dir = self.path / f".tmp-{uuid.uuid4()}"
+        tmp_dir.mkdir(parents=True)
+        return tmp_dir
+
+    def _commit(self, tmp_dir: Path, key: str) -> None:
+        # entries are moved into place whole, so a reader never sees a
+        # partial wheel
+        entry_dir = self.path / key
+        try:
+            tmp_dir.rename(entry_dir)
+        except OSError:
+            # another build saved the same entry first
+            if not entry_dir.exists():
+                raise
+
+    def _project_relative(self, path: Path) -> str:
+        resolved = path.resolve()
+        project_dir = self.project_dir.resolve()
+        if resolved == project_dir or project_dir in resolved.parents:
+            return resolved.relative_to(project_dir).as_posix()
+        return str(resolved)
+
+
+def get_wheel_cache(options: Options) -> WheelCache | None:
+    """
+    Returns the wheel cache for a run, or None if it's not enabled.
+    """
+    if not options.globals.wheel_cache:
+        return None
+    return WheelCache(
+        CIBW_CACHE_PATH / "wheels",
+        Path.cwd(),
+        exclude=[options.globals.output_dir],
+        shared=get_shared_cache(),
+    )
+
+
+def host_toolchain(python_configuration: object) -> str:
+    """
+    Identifies the toolchain of a build that runs on the host - the Python
+    it's built for, and the host's OS.
+    """
+    return f"{python_configuration!r} {platform.platform()}"
+
+
+def hash_project_files(project_dir: Path, *, exclude: Sequence[Path] = ()) -> str:
+    """
+    Hashes the names, contents and executable bits of the files in a
+    project. Files in `exclude` directories, like the output directory, are
+    left out, and so is the .git directory.
+    """
+    excluded_dirs = set()
+    for path in exclude:
+        # directories outside the project don't matter
+        with contextlib.suppress(ValueError):
+            excluded_dirs.add(path.resolve().relative_to(project_dir.resolve()).as_posix())
+
+    def is_excluded(path: str) -> bool:
+        return path == ".git" or any(path == d or path.startswith(f"{d}/") for d in excluded_dirs)
+
+    files = git_files(project_dir)
+    if files is None:
+        files = list(walk_files(project_dir, skip_dir=is_excluded))
+
+    digest = hashlib.sha256()
+    for name in sorted(files):
+        if is_excluded(name):
+            continue
+        path = project_dir / name
+        if path.is_symlink():
+            digest.update(f"{name}\0link\0{path.readlink()}\0".encode())
+            continue
+        executable = bool(path.stat().st_mode & 0o111)
+        digest.update(f"{name}\0{executable}\0{file_sha256(path)}\0".encode())
+    return digest.hexdigest()
+
+
+def file_sha256(path: Path) -> str:
+    with path.open("rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
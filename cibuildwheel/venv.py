@@ -2,8 +2,10 @@
 
 __lazy_modules__ = {
     "cibuildwheel.util",
+    "cibuildwheel.util.cache_index",
     "cibuildwheel.util.cmd",
     "cibuildwheel.util.file",
+    "cibuildwheel.util.prefetch",
     "contextlib",
     "filelock",
     "packaging",
@@ -30,8 +32,10 @@
 from packaging.version import Version
 
 from cibuildwheel.util import resources
+from cibuildwheel.util.cache_index import record_cache_use
 from cibuildwheel.util.cmd import call
-from cibuildwheel.util.file import CIBW_CACHE_PATH, download, remove_on_error
+from cibuildwheel.util.file import CIBW_CACHE_PATH, download, remove_on_error, verify_file
+from cibuildwheel.util.prefetch import ToolchainAsset
 
 TYPE_CHECKING = False
 if TYPE_CHECKING:
@@ -71,12 +75,27 @@ def _ensure_virtualenv(version: str) -> tuple[Path, Version]:
     sha256 = str(configuration["sha256"])
     path = CIBW_CACHE_PATH / f"virtualenv-{version}.pyz"
     with FileLock(str(path) + ".lock"):
+        record_cache_use(path)
+        if path.exists() and not verify_file(path, sha256):
+            print(f"Cached {path.name} doesn't match its SHA256; redownloading.")
+            path.unlink()
         if not path.exists():
             with remove_on_error(path):
                 download(url, path, sha256=sha256)
     return (path, Version(version))
 
 
+def virtualenv_asset(version: str) -> ToolchainAsset:
+    """
+    The virtualenv zipapp that `virtualenv` uses for Python `version`.
+    """
+    major, minor, *_ = version.split(".")
+    return ToolchainAsset(
+        name=f"virtualenv for Python {major}.{minor}",
+        fetch=functools.partial(_ensure_virtualenv, version),
+    )
+
+
 def constraint_flags(
     dependency_constraint: Path | None,
 ) -> Sequence[str]:
@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tarfile
+
+import pytest
+
+from cibuildwheel import bundle, errors
+from cibuildwheel.bundle import (
+    MANIFEST_NAME,
+    BundleManifest,
+    export_bundle,
+    import_bundle,
+)
+from cibuildwheel.platforms import linux, macos
+from cibuildwheel.util.cache_index import cache_entries, record_cache_use
+from cibuildwheel.util.file import BUNDLE_WHEELHOUSE_NAME
+from cibuildwheel.util.prefetch import ToolchainAsset
+
+from .conftest import make_options
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+
+    from cibuildwheel.typing import PlatformName
+
+
+@pytest.fixture
+def cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    cache = tmp_path / "export-cache"
+    cache.mkdir()
+    (cache / "old-tool").mkdir()
+    (cache / "old-tool" / "bin").write_text("unused")
+
+    def install() -> None:
+        path = cache / "virtualenv-1.0.pyz"
+        path.write_text("virtualenv")
+        record_cache_use(path, hit=False, cache_path=cache)
+        python = cache / "nuget-cpython" / "python-3.12" / "python"
+        python.parent.mkdir(parents=True)
+        python.write_text("python")
+        record_cache_use(python, hit=False, cache_path=cache)
+
+    def download_installer() -> None:
+        pkg = cache / "cpython-installer" / "python-3.12.0-macos11.pkg"
+        pkg.parent.mkdir()
+        pkg.write_text("installer")
+        record_cache_use(pkg, hit=False, cache_path=cache)
+
+    monkeypatch.setattr(
+        macos,
+        "toolchain_assets",
+        lambda _options, _identifiers: [ToolchainAsset(name="tools", fetch=install)],
+    )
+    monkeypatch.setattr(
+        macos,
+        "installer_assets",
+        lambda _identifiers: [ToolchainAsset(name="installer", fetch=download_installer)],
+    )
+
+    def download_wheelhouse(
+        _requirements: Iterable[tuple[bundle.WheelTarget, str]], dest: Path
+    ) -> list[str]:
+        (dest / "pip-24.0-py3-none-any.whl").write_text("wheel")
+        return []
+
+    monkeypatch.setattr(bundle, "_download_wheelhouse", download_wheelhouse)
+    return cache
+
+
+def test_export_and_import(cache: Path, tmp_path: Path) -> None:
+    constraints = tmp_path / "constraints.txt"
+    constraints.write_text("# pinned\npip==24.0  # the installer\n--prefer-binary\n")
+    options = make_options("macos", {"CIBW_DEPENDENCY_VERSIONS": str(constraints)})
+    assert bundle._constraint_requirements(
+        "macos", options, ["cp312-macosx_x86_64", "cp313-macosx_x86_64"], tmp_path
+    ) == {
+        (
+            bundle.WheelTarget(
+                python_version=version,
+                implementation="cp",
+                abis=(f"cp{version.replace('.', '')}", "abi3", "none"),
+                platforms=("macosx_11_0_x86_64",),
+            ),
+            "pip==24.0",
+        )
+        for version in ["3.12", "3.13"]
+    }
+
+    bundle_path = tmp_path / "bundle.tar.gz"
+    manifest = export_bundle(
+        bundle_path,
+        platform="macos",
+        options=options,
+        identifiers=["cp312-macosx_x86_64"],
+        cache_path=cache,
+    )
+
+    # only what the builds use goes in
+    assert sorted(manifest.cache_entries) == [
+        "cpython-installer/python-3.12.0-macos11.pkg",
+        "nuget-cpython/python-3.12",
+        "virtualenv-1.0.pyz",
+    ]
+    assert set(manifest.files) == {
+        "cache/virtualenv-1.0.pyz",
+        "cache/nuget-cpython/python-3.12/python",
+        "cache/cpython-installer/python-3.12.0-macos11.pkg",
+        "wheelhouse/pip-24.0-py3-none-any.whl",
+    }
+    with tarfile.open(bundle_path) as tar:
+        assert json.loads(tar.extractfile(MANIFEST_NAME).read())["format"] == 1  # type: ignore[union-attr]
+
+    target = tmp_path / "import-cache"
+    imported = import_bundle(bundle_path, cache_path=target)
+    assert imported == manifest
+    assert (target / "virtualenv-1.0.pyz").read_text() == "virtualenv"
+    assert (target / "nuget-cpython" / "python-3.12" / "python").read_text() == "python"
+    assert (target / BUNDLE_WHEELHOUSE_NAME / "pip-24.0-py3-none-any.whl").exists()
+    assert (target / "CACHEDIR.TAG").exists()
+    assert (target / "cpython-installer" / "python-3.12.0-macos11.pkg").exists()
+    assert sorted(e.name for e in cache_entries(target)) == [
+        BUNDLE_WHEELHOUSE_NAME,
+        "cpython-installer/python-3.12.0-macos11.pkg",
+        "nuget-cpython/python-3.12",
+        "virtualenv-1.0.pyz",
+    ]
+
+    # entries that are already there are kept
+    (target / "virtualenv-1.0.pyz").write_text("newer")
+    import_bundle(bundle_path, cache_path=target)
+    assert (target / "virtualenv-1.0.pyz").read_text() == "newer"
+
+
+def test_installer_assets() -> None:
+    # the builds install CPython from the python.org installer, which a
+    # bundle has to carry - PyPy and GraalPy are toolchain assets already
+    assets = macos.installer_assets(["cp313-macosx_arm64", "pp311-macosx_arm64"])
+    [config] = [
+        c for c in macos.all_python_configurations() if c.identifier == "cp313-macosx_arm64"
+    ]
+    assert [asset.name for asset in assets] == [config.url.rsplit("/", 1)[-1]]
+    assert assets[0].name.endswith(".pkg")
+
+
+def write_bundle(path: Path, root: Path, manifest: BundleManifest) -> None:
+    (root / MANIFEST_NAME).write_text(manifest.to_json())
+    with tarfile.open(path, "w") as tar:
+        for child in sorted(root.iterdir()):
+            tar.add(child, child.name)
+
+
+@pytest.mark.parametrize(
+    ("platform", "identifier", "env", "pip_args"),
+    [
+        (
+            "linux",
+            "cp313-manylinux_x86_64",
+            {"CIBW_MANYLINUX_X86_64_IMAGE": "manylinux_2_28"},
+            [
+                "--python-version=3.13",
+                "--implementation=cp",
+                "--abi=cp313",
+                "--abi=abi3",
+                "--abi=none",
+                *(f"--platform=manylinux_2_{minor}_x86_64" for minor in range(28, 4, -1)),
+                "--platform=manylinux2014_x86_64",
+                "--platform=manylinux2010_x86_64",
+                "--platform=manylinux1_x86_64",
+            ],
+        ),
+        (
+            "linux",
+            "cp313t-musllinux_aarch64",
+            {"CIBW_MUSLLINUX_AARCH64_IMAGE": "quay.io/pypa/musllinux_1_1_aarch64:2024.10.26-1"},
+            [
+                "--python-version=3.13",
+                "--implementation=cp",
+                "--abi=cp313t",
+                "--abi=none",
+                "--platform=musllinux_1_1_aarch64",
+                "--platform=musllinux_1_0_aarch64",
+            ],
+        ),
+        (
+            "macos",
+            "pp311-macosx_universal2",
+            {},
+            [
+                "--python-version=3.11",
+                "--implementation=pp",
+                "--abi=pypy311_pp73",
+                "--abi=none",
+                "--platform=macosx_11_0_arm64",
+                "--platform=macosx_11_0_x86_64",
+            ],
+        ),
+        (
+            "windows",
+            "cp312-win32",
+            {},
+            [
+                "--python-version=3.12",
+                "--implementation=cp",
+                "--abi=cp312",
+                "--abi=abi3",
+                "--abi=none",
+                "--platform=win32",
+            ],
+        ),
+        ("pyodide", "cp312-pyodide_wasm32", {}, ["--python-version=3.12"]),
+    ],
+)
+def test_wheel_target(
+    platform: PlatformName, identifier: str, env: dict[str, str], pip_args: list[str]
+) -> None:
+    options = make_options(platform, env)
+    python_version = f"3.{identifier[3:5]}"
+    target = bundle.wheel_target(identifier, python_version, options.build_options(identifier))
+    assert target.pip_args() == pip_args
+
+
+def test_import_damaged_bundle(tmp_path: Path) -> None:
+    root = tmp_path / "contents"
+    (root / "cache").mkdir(parents=True)
+    (root / "cache" / "virtualenv-1.0.pyz").write_text("tampered")
+    manifest = BundleManifest(
+        cibuildwheel_version="3.0",
+        platform="macos",
+        identifiers=[],
+        cache_entries=["virtualenv-1.0.pyz"],
+        images=[],
+        files={"cache/virtualenv-1.0.pyz": "0" * 64},
+    )
+    write_bundle(tmp_path / "bundle.tar", root, manifest)
+
+    with pytest.raises(errors.FatalError, match="doesn't match its sha256"):
+        import_bundle(tmp_path / "bundle.tar", cache_path=tmp_path / "cache")
+    assert not (tmp_path / "cache" / "virtualenv-1.0.pyz").exists()
+
+
+def test_import_invalid_entry(tmp_path: Path) -> None:
+    root = tmp_path / "contents"
+    root.mkdir()
+    manifest = BundleManifest(
+        cibuildwheel_version="3.0",
+        platform="macos",
+        identifiers=[],
+        cache_entries=["../outside"],
+        images=[],
+        files={},
+    )
+    write_bundle(tmp_path / "bundle.tar", root, manifest)
+
+    with pytest.raises(errors.FatalError, match="invalid cache entry"):
+        import_bundle(tmp_path / "bundle.tar", cache_path=tmp_path / "cache")
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="uses a shell script as the engine")
+def test_export_and_import_images(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, cache: Path
+) -> None:
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    engine_log = tmp_path / "engine.log"
+    docker = bin_dir / "docker"
+    docker.write_text(
+        f'#!/bin/sh\necho "$@" >> {engine_log}\nif [ "$1" = save ]; then echo image > "$3"; fi\n'
+    )
+    docker.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setattr(linux, "toolchain_assets", lambda _options, _identifiers: [])
+
+    options = make_options("linux")
+    bundle_path = tmp_path / "bundle.tar"
+    manifest = export_bundle(
+        bundle_path,
+        platform="linux",
+        options=options,
+        identifiers=["cp312-manylinux_x86_64", "cp313-manylinux_x86_64"],
+        cache_path=cache,
+    )
+    [image] = manifest.images
+    assert image.engine == "docker"
+    assert image.platform == "linux/amd64"
+    assert "manylinux" in image.image
+    assert image.file in manifest.files
+    assert any(line.startswith("save -o ") for line in engine_log.read_text().splitlines())
+
+    import_bundle(bundle_path, cache_path=tmp_path / "import-cache")
+    assert engine_log.read_text().splitlines()[-1].startswith("load -i ")
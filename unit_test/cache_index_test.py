@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import os
+import time
+
+import pytest
+from filelock import FileLock
+
+from cibuildwheel.util import cache_index
+from cibuildwheel.util.cache_index import (
+    CACHE_INDEX_FILE_NAME,
+    cache_entries,
+    entry_name,
+    format_entries,
+    parse_size,
+    prune_cache,
+    record_cache_use,
+    use_cache_index,
+)
+from cibuildwheel.util.file import VERIFIED_SUFFIX
+from cibuildwheel.util.metadata_cache import MetadataCache
+
+from .conftest import make_options
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def make_entry(path: Path, size: int, mtime: float = 0) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_entry_name(tmp_path: Path) -> None:
+    assert entry_name(tmp_path / "pypy3.10" / "bin" / "python", tmp_path) == "pypy3.10"
+    assert entry_name(tmp_path / "wheels" / "abc" / "spam.whl", tmp_path) == "wheels/abc"
+    assert entry_name(tmp_path / "wheels", tmp_path) is None
+    assert entry_name(tmp_path / "CACHEDIR.TAG", tmp_path) is None
+    assert entry_name(tmp_path.parent / "elsewhere", tmp_path) is None
+
+
+def test_record_cache_use(tmp_path: Path) -> None:
+    make_entry(tmp_path / "node.tar.gz", 10)
+    make_entry(tmp_path / "wheels" / "abc" / "spam.whl", 20)
+    make_entry(tmp_path / "wheels" / "def" / "eggs.whl", 30)
+    os.utime(tmp_path / "wheels" / "def", (0, 0))
+
+    record_cache_use(tmp_path / "node.tar.gz", cache_path=tmp_path)
+    record_cache_use(tmp_path / "node.tar.gz", cache_path=tmp_path)
+    record_cache_use(tmp_path / "wheels" / "abc", hit=False, cache_path=tmp_path)
+    # a path that isn't in the cache is ignored
+    record_cache_use(tmp_path.parent / "elsewhere", cache_path=tmp_path)
+
+    entries = {e.name: e for e in cache_entries(tmp_path)}
+    assert sorted(entries) == ["node.tar.gz", "wheels/abc", "wheels/def"]
+    assert entries["node.tar.gz"].hits == 2
+    assert entries["node.tar.gz"].size == 10
+    assert entries["wheels/abc"].hits == 0
+    assert entries["wheels/def"].size == 30
+    # never-used entries fall back to their modification time
+    assert entries["wheels/def"].last_used == 0
+    assert entries["node.tar.gz"].last_used > time.time() - 60
+
+    table = format_entries(list(entries.values()))
+    assert table.splitlines()[0].split() == ["Entry", "Size", "Last", "used", "Hits"]
+    assert "wheels/def" in table
+
+
+def test_prune_cache(tmp_path: Path) -> None:
+    make_entry(tmp_path / "oldest.tgz", 100, mtime=1000)
+    make_entry(tmp_path / "older.tgz", 100, mtime=2000)
+    make_entry(tmp_path / "old.tgz", 100, mtime=3000)
+    make_entry(tmp_path / "recent.tgz", 100, mtime=time.time())
+    # a verification record isn't an entry of its own
+    (tmp_path / f"old.tgz{VERIFIED_SUFFIX}").write_text("{}")
+    (tmp_path / "CACHEDIR.TAG").write_text("Signature: 8a477f597d28d172789f06886806bc55")
+
+    # using an entry moves it to the back of the queue
+    record_cache_use(tmp_path / "oldest.tgz", cache_path=tmp_path)
+    os.utime(tmp_path / "oldest.tgz", (0, 0))
+
+    removed = prune_cache(tmp_path, max_size=250, dry_run=True)
+    assert [e.name for e in removed] == ["older.tgz", "old.tgz"]
+    assert (tmp_path / "older.tgz").exists()
+
+    # the recently used entries are kept, even when over the limit
+    removed = prune_cache(tmp_path, max_size=0)
+    assert [e.name for e in removed] == ["older.tgz", "old.tgz"]
+    assert sorted(e.name for e in cache_entries(tmp_path)) == ["oldest.tgz", "recent.tgz"]
+    assert (tmp_path / "CACHEDIR.TAG").exists()
+    assert not (tmp_path / f"old.tgz{VERIFIED_SUFFIX}").exists()
+
+    removed = prune_cache(tmp_path, max_size=0, min_age=0)
+    assert {e.name for e in removed} == {"oldest.tgz", "recent.tgz"}
+    assert cache_entries(tmp_path) == []
+
+
+def test_prune_cache_skips_locked_entries(tmp_path: Path) -> None:
+    make_entry(tmp_path / "pypy" / "bin" / "python", 100)
+    make_entry(tmp_path / "graalpy" / "bin" / "python", 100)
+
+    with FileLock(tmp_path / "pypy.lock"):
+        removed = prune_cache(tmp_path, max_size=0, min_age=0)
+    assert [e.name for e in removed] == ["graalpy"]
+    assert (tmp_path / "pypy").exists()
+
+    # only one run prunes at a time
+    with FileLock(tmp_path / "prune.lock"):
+        assert prune_cache(tmp_path, max_size=0, min_age=0) == []
+
+
+def test_cache_uses_are_batched(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(cache_index, "WRITE_DELAY", 3600)
+    make_entry(tmp_path / "node.tar.gz", 10)
+
+    with use_cache_index():
+        record_cache_use(tmp_path / "node.tar.gz", cache_path=tmp_path)
+        record_cache_use(tmp_path / "node.tar.gz", cache_path=tmp_path)
+        assert not (tmp_path / CACHE_INDEX_FILE_NAME).exists()
+
+    [entry] = cache_entries(tmp_path)
+    assert entry.hits == 2
+    assert entry.last_used > time.time() - 60
+
+
+def test_entries_in_use_are_kept(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(cache_index, "WRITE_DELAY", 0.01)
+    monkeypatch.setattr(cache_index, "KEEP_ALIVE_INTERVAL", 0)
+    make_entry(tmp_path / "container-package-cache" / "x86_64" / "pip" / "spam.whl", 10)
+    index = MetadataCache(tmp_path / CACHE_INDEX_FILE_NAME)
+
+    with use_cache_index():
+        record_cache_use(tmp_path / "container-package-cache" / "x86_64", cache_path=tmp_path)
+        # it's in use for longer than PRUNE_MIN_AGE
+        index.set("container-package-cache/x86_64", {"last_used": 0, "hits": 1})
+        deadline = time.time() + 10
+        while index.get("container-package-cache/x86_64")["last_used"] == 0:
+            assert time.time() < deadline, "the entry's use wasn't refreshed"
+            time.sleep(0.01)
+        assert prune_cache(tmp_path, max_size=0) == []
+
+
+@pytest.mark.parametrize(
+    ("size", "expected"),
+    [
+        ("123", 123),
+        ("10k", 10_000),
+        ("1.5M", 1_500_000),
+        ("10GB", 10_000_000_000),
+        ("2GiB", 2 * 1024**3),
+        (" 1 Ti ", 1024**4),
+    ],
+)
+def test_parse_size(size: str, expected: int) -> None:
+    assert parse_size(size) == expected
+
+
+@pytest.mark.parametrize("size", ["", "big", "10X", "-1G"])
+def test_parse_size_invalid(size: str) -> None:
+    with pytest.raises(ValueError, match="Invalid size"):
+        parse_size(size)
+
+
+def test_cache_size_limit_option() -> None:
+    options = make_options("linux")
+    assert options.globals.cache_size_limit is None
+
+    options = make_options("linux", {"CIBW_CACHE_SIZE_LIMIT": "10G"})
+    assert options.globals.cache_size_limit == 10_000_000_000
@@ -1,11 +1,35 @@
+from __future__ import annotations
+
 import sys
 from pathlib import Path
 
 import pytest
 
+from cibuildwheel.options import CommandLineArguments, Options
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from cibuildwheel.typing import PlatformName
+
 MOCK_PACKAGE_DIR = Path("some_package_dir")
 
 
+def make_options(
+    platform: PlatformName = "linux",
+    env: dict[str, str] | None = None,
+    *,
+    package_dir: Path | None = None,
+) -> Options:
+    """
+    The options of a run with the default command line, on `platform`.
+    """
+    args = CommandLineArguments.defaults()
+    args.platform = platform  # type: ignore[assignment]
+    if package_dir is not None:
+        args.package_dir = package_dir
+    return Options(platform, command_line_arguments=args, env=env or {})
+
+
 def pytest_addoption(parser: pytest.Parser) -> None:
     parser.addoption("--run-docker", action="store_true", default=False, help="run docker tests")
     parser.addoption("--run-podman", action="store_true", default=False, help="run podman tests")
@@ -1,7 +1,13 @@
 from __future__ import annotations
 
+import hashlib
+import http.server
 import io
+import os
 import ssl
+import stat
+import sys
+import threading
 import time
 import urllib.error
 import urllib.request
@@ -9,7 +15,9 @@
 import certifi
 import pytest
 
-from cibuildwheel.util.file import download
+from cibuildwheel.errors import FatalError
+from cibuildwheel.util import file
+from cibuildwheel.util.file import VERIFIED_SUFFIX, download, verify_file
 
 TYPE_CHECKING = False
 if TYPE_CHECKING:
@@ -65,14 +73,20 @@ def make(url: str, code: int) -> urllib.error.HTTPError:
 
 
 class FakeResponse:
+    status = 200
+
+    def __init__(self) -> None:
+        self.headers: dict[str, str] = {}
+        self.body = io.BytesIO(PAYLOAD)
+
     def __enter__(self) -> Self:
         return self
 
     def __exit__(self, *args: object) -> None:
         return None
 
-    def read(self) -> bytes:
-        return PAYLOAD
+    def read(self, size: int = -1) -> bytes:
+        return self.body.read(size)
 
 
 @pytest.fixture
@@ -170,3 +184,211 @@ def fake_urlopen(url: str, context: object = None) -> FakeResponse:  # noqa: ARG
     download(DOWNLOAD_URL, tmp_path / "file.txt")
 
     assert len(attempts) == 2
+
+
+class RangeHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Serves ``content``, honoring range requests if ``ranges`` is set. The
+    first ``drops`` responses are cut off half way through.
+    """
+
+    content: bytes
+    ranges: bool
+    drops: int
+    requests: list[str | None]
+
+    def do_GET(self) -> None:
+        range_header = self.headers.get("Range")
+        self.requests.append(range_header)
+        content = self.content
+        start, end = 0, len(content)
+        if self.ranges and range_header is not None:
+            first, _, last = range_header.removeprefix("bytes=").partition("-")
+            start = int(first)
+            end = int(last) + 1 if last else len(content)
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end - 1}/{len(content)}")
+        else:
+            self.send_response(200)
+        if self.ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start))
+        self.end_headers()
+
+        body = content[start:end]
+        if self.drops > 0:
+            type(self).drops -= 1
+            self.wfile.write(body[: len(body) // 2])
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def range_server() -> Iterator[tuple[str, type[RangeHandler]]]:
+    content = bytes(range(256)) * 4000
+    handler = type(
+        "Handler", (RangeHandler,), {"content": content, "ranges": True, "drops": 0, "requests": []}
+    )
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}/python.tar.gz", handler
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_download_streams_and_verifies(
+    range_server: tuple[str, type[RangeHandler]], tmp_path: Path
+) -> None:
+    url, handler = range_server
+    dest = tmp_path / "python.tar.gz"
+    download(url, dest, sha256=hashlib.sha256(handler.content).hexdigest())
+    assert dest.read_bytes() == handler.content
+    assert handler.requests == [None]
+    assert list(tmp_path.iterdir()) == [dest]
+
+
+def test_download_resumes_dropped_connection(
+    range_server: tuple[str, type[RangeHandler]],
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(time, "sleep", _no_sleep)
+    url, handler = range_server
+    handler.drops = 2
+    dest = tmp_path / "python.tar.gz"
+
+    download(url, dest, sha256=hashlib.sha256(handler.content).hexdigest())
+
+    assert dest.read_bytes() == handler.content
+    size = len(handler.content)
+    # each attempt carries on from where the last one stopped
+    assert handler.requests == [
+        None,
+        f"bytes={size // 2}-{size - 1}",
+        f"bytes={size * 3 // 4}-{size - 1}",
+    ]
+
+
+def test_download_restarts_without_range_support(
+    range_server: tuple[str, type[RangeHandler]],
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(time, "sleep", _no_sleep)
+    url, handler = range_server
+    handler.ranges = False
+    handler.drops = 1
+    dest = tmp_path / "python.tar.gz"
+
+    download(url, dest, sha256=hashlib.sha256(handler.content).hexdigest())
+
+    assert dest.read_bytes() == handler.content
+    assert len(handler.requests) == 2
+
+
+def test_download_segments(
+    range_server: tuple[str, type[RangeHandler]],
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(time, "sleep", _no_sleep)
+    monkeypatch.setattr(file, "SEGMENTED_DOWNLOAD_MIN_SIZE", 1000)
+    monkeypatch.setattr(file, "DOWNLOAD_SEGMENTS", 3)
+    url, handler = range_server
+    handler.drops = 1
+    dest = tmp_path / "python.tar.gz"
+
+    download(url, dest, sha256=hashlib.sha256(handler.content).hexdigest())
+
+    assert dest.read_bytes() == handler.content
+    size = len(handler.content)
+    segment = -(-size // 3)
+    assert f"bytes={segment}-{2 * segment - 1}" in handler.requests
+    assert f"bytes={2 * segment}-{size - 1}" in handler.requests
+    assert list(tmp_path.iterdir()) == [dest]
+
+
+def test_download_hash_mismatch(
+    range_server: tuple[str, type[RangeHandler]], tmp_path: Path
+) -> None:
+    url, _ = range_server
+    dest = tmp_path / "python.tar.gz"
+    with pytest.raises(FatalError, match="SHA256 mismatch"):
+        download(url, dest, sha256="0" * 64)
+    # nothing is left behind
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="no POSIX permissions on Windows")
+def test_download_permissions(range_server: tuple[str, type[RangeHandler]], tmp_path: Path) -> None:
+    url, _ = range_server
+    old_umask = os.umask(0o022)
+    try:
+        download(url, tmp_path / "python.tar.gz")
+    finally:
+        os.umask(old_umask)
+    # the usual permissions for a new file, rather than the temp file's 0600
+    assert stat.S_IMODE((tmp_path / "python.tar.gz").stat().st_mode) == 0o644
+
+
+def test_download_records_verification(
+    range_server: tuple[str, type[RangeHandler]],
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(file, "CIBW_CACHE_PATH", tmp_path)
+    url, handler = range_server
+    dest = tmp_path / "python.tar.gz"
+    sha256 = hashlib.sha256(handler.content).hexdigest()
+    download(url, dest, sha256=sha256)
+
+    # the download was hashed as it was written, so it's not hashed again
+    hashed: list[Path] = []
+
+    def file_sha256(path: Path) -> str:
+        hashed.append(path)
+        return sha256
+
+    monkeypatch.setattr(file, "_file_sha256", file_sha256)
+    assert verify_file(dest, sha256)
+    assert hashed == []
+
+
+def test_verify_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(file, "CIBW_CACHE_PATH", tmp_path)
+    path = tmp_path / "python.tar.gz"
+    path.write_bytes(PAYLOAD)
+    sha256 = hashlib.sha256(PAYLOAD).hexdigest()
+    hashed: list[Path] = []
+    real_file_sha256 = file._file_sha256
+
+    def file_sha256(path: Path) -> str:
+        hashed.append(path)
+        return real_file_sha256(path)
+
+    monkeypatch.setattr(file, "_file_sha256", file_sha256)
+
+    assert verify_file(path, sha256)
+    assert verify_file(path, sha256)
+    assert len(hashed) == 1
+    assert (tmp_path / f"python.tar.gz{VERIFIED_SUFFIX}").exists()
+
+    # a file that's changed is hashed again
+    path.write_bytes(b"changed")
+    assert not verify_file(path, sha256)
+    assert len(hashed) == 2
+    assert not (tmp_path / f"python.tar.gz{VERIFIED_SUFFIX}").exists()
+
+    # and, with --verify-cache, so is every file
+    path.write_bytes(PAYLOAD)
+    assert verify_file(path, sha256)
+    monkeypatch.setattr(file, "_full_cache_verification", True)
+    assert verify_file(path, sha256)
+    assert len(hashed) == 4
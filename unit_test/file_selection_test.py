@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+import tarfile
+
+import pytest
+
+from cibuildwheel.oci_container import host_tar_command
+from cibuildwheel.util.file_selection import (
+    IgnoreMatcher,
+    parse_ignore_patterns,
+    select_project_files,
+)
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def make_tree(root: Path, paths: list[str]) -> None:
+    for path in paths:
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_text(path)
+
+
+@pytest.mark.parametrize(
+    ("patterns", "path", "excluded"),
+    [
+        ("*.so", "a.so", True),
+        ("*.so", "pkg/sub/a.so", True),
+        ("*.so", "a.soo", False),
+        ("/build", "build/x.o", True),
+        ("/build", "pkg/build/x.o", False),
+        ("build/", "pkg/build/x.o", True),
+        ("build/", "build", False),
+        ("docs/*.md", "docs/a.md", True),
+        ("docs/*.md", "docs/sub/a.md", False),
+        ("docs/**/*.md", "docs/sub/deeper/a.md", True),
+        ("**/cache", "a/b/cache/x", True),
+        ("data/**", "data/x/y", True),
+        ("a?c", "abc", True),
+        ("a?c", "a/c", False),
+        ("[!x]y", "zy", True),
+        ("[!x]y", "xy", False),
+        ("*.so\n!keep.so", "keep.so", False),
+        ("*.so\n!keep.so", "other.so", True),
+        # a file can't be re-included if its directory is excluded
+        ("build/\n!build/keep", "build/keep", True),
+        ("# a comment\n\n\\#hash", "#hash", True),
+        ("\\!bang", "!bang", True),
+    ],
+)
+def test_ignore_patterns(patterns: str, path: str, excluded: bool) -> None:
+    matcher = IgnoreMatcher(parse_ignore_patterns(patterns))
+    assert matcher.excluded(path) == excluded
+
+
+def test_select_project_files_all(tmp_path: Path) -> None:
+    make_tree(tmp_path, ["setup.py", "pkg/a.py", "pkg/a.so", "build/x.o", ".git/HEAD"])
+
+    # without a .cibwignore file, everything is copied
+    assert select_project_files(tmp_path, vcs=False) is None
+
+    (tmp_path / ".cibwignore").write_text("*.so\n/build/\n")
+    assert select_project_files(tmp_path, vcs=False) == [
+        ".cibwignore",
+        ".git/HEAD",
+        "pkg/a.py",
+        "setup.py",
+    ]
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="needs git")
+def test_select_project_files_vcs(tmp_path: Path) -> None:
+    make_tree(
+        tmp_path,
+        [
+            ".gitignore",
+            "setup.py",
+            "pkg/a.py",
+            "pkg/deleted.py",
+            "pkg/a.so",
+            "build/x.o",
+            "notes.txt",
+            "tests/data.bin",
+        ],
+    )
+    (tmp_path / ".gitignore").write_text("*.so\nbuild/\n")
+    git = ["git", "-c", "user.name=test", "-c", "user.email=test@example.com"]
+    subprocess.run([*git, "init", "-q"], cwd=tmp_path, check=True)
+    subprocess.run([*git, "add", ".gitignore", "setup.py", "pkg"], cwd=tmp_path, check=True)
+    subprocess.run([*git, "commit", "-q", "-m", "init"], cwd=tmp_path, check=True)
+    (tmp_path / "pkg/deleted.py").unlink()
+
+    # tracked files, plus untracked files that aren't ignored
+    assert select_project_files(tmp_path, vcs=True) == [
+        ".gitignore",
+        "notes.txt",
+        "pkg/a.py",
+        "setup.py",
+        "tests/data.bin",
+    ]
+
+    (tmp_path / ".cibwignore").write_text("tests/\n.*\n")
+    assert select_project_files(tmp_path, vcs=True) == ["notes.txt", "pkg/a.py", "setup.py"]
+
+    # the selection is relative to the project, inside a larger repository
+    assert select_project_files(tmp_path / "pkg", vcs=True) == ["a.py"]
+
+
+def test_select_project_files_vcs_not_a_repository(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    make_tree(tmp_path, ["setup.py", "pkg/a.so"])
+    monkeypatch.setenv("GIT_CEILING_DIRECTORIES", str(tmp_path.parent))
+
+    assert select_project_files(tmp_path, vcs=True) is None
+    assert "Copying all the project files" in capsys.readouterr().err
+
+
+@pytest.mark.skipif(shutil.which("tar") is None, reason="needs tar")
+def test_host_tar_command(tmp_path: Path) -> None:
+    make_tree(tmp_path / "project", ["setup.py", "-rf", "pkg/a.py", "pkg/a.so"])
+
+    tar_command, tar_input = host_tar_command(["-rf", "pkg/a.py", "setup.py"])
+    archive = subprocess.run(
+        tar_command,
+        shell=True,
+        check=True,
+        cwd=tmp_path / "project",
+        input=tar_input,
+        capture_output=True,
+    ).stdout
+
+    (tmp_path / "archive.tar").write_bytes(archive)
+    with tarfile.open(tmp_path / "archive.tar") as tar:
+        names = sorted(os.path.normpath(name) for name in tar.getnames())
+    assert names == ["-rf", "pkg/a.py", "setup.py"]
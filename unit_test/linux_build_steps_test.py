@@ -1,14 +1,19 @@
 from __future__ import annotations
 
+import concurrent.futures
+import subprocess
 import textwrap
+import threading
+from pathlib import PurePosixPath
 from pprint import pprint
 
 import pytest
 
 import cibuildwheel.platforms.linux
-from cibuildwheel.errors import ConfigurationError
-from cibuildwheel.oci_container import OCIContainerEngineConfig
+from cibuildwheel.errors import AlreadyBuiltWheelError, ConfigurationError, FatalError
+from cibuildwheel.oci_container import OCIContainerEngineConfig, OCIPlatform
 from cibuildwheel.options import CommandLineArguments, Options
+from cibuildwheel.util.file import CIBW_CACHE_PATH
 
 TYPE_CHECKING = False
 if TYPE_CHECKING:
@@ -123,3 +128,366 @@ def test_package_dir_outside_working_directory_raises_configuration_error(
         ConfigurationError, match="package_dir must be inside the working directory"
     ):
         cibuildwheel.platforms.linux.build(options, tmp_path / "build")
+
+
+def test_build_steps_run_in_parallel(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    args = CommandLineArguments.defaults()
+    args.platform = "linux"
+    args.jobs = "3"
+
+    (tmp_path / "pyproject.toml").write_text(
+        textwrap.dedent(
+            """
+                [tool.cibuildwheel]
+                build = "cp31{2,3,4}-manylinux_x86_64"
+
+                [[tool.cibuildwheel.overrides]]
+                select = "cp313-*"
+                before-all = "echo cp313"
+
+                [[tool.cibuildwheel.overrides]]
+                select = "cp314-*"
+                before-all = "echo cp314"
+            """
+        )
+    )
+
+    monkeypatch.chdir(tmp_path)
+    options = Options("linux", command_line_arguments=args, env={})
+
+    all_started = threading.Barrier(3, timeout=10)
+
+    def fake_build_step_in_container(
+        *, build_step: cibuildwheel.platforms.linux.BuildStep, **_kwargs: object
+    ) -> None:
+        (identifier,) = (c.identifier for c in build_step.platform_configs)
+        print(f"{identifier} start")
+        # every step has to be running at the same time to pass the barrier
+        all_started.wait()
+        print(f"{identifier} end")
+
+    monkeypatch.setattr(
+        cibuildwheel.platforms.linux, "build_step_in_container", fake_build_step_in_container
+    )
+    monkeypatch.setattr(cibuildwheel.platforms.linux, "pull_image", lambda *_args: None)
+
+    cibuildwheel.platforms.linux.build(options, tmp_path / "build")
+
+    lines = capsys.readouterr().out.splitlines()
+    for identifier in ["cp312", "cp313", "cp314"]:
+        start = lines.index(f"{identifier}-manylinux_x86_64 start")
+        assert lines[start + 1] == f"{identifier}-manylinux_x86_64 end"
+
+
+def test_build_steps_parallel_failure(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    args = CommandLineArguments.defaults()
+    args.platform = "linux"
+    args.jobs = "2"
+
+    (tmp_path / "pyproject.toml").write_text(
+        textwrap.dedent(
+            """
+                [tool.cibuildwheel]
+                build = "cp31{2,3}-manylinux_x86_64"
+
+                [[tool.cibuildwheel.overrides]]
+                select = "cp313-*"
+                before-all = "echo cp313"
+            """
+        )
+    )
+
+    monkeypatch.chdir(tmp_path)
+    options = Options("linux", command_line_arguments=args, env={})
+
+    def fake_build_step_in_container(
+        *, build_step: cibuildwheel.platforms.linux.BuildStep, **_kwargs: object
+    ) -> None:
+        if build_step.platform_configs[0].identifier.startswith("cp313"):
+            msg = "cp313 failed"
+            raise FatalError(msg)
+
+    monkeypatch.setattr(
+        cibuildwheel.platforms.linux, "build_step_in_container", fake_build_step_in_container
+    )
+    monkeypatch.setattr(cibuildwheel.platforms.linux, "pull_image", lambda *_args: None)
+
+    with pytest.raises(FatalError, match="cp313 failed"):
+        cibuildwheel.platforms.linux.build(options, tmp_path / "build")
+
+
+def test_built_wheels_claim() -> None:
+    built_wheels = cibuildwheel.platforms.linux.BuiltWheels()
+    abi3_wheel = PurePosixPath("/tmp/spam-0.1.0-cp312-abi3-manylinux_2_28_x86_64.whl")
+    cp312_wheel = PurePosixPath("/tmp/spam-0.1.0-cp312-cp312-manylinux_2_28_x86_64.whl")
+
+    assert built_wheels.claim(abi3_wheel, "cp312-manylinux_x86_64")
+    # a build of another version that's running at the same time produced the same abi3 wheel
+    assert not built_wheels.claim(abi3_wheel, "cp313-manylinux_x86_64")
+    assert built_wheels.find_compatible_wheel("cp313-manylinux_x86_64") is None
+
+    built_wheels.add(PurePosixPath("/output") / abi3_wheel.name)
+    assert built_wheels.find_compatible_wheel("cp313-manylinux_x86_64") == PurePosixPath(
+        "/output", abi3_wheel.name
+    )
+
+    assert built_wheels.claim(cp312_wheel, "cp312-manylinux_x86_64")
+    with pytest.raises(AlreadyBuiltWheelError):
+        built_wheels.claim(cp312_wheel, "cp313-manylinux_x86_64")
+
+
+def test_find_before_all_snapshot(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    args = CommandLineArguments.defaults()
+    args.platform = "linux"
+
+    (tmp_path / "pyproject.toml").write_text(
+        textwrap.dedent(
+            """
+                [tool.cibuildwheel]
+                manylinux-x86_64-image = "normal_container_image"
+                build = "cp312-manylinux_x86_64"
+                before-all = "yum install -y libffi-devel"
+                before-all-snapshot = true
+            """
+        )
+    )
+    monkeypatch.chdir(tmp_path)
+
+    local_images: dict[str, str] = {}
+    monkeypatch.setattr(
+        cibuildwheel.platforms.linux,
+        "get_image_id",
+        lambda _engine, image: local_images.get(image),
+    )
+
+    def find_snapshot(env: dict[str, str]) -> str | None:
+        options = Options("linux", command_line_arguments=args, env=env)
+        python_configurations = cibuildwheel.platforms.linux.get_python_configurations(
+            options.globals.build_selector, options.globals.architectures
+        )
+        (build_step,) = cibuildwheel.platforms.linux.get_build_steps(options, python_configurations)
+        return cibuildwheel.platforms.linux.find_before_all_snapshot(
+            options=options, build_step=build_step, oci_platform=OCIPlatform.AMD64
+        )
+
+    # the image hasn't been pulled
+    assert find_snapshot({}) is None
+
+    local_images["normal_container_image"] = "sha256:1234"
+    snapshot_image = cibuildwheel.platforms.linux.before_all_snapshot_image(
+        base_image_id="sha256:1234",
+        oci_platform=OCIPlatform.AMD64,
+        before_all_options=Options("linux", command_line_arguments=args, env={}).build_options(
+            "cp312-manylinux_x86_64"
+        ),
+    )
+    assert snapshot_image.startswith("cibuildwheel-snapshot:")
+    # no snapshot has been saved
+    assert find_snapshot({}) is None
+
+    local_images[snapshot_image] = "sha256:5678"
+    assert find_snapshot({}) == snapshot_image
+
+    # a change to the environment, or to the base image, needs a new snapshot
+    assert find_snapshot({"CIBW_ENVIRONMENT": "FOO=bar"}) is None
+    local_images["normal_container_image"] = "sha256:abcd"
+    assert find_snapshot({}) is None
+
+    # snapshots are only used when enabled
+    local_images["normal_container_image"] = "sha256:1234"
+    assert find_snapshot({"CIBW_BEFORE_ALL_SNAPSHOT": "0"}) is None
+
+
+def test_image_prefetch(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    args = CommandLineArguments.defaults()
+    args.platform = "linux"
+
+    (tmp_path / "pyproject.toml").write_text(
+        textwrap.dedent(
+            """
+                [tool.cibuildwheel]
+                manylinux-x86_64-image = "x86_64_image"
+                manylinux-i686-image = "i686_image"
+                build = "cp31{2,3}-manylinux_*"
+                archs = "x86_64 i686"
+
+                [[tool.cibuildwheel.overrides]]
+                select = "cp313-*"
+                before-all = "echo cp313"
+            """
+        )
+    )
+    monkeypatch.chdir(tmp_path)
+    options = Options("linux", command_line_arguments=args, env={})
+    python_configurations = cibuildwheel.platforms.linux.get_python_configurations(
+        options.globals.build_selector, options.globals.architectures
+    )
+    build_steps = list(cibuildwheel.platforms.linux.get_build_steps(options, python_configurations))
+    assert len(build_steps) == 4
+
+    pulled = []
+    release_pulls = threading.Event()
+
+    def fake_pull_image(
+        _engine: OCIContainerEngineConfig, image: str, oci_platform: OCIPlatform
+    ) -> None:
+        pulled.append((image, oci_platform))
+        release_pulls.wait(timeout=10)
+
+    monkeypatch.setattr(cibuildwheel.platforms.linux, "pull_image", fake_pull_image)
+
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        image_prefetch = cibuildwheel.platforms.linux.ImagePrefetch(build_steps, executor)
+
+        # all the pulls run in the background, each image is pulled once
+        waiter = threading.Thread(target=image_prefetch.wait, args=(build_steps[0],))
+        waiter.start()
+        waiter.join(timeout=0.1)
+        assert waiter.is_alive()
+
+        release_pulls.set()
+        waiter.join(timeout=10)
+        assert not waiter.is_alive()
+        for build_step in build_steps:
+            image_prefetch.wait(build_step)
+
+    assert sorted(pulled) == [
+        ("i686_image", OCIPlatform.i386),
+        ("x86_64_image", OCIPlatform.AMD64),
+    ]
+
+
+def test_project_source(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    args = CommandLineArguments.defaults()
+    args.platform = "linux"
+
+    (tmp_path / "pyproject.toml").write_text(
+        textwrap.dedent(
+            """
+                [tool.cibuildwheel]
+                build = "cp31{2,3}-manylinux_x86_64"
+
+                [[tool.cibuildwheel.overrides]]
+                select = "cp313-*"
+                container-engine = "podman"
+            """
+        )
+    )
+    monkeypatch.chdir(tmp_path)
+    options = Options("linux", command_line_arguments=args, env={})
+    python_configurations = cibuildwheel.platforms.linux.get_python_configurations(
+        options.globals.build_selector, options.globals.architectures
+    )
+    build_steps = list(cibuildwheel.platforms.linux.get_build_steps(options, python_configurations))
+    assert [s.container_engine.name for s in build_steps] == ["docker", "podman"]
+
+    created = []
+    removed = []
+
+    def fake_create_volume_from_dir(
+        engine: OCIContainerEngineConfig, from_path: Path, **kwargs: object
+    ) -> str:
+        assert from_path == tmp_path
+        assert kwargs["files"] == ["pyproject.toml"]
+        created.append(engine.name)
+        return f"{engine.name}-volume"
+
+    monkeypatch.setattr(
+        cibuildwheel.platforms.linux, "create_volume_from_dir", fake_create_volume_from_dir
+    )
+    monkeypatch.setattr(
+        cibuildwheel.platforms.linux,
+        "remove_volume",
+        lambda engine, volume: removed.append((engine.name, volume)),
+    )
+
+    copy_source = cibuildwheel.platforms.linux.ProjectSource("copy", tmp_path)
+    assert copy_source.volumes(build_steps[0]) == []
+
+    bind_source = cibuildwheel.platforms.linux.ProjectSource("bind", tmp_path)
+    assert bind_source.volumes(build_steps[0]) == [f"{tmp_path}:/cibuildwheel/project-source:ro"]
+    bind_source.close()
+    assert created == []
+    assert removed == []
+
+    # a volume is filled once per container engine, and removed at the end
+    volume_source = cibuildwheel.platforms.linux.ProjectSource(
+        "volume", tmp_path, files=["pyproject.toml"]
+    )
+    for build_step in [*build_steps, *build_steps]:
+        assert volume_source.volumes(build_step) == [
+            f"{build_step.container_engine.name}-volume:/cibuildwheel/project-source:ro"
+        ]
+    assert created == ["docker", "podman"]
+
+    volume_source.close()
+    assert sorted(removed) == [("docker", "docker-volume"), ("podman", "podman-volume")]
+
+
+def test_package_cache() -> None:
+    linux = cibuildwheel.platforms.linux
+
+    # each architecture has its own cache, in the cibuildwheel cache
+    amd64_dir = linux.package_cache_dir(OCIPlatform.AMD64, "quay.io/pypa/manylinux_2_28:2025.1")
+    armv7_dir = linux.package_cache_dir(OCIPlatform.ARMV7, "quay.io/pypa/manylinux_2_28:2025.1")
+    assert amd64_dir != armv7_dir
+    assert amd64_dir.parent == armv7_dir.parent == CIBW_CACHE_PATH / "container-package-cache"
+    assert armv7_dir.name == "linux-arm-v7-quay.io-pypa-manylinux_2_28"
+
+    # the image's version doesn't matter, but its libc does
+    assert amd64_dir == linux.package_cache_dir(
+        OCIPlatform.AMD64, "quay.io/pypa/manylinux_2_28@sha256:1234"
+    )
+    assert amd64_dir == linux.package_cache_dir(OCIPlatform.AMD64, "quay.io/pypa/manylinux_2_28")
+    assert linux.package_cache_dir(OCIPlatform.AMD64, "localhost:5000/manylinux").name.endswith(
+        "localhost-5000-manylinux"
+    )
+
+    # manylinux and musllinux builds need different caches
+    args = CommandLineArguments.defaults()
+    args.platform = "linux"
+    options = Options(
+        "linux",
+        command_line_arguments=args,
+        env={"CIBW_BUILD": "cp312-manylinux_x86_64 cp312-musllinux_x86_64"},
+    )
+    python_configurations = linux.get_python_configurations(
+        options.globals.build_selector, options.globals.architectures
+    )
+    manylinux_step, musllinux_step = linux.get_build_steps(options, python_configurations)
+    assert manylinux_step.platform_configs[0].identifier == "cp312-manylinux_x86_64"
+    assert linux.package_cache_dir(
+        manylinux_step.oci_platform, manylinux_step.container_image
+    ) != linux.package_cache_dir(musllinux_step.oci_platform, musllinux_step.container_image)
+
+    env = linux.package_cache_environment()
+    assert env["PIP_CACHE_DIR"] == "/cibuildwheel/package-cache/pip"
+    assert env["UV_CACHE_DIR"] == "/cibuildwheel/package-cache/uv"
+
+
+def test_give_package_cache_to_owner_ignores_failures() -> None:
+    calls: list[list[object]] = []
+
+    class FailingContainer:
+        def call(self, args: list[object]) -> None:
+            calls.append(args)
+            raise subprocess.CalledProcessError(1, "sh")
+
+    # it runs after a failed build, so its own failure mustn't hide that one
+    cibuildwheel.platforms.linux.give_package_cache_to_owner(FailingContainer())  # type: ignore[arg-type]
+    assert calls[0][-1] == cibuildwheel.platforms.linux.CONTAINER_PACKAGE_CACHE_PATH
+
+
+def test_bundle_wheelhouse_volumes(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    linux = cibuildwheel.platforms.linux
+    monkeypatch.setattr(linux, "CIBW_CACHE_PATH", tmp_path)
+
+    # nothing to mount until a bundle is imported
+    assert linux.bundle_wheelhouse_volumes() == []
+
+    (tmp_path / "bundle-wheelhouse").mkdir()
+    assert linux.bundle_wheelhouse_volumes() == [
+        f"{tmp_path / 'bundle-wheelhouse'}:/cibuildwheel/bundle-wheelhouse:ro"
+    ]
@@ -1,18 +1,26 @@
 from __future__ import annotations
 
 import errno
+import os
 import shutil
 import sys
 
 import pytest
 
 import cibuildwheel.__main__ as main_module
-from cibuildwheel.__main__ import main
+from cibuildwheel import bundle
+from cibuildwheel.__main__ import get_subcommand, main
+from cibuildwheel.platforms import pyodide
+from cibuildwheel.report import BuildReport, RunReport
+from cibuildwheel.util.cache_index import record_cache_use
+from cibuildwheel.util.prefetch import ToolchainAsset
 
 TYPE_CHECKING = False
 if TYPE_CHECKING:
     from pathlib import Path
 
+    from cibuildwheel.oci_container import OCIContainerEngineConfig
+
 
 def test_clean_cache_when_cache_exists(
     tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capfd: pytest.CaptureFixture[str]
@@ -141,3 +149,263 @@ def test_clean_cache_with_invalid_signature(
     _, err = capfd.readouterr()
     assert "does not contain a valid cache directory signature" in err
     assert fake_cache_dir.exists()
+
+
+def test_prune_snapshots(
+    monkeypatch: pytest.MonkeyPatch, capfd: pytest.CaptureFixture[str]
+) -> None:
+    monkeypatch.setattr(
+        shutil, "which", lambda name: f"/usr/bin/{name}" if name == "docker" else None
+    )
+    pruned_engines = []
+
+    def fake_prune_snapshots(engine: OCIContainerEngineConfig) -> list[str]:
+        pruned_engines.append(engine.name)
+        return ["cibuildwheel-snapshot:1234"]
+
+    monkeypatch.setattr(main_module, "prune_snapshots", fake_prune_snapshots)
+    monkeypatch.setattr(sys, "argv", ["cibuildwheel", "--prune-snapshots"])
+
+    with pytest.raises(SystemExit) as e:
+        main()
+
+    assert e.value.code == 0
+    assert pruned_engines == ["docker"]
+    out, _ = capfd.readouterr()
+    assert "Removed 1 snapshot image(s) from docker." in out
+
+
+def test_prune_snapshots_without_engine(
+    monkeypatch: pytest.MonkeyPatch, capfd: pytest.CaptureFixture[str]
+) -> None:
+    monkeypatch.setattr(shutil, "which", lambda _name: None)
+    monkeypatch.setattr(sys, "argv", ["cibuildwheel", "--prune-snapshots"])
+
+    with pytest.raises(SystemExit) as e:
+        main()
+
+    assert e.value.code == 1
+    _, err = capfd.readouterr()
+    assert "neither docker nor podman was found" in err
+
+
+def test_cache_stats_and_prune(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capfd: pytest.CaptureFixture[str]
+) -> None:
+    fake_cache_dir = (tmp_path / "cibw_cache").resolve()
+    monkeypatch.setattr(main_module, "CIBW_CACHE_PATH", fake_cache_dir)
+    monkeypatch.delenv("CIBW_CACHE_SIZE_LIMIT", raising=False)
+
+    (fake_cache_dir / "old").mkdir(parents=True)
+    (fake_cache_dir / "old" / "python").write_bytes(b"x" * 1000)
+    (fake_cache_dir / "new.tgz").write_bytes(b"x" * 1000)
+    os.utime(fake_cache_dir / "old", (0, 0))
+    os.utime(fake_cache_dir / "new.tgz", (10000, 10000))
+
+    monkeypatch.setattr(sys, "argv", ["cibuildwheel", "cache", "stats"])
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 0
+    out, _ = capfd.readouterr()
+    assert out.index("old") < out.index("new.tgz")
+    assert "2 entries" in out
+
+    monkeypatch.setattr(
+        sys, "argv", ["cibuildwheel", "cache", "prune", "--max-size", "1.5K", "--dry-run"]
+    )
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 0
+    out, _ = capfd.readouterr()
+    assert "Would remove 1 entries" in out
+    assert (fake_cache_dir / "old").exists()
+
+    monkeypatch.setenv("CIBW_CACHE_SIZE_LIMIT", "1.5K")
+    monkeypatch.setattr(sys, "argv", ["cibuildwheel", "cache", "prune"])
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 0
+    out, _ = capfd.readouterr()
+    assert "Removed 1 entries" in out
+    assert not (fake_cache_dir / "old").exists()
+    assert (fake_cache_dir / "new.tgz").exists()
+
+
+def test_subcommand_or_package_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    assert get_subcommand(["cache", "stats"]) == "cache"
+    assert get_subcommand(["report", "compare"]) == "report"
+    assert get_subcommand(["spam"]) is None
+    assert get_subcommand([]) is None
+
+    # a package in a directory with a subcommand's name can still be built
+    (tmp_path / "cache").mkdir()
+    assert get_subcommand(["cache"]) is None
+    (tmp_path / "report").write_text("")
+    assert get_subcommand(["report"]) == "report"
+
+
+def test_cache_prune_needs_size(
+    monkeypatch: pytest.MonkeyPatch, capfd: pytest.CaptureFixture[str]
+) -> None:
+    monkeypatch.delenv("CIBW_CACHE_SIZE_LIMIT", raising=False)
+    monkeypatch.setattr(sys, "argv", ["cibuildwheel", "cache", "prune"])
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 2
+    _, err = capfd.readouterr()
+    assert "--max-size" in err
+
+
+def test_fetch(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capfd: pytest.CaptureFixture[str]
+) -> None:
+    fake_cache_dir = (tmp_path / "cibw_cache").resolve()
+    monkeypatch.setattr(main_module, "CIBW_CACHE_PATH", fake_cache_dir)
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "pyproject.toml").write_text("[project]\nname = 'spam'\n")
+
+    fetched: list[str] = []
+    requested: list[list[str]] = []
+
+    def toolchain_assets(_options: object, identifiers: list[str]) -> list[ToolchainAsset]:
+        requested.append(identifiers)
+        return [
+            ToolchainAsset(name="python.tar.gz", fetch=lambda: fetched.append("python")),
+            ToolchainAsset(name="virtualenv", fetch=lambda: fetched.append("virtualenv")),
+        ]
+
+    monkeypatch.setattr(pyodide, "toolchain_assets", toolchain_assets)
+    monkeypatch.setattr(sys, "argv", ["cibuildwheel", "fetch", "--only", "cp312-pyodide_wasm32"])
+
+    with pytest.raises(SystemExit) as e:
+        main()
+
+    assert e.value.code == 0
+    assert requested == [["cp312-pyodide_wasm32"]]
+    assert sorted(fetched) == ["python", "virtualenv"]
+    out, _ = capfd.readouterr()
+    assert "Fetched 2 tools." in out
+    assert (fake_cache_dir / "CACHEDIR.TAG").exists()
+
+
+def test_fetch_failure(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capfd: pytest.CaptureFixture[str]
+) -> None:
+    monkeypatch.setattr(main_module, "CIBW_CACHE_PATH", tmp_path / "cibw_cache")
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "pyproject.toml").write_text("[project]\nname = 'spam'\n")
+
+    def fail() -> None:
+        msg = "no network"
+        raise OSError(msg)
+
+    monkeypatch.setattr(
+        pyodide,
+        "toolchain_assets",
+        lambda _options, _identifiers: [ToolchainAsset(name="python.tar.gz", fetch=fail)],
+    )
+    monkeypatch.setattr(sys, "argv", ["cibuildwheel", "fetch", "--only", "cp312-pyodide_wasm32"])
+
+    with pytest.raises(SystemExit) as e:
+        main()
+
+    assert e.value.code == 1
+    _, err = capfd.readouterr()
+    assert "Error fetching python.tar.gz: no network" in err
+
+
+def test_bundle_export_and_import(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capfd: pytest.CaptureFixture[str]
+) -> None:
+    export_cache = (tmp_path / "export_cache").resolve()
+    monkeypatch.setattr(main_module, "CIBW_CACHE_PATH", export_cache)
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "pyproject.toml").write_text("[project]\nname = 'spam'\n")
+
+    def fetch() -> None:
+        export_cache.mkdir(exist_ok=True)
+        path = export_cache / "python.tar.gz"
+        path.write_text("python")
+        record_cache_use(path, hit=False, cache_path=export_cache)
+
+    monkeypatch.setattr(
+        pyodide,
+        "toolchain_assets",
+        lambda _options, _identifiers: [ToolchainAsset(name="python.tar.gz", fetch=fetch)],
+    )
+    monkeypatch.setattr(bundle, "_download_wheelhouse", lambda _requirements, _dest: [])
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["cibuildwheel", "bundle", "export", "bundle.tar", "--only", "cp312-pyodide_wasm32"],
+    )
+
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 0
+    out, err = capfd.readouterr()
+    assert "Wrote 1 cache entries, 0 images" in out
+    # there's no cross-build environment to bundle until a build has run
+    assert "No Pyodide cross-build environments" in err
+
+    import_cache = (tmp_path / "import_cache").resolve()
+    monkeypatch.setattr(main_module, "CIBW_CACHE_PATH", import_cache)
+    monkeypatch.setattr(sys, "argv", ["cibuildwheel", "bundle", "import", "bundle.tar"])
+
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 0
+    out, _ = capfd.readouterr()
+    assert "Imported the bundle for 1 pyodide builds." in out
+    assert (import_cache / "python.tar.gz").read_text() == "python"
+
+
+def test_bundle_needs_command(
+    monkeypatch: pytest.MonkeyPatch, capfd: pytest.CaptureFixture[str]
+) -> None:
+    monkeypatch.setattr(sys, "argv", ["cibuildwheel", "bundle"])
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 2
+    _, err = capfd.readouterr()
+    assert "export" in err
+    assert "import" in err
+
+
+def test_report_compare(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capfd: pytest.CaptureFixture[str]
+) -> None:
+    def write_report(name: str, duration: float) -> Path:
+        report = RunReport(
+            cibuildwheel_version="3.0",
+            platform="linux",
+            builds=[
+                BuildReport(
+                    identifier="cp312-manylinux_x86_64", duration=duration, wheel=None, steps=[]
+                )
+            ],
+        )
+        path = tmp_path / name
+        path.write_text(report.to_json())
+        return path
+
+    old, new = write_report("old.json", 10.0), write_report("new.json", 15.0)
+
+    monkeypatch.setattr(sys, "argv", ["cibuildwheel", "report", "compare", str(old), str(new)])
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 1
+    out, _ = capfd.readouterr()
+    assert "cp312-manylinux_x86_64: 10.00s -> 15.00s (+50%)" in out
+
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["cibuildwheel", "report", "compare", str(old), str(new), "--time-threshold", "60"],
+    )
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 0
+    out, _ = capfd.readouterr()
+    assert "No regressions" in out
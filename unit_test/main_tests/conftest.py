@@ -9,6 +9,7 @@
 
 import pytest
 
+import cibuildwheel.__main__ as main_module
 from cibuildwheel import architecture
 from cibuildwheel.logger import Logger
 from cibuildwheel.platforms import android, ios, linux, macos, pyodide, windows
@@ -45,6 +46,14 @@ def fail_on_call(*args: object, **kwargs: object) -> None:
     def ignore_call(*args: object, **kwargs: object) -> None:
         pass
 
+    @contextlib.contextmanager
+    def no_prefetch(*args: object, **kwargs: object) -> Generator[None, None, None]:
+        yield
+
+    @contextlib.contextmanager
+    def no_timing_history(*args: object, **kwargs: object) -> Generator[None, None, None]:
+        yield
+
     monkeypatch.setattr(subprocess, "Popen", fail_on_call)
     monkeypatch.setattr(file, "download", fail_on_call)
     monkeypatch.setattr(windows, "build", fail_on_call)
@@ -52,6 +61,8 @@ def ignore_call(*args: object, **kwargs: object) -> None:
     monkeypatch.setattr(macos, "build", fail_on_call)
     monkeypatch.setattr(pyodide, "build", fail_on_call)
     monkeypatch.setattr(Path, "mkdir", ignore_call)
+    monkeypatch.setattr(main_module, "prefetch_assets", no_prefetch)
+    monkeypatch.setattr(main_module, "use_timing_history", no_timing_history)
     monkeypatch.setattr(architecture, "_check_aarch32_el0", lambda: True)
 
 
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import json
+import platform as platform_module
 import sys
 
 import pytest
@@ -334,3 +336,57 @@ def test_empty_archs_platform(
 
     options = intercepted_build_args.args[0]
     assert options.globals.architectures == Architecture.auto_archs(platform)
+
+
+def test_shard_argument(
+    intercepted_build_args: ArgsInterceptor, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(platform_module, "machine", lambda: "x86_64")
+    monkeypatch.setenv("CIBW_PLATFORM", "linux")
+    monkeypatch.setenv("CIBW_BUILD", "cp31[1-4]-*")
+    monkeypatch.setenv("CIBW_ARCHS", "x86_64 aarch64")
+
+    shards = []
+    for index in (1, 2):
+        monkeypatch.setattr(sys, "argv", [*sys.argv[:2], "--shard", f"{index}/2"])
+        intercepted_build_args.call_count = 0
+        main()
+        options = intercepted_build_args.args[0]
+        shard = options.globals.build_selector.shard
+        assert shard is not None
+        assert all(options.globals.build_selector(identifier) for identifier in shard)
+        shards.append(shard)
+
+    assert not shards[0] & shards[1]
+    assert len(shards[0] | shards[1]) == 16
+    # the builds that share a container stay together
+    for platform_tag in ("manylinux_x86_64", "musllinux_aarch64"):
+        assert sum(f"cp311-{platform_tag}" in shard for shard in shards) == 1
+        container = {i for i in shards[0] | shards[1] if i.endswith(platform_tag)}
+        assert any(container <= shard for shard in shards)
+
+
+def test_print_build_matrix(
+    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    monkeypatch.setattr(platform_module, "machine", lambda: "x86_64")
+    monkeypatch.setenv("CIBW_BUILD", "cp31[1-4]-*")
+    monkeypatch.setenv("CIBW_ARCHS", "x86_64 aarch64")
+    monkeypatch.setattr(
+        sys, "argv", [*sys.argv, "--platform", "linux", "--print-build-matrix", "--shards", "3"]
+    )
+
+    with pytest.raises(SystemExit) as exit:
+        main()
+
+    assert exit.value.code == 0
+    matrix = json.loads(capsys.readouterr().out)
+    groups = [entry["identifiers"] for entry in matrix["include"]]
+    assert len(groups) == 3
+    assert sorted(i for group in groups for i in group) == sorted(
+        f"cp31{minor}-{platform}_{arch}"
+        for minor in range(1, 5)
+        for platform in ("manylinux", "musllinux")
+        for arch in ("x86_64", "aarch64")
+    )
+    assert all(entry["build"] == " ".join(entry["identifiers"]) for entry in matrix["include"])
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import contextlib
+import hashlib
 import json
 import os
 import random
@@ -8,6 +9,7 @@
 import subprocess
 import sys
 import textwrap
+import threading
 import time
 from contextlib import nullcontext
 from pathlib import Path, PurePath, PurePosixPath
@@ -20,11 +22,16 @@
 from cibuildwheel.environment import EnvironmentAssignmentBash
 from cibuildwheel.errors import OCIEngineTooOldError
 from cibuildwheel.oci_container import (
+    FrameKind,
     OCIContainer,
     OCIContainerEngineConfig,
     OCIPlatform,
     _check_engine_version,
+    _check_engine_version_cached,
+    get_image_id,
+    prune_snapshots,
 )
+from cibuildwheel.util.metadata_cache import MetadataCache
 
 TYPE_CHECKING = False
 if TYPE_CHECKING:
@@ -90,9 +97,11 @@ def test_abnormal_exit(container_engine: OCIContainerEngineConfig) -> None:
         engine=container_engine, image=DEFAULT_IMAGE, oci_platform=DEFAULT_OCI_PLATFORM
     )
     with container:
-        # kill the shell without a newline, so the write below still goes
-        # through the same buffer and the call fails on read, not on write
-        container.bash_stdin.write(b"exit")
+        # stop the agent behind the container's back, the call must fail
+        # rather than hang
+        container._send_frame(0, FrameKind.SHUTDOWN)
+        assert container.process is not None
+        container.process.wait()
         with pytest.raises(RuntimeError):
             container.call(["echo", "hello"])
 
@@ -279,6 +288,74 @@ def test_file_operation(
         assert test_binary_data == bytes(output, encoding="utf8", errors="surrogateescape")
 
 
+def test_commit_snapshot(container_engine: OCIContainerEngineConfig) -> None:
+    snapshot_image = f"cibuildwheel-snapshot:test-{random.randrange(1 << 32):08x}"
+
+    with OCIContainer(
+        engine=container_engine, image=DEFAULT_IMAGE, oci_platform=DEFAULT_OCI_PLATFORM
+    ) as container:
+        base_image_id = container.image_id()
+        assert base_image_id == get_image_id(container_engine, DEFAULT_IMAGE)
+        assert container.base_image_id() == base_image_id
+        container.call(["sh", "-c", "echo snapshotted > /snapshot_test.txt"])
+        container.commit_snapshot(snapshot_image, base_image_id=base_image_id)
+
+    assert get_image_id(container_engine, snapshot_image) is not None
+
+    with OCIContainer(
+        engine=container_engine, image=snapshot_image, oci_platform=DEFAULT_OCI_PLATFORM
+    ) as container:
+        assert container.read_text(PurePosixPath("/snapshot_test.txt")) == "snapshotted\n"
+        # wheels built from the snapshot are keyed by the image it was saved from
+        assert container.image_id() != base_image_id
+        assert container.base_image_id() == base_image_id
+
+    pruned = prune_snapshots(container_engine)
+    assert any(tag.endswith(snapshot_image) for tag in pruned)
+    assert get_image_id(container_engine, snapshot_image) is None
+
+
+def test_base_image_id(monkeypatch: pytest.MonkeyPatch) -> None:
+    labels: dict[str, str] = {}
+
+    def fake_call(*args: object, capture_stdout: bool = False) -> str:
+        assert capture_stdout
+        if args[1:3] == ("container", "inspect"):
+            return "sha256:snapshot\n"
+        assert args[1:3] == ("image", "inspect")
+        return labels.get(str(args[-1]), "<no value>") + "\n"
+
+    monkeypatch.setattr(cibuildwheel.oci_container, "call", fake_call)
+    container = OCIContainer(
+        engine=OCIContainerEngineConfig("docker"), image="foo", oci_platform=OCIPlatform.AMD64
+    )
+    container.name = "test"
+
+    assert container.base_image_id() == "sha256:snapshot"
+    labels["sha256:snapshot"] = "sha256:base"
+    assert container.base_image_id() == "sha256:base"
+
+
+def test_copy_into_selected_files(
+    tmp_path: Path, container_engine: OCIContainerEngineConfig
+) -> None:
+    project_dir = tmp_path / "project"
+    (project_dir / "pkg").mkdir(parents=True)
+    for name in ["setup.py", "pkg/a.py", "pkg/a.so", "-rf"]:
+        (project_dir / name).write_text(name)
+
+    with OCIContainer(
+        engine=container_engine, image=DEFAULT_IMAGE, oci_platform=DEFAULT_OCI_PLATFORM
+    ) as container:
+        dst_dir = PurePosixPath("/tmp/project")
+        container.copy_into(project_dir, dst_dir, files=["-rf", "pkg/a.py", "setup.py"])
+
+        listing = container.call(
+            ["find", ".", "-type", "f"], capture_output=True, cwd=dst_dir
+        ).split()
+        assert sorted(listing) == ["./-rf", "./pkg/a.py", "./setup.py"]
+
+
 def test_dir_operations(tmp_path: Path, container_engine: OCIContainerEngineConfig) -> None:
     with OCIContainer(
         engine=container_engine, image=DEFAULT_IMAGE, oci_platform=DEFAULT_OCI_PLATFORM
@@ -894,3 +971,210 @@ def mockcall(*args: object, **kwargs: object) -> str:
     engine = OCIContainerEngineConfig.from_config_string(engine_name)
     with context:
         _check_engine_version(engine)
+
+
+def test_engine_version_cached(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    engine_path = tmp_path / "docker"
+    engine_path.write_text("#!/bin/sh\n")
+    engine_path.chmod(0o755)
+    monkeypatch.setattr(shutil, "which", lambda _name: str(engine_path))
+    monkeypatch.setattr(
+        cibuildwheel.oci_container, "METADATA_CACHE", MetadataCache(tmp_path / "metadata.json")
+    )
+    checked: list[OCIContainerEngineConfig] = []
+    monkeypatch.setattr(cibuildwheel.oci_container, "_check_engine_version", checked.append)
+    engine = OCIContainerEngineConfig(name="docker")
+
+    _check_engine_version_cached(engine)
+    _check_engine_version_cached(engine)
+    assert len(checked) == 1
+
+    # a different server needs checking again
+    monkeypatch.setenv("DOCKER_HOST", "tcp://example.com:2376")
+    _check_engine_version_cached(engine)
+    assert len(checked) == 2
+
+    # as does a new version of the engine
+    engine_path.write_text("#!/bin/sh\n# upgraded\n")
+    _check_engine_version_cached(engine)
+    assert len(checked) == 3
+
+
+@pytest.fixture
+def local_agent_container(monkeypatch: pytest.MonkeyPatch) -> Iterator[OCIContainer]:
+    """
+    An OCIContainer whose container is a bash process on this machine, to
+    test the agent protocol without a container engine.
+    """
+    if sys.platform == "win32" or not shutil.which("bash") or not shutil.which("python3"):
+        pytest.skip("needs bash and python3")
+
+    real_popen = subprocess.Popen
+
+    def popen_bash(_args: object, **kwargs: Any) -> subprocess.Popen[bytes]:
+        return real_popen(["bash"], **kwargs)
+
+    container = OCIContainer(
+        engine=OCIContainerEngineConfig("docker"), image="foo", oci_platform=OCIPlatform.AMD64
+    )
+    container.name = "local"
+    monkeypatch.setattr(subprocess, "Popen", popen_bash)
+    container._start_agent()
+    monkeypatch.undo()
+    assert container._agent_reader is not None, "agent did not start"
+    try:
+        yield container
+    finally:
+        container._stop_agent()
+
+
+def test_agent_call(local_agent_container: OCIContainer, tmp_path: Path) -> None:
+    container = local_agent_container
+    assert container.call(["echo", "hello"], capture_output=True) == "hello\n"
+    assert container.call(["pwd"], cwd=tmp_path, capture_output=True).strip() == str(
+        tmp_path.resolve()
+    )
+    assert (
+        container.call(["sh", "-c", "echo $TEST_VAR"], env={"TEST_VAR": "a b"}, capture_output=True)
+        == "a b\n"
+    )
+
+    with pytest.raises(subprocess.CalledProcessError) as exc_info:
+        container.call(["sh", "-c", "exit 3"])
+    assert exc_info.value.returncode == 3
+
+    with pytest.raises(subprocess.CalledProcessError) as exc_info:
+        container.call(["this-command-does-not-exist"])
+    assert exc_info.value.returncode == 127
+
+
+def test_agent_stderr(
+    local_agent_container: OCIContainer, capfd: pytest.CaptureFixture[str]
+) -> None:
+    output = local_agent_container.call(
+        ["sh", "-c", "echo to-stdout; echo to-stderr >&2"], capture_output=True
+    )
+    assert output == "to-stdout\n"
+    assert "to-stderr" in capfd.readouterr().err
+
+
+def test_agent_concurrent_calls(local_agent_container: OCIContainer, tmp_path: Path) -> None:
+    # the first call can only finish once the second one has run, so this
+    # deadlocks unless the calls run at the same time
+    fifo = tmp_path / "fifo"
+    os.mkfifo(fifo)
+    outputs: list[str] = []
+
+    reader = threading.Thread(
+        target=lambda: outputs.append(
+            local_agent_container.call(["cat", fifo], capture_output=True)
+        )
+    )
+    reader.start()
+    local_agent_container.call(["sh", "-c", f"echo hello > {fifo}"])
+    reader.join(timeout=10)
+
+    assert not reader.is_alive()
+    assert outputs == ["hello\n"]
+
+
+def test_agent_call_batch(local_agent_container: OCIContainer, tmp_path: Path) -> None:
+    results = local_agent_container.call_batch(
+        [["echo", "hello"], ["sh", "-c", "echo to-stderr >&2"], ["pwd"]], cwd=tmp_path
+    )
+    assert [r.returncode for r in results] == [0, 0, 0]
+    assert results[0].stdout == "hello\n"
+    assert results[1].stderr == "to-stderr\n"
+    assert results[2].stdout.strip() == str(tmp_path.resolve())
+
+
+def test_agent_call_batch_check(local_agent_container: OCIContainer, tmp_path: Path) -> None:
+    marker = tmp_path / "marker"
+    with pytest.raises(subprocess.CalledProcessError) as exc_info:
+        local_agent_container.call_batch([["true"], ["false"], ["touch", marker]])
+
+    assert exc_info.value.returncode == 1
+    # the batch stops at the first failure
+    assert not marker.exists()
+
+
+def test_agent_call_batch_no_check(local_agent_container: OCIContainer) -> None:
+    results = local_agent_container.call_batch(
+        [["false"], ["a-command-that-does-not-exist"], ["echo", "hello"]], check=False
+    )
+    assert [r.returncode for r in results] == [1, 127, 0]
+    assert "a-command-that-does-not-exist" in results[1].stderr
+    assert results[2].stdout == "hello\n"
+
+
+def test_agent_missing_cwd(
+    local_agent_container: OCIContainer, tmp_path: Path, capfd: pytest.CaptureFixture[str]
+) -> None:
+    missing = tmp_path / "missing"
+    with pytest.raises(subprocess.CalledProcessError) as exc_info:
+        local_agent_container.call(["true"], cwd=missing)
+    assert exc_info.value.returncode == 127
+    assert f"cd: {missing}: No such file or directory" in capfd.readouterr().err
+
+    [result] = local_agent_container.call_batch([["true"]], cwd=missing, check=False)
+    assert result.returncode == 127
+    assert f"cd: {missing}:" in result.stderr
+
+
+def test_agent_bad_requests(local_agent_container: OCIContainer) -> None:
+    # every request gets a reply, even one the agent can't handle
+    with pytest.raises(OSError, match="KeyError: 'no-such-op'"):
+        local_agent_container._query("no-such-op")
+
+    reply = local_agent_container._agent_request(FrameKind.BATCH, {"check": True})
+    assert reply[0]["returncode"] == 127
+    assert "KeyError" in reply[0]["stderr"]
+
+    # the agent carries on after them
+    assert local_agent_container.call(["echo", "hello"], capture_output=True) == "hello\n"
+
+
+def test_agent_queries(local_agent_container: OCIContainer, tmp_path: Path) -> None:
+    container = local_agent_container
+    container_dir = PurePosixPath(tmp_path)
+
+    container.make_dirs(container_dir / "a" / "b", container_dir / "c")
+    assert (tmp_path / "a" / "b").is_dir()
+    assert (tmp_path / "c").is_dir()
+
+    (tmp_path / "a" / "test.whl").write_text("hello\n")
+    assert container.glob(container_dir / "a", "*.whl") == [container_dir / "a" / "test.whl"]
+    assert container.glob(container_dir, "*.whl") == []
+
+    assert container.exists(container_dir / "a" / "test.whl")
+    assert not container.exists(container_dir / "missing")
+
+    file_stat = container.stat(container_dir / "a" / "test.whl")
+    assert file_stat.is_file
+    assert file_stat.size == 6
+    assert container.stat(container_dir / "a").is_dir
+    with pytest.raises(FileNotFoundError):
+        container.stat(container_dir / "missing")
+
+    assert container.read_text(container_dir / "a" / "test.whl") == "hello\n"
+    assert container.file_hash(container_dir / "a" / "test.whl") == (
+        hashlib.sha256(b"hello\n").hexdigest()
+    )
+
+    assert container.get_environment()["PATH"] == os.environ["PATH"]
+
+    container.remove(container_dir / "a", container_dir / "missing")
+    assert not (tmp_path / "a").exists()
+    assert (tmp_path / "c").exists()
+
+
+def test_agent_resource_usage(
+    local_agent_container: OCIContainer, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(cibuildwheel.oci_container, "CGROUP_ROOT", str(tmp_path))
+    (tmp_path / "cpu.stat").write_text("usage_usec 1500000\n")
+    (tmp_path / "memory.current").write_text("4096\n")
+
+    usage = local_agent_container.resource_usage()
+    assert usage is not None
+    assert (usage.cpu_seconds, usage.memory, usage.io_bytes, usage.pids) == (1.5, 4096, None, None)
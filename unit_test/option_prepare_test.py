@@ -46,6 +46,7 @@ def ignore_context_call(*args: object, **kwargs: object) -> typing.ContextManage
         mock.Mock(spec=platforms.linux.build_in_container),
     )
     monkeypatch.setattr("cibuildwheel.logger.Logger.print_summary", ignore_context_call)
+    monkeypatch.setattr("cibuildwheel.__main__.use_timing_history", ignore_context_call)
 
 
 @pytest.mark.usefixtures("mock_build_container", "fake_package_dir")
@@ -951,3 +951,157 @@ def test_xbuild_files(tmp_path: Path, definition: str, expected: dict[str, list[
 
     options = Options(platform="ios", command_line_arguments=args, env={})
     assert options.build_options(None).xbuild_files == expected
+
+
+@pytest.mark.parametrize(
+    ("toml_assignment", "env", "command_line", "expected"),
+    [
+        ("", {}, None, 1),
+        ("build-jobs = 4", {}, None, 4),
+        ('build-jobs = "3"', {}, None, 3),
+        ("build-jobs = 4", {"CIBW_BUILD_JOBS": "2"}, None, 2),
+        ("build-jobs = 4", {"CIBW_BUILD_JOBS": "2"}, "5", 5),
+        ('build-jobs = "auto"', {}, None, 8),
+        ("", {"CIBW_BUILD_JOBS": "auto"}, None, 8),
+    ],
+)
+def test_build_jobs(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    toml_assignment: str,
+    env: dict[str, str],
+    command_line: str | None,
+    expected: int,
+) -> None:
+    monkeypatch.setattr(os, "cpu_count", lambda: 8)
+    args = CommandLineArguments.defaults()
+    args.package_dir = tmp_path
+    args.jobs = command_line
+
+    tmp_path.joinpath("pyproject.toml").write_text(
+        textwrap.dedent(
+            f"""\
+            [tool.cibuildwheel]
+            {toml_assignment}
+            """
+        )
+    )
+
+    options = Options(platform="linux", command_line_arguments=args, env=env)
+    assert options.globals.build_jobs == expected
+
+
+@pytest.mark.parametrize("value", ["0", "-1", "many", "1.5"])
+def test_build_jobs_invalid(tmp_path: Path, value: str) -> None:
+    args = CommandLineArguments.defaults()
+    args.package_dir = tmp_path
+
+    options = Options(platform="linux", command_line_arguments=args, env={"CIBW_BUILD_JOBS": value})
+    with pytest.raises(errors.ConfigurationError, match="build-jobs"):
+        _ = options.globals
+
+
+@pytest.mark.parametrize(
+    ("env", "expected"),
+    [
+        ({}, 1),
+        ({"CIBW_CONTAINER_BUILD_JOBS": "3"}, 3),
+        ({"CIBW_CONTAINER_BUILD_JOBS": "auto"}, 8),
+    ],
+)
+def test_container_build_jobs(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, env: dict[str, str], expected: int
+) -> None:
+    monkeypatch.setattr(os, "cpu_count", lambda: 8)
+    args = CommandLineArguments.defaults()
+    args.package_dir = tmp_path
+
+    options = Options(platform="linux", command_line_arguments=args, env=env)
+    assert options.globals.container_build_jobs == expected
+
+
+def test_container_build_jobs_invalid(tmp_path: Path) -> None:
+    args = CommandLineArguments.defaults()
+    args.package_dir = tmp_path
+
+    options = Options(
+        platform="linux", command_line_arguments=args, env={"CIBW_CONTAINER_BUILD_JOBS": "0"}
+    )
+    with pytest.raises(errors.ConfigurationError, match="container-build-jobs"):
+        _ = options.globals
+
+
+@pytest.mark.parametrize(
+    ("env", "expected"),
+    [
+        ({}, False),
+        ({"CIBW_BEFORE_ALL_SNAPSHOT": "1"}, True),
+        ({"CIBW_BEFORE_ALL_SNAPSHOT": "false"}, False),
+    ],
+)
+def test_before_all_snapshot(tmp_path: Path, env: dict[str, str], expected: bool) -> None:
+    args = CommandLineArguments.defaults()
+    args.package_dir = tmp_path
+
+    options = Options(platform="linux", command_line_arguments=args, env=env)
+    assert options.globals.before_all_snapshot == expected
+
+
+@pytest.mark.parametrize(
+    ("env", "expected"),
+    [
+        ({}, "copy"),
+        ({"CIBW_CONTAINER_PROJECT_SOURCE": "volume"}, "volume"),
+        ({"CIBW_CONTAINER_PROJECT_SOURCE": "bind"}, "bind"),
+    ],
+)
+def test_container_project_source(tmp_path: Path, env: dict[str, str], expected: str) -> None:
+    args = CommandLineArguments.defaults()
+    args.package_dir = tmp_path
+
+    options = Options(platform="linux", command_line_arguments=args, env=env)
+    assert options.globals.container_project_source == expected
+
+
+@pytest.mark.parametrize(
+    ("env", "expected"),
+    [
+        ({}, False),
+        ({"CIBW_CONTAINER_PACKAGE_CACHE": "1"}, True),
+        ({"CIBW_CONTAINER_PACKAGE_CACHE": "false"}, False),
+    ],
+)
+def test_container_package_cache(tmp_path: Path, env: dict[str, str], expected: bool) -> None:
+    args = CommandLineArguments.defaults()
+    args.package_dir = tmp_path
+
+    options = Options(platform="linux", command_line_arguments=args, env=env)
+    assert options.globals.container_package_cache == expected
+
+
+@pytest.mark.parametrize(
+    ("env", "expected"),
+    [
+        ({}, False),
+        ({"CIBW_INDEX_PROXY": "1"}, True),
+    ],
+)
+def test_index_proxy(tmp_path: Path, env: dict[str, str], expected: bool) -> None:
+    args = CommandLineArguments.defaults()
+    args.package_dir = tmp_path
+
+    options = Options(platform="linux", command_line_arguments=args, env=env)
+    assert options.globals.index_proxy == expected
+
+
+def test_container_project_source_invalid(tmp_path: Path) -> None:
+    args = CommandLineArguments.defaults()
+    args.package_dir = tmp_path
+
+    options = Options(
+        platform="linux",
+        command_line_arguments=args,
+        env={"CIBW_CONTAINER_PROJECT_SOURCE": "rsync"},
+    )
+    with pytest.raises(errors.ConfigurationError, match="container-project-source"):
+        _ = options.globals
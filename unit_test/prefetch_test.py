@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from cibuildwheel.platforms import android, linux, pyodide, windows
+from cibuildwheel.util.prefetch import (
+    ToolchainAsset,
+    fetch_assets,
+    prefetch_assets,
+    unique_assets,
+    with_temporary_directory,
+)
+
+from .conftest import make_options
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_unique_assets() -> None:
+    a = ToolchainAsset(name="a", fetch=lambda: None)
+    b = ToolchainAsset(name="b", fetch=lambda: None)
+    assert unique_assets([a, b, ToolchainAsset(name="a", fetch=lambda: None)]) == [a, b]
+
+
+def test_fetch_assets_runs_concurrently() -> None:
+    barrier = threading.Barrier(3, timeout=10)
+
+    def fail() -> None:
+        msg = "no network"
+        raise OSError(msg)
+
+    assets = [
+        ToolchainAsset(name="a", fetch=barrier.wait),
+        ToolchainAsset(name="b", fetch=barrier.wait),
+        ToolchainAsset(name="c", fetch=barrier.wait),
+        ToolchainAsset(name="d", fetch=fail),
+    ]
+    # the three waits only return once all are running at the same time
+    errors = fetch_assets(assets, max_workers=4)
+    assert list(errors) == ["d"]
+    assert str(errors["d"]) == "no network"
+
+
+def test_prefetch_assets_in_background() -> None:
+    started = threading.Event()
+    release = threading.Event()
+    finished: list[str] = []
+
+    def slow() -> None:
+        started.set()
+        release.wait(timeout=10)
+        finished.append("slow")
+
+    def fail() -> None:
+        msg = "no network"
+        raise OSError(msg)
+
+    assets = [ToolchainAsset(name="slow", fetch=slow), ToolchainAsset(name="fail", fetch=fail)]
+    with prefetch_assets(assets):
+        # the block runs while the asset is being fetched
+        assert started.wait(timeout=10)
+        assert finished == []
+        release.set()
+    # and the fetch is finished by the end of it, failures are ignored
+    assert finished == ["slow"]
+
+
+def test_with_temporary_directory() -> None:
+    used: list[Path] = []
+
+    def install(tmp: Path) -> str:
+        assert tmp.is_dir()
+        used.append(tmp)
+        return "installed"
+
+    fetch = with_temporary_directory(install)
+    assert fetch() == "installed"
+    assert not used[0].exists()
+
+
+def test_windows_toolchain_assets() -> None:
+    assets = windows.toolchain_assets(
+        make_options("windows"), ["cp312-win_amd64", "cp312-win32", "pp311-win_amd64"]
+    )
+    names = {asset.name for asset in unique_assets(assets)}
+    [pypy] = [name for name in names if name.startswith("pypy3.11-")]
+    assert pypy.endswith("-win64.zip")
+    assert names == {
+        "CPython cp312-win_amd64",
+        "CPython cp312-win32",
+        pypy,
+        "virtualenv for Python 3.12",
+        "virtualenv for Python 3.11",
+    }
+
+
+@pytest.mark.parametrize("frontend", ["build", "build[uv]"])
+def test_android_toolchain_assets(frontend: str) -> None:
+    options = make_options("android", {"CIBW_BUILD_FRONTEND": frontend})
+
+    [config] = [
+        c for c in android.all_python_configurations() if c.identifier == "cp313-android_x86_64"
+    ]
+    names = [asset.name for asset in android.toolchain_assets(options, [config.identifier])]
+    expected = [config.url.rpartition("/")[-1], "python-build-standalone 3.13"]
+    if frontend == "build":
+        expected.append("virtualenv for Python 3.13")
+    assert names == expected
+
+
+def test_pyodide_toolchain_assets() -> None:
+    [config, *_] = pyodide.all_python_configurations()
+    names = [
+        asset.name
+        for asset in pyodide.toolchain_assets(make_options("pyodide"), [config.identifier])
+    ]
+    assert names == [
+        f"python-build-standalone {config.version}",
+        f"virtualenv for Python {config.version}",
+    ]
+
+
+def test_linux_toolchain_assets() -> None:
+    assert linux.toolchain_assets(make_options("linux"), ["cp312-manylinux_x86_64"]) == []
@@ -2,15 +2,18 @@
 
 import platform
 import subprocess
+import tarfile
 from typing import Any
 
 import pytest
 
 from cibuildwheel.util import python_build_standalone as pbs
+from cibuildwheel.util.file import extract_tar
 
 TYPE_CHECKING = False
 if TYPE_CHECKING:
     from collections.abc import Callable
+    from pathlib import Path
 
 # Real-world `ldd --version` outputs.
 GLIBC_STDOUT = "ldd (Ubuntu GLIBC 2.35-0ubuntu3.1) 2.35\n"
@@ -61,3 +64,34 @@ def test_linux_platform_identifiers_libc(
     assert arch == "x86_64"
     assert platform_id == "unknown-linux"
     assert libc == expected_libc
+
+
+def test_create_environment_extracts_once(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    contents = tmp_path / "contents"
+    (contents / "python" / "bin").mkdir(parents=True)
+    (contents / "python" / "bin" / "python").write_text("python")
+    (contents / "python" / "python.exe").write_text("python")
+    archive = tmp_path / "cpython-3.12.0-install_only.tar.gz"
+    with tarfile.open(archive, "w:gz") as tar:
+        tar.add(contents / "python", "python")
+
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(pbs, "download_python_build_standalone", lambda _version, _cache: archive)
+    extractions: list[Path] = []
+
+    def counting_extract_tar(src: Path, dest: Path) -> None:
+        extractions.append(src)
+        extract_tar(src, dest)
+
+    monkeypatch.setattr(pbs, "extract_tar", counting_extract_tar)
+
+    first = pbs.create_python_build_standalone_environment("3.12", tmp_path / "a", cache_dir)
+    second = pbs.create_python_build_standalone_environment("3.12", tmp_path / "b", cache_dir)
+
+    assert extractions == [archive]
+    assert first.is_relative_to(tmp_path / "a" / "pbs")
+    assert second.is_relative_to(tmp_path / "b" / "pbs")
+    cached = cache_dir / pbs.EXTRACTED_DIR_NAME / "cpython-3.12.0-install_only"
+    # the environments share the cached files
+    assert first.stat().st_ino == (cached / first.relative_to(tmp_path / "a" / "pbs")).stat().st_ino
+    assert second.stat().st_ino == first.stat().st_ino
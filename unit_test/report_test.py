@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import hashlib
+
+import pytest
+
+from cibuildwheel.logger import Logger
+from cibuildwheel.report import (
+    BuildReport,
+    RunReport,
+    StepReport,
+    WheelReport,
+    compare_reports,
+    container_timer,
+    get_recorder,
+    use_report_file,
+)
+from cibuildwheel.util.cache_index import record_cache_use
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_record_report(tmp_path: Path) -> None:
+    cache = tmp_path / "cache"
+    (cache / "wheels" / "abc").mkdir(parents=True)
+    wheel = tmp_path / "spam-0.1.0-cp312-cp312-manylinux_2_28_x86_64.whl"
+    wheel.write_bytes(b"wheel contents")
+    report_file = tmp_path / "report.json"
+
+    logger = Logger()
+    with use_report_file(report_file, platform="linux"):
+        assert get_recorder() is not None
+        with container_timer("cibuildwheel-1", image="manylinux", kind="start"):
+            pass
+        logger.build_start("cp312-manylinux_x86_64")
+        logger.step("Building wheel...")
+        record_cache_use(cache / "wheels" / "abc", hit=True, cache_path=cache)
+        record_cache_use(cache / "wheels" / "def", hit=False, cache_path=cache)
+        logger.step("Repairing wheel...")
+        with container_timer("cibuildwheel-1", image="manylinux", kind="copy_out"):
+            pass
+        logger.build_end(wheel)
+        # only builds that are running have their steps reported
+        logger.step("Removing container...")
+        logger.step_end()
+    assert get_recorder() is None
+
+    report = RunReport.from_json(report_file.read_text())
+    assert report.platform == "linux"
+    [build] = report.builds
+    assert build.identifier == "cp312-manylinux_x86_64"
+    assert [step.name for step in build.steps] == ["Building wheel...", "Repairing wheel..."]
+    assert all(step.success for step in build.steps)
+    assert build.wheel == WheelReport(
+        name=wheel.name, size=14, sha256=hashlib.sha256(b"wheel contents").hexdigest()
+    )
+    assert {name: (use.hits, use.misses) for name, use in report.cache.items()} == {
+        "wheels/abc": (1, 0),
+        "wheels/def": (0, 1),
+    }
+    assert set(report.containers) == {"cibuildwheel-1"}
+    assert report.containers["cibuildwheel-1"].image == "manylinux"
+    assert report.duration >= build.duration
+
+
+def test_no_report(tmp_path: Path) -> None:
+    logger = Logger()
+    with use_report_file(None, platform="linux"):
+        assert get_recorder() is None
+        logger.build_start("cp312-manylinux_x86_64")
+        logger.step("Building wheel...")
+        logger.build_end(None)
+    assert list(tmp_path.iterdir()) == []
+
+
+def make_report(build_duration: float, step_duration: float, wheel_size: int) -> RunReport:
+    return RunReport(
+        cibuildwheel_version="3.0",
+        platform="linux",
+        builds=[
+            BuildReport(
+                identifier="cp312-manylinux_x86_64",
+                duration=build_duration,
+                wheel=WheelReport(name="spam.whl", size=wheel_size, sha256="0" * 64),
+                steps=[
+                    StepReport(name="Building wheel...", duration=step_duration, success=True),
+                    StepReport(name="Testing wheel...", duration=0.2, success=True),
+                    StepReport(name="Testing wheel...", duration=0.2, success=True),
+                ],
+            )
+        ],
+    )
+
+
+@pytest.mark.parametrize(
+    ("new", "expected"),
+    [
+        (make_report(10.5, 5.2, 1050), []),
+        (make_report(12.0, 5.2, 1050), ["cp312-manylinux_x86_64"]),
+        (make_report(10.0, 7.0, 1000), ["cp312-manylinux_x86_64 Building wheel..."]),
+        (make_report(10.0, 5.0, 2000), ["spam.whl"]),
+    ],
+)
+def test_compare_reports(new: RunReport, expected: list[str]) -> None:
+    old = make_report(10.0, 5.0, 1000)
+    regressions = compare_reports(
+        old, new, time_threshold=0.1, size_threshold=0.1, min_duration=1.0
+    )
+    assert [r.subject for r in regressions] == expected
+
+
+def test_compare_reports_ignores_short_steps() -> None:
+    old = make_report(10.0, 5.0, 1000)
+    new = make_report(10.0, 5.0, 1000)
+    new.builds[0].steps[1].duration = 0.6
+    assert not compare_reports(old, new, time_threshold=0.1, size_threshold=0.1, min_duration=1.0)
+
+    [regression] = compare_reports(
+        old, new, time_threshold=0.1, size_threshold=0.1, min_duration=0.1
+    )
+    assert str(regression) == "cp312-manylinux_x86_64 Testing wheel...: 0.40s -> 0.80s (+100%)"
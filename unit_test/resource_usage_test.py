@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import pytest
+
+from cibuildwheel.logger import Logger
+from cibuildwheel.util.resource_usage import (
+    UsageSample,
+    UsageSampler,
+    UsageSummary,
+    parse_cgroup_files,
+    sample_usage,
+    summarize,
+    use_usage_sampling,
+)
+
+CGROUP_V2 = {
+    "cpu.stat": "usage_usec 2500000\nuser_usec 2000000\nsystem_usec 500000\n",
+    "memory.current": "104857600\n",
+    "io.stat": "8:0 rbytes=1000 wbytes=500 rios=3 wios=1\n8:16 rbytes=24 wbytes=0 rios=1 wios=0\n",
+    "pids.current": "12\n",
+}
+
+CGROUP_V1 = {
+    "cpuacct/cpuacct.usage": "2500000000\n",
+    "memory/memory.usage_in_bytes": "104857600\n",
+    "blkio/blkio.throttle.io_service_bytes": (
+        "8:0 Read 1000\n8:0 Write 500\n8:0 Total 1500\n8:16 Read 24\nTotal 1524\n"
+    ),
+    "pids/pids.current": "12\n",
+}
+
+
+@pytest.mark.parametrize("files", [CGROUP_V2, CGROUP_V1], ids=["v2", "v1"])
+def test_parse_cgroup_files(files: dict[str, str | None]) -> None:
+    assert parse_cgroup_files(files, time=1.0) == UsageSample(
+        time=1.0, cpu_seconds=2.5, memory=104857600, io_bytes=1524, pids=12
+    )
+
+
+def test_parse_cgroup_files_missing() -> None:
+    assert parse_cgroup_files({}, time=1.0) is None
+    assert parse_cgroup_files({"memory.current": "max\n", "pids.current": "3\n"}, time=1.0) == (
+        UsageSample(time=1.0, cpu_seconds=None, memory=None, io_bytes=None, pids=3)
+    )
+
+
+def sample(time: float, cpu: float, memory: int, io: int, pids: int) -> UsageSample:
+    return UsageSample(time=time, cpu_seconds=cpu, memory=memory, io_bytes=io, pids=pids)
+
+
+def test_summarize() -> None:
+    samples = [
+        sample(0.0, 10.0, 100, 1000, 2),
+        sample(1.0, 11.0, 300, 1500, 8),
+        sample(3.0, 17.0, 200, 4000, 4),
+    ]
+    assert summarize(samples) == UsageSummary(
+        cpu_average=7 / 3,
+        cpu_peak=3.0,
+        memory_average=200.0,
+        memory_peak=300,
+        io_bytes=3000,
+        pids_peak=8,
+    )
+    # rates need two samples
+    assert summarize(samples[:1]) == UsageSummary(
+        memory_average=100.0, memory_peak=100, pids_peak=2
+    )
+    assert summarize([]) is None
+
+    summary = summarize(samples)
+    assert str(summary) == (
+        "CPU 2.3 cores avg, 3.0 peak, memory 200 Bytes avg, 300 Bytes peak, "
+        "I/O 3.0 kB, 8 processes peak"
+    )
+
+
+def fake_reader(samples: list[UsageSample]) -> UsageSampler:
+    queue = iter(samples)
+    return UsageSampler(lambda: next(queue, None), interval=60)
+
+
+def test_sampler_windows() -> None:
+    sampler = fake_reader(
+        [sample(0.0, 0.0, 100, 0, 1), sample(1.0, 1.0, 200, 0, 1), sample(2.0, 3.0, 100, 0, 1)]
+    )
+    start = sampler.sample()
+    middle = sampler.sample()
+    summary = sampler.summary_since(middle)
+    assert summary is not None
+    assert summary.cpu_average == 2.0
+    assert summarize(sampler.samples[start:]) is not None
+
+    # a failing read is skipped, the container may have gone
+    def read_gone() -> UsageSample | None:
+        msg = "the container agent has exited"
+        raise RuntimeError(msg)
+
+    sampler.read = read_gone
+    assert sampler.sample() == 3
+    assert len(sampler.samples) == 3
+
+
+def test_sample_usage_off_or_unreadable() -> None:
+    with sample_usage(lambda: sample(0.0, 0.0, 0, 0, 0)) as sampler:
+        assert sampler is None
+    with use_usage_sampling(1.0), sample_usage(lambda: None) as sampler:
+        assert sampler is None
+
+
+def test_logger_reports_usage(capsys: pytest.CaptureFixture[str]) -> None:
+    readings = iter(
+        [
+            sample(0.0, 0.0, 100, 0, 1),  # when sampling starts
+            sample(0.0, 0.0, 100, 0, 1),  # build start
+            sample(0.0, 0.0, 100, 0, 1),  # step start
+            sample(2.0, 4.0, 2_000_000_000, 5_000_000, 30),  # step end
+            sample(2.0, 4.0, 2_000_000_000, 5_000_000, 30),  # build end
+        ]
+    )
+    logger = Logger()
+    with (
+        use_usage_sampling(60),
+        sample_usage(lambda: next(readings, None)) as sampler,
+        logger.sampling_usage(sampler),
+    ):
+        assert logger.usage_sampler is sampler
+        logger.build_start("cp312-manylinux_x86_64")
+        logger.step("Building wheel...")
+        logger.build_end(None)
+    assert logger.usage_sampler is None
+
+    out = capsys.readouterr().out
+    assert "CPU 2.0 cores avg, 2.0 peak" in out
+    assert "30 processes peak" in out
+    [build_info] = logger.summary
+    assert build_info.usage is not None
+    assert build_info.usage.memory_peak == 2_000_000_000
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import pytest
+
+from cibuildwheel.architecture import Architecture
+from cibuildwheel.sharding import (
+    EMULATION_COST,
+    FREE_THREADED_COST,
+    PYPY_COST,
+    Shard,
+    build_matrix,
+    estimate_costs,
+    plan_shards,
+    shard,
+    static_cost,
+)
+
+
+def test_parse_shard() -> None:
+    assert shard("1/4") == (1, 4)
+    assert shard("4/4") == (4, 4)
+    for value in ("0/4", "5/4", "1", "a/b", "1/0"):
+        with pytest.raises(ValueError, match=r"INDEX/COUNT|shard index|invalid literal"):
+            shard(value)
+
+
+def test_static_cost() -> None:
+    native = {Architecture.x86_64, Architecture.i686}
+    assert static_cost("cp312-manylinux_x86_64", native_archs=native) == 1.0
+    assert static_cost("cp312-manylinux_i686", native_archs=native) == 1.0
+    assert static_cost("cp312-manylinux_aarch64", native_archs=native) == EMULATION_COST
+    assert static_cost("pp311-manylinux_x86_64", native_archs=native) == PYPY_COST
+    assert static_cost("cp314t-musllinux_aarch64", native_archs=native) == (
+        FREE_THREADED_COST * EMULATION_COST
+    )
+    # only Linux builds are emulated
+    assert static_cost("cp312-macosx_arm64") == 1.0
+
+
+def test_estimate_costs_with_durations(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(Architecture, "native_arch", lambda _platform: Architecture.x86_64)
+    identifiers = ["cp312-manylinux_x86_64", "cp313-manylinux_x86_64", "cp312-manylinux_aarch64"]
+
+    assert estimate_costs(identifiers, platform="linux") == {
+        "cp312-manylinux_x86_64": 1.0,
+        "cp313-manylinux_x86_64": 1.0,
+        "cp312-manylinux_aarch64": EMULATION_COST,
+    }
+    # the builds without timings are scaled to match the ones with
+    assert estimate_costs(
+        identifiers, platform="linux", durations={"cp312-manylinux_x86_64": 30.0}
+    ) == {
+        "cp312-manylinux_x86_64": 30.0,
+        "cp313-manylinux_x86_64": 30.0,
+        "cp312-manylinux_aarch64": 30.0 * EMULATION_COST,
+    }
+
+
+def test_plan_shards_balances_cost() -> None:
+    groups = [["a1", "a2", "a3", "a4"], ["b1", "b2"], ["c1"], ["d1"]]
+    costs = {"a1": 1, "a2": 1, "a3": 1, "a4": 1, "b1": 3, "b2": 3, "c1": 1.5, "d1": 1}
+
+    # the groups stay together
+    shards = plan_shards(groups, costs, count=2)
+    assert shards == [
+        Shard(identifiers=["b1", "b2"], cost=6),
+        Shard(identifiers=["a1", "a2", "a3", "a4", "c1", "d1"], cost=6.5),
+    ]
+    # the same inputs always give the same plan
+    assert plan_shards(groups, costs, count=2) == shards
+
+
+def test_plan_shards_splits_big_groups() -> None:
+    groups = [[f"emulated{i}" for i in range(6)], ["native"]]
+    costs = {**{f"emulated{i}": 10.0 for i in range(6)}, "native": 1.0}
+
+    shards = plan_shards(groups, costs, count=3)
+    assert [s.identifiers for s in shards] == [
+        ["emulated0", "emulated1", "native"],
+        ["emulated2", "emulated3"],
+        ["emulated4", "emulated5"],
+    ]
+    assert sorted(i for s in shards for i in s.identifiers) == sorted(costs)
+
+
+def test_plan_shards_more_shards_than_builds() -> None:
+    shards = plan_shards([["a"], ["b"]], {"a": 1.0, "b": 1.0}, count=3)
+    assert [s.identifiers for s in shards] == [["a"], ["b"], []]
+
+    matrix = build_matrix(shards, platform="linux")
+    assert matrix == {
+        "include": [
+            {"platform": "linux", "identifiers": ["a"], "build": "a", "estimated_cost": 1.0},
+            {"platform": "linux", "identifiers": ["b"], "build": "b", "estimated_cost": 1.0},
+        ]
+    }
+
+
+def test_estimate_costs_portable(monkeypatch: pytest.MonkeyPatch) -> None:
+    identifiers = ["cp312-manylinux_x86_64", "cp312-manylinux_aarch64"]
+    expected = {"cp312-manylinux_x86_64": 1.0, "cp312-manylinux_aarch64": EMULATION_COST}
+
+    # the same on any machine
+    for native_arch in (Architecture.x86_64, Architecture.aarch64):
+        monkeypatch.setattr(Architecture, "native_arch", lambda _platform, a=native_arch: a)
+        assert estimate_costs(identifiers, platform="linux", portable=True) == expected
+
+    assert estimate_costs(identifiers, platform="linux") == {
+        "cp312-manylinux_x86_64": EMULATION_COST,
+        "cp312-manylinux_aarch64": 1.0,
+    }
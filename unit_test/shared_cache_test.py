@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import hashlib
+import http.client
+import http.server
+import socket
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from cibuildwheel.util import file, shared_cache
+from cibuildwheel.util.shared_cache import (
+    DirectoryBackend,
+    HTTPBackend,
+    SharedCache,
+    backend_from_location,
+    get_shared_cache,
+    use_shared_cache,
+)
+from cibuildwheel.util.wheel_cache import WheelCache
+
+from .conftest import make_options
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from collections.abc import Generator
+    from pathlib import Path
+
+
+class FileStoreHandler(http.server.BaseHTTPRequestHandler):
+    files: dict[str, bytes]
+    tokens: list[str | None]
+
+    def do_GET(self) -> None:
+        self.tokens.append(self.headers.get("Authorization"))
+        data = self.files.get(self.path)
+        if data is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_PUT(self) -> None:
+        self.tokens.append(self.headers.get("Authorization"))
+        self.files[self.path] = self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(201)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def file_server() -> Generator[tuple[str, type[FileStoreHandler]], None, None]:
+    handler = type("Handler", (FileStoreHandler,), {"files": {}, "tokens": []})
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}/cache", handler
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_directory_backend(tmp_path: Path) -> None:
+    backend = DirectoryBackend(tmp_path / "shared")
+    src = tmp_path / "src.txt"
+    src.write_text("hello")
+
+    assert not backend.get("a/b.txt", tmp_path / "dest.txt")
+    backend.put("a/b.txt", src)
+    assert (tmp_path / "shared" / "a" / "b.txt").read_text() == "hello"
+    assert backend.get("a/b.txt", tmp_path / "dest.txt")
+    assert (tmp_path / "dest.txt").read_text() == "hello"
+
+
+def test_http_backend(tmp_path: Path, file_server: tuple[str, type[FileStoreHandler]]) -> None:
+    url, handler = file_server
+    backend = HTTPBackend(url, token="secret")
+    src = tmp_path / "src.txt"
+    src.write_text("hello")
+
+    assert not backend.get("a/b.txt", tmp_path / "dest.txt")
+    backend.put("a/b.txt", src)
+    assert handler.files == {"/cache/a/b.txt": b"hello"}
+    assert backend.get("a/b.txt", tmp_path / "dest.txt")
+    assert (tmp_path / "dest.txt").read_text() == "hello"
+    assert handler.tokens == ["Bearer secret"] * 3
+
+    with pytest.raises(urllib.error.URLError):
+        HTTPBackend("http://127.0.0.1:1/cache").get("a/b.txt", tmp_path / "dest.txt")
+
+
+def test_backend_from_location(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("CIBW_SHARED_CACHE_TOKEN", "secret")
+
+    backend = backend_from_location("https://example.com/cache/")
+    assert isinstance(backend, HTTPBackend)
+    assert backend.base_url == "https://example.com/cache"
+    assert backend.token == "secret"
+
+    backend = backend_from_location(tmp_path.as_uri())
+    assert isinstance(backend, DirectoryBackend)
+    assert backend.root == tmp_path
+
+    backend = backend_from_location(str(tmp_path))
+    assert isinstance(backend, DirectoryBackend)
+    assert backend.root == tmp_path
+
+
+def test_http_backend_timeout(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(shared_cache, "TIMEOUT", 0.1)
+    # a server that accepts connections, but never answers
+    with socket.create_server(("127.0.0.1", 0)) as server:
+        backend = HTTPBackend(f"http://127.0.0.1:{server.getsockname()[1]}/cache")
+        with pytest.raises(TimeoutError):
+            backend.get("a/b.txt", tmp_path / "dest.txt")
+
+
+@pytest.mark.parametrize(
+    "error",
+    [OSError("unreachable"), http.client.IncompleteRead(b"", 10)],
+    ids=["OSError", "IncompleteRead"],
+)
+def test_shared_cache_failures_are_warnings(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str], error: Exception
+) -> None:
+    class FailingBackend:
+        def get(self, _key: str, _dest: Path) -> bool:
+            raise error
+
+        def put(self, _key: str, _src: Path) -> None:
+            raise error
+
+    src = tmp_path / "src.txt"
+    src.write_text("hello")
+
+    cache = SharedCache(FailingBackend(), tmp_path / "staging")
+    assert not cache.get("a.txt", tmp_path / "dest.txt")
+    cache.put_async(("a.txt", src))
+    cache.close()
+
+    err = capsys.readouterr().err
+    assert "Can't read a.txt from the shared cache" in err
+    assert "Can't save a.txt to the shared cache" in err
+    # the staged copies are cleaned up
+    assert list((tmp_path / "staging").iterdir()) == []
+
+
+def test_use_shared_cache(tmp_path: Path) -> None:
+    with use_shared_cache("", staging_dir=tmp_path / "staging"):
+        assert get_shared_cache() is None
+
+    with use_shared_cache(str(tmp_path / "shared"), staging_dir=tmp_path / "staging"):
+        shared_cache = get_shared_cache()
+        assert shared_cache is not None
+        src = tmp_path / "src.txt"
+        src.write_text("hello")
+        shared_cache.put_async(("a.txt", src))
+        src.unlink()
+
+    # uploads have finished by the end of the block
+    assert get_shared_cache() is None
+    assert (tmp_path / "shared" / "a.txt").read_text() == "hello"
+
+
+def test_wheel_cache_lookup(tmp_path: Path) -> None:
+    project = tmp_path / "project"
+    project.mkdir()
+    wheel = tmp_path / "spam-0.1.0-cp312-cp312-manylinux_2_28_x86_64.whl"
+    wheel.write_bytes(b"wheel contents")
+
+    shared = SharedCache(DirectoryBackend(tmp_path / "shared"), tmp_path / "staging")
+    WheelCache(tmp_path / "cache-a", project, shared=shared).put("abc", wheel)
+    shared.close()
+    assert sorted(p.name for p in (tmp_path / "shared" / "wheels").iterdir()) == [
+        "abc.json",
+        "abc.whl",
+    ]
+
+    # another machine, with an empty local cache, finds it
+    shared = SharedCache(DirectoryBackend(tmp_path / "shared"), tmp_path / "staging")
+    cache = WheelCache(tmp_path / "cache-b", project, shared=shared)
+    assert cache.lookup("missing").result() is None
+    cached_wheel = cache.lookup("abc").result()
+    assert cached_wheel is not None
+    assert cached_wheel.name == wheel.name
+    assert cached_wheel.read_bytes() == b"wheel contents"
+    assert cache.get("abc") == cached_wheel
+
+    # a wheel that doesn't match its entry isn't used
+    (tmp_path / "shared" / "wheels" / "abc.whl").write_bytes(b"tampered")
+    cache = WheelCache(tmp_path / "cache-c", project, shared=shared)
+    assert cache.lookup("abc").result() is None
+    assert cache.get("abc") is None
+    shared.close()
+
+
+def test_download_from_shared_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    contents = b"installer contents"
+    sha256 = hashlib.sha256(contents).hexdigest()
+    shared_dir = tmp_path / "shared" / "downloads" / "sha256" / sha256
+    shared_dir.mkdir(parents=True)
+    (shared_dir / "python.tgz").write_bytes(contents)
+
+    def fail(*args: object, **kwargs: object) -> None:
+        msg = "no network"
+        raise AssertionError(msg)
+
+    monkeypatch.setattr(urllib.request, "urlopen", fail)
+
+    with use_shared_cache(str(tmp_path / "shared"), staging_dir=tmp_path / "staging"):
+        dest = tmp_path / "downloads" / "python.tgz"
+        file.download("https://example.com/python.tgz", dest, sha256=sha256)
+    assert dest.read_bytes() == contents
+
+
+def test_shared_cache_option() -> None:
+    options = make_options("linux")
+    assert options.globals.shared_cache == ""
+
+    options = make_options("linux", {"CIBW_SHARED_CACHE": " /mnt/cache "})
+    assert options.globals.shared_cache == "/mnt/cache"
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import sqlite3
+import time
+
+from cibuildwheel.logger import Logger
+from cibuildwheel.util.timing_history import (
+    HISTORY_LENGTH,
+    TIMINGS_DB_NAME,
+    TimingDatabase,
+    TimingHistory,
+    config_key,
+    get_timing_history,
+    project_key,
+    use_timing_history,
+)
+
+from .conftest import make_options
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import pytest
+
+CP312 = "cp312-manylinux_x86_64"
+CP313 = "cp313-manylinux_x86_64"
+
+
+def test_expected_durations(tmp_path: Path) -> None:
+    database = TimingDatabase(tmp_path / TIMINGS_DB_NAME)
+    assert database.expected_duration(project="spam", config="a", identifier=CP312) is None
+
+    for i, duration in enumerate([10.0, 30.0, 20.0]):
+        database.record_build(
+            project="spam",
+            config="a",
+            identifier=CP312,
+            duration=duration,
+            steps=[
+                ("Building wheel...", duration - 5),
+                ("Testing wheel...", 1),
+                ("Testing wheel...", 2),
+            ],
+            finished=i,
+        )
+    database.record_build(project="spam", config="b", identifier=CP312, duration=100.0)
+
+    assert database.expected_duration(project="spam", config="a", identifier=CP312) == 20.0
+    assert database.expected_duration(project="spam", config="b", identifier=CP312) == 100.0
+    # a new config falls back to the builds with any config
+    assert database.expected_duration(project="spam", config="c", identifier=CP312) == 25.0
+    assert database.expected_duration(project="eggs", config="a", identifier=CP312) is None
+    assert database.expected_step_durations(project="spam", config="a", identifier=CP312) == {
+        "Building wheel...": 15.0,
+        "Testing wheel...": 3.0,
+    }
+
+
+def test_history_is_trimmed(tmp_path: Path) -> None:
+    database = TimingDatabase(tmp_path / TIMINGS_DB_NAME)
+    for i in range(HISTORY_LENGTH + 5):
+        database.record_build(
+            project="spam",
+            config="a",
+            identifier=CP312,
+            duration=float(i),
+            steps=[("Building wheel...", 1.0)],
+            finished=i,
+        )
+
+    with sqlite3.connect(database.path) as connection:
+        durations = [row[0] for row in connection.execute("SELECT duration FROM builds")]
+        [[steps]] = connection.execute("SELECT COUNT(*) FROM steps")
+    assert sorted(durations) == [float(i) for i in range(5, HISTORY_LENGTH + 5)]
+    assert steps == HISTORY_LENGTH
+
+
+def test_progress(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    database = TimingDatabase(tmp_path / TIMINGS_DB_NAME)
+    database.record_build(project="spam", config="a", identifier=CP312, duration=60.0)
+    database.record_build(project="spam", config="a", identifier=CP313, duration=180.0)
+
+    now = 1000.0
+    monkeypatch.setattr(time, "time", lambda: now)
+    history = TimingHistory(
+        database, project="spam", configs={CP312: "a", CP313: "a", "cp314-manylinux_x86_64": "a"}
+    )
+    # the new build is expected to take the average
+    assert history.expected_durations() == {
+        CP312: 60.0,
+        CP313: 180.0,
+        "cp314-manylinux_x86_64": 120.0,
+    }
+    assert history.progress() == "0/3 builds done, 0% of the expected time, about 6 minutes left"
+
+    # this run is going twice as fast as before
+    now += 30.0
+    history.record_build(CP312, duration=30.0, steps=[])
+    assert history.progress() == "1/3 builds done, 17% of the expected time, about 2 minutes left"
+    assert database.expected_duration(project="spam", config="a", identifier=CP312) == 45.0
+
+
+def test_progress_without_history(tmp_path: Path) -> None:
+    history = TimingHistory(
+        TimingDatabase(tmp_path / TIMINGS_DB_NAME), project="spam", configs={CP312: "a"}
+    )
+    assert history.expected_durations() == {}
+    history.record_build(CP312, duration=30.0, steps=[])
+    assert history.progress() == "1/1 builds done"
+
+
+def test_broken_database(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    history = TimingHistory(
+        TimingDatabase(tmp_path / "missing" / TIMINGS_DB_NAME), project="spam", configs={CP312: "a"}
+    )
+    history.record_build(CP312, duration=30.0, steps=[])
+    assert history.progress() == "1/1 builds done"
+    # warns once, then stays quiet
+    assert capsys.readouterr().out.count("Can't use the build timing history") == 1
+
+
+def test_keys(tmp_path: Path) -> None:
+    (tmp_path / "pyproject.toml").write_text(
+        '[project]\nname = "spam"\n\n[tool.cibuildwheel]\ntest-command = "pytest"\n'
+    )
+    options = make_options("linux", package_dir=tmp_path)
+    assert project_key(options) == "spam"
+    assert config_key(options, CP312) == config_key(options, CP312)
+
+    other = make_options("linux", {"CIBW_TEST_COMMAND": "true"}, package_dir=tmp_path)
+    assert config_key(other, CP312) != config_key(options, CP312)
+
+    (tmp_path / "pyproject.toml").unlink()
+    options = make_options("linux", package_dir=tmp_path)
+    assert project_key(options) == tmp_path.name
+
+
+def test_logger_records_timings(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    (tmp_path / "pyproject.toml").write_text('[project]\nname = "spam"\n')
+    options = make_options("linux", package_dir=tmp_path)
+
+    logger = Logger()
+    with use_timing_history(options, [CP312, CP313], cache_path=tmp_path) as history:
+        assert get_timing_history() is history
+        logger.build_start(CP312)
+        logger.step("Building wheel...")
+        logger.build_end(None)
+    assert get_timing_history() is None
+
+    assert "1/2 builds done" in capsys.readouterr().out
+    database = TimingDatabase(tmp_path / TIMINGS_DB_NAME)
+    key = {"project": "spam", "config": config_key(options, CP312), "identifier": CP312}
+    assert database.expected_duration(**key) is not None
+    assert set(database.expected_step_durations(**key)) == {"Building wheel..."}
+
+    with use_timing_history(options, [CP312, CP313], cache_path=tmp_path) as history:
+        assert set(history.expected_durations()) == {CP312, CP313}
+    assert "Earlier runs took" in capsys.readouterr().out
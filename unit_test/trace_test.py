@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from cibuildwheel.logger import Logger
+from cibuildwheel.util.cmd import call
+from cibuildwheel.util.trace import get_trace, trace_span, use_trace_file
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def read_spans(path: Path) -> dict[str, dict[str, object]]:
+    events = json.loads(path.read_text())["traceEvents"]
+    return {event["name"]: event for event in events if event["ph"] == "X"}
+
+
+def test_trace_spans(tmp_path: Path) -> None:
+    trace_file = tmp_path / "trace.json"
+    with use_trace_file(trace_file):
+        assert get_trace() is not None
+        with trace_span("outer", category="test", answer=42) as args:
+            args["extra"] = True
+            with pytest.raises(RuntimeError), trace_span("inner", category="test"):
+                raise RuntimeError
+
+        def work() -> None:
+            with trace_span("threaded", category="test"):
+                pass
+
+        thread = threading.Thread(target=work, name="worker")
+        thread.start()
+        thread.join()
+    assert get_trace() is None
+
+    events = json.loads(trace_file.read_text())["traceEvents"]
+    spans = read_spans(trace_file)
+    assert spans["outer"]["args"] == {"answer": 42, "extra": True}
+    assert spans["inner"]["args"] == {"error": "RuntimeError"}
+    # spans nest in time
+    outer, inner, run = spans["outer"], spans["inner"], spans["cibuildwheel"]
+    assert run["ts"] <= outer["ts"] <= inner["ts"]  # type: ignore[operator]
+    assert outer["dur"] >= inner["dur"]  # type: ignore[operator]
+    # each thread gets its own, named track
+    thread_names = {e["tid"]: e["args"]["name"] for e in events if e["ph"] == "M"}
+    assert thread_names[spans["threaded"]["tid"]] == "worker"
+    assert spans["threaded"]["tid"] != outer["tid"]
+
+
+def test_no_trace(tmp_path: Path) -> None:
+    with use_trace_file(None), trace_span("span", category="test") as args:
+        args["ignored"] = True
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_trace_commands(tmp_path: Path) -> None:
+    trace_file = tmp_path / "trace.json"
+    with use_trace_file(trace_file):
+        call(sys.executable, "-c", "print('hello')", capture_stdout=True)
+        with pytest.raises(subprocess.CalledProcessError):
+            call(sys.executable, "-c", "raise SystemExit(3)")
+
+    events = [
+        e for e in json.loads(trace_file.read_text())["traceEvents"] if e.get("cat") == "command"
+    ]
+    assert [e["args"]["exit_code"] for e in events] == [0, 3]
+    assert events[0]["args"]["output_bytes"] == len(f"hello{chr(10)}".encode())
+    assert events[0]["args"]["command"][1:] == ["-c", "print('hello')"]
+
+
+def test_trace_builds_and_steps(tmp_path: Path) -> None:
+    trace_file = tmp_path / "trace.json"
+    logger = Logger()
+    with use_trace_file(trace_file):
+        logger.build_start("cp312-manylinux_x86_64")
+        logger.step("Building wheel...")
+        logger.step("Repairing wheel...")
+        logger.step_end(success=False)
+        logger.build_end(None)
+
+    spans = read_spans(trace_file)
+    assert spans["cp312-manylinux_x86_64"]["cat"] == "build"
+    assert spans["Building wheel..."]["args"] == {
+        "identifier": "cp312-manylinux_x86_64",
+        "success": True,
+    }
+    assert spans["Repairing wheel..."]["args"]["success"] is False  # type: ignore[index]
@@ -16,6 +16,7 @@
     unwrap,
     unwrap_preserving_paragraphs,
 )
+from cibuildwheel.util.metadata_cache import MetadataCache
 from cibuildwheel.util.packaging import find_compatible_wheel, is_abi3_wheel
 
 
@@ -496,3 +497,22 @@ def test_none_any_wheel(self) -> None:
 
     def test_none_platform_wheel(self) -> None:
         assert is_abi3_wheel("foo-1.0-cp310-none-win_amd64.whl") is False
+
+
+def test_metadata_cache(tmp_path: Path) -> None:
+    cache_path = tmp_path / "cache" / "metadata.json"
+    cache = MetadataCache(cache_path)
+    assert cache.get("key") is None
+
+    cache.set("key", {"value": [1, 2]})
+    cache.set("other-key", True)
+    assert cache.get("key") == {"value": [1, 2]}
+
+    # another instance, e.g. in a later run, sees the same values
+    assert MetadataCache(cache_path).get("other-key") is True
+
+    # a damaged file is treated as empty
+    cache_path.write_text("{not json")
+    assert cache.get("key") is None
+    cache.set("key", 3)
+    assert cache.get("key") == 3
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import textwrap
+
+import pytest
+
+from cibuildwheel.platforms import pyodide
+from cibuildwheel.util.wheel_cache import WheelCache, get_wheel_cache, hash_project_files
+
+from .conftest import make_options
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from cibuildwheel.options import Options
+
+
+@pytest.fixture
+def project(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    project_dir = tmp_path / "project"
+    (project_dir / "pkg").mkdir(parents=True)
+    (project_dir / "pkg" / "__init__.py").write_text("")
+    (project_dir / "pyproject.toml").write_text(
+        textwrap.dedent(
+            """
+            [tool.cibuildwheel]
+            before-build = "echo before"
+            """
+        )
+    )
+    # outside a git repository, so that all the files are hashed
+    monkeypatch.setenv("GIT_CEILING_DIRECTORIES", str(tmp_path))
+    monkeypatch.chdir(project_dir)
+    return project_dir
+
+
+def test_hash_project_files(project: Path) -> None:
+    original = hash_project_files(project, exclude=[project / "wheelhouse"])
+
+    # the output directory and .git don't change the hash
+    (project / "wheelhouse").mkdir()
+    (project / "wheelhouse" / "old.whl").write_text("")
+    (project / ".git").mkdir()
+    (project / ".git" / "HEAD").write_text("")
+    assert hash_project_files(project, exclude=[project / "wheelhouse"]) == original
+
+    # file contents, names and executable bits do
+    (project / "pkg" / "__init__.py").write_text("x = 1")
+    changed_content = hash_project_files(project, exclude=[project / "wheelhouse"])
+    assert changed_content != original
+
+    (project / "pkg" / "__init__.py").rename(project / "pkg" / "other.py")
+    changed_name = hash_project_files(project, exclude=[project / "wheelhouse"])
+    assert changed_name not in {original, changed_content}
+
+    (project / "pkg" / "other.py").chmod(0o755)
+    assert hash_project_files(project, exclude=[project / "wheelhouse"]) != changed_name
+
+
+def test_wheel_cache_key(project: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    def key(
+        options: Options,
+        *,
+        identifier: str = "cp312-manylinux_x86_64",
+        toolchain: str = "sha256:1234",
+        constraints_path: Path | None = None,
+    ) -> str:
+        cache = WheelCache(project / "cache", project)
+        return cache.key(
+            identifier=identifier,
+            build_options=options.build_options(identifier),
+            toolchain=toolchain,
+            constraints_path=constraints_path,
+        )
+
+    original = key(make_options())
+    assert key(make_options()) == original
+
+    assert key(make_options(), identifier="cp313-manylinux_x86_64") != original
+    assert key(make_options(), toolchain="sha256:5678") != original
+    assert key(make_options("linux", {"CIBW_ENVIRONMENT": "FOO=bar"})) != original
+    assert key(make_options("linux", {"CIBW_BEFORE_BUILD": "echo other"})) != original
+
+    constraints = project.parent / "constraints.txt"
+    constraints.write_text("setuptools==70.0\n")
+    with_constraints = key(make_options(), constraints_path=constraints)
+    assert with_constraints != original
+    constraints.write_text("setuptools==71.0\n")
+    assert key(make_options(), constraints_path=constraints) != with_constraints
+
+    # the values that environment-pass passes in come from the host
+    monkeypatch.delenv("CIBW_TEST_PASSED", raising=False)
+    pass_options = make_options("linux", {"CIBW_ENVIRONMENT_PASS_LINUX": "CIBW_TEST_PASSED"})
+    passed = key(pass_options)
+    assert passed != original
+    monkeypatch.setenv("CIBW_TEST_PASSED", "1")
+    assert key(pass_options) != passed
+
+    # options that only affect testing don't change the key
+    assert key(make_options("linux", {"CIBW_TEST_COMMAND": "pytest"})) == original
+
+    (project / "pkg" / "__init__.py").write_text("x = 1")
+    assert key(make_options()) != original
+
+
+def test_wheel_cache_get_put(project: Path) -> None:
+    cache = WheelCache(project.parent / "cache", project)
+    assert cache.get("abc") is None
+
+    wheel = project.parent / "spam-0.1.0-cp312-cp312-manylinux_2_28_x86_64.whl"
+    wheel.write_bytes(b"wheel contents")
+    cache.put("abc", wheel)
+
+    cached_wheel = cache.get("abc")
+    assert cached_wheel is not None
+    assert cached_wheel.name == wheel.name
+    assert cached_wheel.read_bytes() == b"wheel contents"
+
+    # an entry isn't replaced once it's been saved
+    wheel.write_bytes(b"other contents")
+    cache.put("abc", wheel)
+    assert cached_wheel.read_bytes() == b"wheel contents"
+    assert [p.name for p in (project.parent / "cache").iterdir()] == ["abc"]
+
+
+def test_get_wheel_cache(project: Path) -> None:
+    assert get_wheel_cache(make_options()) is None
+
+    cache = get_wheel_cache(make_options("linux", {"CIBW_WHEEL_CACHE": "1"}))
+    assert cache is not None
+    assert cache.project_dir == project
+
+
+def test_pyodide_cache_hit(project: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = WheelCache(project.parent / "cache", project)
+    wheel = project.parent / "spam-0.1.0-cp313-cp313-pyodide_2025_0_wasm32.whl"
+    wheel.write_bytes(b"wheel contents")
+    cache.put("abc", wheel)
+    monkeypatch.setattr(cache, "key", lambda **_kwargs: "abc")
+
+    def no_commands(*args: object, **_kwargs: object) -> None:
+        pytest.fail(f"unexpected command {args}")
+
+    monkeypatch.setattr(pyodide, "get_wheel_cache", lambda _options: cache)
+    monkeypatch.setattr(pyodide, "setup_python", lambda **_kwargs: {"PATH": ""})
+    monkeypatch.setattr(pyodide, "get_pip_version", lambda _env: "24.0")
+    monkeypatch.setattr(pyodide, "call", no_commands)
+    monkeypatch.setattr(pyodide, "shell", no_commands)
+
+    options = make_options("pyodide", {"CIBW_BUILD": "cp313-pyodide_wasm32"})
+    (project.parent / "build").mkdir()
+    pyodide.build(options, project.parent / "build")
+
+    output_wheel = project / "wheelhouse" / wheel.name
+    assert output_wheel.read_bytes() == b"wheel contents"